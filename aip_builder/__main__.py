@@ -5,6 +5,8 @@ Cung cap cac command:
 - build: Xay dung goi AIP tu metadata.xlsx va PDF
 - test: Chay test voi du lieu mau
 - validate: Kiem tra file Excel va PDF
+- scan: Kiem tra nhanh suc khoe toan bo PDF (header/trailer), xuat bao cao
+- plan: Lap ke hoach build (dry-run): duong dan goi, dung luong, dia trong, duong dan qua dai
 """
 
 import click
@@ -13,14 +15,18 @@ import sys
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from .config import Config, get_config, set_config
 from .excel_reader import read_metadata_excel, ExcelReader
-from .pdf_probe import probe_pdf_directory, PDFProbe
+from .pdf_probe import probe_pdf_directory, PDFProbe, ProbeLevel, PROBE_LEVEL_NAMES
+from .pdf_scan import iter_scan_files, summarize_scan, write_scan_report, SCAN_OK, SCAN_ERROR
+from .planner import plan_build, summarize_plan, write_plan_report
 from .grouping import group_hoso_by_folder, FileGrouper
-from .xml_generator import XMLTemplateGenerator
+from .xml_generator import create_xml_generator
+from .xml_builder import benchmark_engines
 from .package_builder import PackageBuilder
+from .probe_cache import ProbeCache
 from .validator import CSIPValidator, IntegrityChecker
 from .batch_processor import BatchProcessor, BatchMonitor, create_batch_processor
 from .error_handling import create_enhanced_logger, ErrorCategory, RetryConfig
@@ -73,6 +79,23 @@ def prompt_for_boolean(prompt_text: str, default_value: bool) -> bool:
             click.echo("❌ Vui lòng nhập 'y' hoặc 'n'")
 
 
+def format_compression(compression: Dict[str, Dict[str, Any]], seconds_saved: float) -> str:
+    """Dong tom tat nen ZIP: ty le theo loai file va thoi gian tiet kiem uoc tinh"""
+    parts = []
+    for ext, stats in compression.items():
+        methods = '/'.join(sorted(stats['methods']))
+        parts.append(f"{ext} {stats['files']} file {methods} {stats['size_mb']:.2f}->{stats['compressed_mb']:.2f} MB "
+                     f"(ty le {stats['ratio']:.2f})")
+    return '; '.join(parts) + f"; tiet kiem ~{seconds_saved:.2f}s nen"
+
+
+def format_template_timings(timings: Dict[str, Dict[str, Any]]) -> str:
+    """Dong tom tat template: so lan render, thoi gian render va bien dich theo template"""
+    parts = [f"{name} {stats['renders']}x {stats['render_ms']:.1f} ms (bien dich {stats['compile_ms']:.1f} ms)"
+             for name, stats in timings.items()]
+    return '; '.join(parts)
+
+
 def interactive_parameter_input():
     """Thu thập tham số từ người dùng một cách tương tác"""
     click.echo("=" * 60)
@@ -229,7 +252,9 @@ def build(meta: Optional[str], pdf_root: Optional[str], out: Optional[str], keep
 @cli.command()
 @click.option('--meta', default=None, help='Duong dan file metadata.xlsx')
 @click.option('--pdf-root', default=None, help='Thu muc goc chua PDF')
-def validate(meta: Optional[str], pdf_root: Optional[str]):
+@click.option('--probe-level', type=click.Choice(PROBE_LEVEL_NAMES), default='stat',
+              help='Muc do quet PDF mau: stat (mac dinh), hash, structure, text')
+def validate(meta: Optional[str], pdf_root: Optional[str], probe_level: str):
     """Kiem tra file Excel va PDF"""
     
     config = get_config()
@@ -259,14 +284,37 @@ def validate(meta: Optional[str], pdf_root: Optional[str]):
         pdf_files = list(Path(pdf_root_path).rglob("*.pdf"))
         click.echo(f"✓ Tim thay {len(pdf_files)} file PDF")
         
+        # Kiem tra nhanh header/trailer cua tat ca file
+        if pdf_files:
+            scan_results = list(iter_scan_files(pdf_files))
+            summary = summarize_scan(scan_results)
+            mark = "✓" if summary['error'] == 0 else "✗"
+            click.echo(f"{mark} Scan PDF: {summary['ok']} ok, {summary['warning']} canh bao, {summary['error']} loi")
+            problems = sorted((r for r in scan_results if r.status != SCAN_OK), key=lambda r: str(r.path))
+            for r in problems[:10]:
+                click.echo(f"  {'✗' if r.status == SCAN_ERROR else '!'} {r.path.name}: {'; '.join(r.issues)}")
+            if len(problems) > 10:
+                click.echo(f"  ... va {len(problems) - 10} file khac (dung lenh 'scan --report' de xem day du)")
+        
         # Kiem tra mot vai file mau
         if pdf_files:
             click.echo("Kiem tra file PDF mau...")
+            level = ProbeLevel.parse(probe_level)
+            probe = PDFProbe()
             for i, pdf_file in enumerate(pdf_files[:3]):  # Chi kiem tra 3 file dau
                 try:
-                    from .pdf_probe import probe_pdf
-                    pdf_info = probe_pdf(pdf_file)
-                    click.echo(f"  ✓ {pdf_file.name}: {pdf_info.size} bytes, {pdf_info.pages} trang")
+                    pdf_info = probe.probe_file(pdf_file, level)
+                    if pdf_info.error:
+                        click.echo(f"  ✗ {pdf_file.name}: Loi - {pdf_info.error}")
+                        continue
+                    details = f"{pdf_info.size} bytes"
+                    if level >= ProbeLevel.HASH:
+                        details += f", sha256 {pdf_info.sha256[:12]}..."
+                    if level >= ProbeLevel.STRUCTURE:
+                        details += f", {pdf_info.pages} trang"
+                    if level >= ProbeLevel.TEXT:
+                        details += f", {'co' if pdf_info.has_text else 'khong co'} text"
+                    click.echo(f"  ✓ {pdf_file.name}: {details}")
                 except Exception as e:
                     click.echo(f"  ✗ {pdf_file.name}: Loi - {e}")
     else:
@@ -277,6 +325,134 @@ def validate(meta: Optional[str], pdf_root: Optional[str]):
     return 0
 
 
+@cli.command()
+@click.option('--pdf-root', default=None, help='Thu muc goc chua PDF')
+@click.option('--workers', type=int, default=None, help='So thread quet (mac dinh: Config.scan_workers)')
+@click.option('--report', default=None, help='File bao cao: .csv (moi file 1 dong) hoac .json (tong hop + file loi)')
+@click.option('--fail-on-error/--no-fail-on-error', default=True, help='Tra ma loi 1 neu co file PDF loi (mac dinh: bat)')
+def scan(pdf_root: Optional[str], workers: Optional[int], report: Optional[str], fail_on_error: bool):
+    """Kiem tra nhanh suc khoe toan bo PDF truoc khi build (header, %%EOF, trailer, ma hoa)"""
+    config = get_config()
+    root = Path(pdf_root or config.default_pdf_root)
+    if not root.exists():
+        click.echo(f"✗ Thu muc PDF khong ton tai: {root}")
+        sys.exit(1)
+    
+    click.echo(f"🔍 Scan PDF trong: {root}")
+    start = datetime.now()
+    results = []
+    for i, result in enumerate(iter_scan_files(root.rglob("*.pdf"), workers), 1):
+        results.append(result)
+        if result.status == SCAN_ERROR:
+            click.echo(f"  ✗ {result.path.relative_to(root)}: {'; '.join(result.issues)}")
+        if i % 1000 == 0:
+            click.echo(f"  ... da quet {i} file")
+    elapsed = (datetime.now() - start).total_seconds()
+    results.sort(key=lambda r: str(r.path))
+    
+    summary = summarize_scan(results)
+    click.echo("\n📊 KET QUA SCAN:")
+    click.echo(f"   • Tong file: {summary['total_files']} ({summary['total_size_mb']:.2f} MB)")
+    click.echo(f"   • OK: {summary['ok']}")
+    click.echo(f"   • Canh bao: {summary['warning']}")
+    click.echo(f"   • Loi: {summary['error']}")
+    click.echo(f"   • Ma hoa: {summary['encrypted']}")
+    click.echo(f"   • Phien ban: {', '.join(f'{v}: {n}' for v, n in summary['versions'].items())}")
+    click.echo(f"   • Thoi gian: {elapsed:.2f} giay")
+    
+    if report:
+        report_path = write_scan_report(results, report, root=root)
+        click.echo(f"   • Bao cao: {report_path}")
+    
+    if fail_on_error and summary['error'] > 0:
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--meta', default=None, help='Duong dan file metadata.xlsx')
+@click.option('--pdf-root', default=None, help='Thu muc goc chua PDF')
+@click.option('--output', default=None, help='Thu muc output du kien (khong tao)')
+@click.option('--limit', type=int, help='Gioi han so luong ho so')
+@click.option('--ma-phong', default=None, help='Ma phong (anh huong ten goi AIP theo OBJID)')
+@click.option('--cleanup/--no-cleanup', default=False, help='Ke hoach cho che do khong giu folder AIP (mac dinh: giu folder)')
+@click.option('--payload-mode', type=click.Choice(['copy', 'hardlink', 'symlink', 'reflink']), default=None,
+              help='Cach dua PDF vao goi (anh huong dung luong dia can)')
+@click.option('--container', type=click.Choice(['zip', 'tar', 'tar.zst']), default=None,
+              help='Dinh dang dong goi (mac dinh: zip)')
+@click.option('--report', default=None, help='File bao cao: .csv (moi ho so 1 dong) hoac .json (tong hop + ho so co van de)')
+@click.option('--fail-on-error/--no-fail-on-error', default=True,
+              help='Tra ma loi 1 neu thieu file, duong dan qua dai hoac khong du dung luong (mac dinh: bat)')
+def plan(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], limit: Optional[int], ma_phong: Optional[str], cleanup: bool, payload_mode: Optional[str], container: Optional[str], report: Optional[str], fail_on_error: bool):
+    """Lap ke hoach build (dry-run): duong dan goi, so file, dung luong, dia trong - khong ghi gi"""
+    config = get_config()
+    if payload_mode:
+        config.payload_mode = payload_mode
+    if container:
+        config.container_format = container
+    meta_path = Path(meta or config.default_meta_path)
+    pdf_root_path = Path(pdf_root or config.default_pdf_root)
+    output_dir = Path(output or config.output_dir_with_timestamp)
+    
+    if not meta_path.exists():
+        click.echo(f"❌ File metadata khong ton tai: {meta_path}")
+        sys.exit(1)
+    if not pdf_root_path.exists():
+        click.echo(f"❌ Thu muc PDF khong ton tai: {pdf_root_path}")
+        sys.exit(1)
+    
+    click.echo(f"🗺️  Lap ke hoach build cho: {meta_path}")
+    start = datetime.now()
+    try:
+        excel_reader = ExcelReader(config)
+        hoso_df, tailieu_df = excel_reader.read_excel(str(meta_path))
+        hoso_list = excel_reader.convert_to_models(hoso_df, tailieu_df)
+        if limit and limit > 0:
+            hoso_list = hoso_list[:limit]
+        ma_phong_final = ma_phong or config.default_ma_phong
+        if ma_phong_final:
+            for hoso in hoso_list:
+                hoso.ma_phong = ma_phong_final
+                hoso.objid = hoso.generate_objid_with_ma_phong()
+        read_seconds = (datetime.now() - start).total_seconds()
+        
+        build_plan = plan_build(hoso_list, pdf_root_path, output_dir, config, cleanup_folders=cleanup)
+    except Exception as e:
+        click.echo(f"❌ Loi: {e}")
+        sys.exit(1)
+    elapsed = (datetime.now() - start).total_seconds()
+    
+    for item in build_plan.items:
+        for missing in item.missing_files:
+            click.echo(f"  ✗ {item.hoso_id}: thieu file {missing}")
+        if item.long_paths:
+            click.echo(f"  ✗ {item.hoso_id}: {len(item.long_paths)} duong dan >= {build_plan.path_limit} ky tu "
+                       f"(dai nhat {item.max_path_length})")
+    
+    summary = summarize_plan(build_plan)
+    click.echo("\n📊 KE HOACH BUILD:")
+    click.echo(f"   • Output: {build_plan.output_dir}")
+    click.echo(f"   • Tong ho so: {summary['total_hoso']}")
+    click.echo(f"   • Tong file: {summary['total_files']}")
+    click.echo(f"   • Payload: {summary['payload_mb']:.2f} MB")
+    click.echo(f"   • File dong goi ({summary['container']}): ~{summary['estimated_archive_mb']:.2f} MB")
+    click.echo(f"   • Dia can ({'cleanup' if cleanup else 'giu folder'}, payload {summary['payload_mode']}): "
+               f"~{summary['estimated_disk_mb']:.2f} MB")
+    if summary['free_disk_mb'] is not None:
+        click.echo(f"   • Dia trong: {summary['free_disk_mb']:.2f} MB "
+                   f"({'du' if summary['fits_on_disk'] else 'KHONG DU'})")
+    click.echo(f"   • Thieu file: {summary['missing_files']}")
+    click.echo(f"   • Duong dan qua dai: {summary['path_overflows']} ho so (dai nhat {summary['max_path_length']})")
+    click.echo(f"   • Thoi gian: {elapsed:.2f} giay (doc Excel {read_seconds:.2f} giay)")
+    
+    if report:
+        report_path = write_plan_report(build_plan, report)
+        click.echo(f"   • Bao cao: {report_path}")
+    
+    has_problems = summary['missing_files'] or summary['path_overflows'] or summary['fits_on_disk'] is False
+    if fail_on_error and has_problems:
+        sys.exit(1)
+
+
 @cli.command()
 def version():
     """Hien thi phien ban"""
@@ -287,12 +463,16 @@ def version():
 @cli.command()
 @click.option('--meta', default='data/input/metadata.xlsx', help='Duong dan file metadata.xlsx')
 @click.option('--output', default='temp_xml', help='Thu muc xuat XML test')
-def test_xml(meta: str, output: str):
+@click.option('--xml-engine', type=click.Choice(['jinja', 'lxml']), default=None,
+              help='Engine sinh XML (mac dinh: theo cau hinh)')
+def test_xml(meta: str, output: str, xml_engine: Optional[str]):
     """Test sinh XML templates"""
     click.echo("AIP Builder - Test XML Generation")
     
     try:
         config = get_config()
+        if xml_engine:
+            config.xml_engine = xml_engine
         
         # Doc du lieu Excel
         excel_reader = ExcelReader(config)
@@ -307,8 +487,8 @@ def test_xml(meta: str, output: str):
         hoso = hoso_list[0]
         click.echo(f"✓ Test ho so: {hoso.arc_file_code}")
         
-        # Tao XML generator
-        xml_gen = XMLTemplateGenerator(config)
+        # Tao XML generator (engine theo config)
+        xml_gen = create_xml_generator(config)
         package_id = f"AIP_{hoso.arc_file_code}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         # Tao thu muc output
@@ -340,15 +520,86 @@ def test_xml(meta: str, output: str):
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--meta', default='data/input/metadata.xlsx', help='Duong dan file metadata.xlsx')
+@click.option('--limit', type=int, help='Gioi han so luong ho so')
+@click.option('--rounds', type=click.IntRange(1), default=3, help='So lan chay moi engine (lay lan nhanh nhat)')
+def bench_xml(meta: str, limit: Optional[int], rounds: int):
+    """So sanh thoi gian sinh XML cua engine jinja va lxml (kiem tra noi dung tuong duong)"""
+    click.echo("AIP Builder - Benchmark XML engine")
+    
+    try:
+        config = get_config()
+        excel_reader = ExcelReader(config)
+        hoso_df, tailieu_df = excel_reader.read_excel(meta)
+        hoso_list = excel_reader.convert_to_models(hoso_df, tailieu_df)
+        if limit:
+            hoso_list = hoso_list[:limit]
+        if not hoso_list:
+            click.echo("❌ Khong tim thay ho so nao")
+            return
+        for hoso in hoso_list:
+            hoso.generate_identifiers()
+        
+        # Tat log INFO cua tung lan sinh XML trong luc do
+        logging.disable(logging.INFO)
+        try:
+            report = benchmark_engines(hoso_list, config, rounds=rounds)
+        finally:
+            logging.disable(logging.NOTSET)
+        
+        click.echo(f"✓ {report['hoso']} ho so, {report['documents']} tai lieu, {rounds} lan/engine")
+        click.echo(f"   • Bien dich render context: {report['context_ms_per_document']:.4f} ms/tai lieu")
+        for engine, stats in report['engines'].items():
+            click.echo(f"   • {engine}: {stats['seconds']:.3f}s ({stats['ms_per_hoso']:.2f} ms/ho so, "
+                       f"{stats['ms_per_document']:.3f} ms/tai lieu, {stats['mb']:.2f} MB)")
+            for name, ms in stats['templates'].items():
+                click.echo(f"       - {name}: {ms:.4f} ms/tai lieu")
+        if report['speedup']:
+            click.echo(f"   • Toc do lxml so voi jinja: x{report['speedup']:.2f}")
+        if report['mismatches']:
+            click.echo(f"❌ {len(report['mismatches'])} XML khac noi dung giua 2 engine: "
+                       f"{', '.join(report['mismatches'][:10])}")
+            sys.exit(1)
+        click.echo("✓ Noi dung XML 2 engine tuong duong")
+        
+    except Exception as e:
+        click.echo(f"❌ Loi: {e}")
+        sys.exit(1)
+
+
 @cli.command()
 @click.option('--meta', default=None, help='Duong dan file metadata.xlsx')
 @click.option('--pdf-root', default=None, help='Thu muc goc chua PDF')
 @click.option('--output', default=None, help='Thu muc xuat AIP packages (mac dinh: data/output_[timestamp])')
 @click.option('--limit', type=int, help='Gioi han so luong ho so (cho test)')
-@click.option('--cleanup/--no-cleanup', default=None, help='Xoa folder AIP sau khi tao ZIP (mac dinh: giu folder)')
+@click.option('--cleanup/--no-cleanup', default=None, help='Khong giu folder AIP: ghi thang vao ZIP (mac dinh: giu folder)')
 @click.option('--interactive/--no-interactive', default=None, help='Che do nhap tham so tuong tac (mac dinh: auto-detect)')
 @click.option('--ma-phong', default=None, help='Ma phong cho metsHdr/agent/note voi csip:NOTETYPE="IDENTIFICATIONCODE" (khac voi ten phong trong Excel)')
-def build(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], limit: Optional[int], cleanup: Optional[bool], interactive: Optional[bool], ma_phong: Optional[str]):
+@click.option('--probe-cache/--no-probe-cache', default=None, help='Dung cache ket qua quet PDF giua cac lan chay (mac dinh: bat)')
+@click.option('--probe-level', type=click.Choice(['hash', 'structure', 'text']), default=None,
+              help='Muc do quet PDF: hash, structure (doc so trang neu Excel thieu - mac dinh), text')
+@click.option('--fixity', default=None, help='Fixity bo sung ngoai SHA-256, cach nhau dau phay (vd: MD5,SHA-512)')
+@click.option('--dedup/--no-dedup', default=None, help='Lien ket (hardlink/reflink) PDF trung noi dung thay vi sao chep (mac dinh: tat)')
+@click.option('--payload-mode', type=click.Choice(['copy', 'hardlink', 'symlink', 'reflink']), default=None,
+              help='Cach dat PDF vao rep1/data: copy (mac dinh), hardlink, symlink, reflink (lien ket toi PDF nguon)')
+@click.option('--zip-compression', type=click.Choice(['deflate', 'lzma']), default=None,
+              help='Phuong thuc nen XML/XSD trong ZIP (PDF luon STORED), mac dinh: deflate')
+@click.option('--zip-level', type=click.IntRange(0, 9), default=None, help='Muc nen DEFLATE (mac dinh: 6)')
+@click.option('--zip-adaptive/--no-zip-adaptive', default=None,
+              help='Nen thu block dau file khong phai PDF/anh/XML..., ty le kem thi STORED (mac dinh: tat)')
+@click.option('--zip-workers', type=click.IntRange(0), default=None,
+              help='So thread nen member ZIP song song trong 1 goi (0 = so CPU)')
+@click.option('--pool-workers', type=click.IntRange(0), default=None,
+              help='So luot thread dung chung ca lan chay: goi build + EAD_doc song song (0 = so CPU, 1 = tuan tu)')
+@click.option('--container', type=click.Choice(['zip', 'tar', 'tar.zst']), default=None,
+              help='Dinh dang file dong goi: zip (mac dinh), tar, tar.zst (can zstandard hoac lenh zstd)')
+@click.option('--template-cache', default=None, help='Thu muc bytecode cache template (lan chay sau khong bien dich lai)')
+@click.option('--stream-render/--no-stream-render', default=None,
+              help='Render metadata XML dang stream, ghi thang vao file/ZIP (ho so rat lon; mac dinh: tat)')
+@click.option('--xml-engine', type=click.Choice(['jinja', 'lxml']), default=None,
+              help='Engine sinh metadata XML: jinja (template, mac dinh) hoac lxml (dung cay bang lxml)')
+def build(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], limit: Optional[int], cleanup: Optional[bool], interactive: Optional[bool], ma_phong: Optional[str], probe_cache: Optional[bool], probe_level: Optional[str], fixity: Optional[str], dedup: Optional[bool], payload_mode: Optional[str], zip_compression: Optional[str], zip_level: Optional[int], zip_adaptive: Optional[bool], zip_workers: Optional[int], pool_workers: Optional[int], container: Optional[str], template_cache: Optional[str], stream_render: Optional[bool], xml_engine: Optional[str]):
     """Xay dung cac goi AIP tu metadata Excel va PDF files"""
     
     config = get_config()
@@ -380,6 +631,32 @@ def build(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], l
     
     try:
         config = get_config()
+        if probe_level:
+            config.probe_level = probe_level
+        if fixity:
+            config.extra_fixity_algorithms = [a.strip() for a in fixity.split(',') if a.strip()]
+        if dedup is not None:
+            config.payload_dedup = dedup
+        if payload_mode:
+            config.payload_mode = payload_mode
+        if zip_compression:
+            config.zip_compression = zip_compression
+        if zip_level is not None:
+            config.zip_compression_level = zip_level
+        if zip_adaptive is not None:
+            config.zip_adaptive = zip_adaptive
+        if zip_workers is not None:
+            config.zip_workers = zip_workers
+        if pool_workers is not None:
+            config.pool_workers = pool_workers
+        if container:
+            config.container_format = container
+        if template_cache:
+            config.template_cache_dir = template_cache
+        if stream_render is not None:
+            config.stream_render = stream_render
+        if xml_engine:
+            config.xml_engine = xml_engine
         
         # Tao output directory voi timestamp neu khong duoc chi dinh
         if output is None:
@@ -403,7 +680,8 @@ def build(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], l
         # Tao thu muc output
         output_dir.mkdir(parents=True, exist_ok=True)
         click.echo(f"✓ Thu muc output: {output_dir.absolute()}")
-        click.echo(f"🧹 Cleanup mode: {'BAT (xoa folder sau khi tao ZIP)' if cleanup else 'TAT (giu lai folder)'}")
+        click.echo(f"🧹 Cleanup mode: {'BAT (ghi thang vao ZIP, khong giu folder)' if cleanup else 'TAT (giu lai folder)'}")
+        click.echo(f"📦 Dinh dang dong goi: {config.container_format}")
         
         # Doc du lieu Excel
         click.echo("📖 Doc metadata Excel...")
@@ -435,8 +713,21 @@ def build(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], l
         
         # Xay dung packages
         click.echo("🏗️  Bat dau xay dung packages...")
-        builder = PackageBuilder(config, cleanup_folders=cleanup)
-        summary = builder.build_multiple_packages(hoso_list, pdf_root_path, output_dir)
+        use_probe_cache = probe_cache if probe_cache is not None else config.probe_cache_enabled
+        cache = None
+        if use_probe_cache:
+            cache = ProbeCache.for_output_dir(
+                output_dir,
+                max_entries=config.probe_cache_max_entries,
+                filename=config.probe_cache_filename
+            )
+        
+        builder = PackageBuilder(config, cleanup_folders=cleanup, probe_cache=cache)
+        try:
+            summary = builder.build_multiple_packages(hoso_list, pdf_root_path, output_dir)
+        finally:
+            if cache:
+                cache.close()
         
         # Hien thi ket qua
         click.echo("\\n📊 KET QUA XAY DUNG:")
@@ -446,6 +737,18 @@ def build(meta: Optional[str], pdf_root: Optional[str], output: Optional[str], l
         click.echo(f"   • Tong file: {summary.total_files}")
         click.echo(f"   • Kich thuoc: {summary.total_size_mb:.2f} MB")
         click.echo(f"   • Thoi gian: {summary.build_time_seconds:.2f} giay")
+        if use_probe_cache:
+            click.echo(f"   • Probe cache: {summary.probe_cache_hits} hit / {summary.probe_cache_misses} miss")
+        click.echo(f"   • Hash: {summary.hashed_mb:.2f} MB ({summary.hash_mb_per_second:.1f} MB/s)")
+        if summary.copy_methods:
+            click.echo(f"   • Sao chep: {', '.join(f'{m}: {n}' for m, n in sorted(summary.copy_methods.items()))}")
+        if config.payload_dedup:
+            click.echo(f"   • Dedup: {summary.dedup_files} file trung, tiet kiem {summary.dedup_saved_mb:.2f} MB, "
+                       f"{summary.zip_members_reused} member ZIP dung lai")
+        if summary.compression:
+            click.echo(f"   • Nen ZIP: {format_compression(summary.compression, summary.compression_seconds_saved)}")
+        if summary.template_timings:
+            click.echo(f"   • Template: {format_template_timings(summary.template_timings)}")
         
         if summary.errors:
             click.echo("\\n❌ LOI:")
@@ -578,7 +881,34 @@ def validate_packages(package_dir: Optional[str], packages_root: str, check_chec
               help='Bo qua validation sau khi build')
 @click.option('--stop-on-error', is_flag=True, default=False,
               help='Dung khi gap loi (mac dinh: tiep tuc)')
-def batch_build(output, pdf_root, excel, max_workers, chunk_size, no_validate, stop_on_error):
+@click.option('--probe-cache/--no-probe-cache', default=True,
+              help='Dung cache ket qua quet PDF giua cac lan chay (mac dinh: bat)')
+@click.option('--probe-level', type=click.Choice(['hash', 'structure', 'text']), default=None,
+              help='Muc do quet PDF: hash, structure (doc so trang neu Excel thieu - mac dinh), text')
+@click.option('--fixity', default=None,
+              help='Fixity bo sung ngoai SHA-256, cach nhau dau phay (vd: MD5,SHA-512)')
+@click.option('--dedup/--no-dedup', default=None,
+              help='Lien ket (hardlink/reflink) PDF trung noi dung thay vi sao chep (mac dinh: tat)')
+@click.option('--payload-mode', type=click.Choice(['copy', 'hardlink', 'symlink', 'reflink']), default=None,
+              help='Cach dat PDF vao rep1/data: copy (mac dinh), hardlink, symlink, reflink (lien ket toi PDF nguon)')
+@click.option('--zip-compression', type=click.Choice(['deflate', 'lzma']), default=None,
+              help='Phuong thuc nen XML/XSD trong ZIP (PDF luon STORED), mac dinh: deflate')
+@click.option('--zip-level', type=click.IntRange(0, 9), default=None, help='Muc nen DEFLATE (mac dinh: 6)')
+@click.option('--zip-adaptive/--no-zip-adaptive', default=None,
+              help='Nen thu block dau file khong phai PDF/anh/XML..., ty le kem thi STORED (mac dinh: tat)')
+@click.option('--zip-workers', type=click.IntRange(0), default=None,
+              help='So thread nen member ZIP song song trong 1 goi (0 = so CPU)')
+@click.option('--pool-workers', type=click.IntRange(0), default=None,
+              help='So luot thread dung chung ca lan chay: goi build + EAD_doc song song (0 = so CPU, 1 = tuan tu)')
+@click.option('--container', type=click.Choice(['zip', 'tar', 'tar.zst']), default=None,
+              help='Dinh dang file dong goi: zip (mac dinh), tar, tar.zst (can zstandard hoac lenh zstd)')
+@click.option('--template-cache', default=None,
+              help='Thu muc bytecode cache template (lan chay sau khong bien dich lai)')
+@click.option('--stream-render/--no-stream-render', default=None,
+              help='Render metadata XML dang stream, ghi thang vao file/ZIP (ho so rat lon; mac dinh: tat)')
+@click.option('--xml-engine', type=click.Choice(['jinja', 'lxml']), default=None,
+              help='Engine sinh metadata XML: jinja (template, mac dinh) hoac lxml (dung cay bang lxml)')
+def batch_build(output, pdf_root, excel, max_workers, chunk_size, no_validate, stop_on_error, probe_cache, probe_level, fixity, dedup, payload_mode, zip_compression, zip_level, zip_adaptive, zip_workers, pool_workers, container, template_cache, stream_render, xml_engine):
     """Xay dung dong loat nhieu AIP package voi parallel processing"""
     
     click.secho("🚀 AIP Builder - Batch Processing", fg='green', bold=True)
@@ -614,7 +944,21 @@ def batch_build(output, pdf_root, excel, max_workers, chunk_size, no_validate, s
         processor = create_batch_processor(
             max_workers=max_workers,
             validate=not no_validate,
-            chunk_size=chunk_size
+            chunk_size=chunk_size,
+            use_probe_cache=probe_cache,
+            probe_level=probe_level,
+            extra_fixity_algorithms=[a.strip() for a in fixity.split(',') if a.strip()] if fixity else None,
+            payload_dedup=dedup,
+            payload_mode=payload_mode,
+            zip_compression=zip_compression,
+            zip_compression_level=zip_level,
+            zip_adaptive=zip_adaptive,
+            zip_workers=zip_workers,
+            container_format=container,
+            template_cache_dir=template_cache,
+            stream_render=stream_render,
+            xml_engine=xml_engine,
+            pool_workers=pool_workers
         )
         processor.config.continue_on_error = not stop_on_error
         
@@ -644,6 +988,18 @@ def batch_build(output, pdf_root, excel, max_workers, chunk_size, no_validate, s
         
         click.echo(f"   • Tong kich thuoc: {result.total_size_mb:.2f} MB")
         click.echo(f"   • Thoi gian: {result.total_time:.2f} giay")
+        if probe_cache:
+            click.echo(f"   • Probe cache: {result.probe_cache_hits} hit / {result.probe_cache_misses} miss")
+        click.echo(f"   • Hash: {result.hashed_mb:.2f} MB ({result.hash_mb_per_second:.1f} MB/s/thread)")
+        if result.copy_methods:
+            click.echo(f"   • Sao chep: {', '.join(f'{m}: {n}' for m, n in sorted(result.copy_methods.items()))}")
+        if result.dedup_files or result.zip_members_reused:
+            click.echo(f"   • Dedup: {result.dedup_files} file trung, tiet kiem {result.dedup_saved_mb:.2f} MB, "
+                       f"{result.zip_members_reused} member ZIP dung lai")
+        if result.compression:
+            click.echo(f"   • Nen ZIP: {format_compression(result.compression, result.compression_seconds_saved)}")
+        if result.template_timings:
+            click.echo(f"   • Template: {format_template_timings(result.template_timings)}")
         
         if result.total_packages > 0:
             success_rate = (result.successful_packages / result.total_packages) * 100
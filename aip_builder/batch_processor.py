@@ -15,6 +15,15 @@ from queue import Queue
 
 from .models import HoSo
 from .package_builder import PackageBuilder
+from .probe_cache import ProbeCache
+from .dedup import ContentIndex
+from .manifest import PackageManifest
+from .template_cache import get_template_cache
+from .xml_builder import get_build_timings
+from .xml_generator import XML_ENGINE_LXML
+from .utils.hashing import hash_stats
+from .utils.work_pool import get_work_pool
+from .utils.zip_compression import CompressionStats, summarize_compression
 from .validator import CSIPValidator, ValidationResult
 
 logger = logging.getLogger(__name__)
@@ -29,6 +38,21 @@ class BatchConfig:
     output_parallel: bool = False  # Cho phep ghi file parallel
     memory_limit_mb: int = 1024  # Gioi han memory (MB)
     timeout_per_package: int = 300  # Timeout cho 1 package (seconds)
+    use_probe_cache: bool = True  # Dung probe cache SQLite chung cho ca batch
+    probe_cache_path: Optional[Path] = None  # None = dat canh thu muc output
+    probe_level: Optional[str] = None  # None = theo Config.probe_level
+    extra_fixity_algorithms: Optional[List[str]] = None  # None = theo Config.extra_fixity_algorithms
+    payload_dedup: Optional[bool] = None  # None = theo Config.payload_dedup
+    payload_mode: Optional[str] = None  # None = theo Config.payload_mode (copy/hardlink/symlink/reflink)
+    zip_compression: Optional[str] = None  # None = theo Config.zip_compression (deflate/lzma)
+    zip_compression_level: Optional[int] = None
+    zip_adaptive: Optional[bool] = None
+    zip_workers: Optional[int] = None  # None = chia deu so CPU cho cac worker build
+    container_format: Optional[str] = None  # None = theo Config.container_format (zip/tar/tar.zst)
+    template_cache_dir: Optional[str] = None  # None = theo Config.template_cache_dir (bytecode cache template)
+    stream_render: Optional[bool] = None  # None = theo Config.stream_render (render metadata dang stream)
+    xml_engine: Optional[str] = None  # None = theo Config.xml_engine (jinja/lxml)
+    pool_workers: Optional[int] = None  # None = theo Config.pool_workers (luot thread dung chung, 0 = so CPU)
 
 @dataclass
 class BatchResult:
@@ -40,6 +64,17 @@ class BatchResult:
     validation_failed: int = 0
     total_time: float = 0.0
     total_size_mb: float = 0.0
+    probe_cache_hits: int = 0
+    probe_cache_misses: int = 0
+    hashed_mb: float = 0.0
+    hash_mb_per_second: float = 0.0
+    dedup_files: int = 0
+    dedup_saved_mb: float = 0.0
+    zip_members_reused: int = 0
+    copy_methods: Dict[str, int] = None  # So file theo phuong thuc sao chep
+    compression: Dict[str, Dict[str, Any]] = None  # Thong ke nen ZIP theo loai file
+    compression_seconds_saved: float = 0.0
+    template_timings: Dict[str, Dict[str, Any]] = None  # Thoi gian bien dich/render theo template
     errors: List[str] = None
     package_results: List[Dict[str, Any]] = None
     
@@ -48,6 +83,12 @@ class BatchResult:
             self.errors = []
         if self.package_results is None:
             self.package_results = []
+        if self.copy_methods is None:
+            self.copy_methods = {}
+        if self.compression is None:
+            self.compression = {}
+        if self.template_timings is None:
+            self.template_timings = {}
 
 class BatchProgressCallback:
     """Callback cho progress reporting"""
@@ -80,6 +121,10 @@ class BatchProcessor:
         
         self.progress_callback = BatchProgressCallback()
         self._stop_event = threading.Event()
+        self._probe_cache: Optional[ProbeCache] = None
+        self._content_index: Optional[ContentIndex] = None
+        self._compression_stats = CompressionStats()
+        self._work_pool = None  # Lay khi bat dau build (so luot theo BatchConfig/Config)
         
         logger.info(f"Khoi tao BatchProcessor voi {self.config.max_workers} workers")
     
@@ -100,9 +145,33 @@ class BatchProcessor:
         
         start_time = time.time()
         result = BatchResult(total_packages=len(ho_so_list))
+        hash_start = hash_stats.snapshot()
+        self._compression_stats = CompressionStats()
         
         logger.info(f"Bat dau xay dung {len(ho_so_list)} packages voi {self.config.max_workers} workers")
         
+        # Mot probe cache dung chung cho tat ca chunk/thread
+        if self.config.use_probe_cache:
+            self._probe_cache = self._open_probe_cache(output_dir)
+        
+        # Chi muc noi dung dung chung: payload trung giua cac ho so/chunk chi ghi 1 lan
+        from .config import get_config
+        app_config = get_config()
+        use_dedup = self.config.payload_dedup if self.config.payload_dedup is not None else app_config.payload_dedup
+        if use_dedup:
+            self._content_index = ContentIndex(link_mode=app_config.dedup_link_mode)
+        
+        # Bien dich template 1 lan truoc khi chia chunk (dung chung cho moi chunk/thread)
+        templates = get_template_cache(self.config.template_cache_dir or app_config.template_cache_dir)
+        xml_engine = self.config.xml_engine or app_config.xml_engine
+        
+        # Pool dung chung: moi worker giu 1 luot khi build 1 goi, EAD_doc trong goi dung luot con trong
+        pool_workers = self.config.pool_workers if self.config.pool_workers is not None else app_config.pool_workers
+        self._work_pool = get_work_pool(pool_workers)
+        if self.config.max_workers > self._work_pool.workers:
+            logger.info(f"Work pool {self._work_pool.workers} luot: toi da {self._work_pool.workers} "
+                        f"goi build cung luc (max_workers={self.config.max_workers})")
+        
         # Chia thanh cac chunk nho
         chunks = self._create_chunks(ho_so_list, self.config.chunk_size)
         
@@ -166,11 +235,55 @@ class BatchProcessor:
         
         result.total_time = time.time() - start_time
         
+        hash_end = hash_stats.snapshot()
+        hash_seconds = hash_end['seconds'] - hash_start['seconds']
+        result.hashed_mb = (hash_end['bytes'] - hash_start['bytes']) / (1024 * 1024)
+        if hash_seconds > 0:
+            # Tong thoi gian cua cac thread -> toc do trung binh moi thread
+            result.hash_mb_per_second = result.hashed_mb / hash_seconds
+        
+        compression = summarize_compression(self._compression_stats.snapshot())
+        result.compression = compression['types']
+        result.compression_seconds_saved = compression['seconds_saved']
+        result.template_timings = (get_build_timings().stats() if xml_engine == XML_ENGINE_LXML
+                                   else templates.stats())
+        
+        if self._content_index:
+            dedup_stats = self._content_index.get_stats()
+            result.dedup_files = dedup_stats['duplicates']
+            result.dedup_saved_mb = dedup_stats['bytes_saved'] / (1024 * 1024)
+            result.zip_members_reused = dedup_stats['zip_members_reused']
+            self._content_index = None
+            logger.info(f"Dedup: {result.dedup_files} file trung, tiet kiem {result.dedup_saved_mb:.2f} MB")
+        
+        if self._probe_cache:
+            result.probe_cache_hits = self._probe_cache.hits
+            result.probe_cache_misses = self._probe_cache.misses
+            self._probe_cache.close()
+            self._probe_cache = None
+        
         logger.info(f"Hoan thanh batch processing trong {result.total_time:.2f}s")
         logger.info(f"Thanh cong: {result.successful_packages}/{result.total_packages}")
+        logger.info(f"Probe cache: {result.probe_cache_hits} hit, {result.probe_cache_misses} miss")
         
         return result
     
+    def _open_probe_cache(self, output_dir: Path) -> Optional[ProbeCache]:
+        """Mo probe cache cho batch, tra ve None neu khong mo duoc"""
+        from .config import get_config
+        app_config = get_config()
+        try:
+            if self.config.probe_cache_path:
+                return ProbeCache(self.config.probe_cache_path, max_entries=app_config.probe_cache_max_entries)
+            return ProbeCache.for_output_dir(
+                output_dir,
+                max_entries=app_config.probe_cache_max_entries,
+                filename=app_config.probe_cache_filename
+            )
+        except Exception as e:
+            logger.warning(f"Khong the mo probe cache, tiep tuc khong dung cache: {e}")
+            return None
+    
     def _create_chunks(self, ho_so_list: List[HoSo], chunk_size: int) -> List[List[HoSo]]:
         """Chia danh sach ho so thanh cac chunk"""
         chunks = []
@@ -191,7 +304,36 @@ class BatchProcessor:
         
         from .config import Config
         config = Config()
-        builder = PackageBuilder(config)
+        if self.config.probe_level:
+            config.probe_level = self.config.probe_level
+        if self.config.extra_fixity_algorithms is not None:
+            config.extra_fixity_algorithms = self.config.extra_fixity_algorithms
+        if self.config.payload_dedup is not None:
+            config.payload_dedup = self.config.payload_dedup
+        if self.config.payload_mode:
+            config.payload_mode = self.config.payload_mode
+        if self.config.zip_compression:
+            config.zip_compression = self.config.zip_compression
+        if self.config.zip_compression_level is not None:
+            config.zip_compression_level = self.config.zip_compression_level
+        if self.config.zip_adaptive is not None:
+            config.zip_adaptive = self.config.zip_adaptive
+        if self.config.zip_workers is not None:
+            config.zip_workers = self.config.zip_workers
+        else:
+            # Nhieu goi build song song -> moi goi chi nen bang phan CPU cua no
+            config.zip_workers = max(1, (multiprocessing.cpu_count() or 1) // self.config.max_workers)
+        if self.config.container_format:
+            config.container_format = self.config.container_format
+        if self.config.template_cache_dir:
+            config.template_cache_dir = self.config.template_cache_dir
+        if self.config.stream_render is not None:
+            config.stream_render = self.config.stream_render
+        if self.config.xml_engine:
+            config.xml_engine = self.config.xml_engine
+        if self.config.pool_workers is not None:
+            config.pool_workers = self.config.pool_workers
+        builder = PackageBuilder(config, probe_cache=self._probe_cache, content_index=self._content_index)
         chunk_result = {
             'successful': 0,
             'failed': 0,
@@ -205,8 +347,9 @@ class BatchProcessor:
                 break
                 
             try:
-                # Build package
-                package_result = builder.build_single_package_dict(ho_so, output_dir, pdf_root)
+                # Build package (giu 1 luot work pool: viec song song trong goi khong vuot so luot)
+                with self._work_pool.slot():
+                    package_result = builder.build_single_package_dict(ho_so, output_dir, pdf_root)
                 
                 if package_result['success']:
                     chunk_result['successful'] += 1
@@ -214,7 +357,8 @@ class BatchProcessor:
                     
                     # Validation neu can
                     if self.config.validate_after_build:
-                        validation_result = self._validate_package(package_result['package_path'])
+                        validation_result = self._validate_package(package_result['package_path'],
+                                                                   package_result.get('manifest'))
                         package_result['validation'] = validation_result
                 else:
                     chunk_result['failed'] += 1
@@ -230,17 +374,20 @@ class BatchProcessor:
                 if not self.config.continue_on_error:
                     break
         
+        chunk_result['copy_methods'] = dict(builder.copy_methods)
+        chunk_result['compression'] = builder.compression_policy.stats.snapshot()
         logger.info(f"Hoan thanh chunk {chunk_index}: {chunk_result['successful']} thanh cong, {chunk_result['failed']} loi")
         return chunk_result
     
-    def _validate_package(self, package_path: Path) -> ValidationResult:
-        """Validate 1 package"""
+    def _validate_package(self, package_path: Path, manifest: Optional[PackageManifest] = None) -> ValidationResult:
+        """Validate 1 package (dung manifest cua builder, khong duyet lai thu muc)"""
         try:
-            validator = CSIPValidator()
-            return validator.validate_package(package_path)
+            from .config import get_config
+            validator = CSIPValidator(get_config())
+            return validator.validate_package(package_path, manifest)
         except Exception as e:
             logger.warning(f"Loi validation package {package_path.name}: {e}")
-            result = ValidationResult(package_path.name)
+            result = ValidationResult()
             result.add_error(f"Validation error: {str(e)}")
             return result
     
@@ -251,6 +398,10 @@ class BatchProcessor:
         batch_result.total_size_mb += chunk_result['total_size_mb']
         batch_result.errors.extend(chunk_result['errors'])
         batch_result.package_results.extend(chunk_result['packages'])
+        for method, count in chunk_result.get('copy_methods', {}).items():
+            batch_result.copy_methods[method] = batch_result.copy_methods.get(method, 0) + count
+        if 'compression' in chunk_result:
+            self._compression_stats.merge(chunk_result['compression'])
         
         # Count validation results
         for pkg in chunk_result['packages']:
@@ -303,12 +454,40 @@ class BatchMonitor:
 
 def create_batch_processor(max_workers: int = None, 
                          validate: bool = True,
-                         chunk_size: int = 5) -> BatchProcessor:
+                         chunk_size: int = 5,
+                         use_probe_cache: bool = True,
+                         probe_level: Optional[str] = None,
+                         extra_fixity_algorithms: Optional[List[str]] = None,
+                         payload_dedup: Optional[bool] = None,
+                         payload_mode: Optional[str] = None,
+                         zip_compression: Optional[str] = None,
+                         zip_compression_level: Optional[int] = None,
+                         zip_adaptive: Optional[bool] = None,
+                         zip_workers: Optional[int] = None,
+                         container_format: Optional[str] = None,
+                         template_cache_dir: Optional[str] = None,
+                         stream_render: Optional[bool] = None,
+                         xml_engine: Optional[str] = None,
+                         pool_workers: Optional[int] = None) -> BatchProcessor:
     """Tao BatchProcessor voi cau hinh mac dinh"""
     config = BatchConfig(
         max_workers=max_workers,
         chunk_size=chunk_size,
         validate_after_build=validate,
-        continue_on_error=True
+        continue_on_error=True,
+        use_probe_cache=use_probe_cache,
+        probe_level=probe_level,
+        extra_fixity_algorithms=extra_fixity_algorithms,
+        payload_dedup=payload_dedup,
+        payload_mode=payload_mode,
+        zip_compression=zip_compression,
+        zip_compression_level=zip_compression_level,
+        zip_adaptive=zip_adaptive,
+        zip_workers=zip_workers,
+        container_format=container_format,
+        template_cache_dir=template_cache_dir,
+        stream_render=stream_render,
+        xml_engine=xml_engine,
+        pool_workers=pool_workers
     )
     return BatchProcessor(config)
@@ -9,11 +9,13 @@ Chua cac cau hinh ve:
 """
 
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
 import os
 from datetime import datetime
 
+from .utils.zip_compression import DEFAULT_STORE_EXTENSIONS
+
 
 @dataclass
 class Config:
@@ -60,6 +62,8 @@ class Config:
     
     # Cau hinh checksum
     checksum_algorithm: str = "SHA-256"
+    # Fixity bo sung ghi vao PREMIS (vd: ["MD5", "SHA-512"]), tinh cung 1 lan doc voi SHA-256
+    extra_fixity_algorithms: List[str] = field(default_factory=list)
     
     # Cau hinh file
     max_path_length: int = 240  # Windows path limit
@@ -67,6 +71,15 @@ class Config:
     
     # Template settings
     template_dir: str = "aip_builder/templates"
+    # Thu muc bytecode cache cua template Jinja2 (None = tat): process moi/lan chay CLI khong bien dich lai
+    template_cache_dir: Optional[str] = None
+    # Render metadata XML dang stream (Template.generate): ghi thang vao file/member ZIP va hash
+    # trong luc ghi, bo nho khong tang theo so tai lieu (dung cho ho so rat lon)
+    stream_render: bool = False
+    # Engine sinh metadata XML: "jinja" (template text) hoac "lxml" (dung cay bang lxml)
+    xml_engine: str = "jinja"
+    # Engine lxml: kiem tra cay voi XSD trong bo nho truoc khi ghi (loi -> canh bao, strict -> dung)
+    xsd_validate_trees: bool = False
     schema_dir: str = "aip_builder/schemas"
     
     # Encoding settings
@@ -83,7 +96,53 @@ class Config:
     
     # Performance
     max_workers: int = 4  # So thread dong thoi
+    # So luot thread dung chung ca lan chay (worker batch + render/ghi EAD_doc song song trong goi),
+    # 0 = so CPU, 1 = tuan tu
+    pool_workers: int = 0
     chunk_size: int = 1000  # Kich thuoc chunk khi xu ly du lieu lon
+    hash_block_size: int = 1024 * 1024  # Kich thuoc block doc khi tinh checksum/sao chep (bytes)
+    # Sao chep payload: "auto" (reflink -> copy_file_range -> sendfile -> userspace)
+    # hoac phuong thuc bat dau thu: "reflink", "copy_file_range", "sendfile", "userspace"
+    copy_backend: str = "auto"
+    # Dat payload vao rep1/data: "copy", "hardlink", "symlink" hoac "reflink" (lien ket toi PDF nguon)
+    payload_mode: str = "copy"
+    # Khi xoa folder sau khi nen (--cleanup): ghi thang vao ZIP, khong tao thu muc trung gian
+    stream_zip: bool = True
+    # Nen ZIP theo loai file: PDF/anh/... (zip_store_extensions) -> STORED,
+    # XML/XSD -> zip_compression ("deflate" hoac "lzma") voi zip_compression_level.
+    # zip_adaptive: nen thu block dau file khac 2 nhom tren, tiet kiem < zip_adaptive_min_saving thi STORED
+    zip_compression: str = "deflate"
+    zip_compression_level: int = 6
+    zip_store_extensions: List[str] = field(default_factory=lambda: list(DEFAULT_STORE_EXTENSIONS))
+    zip_adaptive: bool = False
+    zip_adaptive_min_saving: float = 0.05
+    zip_workers: int = 0  # So thread nen member ZIP song song trong 1 goi (0 = so CPU, 1 = tuan tu)
+    # Dinh dang file dong goi: "zip" (mac dinh), "tar" hoac "tar.zst" (ten file van theo OBJID)
+    container_format: str = "zip"
+    zstd_level: int = 3  # Muc nen zstd cho tar.zst
+    zstd_threads: int = 0  # So luong nen zstd (0 = so CPU)
+    
+    # PDF probe: "trailer" (doc trailer/xref + /Count, fallback PyPDF2) hoac "pypdf2"
+    pdf_probe_backend: str = "trailer"
+    # Muc do quet PDF khi dong goi: "hash", "structure" (so trang neu Excel thieu) hoac "text"
+    probe_level: str = "structure"
+    
+    # Quet PDF song song (iter_probe_files / probe_directory(parallel=True))
+    probe_hash_workers: int = 8  # So thread tinh SHA-256
+    probe_parse_workers: int = 0  # So process doc cau truc PDF (0 = so CPU)
+    probe_file_timeout: float = 120.0  # Gioi han moi file/giai doan probe va scan (giay), 0 = khong gioi han
+    scan_workers: int = 8  # So thread cho buoc scan (kiem tra header/trailer PDF)
+    
+    # Dedup payload theo SHA-256 trong 1 lan chay: file trung duoc lien ket thay vi sao chep,
+    # buoc ZIP dung lai bytes da nen. dedup_link_mode: "auto" (hardlink -> reflink), "hardlink", "reflink"
+    # Mac dinh tat: hardlink giua cac goi lam sua 1 goi thay doi ca goi khac
+    payload_dedup: bool = False
+    dedup_link_mode: str = "auto"
+    
+    # Probe cache (SQLite, dat o thu muc cha cua output)
+    probe_cache_enabled: bool = True
+    probe_cache_filename: str = ".aip_probe_cache.sqlite"
+    probe_cache_max_entries: int = 1_000_000
     
     @property
     def output_dir_with_timestamp(self) -> str:
@@ -149,6 +208,63 @@ class Config:
         if log_level := os.getenv('AIP_LOG_LEVEL'):
             config.log_level = log_level
         
+        if fixity := os.getenv('AIP_EXTRA_FIXITY'):
+            config.extra_fixity_algorithms = [a.strip() for a in fixity.split(',') if a.strip()]
+        
+        if probe_backend := os.getenv('AIP_PDF_PROBE_BACKEND'):
+            config.pdf_probe_backend = probe_backend
+        
+        if probe_level := os.getenv('AIP_PROBE_LEVEL'):
+            config.probe_level = probe_level
+        
+        if copy_backend := os.getenv('AIP_COPY_BACKEND'):
+            config.copy_backend = copy_backend
+        
+        if payload_mode := os.getenv('AIP_PAYLOAD_MODE'):
+            config.payload_mode = payload_mode
+        
+        if stream_zip := os.getenv('AIP_STREAM_ZIP'):
+            config.stream_zip = stream_zip.lower() not in ('0', 'false', 'no', 'off')
+        
+        if zip_compression := os.getenv('AIP_ZIP_COMPRESSION'):
+            config.zip_compression = zip_compression
+        
+        if zip_level := os.getenv('AIP_ZIP_LEVEL'):
+            config.zip_compression_level = int(zip_level)
+        
+        if zip_workers := os.getenv('AIP_ZIP_WORKERS'):
+            config.zip_workers = int(zip_workers)
+        
+        if pool_workers := os.getenv('AIP_POOL_WORKERS'):
+            config.pool_workers = int(pool_workers)
+        
+        if zip_adaptive := os.getenv('AIP_ZIP_ADAPTIVE'):
+            config.zip_adaptive = zip_adaptive.lower() not in ('0', 'false', 'no', 'off')
+        
+        if container := os.getenv('AIP_CONTAINER'):
+            config.container_format = container
+        
+        if zstd_level := os.getenv('AIP_ZSTD_LEVEL'):
+            config.zstd_level = int(zstd_level)
+        
+        if dedup := os.getenv('AIP_DEDUP'):
+            config.payload_dedup = dedup.lower() not in ('0', 'false', 'no', 'off')
+        
+        if probe_cache := os.getenv('AIP_PROBE_CACHE'):
+            config.probe_cache_enabled = probe_cache.lower() not in ('0', 'false', 'no', 'off')
+        
+        if template_cache_dir := os.getenv('AIP_TEMPLATE_CACHE_DIR'):
+            config.template_cache_dir = template_cache_dir
+        
+        if stream_render := os.getenv('AIP_STREAM_RENDER'):
+            config.stream_render = stream_render.lower() not in ('0', 'false', 'no', 'off')
+        
+        if xml_engine := os.getenv('AIP_XML_ENGINE'):
+            config.xml_engine = xml_engine.lower()
+        
+        if xsd_trees := os.getenv('AIP_XSD_VALIDATE_TREES'):
+            config.xsd_validate_trees = xsd_trees.lower() not in ('0', 'false', 'no', 'off')
+        
         return config
     
     def to_dict(self) -> Dict[str, Any]:
@@ -161,10 +277,32 @@ class Config:
             'agent_name': self.agent_name,
             'organization_code': self.organization_code,
             'checksum_algorithm': self.checksum_algorithm,
+            'extra_fixity_algorithms': self.extra_fixity_algorithms,
             'xml_encoding': self.xml_encoding,
             'validate_xml_against_xsd': self.validate_xml_against_xsd,
             'log_level': self.log_level,
             'max_workers': self.max_workers,
+            'pool_workers': self.pool_workers,
+            'pdf_probe_backend': self.pdf_probe_backend,
+            'probe_level': self.probe_level,
+            'copy_backend': self.copy_backend,
+            'payload_mode': self.payload_mode,
+            'stream_zip': self.stream_zip,
+            'zip_compression': self.zip_compression,
+            'zip_compression_level': self.zip_compression_level,
+            'zip_adaptive': self.zip_adaptive,
+            'zip_workers': self.zip_workers,
+            'container_format': self.container_format,
+            'zstd_level': self.zstd_level,
+            'zstd_threads': self.zstd_threads,
+            'payload_dedup': self.payload_dedup,
+            'dedup_link_mode': self.dedup_link_mode,
+            'probe_cache_enabled': self.probe_cache_enabled,
+            'probe_cache_max_entries': self.probe_cache_max_entries,
+            'template_cache_dir': self.template_cache_dir,
+            'stream_render': self.stream_render,
+            'xml_engine': self.xml_engine,
+            'xsd_validate_trees': self.xsd_validate_trees,
         }
 
 
@@ -0,0 +1,280 @@
+"""
+Containers - Dinh dang file dong goi AIP: ZIP, tar, tar.zst
+
+Chuc nang chinh:
+- Ten file dong goi giu theo ten goi AIP (OBJID), chi doi phan duoi (.zip/.tar/.tar.zst)
+- tar va tar.zst ghi dang stream (tarfile 'w|'): file doc thang tu nguon vao
+  archive, khong tao ban sao tam, khong can seek file dich
+- tar.zst nen zstd (nhieu luong) ngay trong luc ghi: dung thu vien zstandard
+  neu co, neu khong thi pipe qua lenh zstd
+- TarStreamWriter.open_member cho phep ghi member tu buffer (vua hash vua ghi);
+  thuoc tinh noi bo cua tarfile chi dung qua utils.tar_compat (ban Python chua kiem
+  tra -> dem qua file tam roi TarFile.addfile)
+- Payload dang symlink (payload mode symlink) duoc ghi noi dung that nhu ZIP
+"""
+
+import io
+import logging
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+from .utils.tar_compat import STREAM_MEMBER_SUPPORTED, begin_member, end_member, write_member_data
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Dinh dang dong goi
+CONTAINER_ZIP = "zip"
+CONTAINER_TAR = "tar"
+CONTAINER_TAR_ZST = "tar.zst"
+CONTAINER_FORMATS = (CONTAINER_ZIP, CONTAINER_TAR, CONTAINER_TAR_ZST)
+
+# Muc nen zstd mac dinh (1-22; 3 la mac dinh cua zstd)
+DEFAULT_ZSTD_LEVEL = 3
+
+# tar can kich thuoc trong header truoc du lieu: member dem qua file tam (XML stream,
+# open_member khi khong co tar_compat) giu trong bo nho toi nguong nay roi moi ghi ra dia
+TAR_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def container_path(package_dir: Path, container: str) -> Path:
+    """File dong goi cua goi AIP: <thu muc cha>/<ten goi AIP>.<duoi>"""
+    return package_dir.parent / f"{package_dir.name}.{container}"
+
+
+def check_container(container: str) -> None:
+    """
+    Kiem tra dinh dang dong goi co dung duoc khong
+
+    Raises:
+        ValueError: Dinh dang khong hop le
+        RuntimeError: tar.zst nhung khong co zstandard va lenh zstd
+    """
+    if container not in CONTAINER_FORMATS:
+        raise ValueError(f"Dinh dang dong goi khong hop le: {container} (chon: {', '.join(CONTAINER_FORMATS)})")
+    if container == CONTAINER_TAR_ZST and zstandard is None and shutil.which('zstd') is None:
+        raise RuntimeError("Can thu vien zstandard (pip install zstandard) hoac lenh zstd de tao tar.zst")
+
+
+class _ZstdPipeWriter:
+    """Nen zstd qua lenh zstd (dung khi khong co thu vien zstandard)"""
+
+    def __init__(self, fileobj: BinaryIO, level: int, threads: int):
+        self._proc = subprocess.Popen(
+            [shutil.which('zstd') or 'zstd', f'-{level}', f'-T{threads}', '-q', '-c', '-'],
+            stdin=subprocess.PIPE, stdout=fileobj,
+        )
+
+    def write(self, data: bytes) -> int:
+        self._proc.stdin.write(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._proc.stdin.close()
+        if self._proc.wait() != 0:
+            raise OSError(f"Lenh zstd loi (ma {self._proc.returncode})")
+
+    def kill(self) -> None:
+        self._proc.kill()
+        self._proc.wait()
+
+
+def open_zstd_writer(fileobj: BinaryIO, level: int = DEFAULT_ZSTD_LEVEL, threads: int = 0):
+    """
+    Stream nen zstd ghi vao fileobj (can close() de ket thuc frame)
+
+    Args:
+        level: Muc nen zstd
+        threads: So luong nen, 0 = so CPU
+    """
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads or -1)
+        return compressor.stream_writer(fileobj, closefd=False)
+    if shutil.which('zstd') is None:
+        raise RuntimeError("Can thu vien zstandard (pip install zstandard) hoac lenh zstd de tao tar.zst")
+    fileobj.flush()
+    return _ZstdPipeWriter(fileobj, level, threads)
+
+
+class _TarMemberWriter:
+    """Ghi du lieu 1 member tar (header da ghi truoc, kich thuoc phai dung nhu header)"""
+
+    def __init__(self, tar: tarfile.TarFile, tarinfo: tarfile.TarInfo):
+        self.tar = tar
+        self.tarinfo = tarinfo
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        self.written += len(data)
+        if self.written > self.tarinfo.size:
+            raise OSError(f"File thay doi trong luc ghi: {self.tarinfo.name}")
+        self._write(data)
+        return len(data)
+
+    def _write(self, data: bytes) -> None:
+        write_member_data(self.tar, data)
+
+    def _finish(self) -> None:
+        end_member(self.tar, self.tarinfo)
+
+    def __enter__(self) -> '_TarMemberWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            return
+        if self.written != self.tarinfo.size:
+            raise OSError(f"File thay doi trong luc ghi: {self.tarinfo.name} "
+                          f"({self.written}/{self.tarinfo.size} bytes)")
+        self._finish()
+
+
+class _SpooledTarMemberWriter(_TarMemberWriter):
+    """
+    Ban Python chua kiem tra (tar_compat.STREAM_MEMBER_SUPPORTED tat): dem du lieu qua
+    file tam roi ghi bang TarFile.addfile khi dong member
+    """
+
+    def __init__(self, tar: tarfile.TarFile, tarinfo: tarfile.TarInfo):
+        super().__init__(tar, tarinfo)
+        self._spool = tempfile.SpooledTemporaryFile(max_size=TAR_SPOOL_MAX_MEMORY)
+
+    def _write(self, data: bytes) -> None:
+        self._spool.write(data)
+
+    def _finish(self) -> None:
+        self._spool.seek(0)
+        self.tar.addfile(self.tarinfo, self._spool)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            super().__exit__(exc_type, exc, tb)
+        finally:
+            self._spool.close()
+
+
+class TarStreamWriter:
+    """
+    Ghi file tar/tar.zst dang stream
+
+    Dung:
+        writer = TarStreamWriter(path, CONTAINER_TAR_ZST)
+        writer.add_file(source, 'goi/representations/rep1/data/a.pdf')
+        writer.close()
+    """
+
+    def __init__(self, path: Union[str, Path], container: str = CONTAINER_TAR,
+                 zstd_level: int = DEFAULT_ZSTD_LEVEL, zstd_threads: int = 0):
+        if container not in (CONTAINER_TAR, CONTAINER_TAR_ZST):
+            raise ValueError(f"TarStreamWriter khong ho tro dinh dang: {container}")
+        self.path = Path(path)
+        self.container = container
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._zstd = None
+        try:
+            stream = self._file
+            if container == CONTAINER_TAR_ZST:
+                self._zstd = open_zstd_writer(self._file, zstd_level, zstd_threads)
+                stream = self._zstd
+            self.tar = tarfile.open(fileobj=stream, mode='w|', format=tarfile.PAX_FORMAT,
+                                    dereference=True)
+        except Exception:
+            self._file.close()
+            self.path.unlink()
+            raise
+
+    def add_file(self, source: Union[str, Path], arcname: str) -> tarfile.TarInfo:
+        """Them file tu dia (doc stream, thuoc tinh lay tu file nguon)"""
+        tarinfo = self.tar.gettarinfo(str(source), arcname)
+        with open(source, 'rb') as f:
+            self.tar.addfile(tarinfo, f)
+        return tarinfo
+
+    def add_bytes(self, arcname: str, data: bytes, mtime: Optional[float] = None) -> tarfile.TarInfo:
+        """Them du lieu trong bo nho"""
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = len(data)
+        tarinfo.mtime = int(mtime if mtime is not None else time.time())
+        tarinfo.mode = 0o644
+        self.tar.addfile(tarinfo, io.BytesIO(data))
+        return tarinfo
+
+    def add_fileobj(self, arcname: str, fileobj: BinaryIO, size: int,
+                    mtime: Optional[float] = None) -> tarfile.TarInfo:
+        """Them du lieu doc tu file object da biet kich thuoc (vd: file tam)"""
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = size
+        tarinfo.mtime = int(mtime if mtime is not None else time.time())
+        tarinfo.mode = 0o644
+        self.tar.addfile(tarinfo, fileobj)
+        return tarinfo
+
+    def open_member(self, source: Union[str, Path], arcname: str) -> _TarMemberWriter:
+        """
+        Mo member de ghi stream (header lay kich thuoc/mtime/quyen tu file nguon)
+
+        Du lieu ghi vao phai dung kich thuoc file nguon, neu khong se bao loi.
+        Ban Python chua kiem tra (xem utils.tar_compat): du lieu dem qua file tam,
+        member chi duoc ghi vao archive khi dong.
+        """
+        tarinfo = self.tar.gettarinfo(str(source), arcname)
+        if not STREAM_MEMBER_SUPPORTED:
+            return _SpooledTarMemberWriter(self.tar, tarinfo)
+        begin_member(self.tar, tarinfo)
+        return _TarMemberWriter(self.tar, tarinfo)
+
+    def close(self) -> None:
+        """Ghi block ket thuc tar va dong stream nen/file"""
+        try:
+            self.tar.close()
+            if self._zstd is not None:
+                self._zstd.close()
+        finally:
+            self._file.close()
+
+    def abort(self) -> None:
+        """Dong va xoa file chua hoan chinh"""
+        if isinstance(self._zstd, _ZstdPipeWriter):
+            self._zstd.kill()
+        try:
+            self._file.close()
+        except Exception as e:
+            logger.debug(f"Loi dong {self.path}: {e}")
+        if self.path.exists():
+            self.path.unlink()
+
+
+def write_tar_package(package_dir: Path, path: Path, container: str = CONTAINER_TAR,
+                      zstd_level: int = DEFAULT_ZSTD_LEVEL, zstd_threads: int = 0,
+                      files: Optional[List[Path]] = None) -> Path:
+    """
+    Dong goi thu muc AIP thanh tar/tar.zst (member theo thu tu ten, goc la ten thu muc goi)
+
+    Args:
+        files: File can dong goi (vd: tu PackageManifest); None = duyet thu muc
+
+    Returns:
+        Duong dan file da tao
+    """
+    if files is None:
+        files = sorted(p for p in package_dir.rglob('*') if p.is_file())
+    writer = TarStreamWriter(path, container, zstd_level, zstd_threads)
+    try:
+        for file_path in files:
+            arcname = f"{package_dir.name}/{file_path.relative_to(package_dir).as_posix()}"
+            writer.add_file(file_path, arcname)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return path
@@ -0,0 +1,169 @@
+"""
+Dedup - Chi muc noi dung (content-addressed) cho payload trong 1 lan chay
+
+Chuc nang chinh:
+- Ghi nho moi payload da dong goi theo SHA-256 (dung chung giua cac ho so/thread)
+- File trung noi dung duoc hardlink/reflink tu ban dau tien thay vi sao chep lai
+- Ghi nho member ZIP da nen cua tung noi dung de buoc ZIP dung lai bytes da nen
+- Thong ke so file trung va dung luong tiet kiem de bao cao trong build summary
+"""
+
+import logging
+import os
+import threading
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+from .utils.fast_copy import reflink_file
+
+logger = logging.getLogger(__name__)
+
+# Che do lien ket file trung
+LINK_MODE_AUTO = "auto"  # hardlink, neu khong duoc thi reflink
+LINK_MODE_HARDLINK = "hardlink"
+LINK_MODE_REFLINK = "reflink"
+LINK_MODES = (LINK_MODE_AUTO, LINK_MODE_HARDLINK, LINK_MODE_REFLINK)
+
+
+@dataclass
+class ContentEntry:
+    """Ban dau tien cua 1 noi dung trong output"""
+    path: Path
+    size: int
+    pages: Optional[int] = None
+
+
+class ContentIndex:
+    """Chi muc payload theo SHA-256, thread-safe, song trong 1 lan chay"""
+
+    def __init__(self, link_mode: str = LINK_MODE_AUTO):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Che do lien ket khong hop le: {link_mode} (chon: {', '.join(LINK_MODES)})")
+        self.link_mode = link_mode
+
+        self.duplicates = 0
+        self.bytes_saved = 0
+        self.link_failures = 0
+        self.zip_members_reused = 0
+        self.zip_bytes_reused = 0
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, ContentEntry] = {}
+        self._sizes: Set[int] = set()
+        self._digest_by_path: Dict[str, str] = {}
+        self._zip_members: Dict[str, Tuple[Path, zipfile.ZipInfo]] = {}
+
+    @staticmethod
+    def _path_key(path: Union[str, Path]) -> str:
+        return os.path.abspath(path)
+
+    def has_size(self, size: int) -> bool:
+        """Da co payload nao cung kich thuoc chua (loc nhanh truoc khi hash)"""
+        with self._lock:
+            return size in self._sizes
+
+    def lookup(self, sha256: str) -> Optional[ContentEntry]:
+        """Ban dau tien cua noi dung, None neu chua co"""
+        with self._lock:
+            return self._entries.get(sha256)
+
+    def add(self, sha256: str, path: Union[str, Path], size: int,
+            pages: Optional[int] = None) -> None:
+        """
+        Ghi nho payload vua dat vao output
+
+        Ban dau tien giu vai tro nguon lien ket; neu ban dau tien da bi xoa
+        (vd: cleanup folder sau khi ZIP) thi ban moi thay the.
+        """
+        path = Path(path)
+        with self._lock:
+            self._digest_by_path[self._path_key(path)] = sha256
+            self._sizes.add(size)
+            entry = self._entries.get(sha256)
+            if entry is None or not entry.path.exists():
+                self._entries[sha256] = ContentEntry(path=path, size=size, pages=pages)
+            elif entry.pages is None and pages:
+                entry.pages = pages
+
+    def link_duplicate(self, sha256: str, target: Union[str, Path]) -> Optional[ContentEntry]:
+        """
+        Lien ket target toi ban dau tien cua noi dung (hardlink/reflink)
+
+        Returns:
+            ContentEntry cua ban dau tien neu lien ket thanh cong, None neu noi
+            dung chua co hoac khong lien ket duoc (khi do can sao chep binh thuong)
+        """
+        entry = self.lookup(sha256)
+        if entry is None:
+            return None
+
+        target = Path(target)
+        try:
+            st = entry.path.stat()
+        except OSError:
+            return None
+        if st.st_size != entry.size:
+            # Ban dau tien bi thay doi ngoai y muon -> khong dung lai
+            logger.warning(f"Bo qua dedup, file da thay doi: {entry.path}")
+            return None
+
+        try:
+            if target.exists() or target.is_symlink():
+                target.unlink()
+            self._link(entry.path, target)
+        except OSError as e:
+            logger.debug(f"Khong the lien ket {target} -> {entry.path}: {e}")
+            with self._lock:
+                self.link_failures += 1
+            return None
+
+        with self._lock:
+            self.duplicates += 1
+            self.bytes_saved += entry.size
+        logger.debug(f"Dedup: {target.name} -> {entry.path}")
+        return entry
+
+    def _link(self, source: Path, target: Path) -> None:
+        if self.link_mode == LINK_MODE_REFLINK:
+            reflink_file(source, target)
+            return
+        try:
+            os.link(source, target)
+        except OSError:
+            if self.link_mode == LINK_MODE_HARDLINK:
+                raise
+            reflink_file(source, target)
+
+    def digest_for(self, path: Union[str, Path]) -> Optional[str]:
+        """SHA-256 cua payload da dat tai path (None neu khong phai payload)"""
+        with self._lock:
+            return self._digest_by_path.get(self._path_key(path))
+
+    def zip_member(self, sha256: str) -> Optional[Tuple[Path, zipfile.ZipInfo]]:
+        """Member ZIP da nen cua noi dung: (duong dan ZIP, ZipInfo)"""
+        with self._lock:
+            return self._zip_members.get(sha256)
+
+    def add_zip_member(self, sha256: str, zip_path: Union[str, Path], zinfo: zipfile.ZipInfo) -> None:
+        """Ghi nho member ZIP (chi goi khi file ZIP da dong hoan chinh)"""
+        with self._lock:
+            self._zip_members.setdefault(sha256, (Path(zip_path), zinfo))
+
+    def record_zip_reuse(self, compressed_size: int) -> None:
+        with self._lock:
+            self.zip_members_reused += 1
+            self.zip_bytes_reused += compressed_size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thong ke dedup"""
+        with self._lock:
+            return {
+                'unique': len(self._entries),
+                'duplicates': self.duplicates,
+                'bytes_saved': self.bytes_saved,
+                'link_failures': self.link_failures,
+                'zip_members_reused': self.zip_members_reused,
+                'zip_bytes_reused': self.zip_bytes_reused,
+            }
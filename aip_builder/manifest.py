@@ -0,0 +1,113 @@
+"""
+Package Manifest - Danh sach file cua 1 goi AIP, ghi nhan ngay luc ghi
+
+Chuc nang chinh:
+- Moi file ghi vao goi (payload, metadata, schema) duoc ghi nhan: duong dan
+  tuong doi, kich thuoc, SHA-256, MIME type, vai tro
+- La nguon du lieu duy nhat cho buoc ZIP/tar, validation va bao cao
+  (kich thuoc, so file) - khong duyet lai thu muc sau khi ghi
+- Ghi lai cung duong dan (vd: METS cap nhat placeholder) thay the muc cu
+"""
+
+import mimetypes
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+# Vai tro file trong goi
+ROLE_PAYLOAD = "payload"
+ROLE_METADATA = "metadata"
+ROLE_SCHEMA = "schema"
+ROLE_METS = "mets"
+
+_MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.xml': 'text/xml',
+    '.xsd': 'application/octet-stream',  # Nhu MIMETYPE cua schema trong METS
+}
+
+
+def role_for(rel: str) -> str:
+    """Vai tro cua file theo duong dan tuong doi trong goi"""
+    parts = rel.split('/')
+    if parts[-1] == 'METS.xml':
+        return ROLE_METS
+    if parts[0] == 'schemas':
+        return ROLE_SCHEMA
+    if len(parts) > 3 and parts[0] == 'representations' and parts[2] == 'data':
+        return ROLE_PAYLOAD
+    return ROLE_METADATA
+
+
+def mime_type_for(rel: str) -> str:
+    """MIME type theo phan mo rong"""
+    ext = rel[rel.rfind('.'):].lower() if '.' in rel else ''
+    return _MIME_TYPES.get(ext) or mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+
+
+@dataclass
+class ManifestEntry:
+    """1 file trong goi"""
+    path: str  # Duong dan tuong doi dang posix, vd: 'representations/rep1/data/a.pdf'
+    size: int
+    checksum: Optional[str] = None  # SHA-256 (hex)
+    mime_type: str = 'application/octet-stream'
+    role: str = ROLE_METADATA
+
+
+class PackageManifest:
+    """Danh sach file cua 1 goi, theo thu tu ghi"""
+
+    def __init__(self):
+        self._entries: Dict[str, ManifestEntry] = {}
+        self.total_size = 0
+
+    def add(self, rel: str, size: int, checksum: Optional[str] = None,
+            mime_type: Optional[str] = None, role: Optional[str] = None) -> ManifestEntry:
+        """Ghi nhan file vua ghi (ghi de muc cu neu cung duong dan)"""
+        self.remove(rel)
+        entry = ManifestEntry(rel, size, checksum, mime_type or mime_type_for(rel), role or role_for(rel))
+        self._entries[rel] = entry
+        self.total_size += size
+        return entry
+
+    def remove(self, rel: str) -> None:
+        entry = self._entries.pop(rel, None)
+        if entry is not None:
+            self.total_size -= entry.size
+
+    def get(self, rel: str) -> Optional[ManifestEntry]:
+        return self._entries.get(rel)
+
+    def __contains__(self, rel: str) -> bool:
+        return rel in self._entries
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        return iter(list(self._entries.values()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def file_count(self) -> int:
+        return len(self._entries)
+
+    def paths(self) -> List[str]:
+        """Duong dan cac file, thu tu co dinh (theo ten) - dung cho ZIP/tar"""
+        return sorted(self._entries)
+
+    def by_role(self, role: str) -> List[ManifestEntry]:
+        return [e for e in self._entries.values() if e.role == role]
+
+    def names_in(self, rel_dir: str) -> List[str]:
+        """Ten cac file nam truc tiep trong rel_dir"""
+        prefix = rel_dir.rstrip('/') + '/'
+        return sorted(rel[len(prefix):] for rel in self._entries
+                      if rel.startswith(prefix) and '/' not in rel[len(prefix):])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dang dict cho bao cao"""
+        return {
+            'files': self.file_count,
+            'total_size': self.total_size,
+            'entries': [vars(e).copy() for e in self._entries.values()],
+        }
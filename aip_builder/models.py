@@ -147,6 +147,7 @@ class TaiLieu(BaseModel):
     filename: Optional[str] = None
     file_path: Optional[Path] = None
     file_size: Optional[int] = None
+    checksums: Dict[str, str] = Field(default_factory=dict)  # Fixity {thuat toan: digest}, SHA-256 dung dau
     created_date: datetime = Field(default_factory=datetime.now)
     
     def generate_identifiers(self, stt: int):
@@ -810,6 +811,26 @@ class HoSo(BaseModel):
         return ''
 
 
+class PackagePlanItem(BaseModel):
+    """Ke hoach cho 1 ho so: duong dan goi, so file, dung luong uoc tinh"""
+    hoso_id: str
+    package_id: str  # duong_dan_ho_so/ten_goi_AIP (ten goi theo OBJID luc lap ke hoach)
+    package_dir: Path
+    archive_path: Path
+    file_count: int = 0  # Tong so file trong goi (payload + metadata + schema)
+    payload_files: int = 0
+    missing_files: List[str] = Field(default_factory=list)  # duongDanFile khong tim thay
+    payload_bytes: int = 0
+    metadata_bytes: int = 0  # Uoc tinh XML + schema
+    estimated_archive_bytes: int = 0
+    max_path_length: int = 0  # Duong dan dai nhat (tuyet doi) trong goi/file dong goi
+    long_paths: List[str] = Field(default_factory=list)  # Duong dan vuot gioi han
+    
+    @property
+    def path_overflow(self) -> bool:
+        return bool(self.long_paths)
+
+
 class PackagePlan(BaseModel):
     """Ke hoach xay dung package AIP"""
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -821,6 +842,31 @@ class PackagePlan(BaseModel):
     output_dir: Path
     created_date: datetime = Field(default_factory=datetime.now)
     status: str = "PLANNING"  # PLANNING, BUILDING, COMPLETED, ERROR
+    # Ket qua lap ke hoach (dry-run, xem planner.py)
+    items: List[PackagePlanItem] = Field(default_factory=list)
+    container: str = "zip"
+    cleanup_folders: bool = False
+    payload_mode: str = "copy"
+    path_limit: int = 260
+    total_files: int = 0
+    payload_bytes: int = 0
+    estimated_archive_bytes: int = 0
+    estimated_disk_bytes: int = 0  # Dung luong can tren o output (folder giu lai + file dong goi)
+    free_disk_bytes: Optional[int] = None  # Dung luong trong cua o output (None = khong xac dinh)
+    
+    @property
+    def missing_count(self) -> int:
+        return sum(len(item.missing_files) for item in self.items)
+    
+    @property
+    def overflow_count(self) -> int:
+        return sum(1 for item in self.items if item.long_paths)
+    
+    @property
+    def fits_on_disk(self) -> Optional[bool]:
+        if self.free_disk_bytes is None:
+            return None
+        return self.estimated_disk_bytes <= self.free_disk_bytes
 
 
 class BuildSummary(BaseModel):
@@ -832,3 +878,16 @@ class BuildSummary(BaseModel):
     total_size_mb: float = 0.0
     errors: List[str] = Field(default_factory=list)
     build_time_seconds: float = 0.0
+    probe_cache_hits: int = 0
+    probe_cache_misses: int = 0
+    hashed_mb: float = 0.0
+    hash_mb_per_second: float = 0.0
+    dedup_files: int = 0  # So payload trung noi dung duoc lien ket thay vi sao chep
+    dedup_saved_mb: float = 0.0
+    zip_members_reused: int = 0  # So member ZIP dung lai bytes da nen
+    copy_methods: Dict[str, int] = Field(default_factory=dict)  # So file theo phuong thuc sao chep
+    compression: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # Thong ke nen ZIP theo loai file
+    compression_seconds_saved: float = 0.0  # Uoc tinh thoi gian nen tiet kiem nho STORED
+    template_timings: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # Thoi gian bien dich/render theo template
+    # PackageManifest cua goi (chi khi build 1 goi) - dung cho validation/bao cao, khong serialize
+    manifest: Optional[Any] = Field(default=None, exclude=True)
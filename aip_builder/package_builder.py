@@ -2,30 +2,111 @@
 Package Builder cho AIP Builder
 Tao cau truc thu muc va sao chep file theo chuan AIP/CSIP
 """
+import hashlib
 import logging
 import shutil
 import zipfile
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any, Union
 from datetime import datetime
 import uuid
+from collections import Counter
 
 from .models import HoSo, TaiLieu, PackagePlan, BuildSummary
 from .config import Config
-from .pdf_probe import PDFProbe
-from .xml_generator import XMLTemplateGenerator
+from .pdf_probe import PDFProbe, ProbeLevel
+from .render_context import HoSoRecord, TaiLieuRecord
+from .xml_builder import fill_placeholders
+from .xml_generator import EAD_DOC_BATCH_SIZE, XML_ENGINE_LXML, create_xml_generator, resolve_placeholders
 from .utils.pathlib_win import LongPath
+from .utils.file_copy import (
+    copy_and_hash, link_and_hash, link_payload, normalize_checksum, stream_copy_and_hash,
+    ChecksumMismatchError,
+    PAYLOAD_MODES, PAYLOAD_MODE_COPY, PAYLOAD_MODE_HARDLINK,
+)
+from .utils.fast_copy import fast_copy, COPY_BACKEND_AUTO, COPY_REFLINK
+from .utils.hashing import hash_file_multi, hash_stats, normalize_algorithms
+from .utils.zip_compat import RAW_WRITE_SUPPORTED
+from .utils.zip_writer import copy_raw_member
+from .utils.zip_compression import CompressionPolicy, summarize_compression
+from .utils.parallel_zip import ParallelZipWriter, resolve_zip_workers
+from .utils.work_pool import get_work_pool
+from .package_sink import DirectorySink, TarStreamSink, ZipStreamSink
+from .containers import CONTAINER_ZIP, check_container, container_path, write_tar_package
+from .probe_cache import ProbeCache
+from .dedup import ContentIndex
+from .schema_assets import get_schema_assets
+from .manifest import PackageManifest
 
 logger = logging.getLogger(__name__)
 
+# Duong dan file/thu muc trong goi AIP (tuong doi so voi thu muc goi)
+METS_REL = 'METS.xml'
+EAD_REL = 'metadata/descriptive/EAD.xml'
+PREMIS_REL = 'metadata/preservation/PREMIS.xml'
+SCHEMAS_REL = 'schemas'
+REP1_METS_REL = 'representations/rep1/METS.xml'
+REP1_DATA_REL = 'representations/rep1/data'
+REP1_DESCRIPTIVE_REL = 'representations/rep1/metadata/descriptive'
+PREMIS_REP1_REL = 'representations/rep1/metadata/preservation/PREMIS_rep1.xml'
+
+# Sink dung cho metadata/schema: DirectorySink, ZipStreamSink hoac TarStreamSink
+PackageSink = Union[DirectorySink, ZipStreamSink, TarStreamSink]
+
+
+def package_folder_path(hoso: HoSo) -> str:
+    """Duong dan thu muc ho so (tuong doi so voi output) chua goi AIP"""
+    if hasattr(hoso, 'original_folder_path') and hoso.original_folder_path:
+        # Duong dan ho so tu folder goc, vi du: "Chi cuc an toan ve sinh thuc pham/hopso01/hoso01"
+        folder_path = str(hoso.original_folder_path).replace('\\', '/').replace(':', '_')
+        return folder_path.lstrip('/')
+    # Fallback: dung arc_file_code
+    return hoso.arc_file_code
+
+
+def package_id_for(hoso: HoSo) -> str:
+    """
+    ID (duong dan tuong doi) cua goi AIP: duong_dan_ho_so / ten_goi_AIP
+    
+    Ten goi AIP lay tu OBJID (thay : -> _)
+    """
+    return f"{package_folder_path(hoso)}/{hoso.objid.replace(':', '_')}"
+
 
 class PackageBuilder:
     """Xay dung goi AIP theo chuan CSIP"""
     
-    def __init__(self, config: Config, cleanup_folders: bool = False):
+    def __init__(self, config: Config, cleanup_folders: bool = False,
+                 probe_cache: Optional[ProbeCache] = None,
+                 content_index: Optional[ContentIndex] = None):
         self.config = config
-        self.pdf_probe = PDFProbe()
-        self.xml_generator = XMLTemplateGenerator(config)
+        self.probe_cache = probe_cache  # Cache ket qua quet PDF giua cac lan chay
+        # Chi muc noi dung payload (dedup) - batch truyen vao 1 chi muc dung chung
+        if content_index is None and config.payload_dedup:
+            content_index = ContentIndex(link_mode=config.dedup_link_mode)
+        self.content_index = content_index
+        # So file theo phuong thuc sao chep (reflink, copy_file_range, ..., dedup, hardlink, symlink)
+        self.copy_methods: Counter = Counter()
+        # Che do dat payload: copy (mac dinh) hoac lien ket toi file nguon (hardlink/symlink/reflink)
+        if config.payload_mode not in PAYLOAD_MODES:
+            raise ValueError(f"Payload mode khong hop le: {config.payload_mode} (chon: {', '.join(PAYLOAD_MODES)})")
+        self.payload_mode = config.payload_mode
+        self.pdf_probe = PDFProbe(cache=probe_cache, backend=config.pdf_probe_backend)
+        # Dong goi luon can hash (checksum cho METS/PREMIS) -> muc toi thieu la HASH
+        self.probe_level = max(ProbeLevel.parse(config.probe_level), ProbeLevel.HASH)
+        # Fixity bo sung (ngoai SHA-256) tinh cung luc sao chep
+        self.extra_fixity = normalize_algorithms(config.extra_fixity_algorithms)[1:]
+        self.xml_generator = create_xml_generator(config)  # Engine jinja (template) hoac lxml (cay)
+        # Pool thread dung chung ca lan chay: render/hash/ghi EAD_doc song song trong goi
+        self.work_pool = get_work_pool(config.pool_workers)
+        # Schema XSD nap 1 lan moi process (noi dung + SHA-256), dung chung cho moi goi
+        self.schema_assets = get_schema_assets()
+        # Cach nen tung member ZIP (PDF -> STORED, XML -> DEFLATE/LZMA) va thong ke theo loai file
+        self.compression_policy = CompressionPolicy.from_config(config)
+        self.zip_workers = resolve_zip_workers(config.zip_workers)  # So thread nen member ZIP song song
+        # Dinh dang file dong goi: zip, tar, tar.zst
+        check_container(config.container_format)
+        self.container_format = config.container_format
         self.cleanup_folders = cleanup_folders  # Tuy chon xoa folder sau khi tao ZIP
     
     def create_package_structure(self, output_dir: Path, package_id: str) -> Dict[str, Path]:
@@ -62,17 +143,19 @@ class PackageBuilder:
         
         return dirs
     
-    def copy_pdf_files(self, hoso: HoSo, pdf_root: Path, rep1_data_dir: Path) -> Tuple[int, int]:
+    def copy_pdf_files(self, hoso: HoSo, pdf_root: Path, rep1_data_dir: Path,
+                       manifest: Optional[PackageManifest] = None) -> Tuple[int, int]:
         """
-        Sao chep cac file PDF vao thu muc data
+        Sao chep cac file PDF vao thu muc data (ghi nhan vao manifest neu co)
         
         Returns:
             Tuple[int, int]: (so_file_thanh_cong, so_file_loi)
         """
-        logger.info(f"Sao chep file PDF cho ho so: {hoso.arc_file_code}")
+        logger.info(f"Sao chep file PDF cho ho so: {hoso.arc_file_code} (payload mode: {self.payload_mode})")
         
         success_count = 0
         error_count = 0
+        payload_mode = self._effective_payload_mode(pdf_root, rep1_data_dir)
         
         for tailieu in hoso.tai_lieu:
             if not tailieu.duongDanFile:
@@ -105,22 +188,19 @@ class PackageBuilder:
                             counter += 1
                         target_filename = target_path.name
                 
-                # Sao chep file
-                shutil.copy2(source_path, target_path)
-                
-                # Cap nhat thong tin file trong tailieu
-                file_info = self.pdf_probe.probe_file(source_path)
-                tailieu.file_path = target_path
-                tailieu.filename = target_filename
-                tailieu.file_size = file_info.size
-                tailieu.checksum = file_info.sha256
-                
-                if file_info.pages and not tailieu.so_trang:
-                    tailieu.so_trang = file_info.pages
+                # Sao chep/lien ket file va cap nhat thong tin file trong tailieu
+                self._copy_payload(tailieu, source_path, target_path, payload_mode)
+                if manifest is not None:
+                    manifest.add(f"{REP1_DATA_REL}/{target_path.name}", tailieu.file_size, tailieu.checksum)
                 
                 success_count += 1
                 logger.debug(f"Sao chep thanh cong: {source_path} -> {target_path}")
                 
+            except ChecksumMismatchError as e:
+                logger.error(f"Loi checksum file {source_path}: {e}")
+                error_count += 1
+                continue
+                
             except Exception as e:
                 logger.error(f"Loi sao chep file {source_path}: {e}")
                 error_count += 1
@@ -129,71 +209,378 @@ class PackageBuilder:
         logger.info(f"Sao chep xong: {success_count} thanh cong, {error_count} loi")
         return success_count, error_count
     
-    def generate_metadata_files(self, hoso: HoSo, package_id: str, dirs: Dict[str, Path]) -> None:
-        """Sinh cac file metadata XML"""
+    def _effective_payload_mode(self, pdf_root: Path, rep1_data_dir: Path) -> str:
+        """Hardlink chi dung duoc khi nguon va output cung file system, neu khong thi sao chep"""
+        if self.payload_mode != PAYLOAD_MODE_HARDLINK:
+            return self.payload_mode
+        try:
+            if pdf_root.stat().st_dev != rep1_data_dir.stat().st_dev:
+                logger.warning(f"PDF nguon va output khac file system, dung che do copy thay cho hardlink")
+                return PAYLOAD_MODE_COPY
+        except OSError as e:
+            logger.warning(f"Khong kiem tra duoc file system ({e}), dung che do copy")
+            return PAYLOAD_MODE_COPY
+        return self.payload_mode
+    
+    def _copy_payload(self, tailieu: TaiLieu, source_path: Path, target_path: Path,
+                      payload_mode: str = PAYLOAD_MODE_COPY) -> None:
+        """
+        Sao chep 1 file PDF va cap nhat size/checksum/so trang vao tailieu
+        
+        Neu probe cache co ket qua con hieu luc cho file nguon thi chi sao chep,
+        khong tinh lai checksum va khong doc lai cau truc PDF.
+        Cau truc PDF chi duoc doc khi probe_level >= STRUCTURE va Excel chua co
+        so trang (hoac probe_level = TEXT)
+        
+        Neu noi dung da co trong output (cung SHA-256) thi lien ket toi ban
+        dau tien (hardlink/reflink) thay vi sao chep
+        
+        payload_mode khac copy: lien ket toi file nguon (hardlink/symlink/reflink),
+        khong lien ket duoc thi sao chep nhu binh thuong
+        """
+        expected_sha256 = self._expected_sha256(tailieu)
+        level = ProbeLevel.HASH
+        if self.probe_level == ProbeLevel.TEXT or (self.probe_level >= ProbeLevel.STRUCTURE and not tailieu.so_trang):
+            level = self.probe_level
+        
+        # File dich co the la hardlink/symlink (payload goi khac hoac file nguon) -> xoa truoc,
+        # khong ghi de len inode chung
+        if target_path.exists() or target_path.is_symlink():
+            target_path.unlink()
+        
+        cached = None
+        if self.probe_cache:
+            cached = self.probe_cache.get(source_path, level, required_digests=self.extra_fixity)
+        if cached:
+            if expected_sha256 and normalize_checksum(expected_sha256) != cached['sha256']:
+                raise ChecksumMismatchError(source_path, normalize_checksum(expected_sha256), cached['sha256'])
+            
+            size, sha256, pages = cached['size'], cached['sha256'], cached['pages']
+            digests = {a: cached['digests'][a] for a in ['SHA-256', *self.extra_fixity]}
+            method = None
+            if payload_mode != PAYLOAD_MODE_COPY:
+                try:
+                    method = link_payload(source_path, target_path, payload_mode)
+                except OSError as e:
+                    logger.warning(f"Khong tao duoc {payload_mode} cho {source_path.name} ({e}), sao chep thay the")
+            elif self.content_index and self.content_index.link_duplicate(sha256, target_path):
+                method = 'dedup'
+            if method is None:
+                # Da co checksum -> sao chep bang kernel (reflink/copy_file_range/sendfile)
+                method = fast_copy(source_path, target_path, self.config.copy_backend)
+        else:
+            duplicate = None
+            copy_result = None
+            hashed_size = None  # Kich thuoc nguon neu da hash khi tra cuu dedup (digests da co)
+            if payload_mode != PAYLOAD_MODE_COPY:
+                # Lien ket toi nguon, chi doc nguon de tinh checksum
+                try:
+                    copy_result = link_and_hash(source_path, target_path, payload_mode,
+                                                expected_sha256=expected_sha256,
+                                                extra_algorithms=self.extra_fixity)
+                except OSError as e:
+                    logger.warning(f"Khong tao duoc {payload_mode} cho {source_path.name} ({e}), sao chep thay the")
+            elif self.content_index and self.content_index.has_size(source_size := source_path.stat().st_size):
+                # Da co payload cung kich thuoc -> hash nguon truoc, trung noi dung thi khong can ghi
+                digests = hash_file_multi(source_path, ['SHA-256', *self.extra_fixity])
+                sha256 = digests['SHA-256']
+                if expected_sha256 and normalize_checksum(expected_sha256) != sha256:
+                    raise ChecksumMismatchError(source_path, normalize_checksum(expected_sha256), sha256)
+                duplicate = self.content_index.link_duplicate(sha256, target_path)
+                if not duplicate:
+                    hashed_size = source_size
+            
+            if duplicate:
+                size, pages = duplicate.size, duplicate.pages
+                method = 'dedup'
+            elif hashed_size is not None:
+                # Da co checksum tu buoc tra cuu -> sao chep bang kernel, khong doc lai nguon de hash
+                size, pages = hashed_size, None
+                method = fast_copy(source_path, target_path, self.config.copy_backend)
+            else:
+                if copy_result is None:
+                    # Sao chep file va tinh checksum trong cung 1 lan doc nguon (reflink neu duoc)
+                    copy_result = copy_and_hash(source_path, target_path, expected_sha256=expected_sha256,
+                                                extra_algorithms=self.extra_fixity,
+                                                try_reflink=self.config.copy_backend in (COPY_BACKEND_AUTO, COPY_REFLINK))
+                size, sha256, pages = copy_result.size, copy_result.sha256, None
+                digests = copy_result.digests
+                method = copy_result.method
+            
+            # Doc cau truc tu file dich vua ghi (tranh doc lai nguon tren NAS)
+            file_info = None
+            if level >= ProbeLevel.STRUCTURE and not (pages and level < ProbeLevel.TEXT):
+                file_info = self.pdf_probe.probe_structure(target_path, with_text=level >= ProbeLevel.TEXT)
+                pages = file_info.pages
+            
+            if self.probe_cache:
+                if file_info is not None and not file_info.error:
+                    self.probe_cache.put(
+                        source_path, sha256, level, pages=pages,
+                        is_encrypted=file_info.is_encrypted, has_text=file_info.has_text,
+                        pdf_version=file_info.pdf_version, digests=digests
+                    )
+                else:
+                    self.probe_cache.put(source_path, sha256, ProbeLevel.HASH, digests=digests)
+        
+        if self.content_index:
+            self.content_index.add(sha256, target_path, size, pages=pages)
+        self.copy_methods[method] += 1
+        logger.debug(f"Payload {target_path.name}: {method}")
+        
+        tailieu.file_path = target_path
+        tailieu.filename = target_path.name
+        tailieu.file_size = size
+        tailieu.checksum = sha256
+        tailieu.checksums = digests
+        
+        if pages and not tailieu.so_trang:
+            tailieu.so_trang = pages
+    
+    def _expected_sha256(self, tailieu: TaiLieu) -> Optional[str]:
+        """Lay checksum ky vong tu Excel (cot AN) neu thuat toan la SHA-256"""
+        if not tailieu.checksum:
+            return None
+        algorithm = (tailieu.thuat_toan_checksum or 'SHA-256').upper().replace('-', '')
+        if algorithm != 'SHA256':
+            logger.debug(f"Bo qua kiem tra checksum {tailieu.thuat_toan_checksum} cho {tailieu.duongDanFile}")
+            return None
+        return tailieu.checksum
+    
+    def generate_metadata_files(self, hoso: HoSo, package_id: str, sink: PackageSink) -> None:
+        """
+        Sinh cac file metadata XML (ghi qua sink: thu muc hoac thang vao ZIP)
+        
+        Moi XML duoc render ra bytes, hash tu bytes trong bo nho va ghi dung 1 lan.
+        Placeholder trong METS duoc thay trong 1 lan duyet: rep1/METS.xml truoc,
+        sau do METS goc (chua checksum cua rep1/METS.xml da hoan chinh).
+        """
         logger.info(f"Sinh metadata cho package: {package_id}")
         
+        if self.config.xml_engine == XML_ENGINE_LXML:
+            return self.generate_metadata_trees(hoso, package_id, sink)
+        if self.config.stream_render:
+            return self.generate_metadata_streamed(hoso, package_id, sink)
+        
+        generator = self.xml_generator
         try:
-            # Sinh XML theo thiet ke moi
-            xmls = self.xml_generator.generate_all_xml(hoso, package_id)
+            # Gia tri template tinh 1 lan cho ho so va tung tai lieu, dung chung cho moi XML
+            hoso = generator.compile(hoso)
             
-            # Ghi file METS goc (root level) - ban dau voi placeholders
-            mets_path = dirs['root'] / 'METS.xml'
-            mets_path.write_text(xmls['mets'], encoding='utf-8')
-            logger.info(f"Tao METS.xml: {mets_path}")
+            # Ghi cac file EAD_doc_FileX.xml rieng cho tung tai lieu (render/hash/ghi song song)
+            placeholders = self._write_ead_docs(
+                hoso, sink, lambda tai_lieu, rel: generator.generate_ead_document(tai_lieu, hoso, package_id).encode('utf-8'))
             
-            # Ghi file METS representation level (rep1/METS.xml)
-            if 'rep_mets' in xmls:
-                rep_mets_path = dirs['rep1'] / 'METS.xml'
-                rep_mets_path.write_text(xmls['rep_mets'], encoding='utf-8')
-                logger.info(f"Tao rep1/METS.xml: {rep_mets_path}")
-            
-            # Ghi cac file EAD_doc_FileX.xml rieng cho tung tai lieu
-            if 'ead_docs' in xmls and xmls['ead_docs']:
-                for filename, ead_content in xmls['ead_docs'].items():
-                    ead_doc_path = dirs['rep1_descriptive'] / filename
-                    ead_doc_path.write_text(ead_content, encoding='utf-8')
-                    logger.info(f"Tao {filename}: {ead_doc_path}")
-            
-            # Ghi file EAD tong hop (neu can)
-            ead_path = dirs['descriptive'] / 'EAD.xml'  # Sửa tên file cho đúng
-            if 'ead' in xmls:
-                ead_path.write_text(xmls['ead'], encoding='utf-8')
-                logger.info(f"Tao EAD.xml: {ead_path}")
-            
-            # Ghi file PREMIS  
-            premis_path = dirs['preservation'] / 'PREMIS.xml'  # Sửa tên file cho đúng
-            premis_path.write_text(xmls['premis'], encoding='utf-8')
-            logger.info(f"Tao PREMIS.xml: {premis_path}")
+            # Ghi file EAD tong hop va PREMIS
+            ead_size, ead_checksum = self._write_metadata(sink, EAD_REL, generator.generate_ead(hoso, package_id))
+            placeholders['PLACEHOLDER_EAD_SIZE'] = str(ead_size)
+            placeholders['PLACEHOLDER_EAD_CHECKSUM'] = ead_checksum
+            
+            premis_size, premis_checksum = self._write_metadata(sink, PREMIS_REL, generator.generate_premis(hoso, package_id))
+            placeholders['PLACEHOLDER_PREMIS_SIZE'] = str(premis_size)
+            placeholders['PLACEHOLDER_PREMIS_CHECKSUM'] = premis_checksum
             
             # Ghi file PREMIS representation level (rep1/metadata/preservation/PREMIS_rep1.xml)
-            if 'premis_rep' in xmls:
-                premis_rep_path = dirs['rep1_preservation'] / 'PREMIS_rep1.xml'
-                premis_rep_path.write_text(xmls['premis_rep'], encoding='utf-8')
-                logger.info(f"Tao PREMIS_rep1.xml: {premis_rep_path}")
-            
-            # Cap nhat METS voi thong tin thuc te cua metadata files
-            logger.debug("Cap nhat METS voi thong tin metadata files thuc te...")
-            updated_mets = self.xml_generator.update_mets_with_metadata_files(
-                xmls['mets'], 
-                str(ead_path), 
-                str(premis_path)
-            )
-            
-            # Ghi lai METS da cap nhat
-            mets_path.write_text(updated_mets, encoding='utf-8')
-            logger.info(f"Cap nhat METS.xml voi thong tin thuc te")
-            
-            # Update placeholders in both main METS and rep1 METS
-            self._update_placeholders_in_mets(mets_path, dirs['root'])
-            rep1_mets_path = dirs['rep1'] / "METS.xml"
-            if rep1_mets_path.exists():
-                self._update_placeholders_in_mets(rep1_mets_path, dirs['root'])
+            rep_size, rep_checksum = self._write_metadata(sink, PREMIS_REP1_REL,
+                                                          generator.generate_premis_rep(hoso, package_id))
+            placeholders['PLACEHOLDER_PREMIS_REP_SIZE'] = str(rep_size)
+            placeholders['PLACEHOLDER_PREMIS_REP_CHECKSUM'] = rep_checksum
+            
+            # Checksum schema da tinh san khi nap schema
+            placeholders.update(self._schema_placeholders(sink))
+            
+            # Ghi file METS representation level (rep1/METS.xml)
+            _, rep_mets_checksum = self._write_metadata(
+                sink, REP1_METS_REL, resolve_placeholders(generator.generate_rep_mets(hoso, package_id), placeholders))
+            placeholders['PLACEHOLDER_REP_CHECKSUM'] = rep_mets_checksum
+            
+            # Ghi file METS goc (root level)
+            self._write_metadata(sink, METS_REL,
+                                 resolve_placeholders(generator.generate_mets(hoso, package_id), placeholders))
             
         except Exception as e:
             logger.error(f"Loi khi sinh metadata: {e}")
             raise
     
+    def generate_metadata_streamed(self, hoso: HoSo, package_id: str, sink: PackageSink) -> None:
+        """
+        Sinh cac file metadata XML dang stream (Config.stream_render)
+        
+        METS, rep1/METS, PREMIS, PREMIS_rep1 va EAD (lap theo tai lieu) render tung block
+        (Template.generate), ghi thang vao file/member ZIP va hash trong luc ghi:
+        bo nho khong tang theo so tai lieu cua ho so.
+        Thu tu ghi va noi dung giong generate_metadata_files; placeholder cua
+        rep1/METS.xml va METS goc duoc thay tren luong (gia tri da biet truoc khi render).
+        """
+        generator = self.xml_generator
+        
+        try:
+            hoso = generator.compile(hoso)
+            
+            # EAD_doc_FileX.xml: kich thuoc co dinh theo 1 tai lieu -> render chuoi (nhanh hon stream),
+            # chi giu vai lo file trong bo nho tai 1 thoi diem
+            placeholders = self._write_ead_docs(
+                hoso, sink, lambda tai_lieu, rel: generator.generate_ead_document(tai_lieu, hoso, package_id).encode('utf-8'))
+            
+            ead_size, ead_checksum = self._write_metadata_stream(
+                sink, EAD_REL, generator.stream_xml('ead', hoso, package_id))
+            placeholders['PLACEHOLDER_EAD_SIZE'] = str(ead_size)
+            placeholders['PLACEHOLDER_EAD_CHECKSUM'] = ead_checksum
+            
+            premis_size, premis_checksum = self._write_metadata_stream(
+                sink, PREMIS_REL, generator.stream_xml('premis', hoso, package_id))
+            placeholders['PLACEHOLDER_PREMIS_SIZE'] = str(premis_size)
+            placeholders['PLACEHOLDER_PREMIS_CHECKSUM'] = premis_checksum
+            
+            rep_size, rep_checksum = self._write_metadata_stream(
+                sink, PREMIS_REP1_REL, generator.stream_xml('premis_rep', hoso, package_id))
+            placeholders['PLACEHOLDER_PREMIS_REP_SIZE'] = str(rep_size)
+            placeholders['PLACEHOLDER_PREMIS_REP_CHECKSUM'] = rep_checksum
+            
+            placeholders.update(self._schema_placeholders(sink))
+            
+            _, rep_mets_checksum = self._write_metadata_stream(
+                sink, REP1_METS_REL, generator.stream_xml('rep_mets', hoso, package_id, placeholders=placeholders))
+            placeholders['PLACEHOLDER_REP_CHECKSUM'] = rep_mets_checksum
+            
+            self._write_metadata_stream(
+                sink, METS_REL, generator.stream_xml('mets', hoso, package_id, placeholders=placeholders))
+            
+        except Exception as e:
+            logger.error(f"Loi khi sinh metadata (stream): {e}")
+            raise
+    
+    def generate_metadata_trees(self, hoso: HoSo, package_id: str, sink: PackageSink) -> None:
+        """
+        Sinh cac file metadata XML bang engine lxml (Config.xml_engine = "lxml")
+        
+        Moi XML dung thanh cay, kiem tra XSD tren cay neu bat (Config.xsd_validate_trees),
+        serialize 1 lan roi hash va ghi. Placeholder cua rep1/METS.xml va METS goc
+        duoc gan thang vao thuoc tinh tren cay. Thu tu ghi giong generate_metadata_files;
+        stream_render khong ap dung (cay EAD_doc dung va ghi tung file).
+        """
+        builder = self.xml_generator
+        
+        def render_ead_doc(tai_lieu: TaiLieu, rel: str) -> bytes:
+            root = builder.build_ead_document(tai_lieu, hoso, package_id)
+            self._check_tree('ead_doc', rel, root)
+            return builder.serialize('ead_doc', root)
+        
+        try:
+            placeholders = self._write_ead_docs(hoso, sink, render_ead_doc)
+            
+            for kind, rel, prefix in (('ead', EAD_REL, 'PLACEHOLDER_EAD'),
+                                      ('premis', PREMIS_REL, 'PLACEHOLDER_PREMIS'),
+                                      ('premis_rep', PREMIS_REP1_REL, 'PLACEHOLDER_PREMIS_REP')):
+                root = getattr(builder, f'build_{kind}')(hoso, package_id)
+                self._check_tree(kind, rel, root)
+                size, checksum = self._write_metadata_bytes(sink, rel, builder.serialize(kind, root))
+                placeholders[f'{prefix}_SIZE'] = str(size)
+                placeholders[f'{prefix}_CHECKSUM'] = checksum
+            
+            placeholders.update(self._schema_placeholders(sink))
+            
+            root = builder.build_rep_mets(hoso, package_id)
+            fill_placeholders(root, placeholders)
+            self._check_tree('rep_mets', REP1_METS_REL, root)
+            _, rep_mets_checksum = self._write_metadata_bytes(sink, REP1_METS_REL, builder.serialize('rep_mets', root))
+            placeholders['PLACEHOLDER_REP_CHECKSUM'] = rep_mets_checksum
+            
+            root = builder.build_mets(hoso, package_id)
+            fill_placeholders(root, placeholders)
+            self._check_tree('mets', METS_REL, root)
+            self._write_metadata_bytes(sink, METS_REL, builder.serialize('mets', root))
+            
+        except Exception as e:
+            logger.error(f"Loi khi sinh metadata (lxml): {e}")
+            raise
+    
+    def _write_ead_docs(self, hoso: Union[HoSo, HoSoRecord], sink: PackageSink,
+                        render: Callable[[Union[TaiLieu, TaiLieuRecord], str], bytes]) -> Dict[str, str]:
+        """
+        Sinh va ghi EAD_doc_FileX.xml cua cac tai lieu, song song o work pool dung chung
+        
+        render(tai_lieu, rel) tra ve bytes XML (tai_lieu la TaiLieu hoac TaiLieuRecord theo hoso); render + SHA-256 (va ghi file neu sink ghi
+        song song duoc - DirectorySink) chay o work pool theo lo, ghi vao ZIP/tar va ghi nhan
+        manifest tren thread goi dung thu tu tai lieu (noi dung goi khong doi so voi tuan tu).
+        
+        Returns:
+            Placeholder PLACEHOLDER_EAD_DOC_{file_id}_SIZE/_CHECKSUM
+        """
+        docs = [(tai_lieu, f"{REP1_DESCRIPTIVE_REL}/{tai_lieu.ead_doc_filename}")
+                for tai_lieu in hoso.tai_lieu if getattr(tai_lieu, 'ead_doc_filename', None)]
+        concurrent_writes = getattr(sink, 'concurrent_writes', False)
+        
+        def produce(doc: Tuple[Union[TaiLieu, TaiLieuRecord], str]) -> Tuple[Optional[bytes], int, str]:
+            tai_lieu, rel = doc
+            data = render(tai_lieu, rel)
+            checksum = hashlib.sha256(data).hexdigest()
+            if concurrent_writes:
+                sink.write_file(rel, data)
+                return None, len(data), checksum
+            return data, len(data), checksum
+        
+        placeholders: Dict[str, str] = {}
+        results = self.work_pool.map(produce, docs, batch_size=EAD_DOC_BATCH_SIZE)
+        for (tai_lieu, rel), (data, size, checksum) in zip(docs, results):
+            if data is None:
+                sink.record(rel, size, checksum)
+            else:
+                sink.write_bytes(rel, data, checksum)
+            logger.debug(f"Tao {tai_lieu.ead_doc_filename}: {rel}")
+            file_id = Path(tai_lieu.ead_doc_filename).stem.replace("EAD_doc_", "")
+            placeholders[f'PLACEHOLDER_EAD_DOC_{file_id}_SIZE'] = str(size)
+            placeholders[f'PLACEHOLDER_EAD_DOC_{file_id}_CHECKSUM'] = checksum
+        logger.info(f"Tao {len(docs)} EAD_doc trong {REP1_DESCRIPTIVE_REL}")
+        return placeholders
+    
+    def _check_tree(self, kind: str, rel: str, root) -> None:
+        """
+        Kiem tra cay XML voi XSD truoc khi ghi (Config.xsd_validate_trees)
+        
+        Raises:
+            ValueError: Cay khong hop le va Config.strict_validation
+        """
+        if not self.config.xsd_validate_trees:
+            return
+        errors = self.xml_generator.validate_tree(kind, root)
+        if not errors:
+            return
+        message = f"{rel} khong hop le theo XSD: {errors[0]}"
+        if len(errors) > 1:
+            message += f" (+{len(errors) - 1} loi khac)"
+        if self.config.strict_validation:
+            raise ValueError(message)
+        logger.warning(message)
+    
+    def _schema_placeholders(self, sink: PackageSink) -> Dict[str, str]:
+        """Gia tri placeholder checksum schema (chi schema co trong goi)"""
+        placeholders = {}
+        for schema_name, placeholder in (('premis.xsd', 'PLACEHOLDER_SCHEMA_PREMIS_CHECKSUM'),
+                                         ('mets.xsd', 'PLACEHOLDER_SCHEMA_METS_CHECKSUM'),
+                                         ('ead.xsd', 'PLACEHOLDER_SCHEMA_EAD_CHECKSUM')):
+            schema = self.schema_assets.get(schema_name)
+            if schema and sink.exists(f"{SCHEMAS_REL}/{schema_name}"):
+                placeholders[placeholder] = schema.sha256
+        return placeholders
+    
+    def _write_metadata_stream(self, sink: PackageSink, rel: str, blocks: Iterable[bytes]) -> Tuple[int, str]:
+        """Ghi 1 file XML render stream qua sink, tra ve (kich thuoc, SHA-256) tinh trong luc ghi"""
+        size, checksum = sink.write_stream(rel, blocks)
+        logger.info(f"Tao {Path(rel).name}: {rel}")
+        return size, checksum
+    
+    def _write_metadata(self, sink: PackageSink, rel: str, content: str) -> Tuple[int, str]:
+        """Ghi 1 file XML qua sink, tra ve (kich thuoc, SHA-256) tinh tu bytes da ghi"""
+        return self._write_metadata_bytes(sink, rel, content.encode('utf-8'))
+    
+    def _write_metadata_bytes(self, sink: PackageSink, rel: str, data: bytes) -> Tuple[int, str]:
+        """Ghi 1 file XML (bytes da serialize) qua sink, tra ve (kich thuoc, SHA-256)"""
+        checksum = hashlib.sha256(data).hexdigest()
+        sink.write_bytes(rel, data, checksum)
+        logger.info(f"Tao {Path(rel).name}: {rel}")
+        return len(data), checksum
+    
     def build_single_package(self, hoso: HoSo, pdf_root: Path, output_dir: Path) -> BuildSummary:
         """
         Xay dung 1 goi AIP cho 1 ho so
@@ -205,19 +592,9 @@ class PackageBuilder:
         
         # Tao duong dan thu muc cho ho so va ten AIP package
         # Chia lam 2 phan: duong_dan_ho_so + ten_goi_AIP  
-        if hasattr(hoso, 'original_folder_path') and hoso.original_folder_path:
-            # Duong dan ho so tu folder goc, vi du: "Chi cuc an toan ve sinh thuc pham/hopso01/hoso01"
-            folder_path = str(hoso.original_folder_path).replace('\\', '/').replace(':', '_')
-            folder_path = folder_path.lstrip('/')
-        else:
-            # Fallback: dung arc_file_code
-            folder_path = hoso.arc_file_code
-        
-        # Ten goi AIP lay tu OBJID (thay : -> _)
+        folder_path = package_folder_path(hoso)
         aip_package_name = hoso.objid.replace(':', '_')
-        
-        # Ket hop: duong_dan_ho_so / ten_goi_AIP
-        package_id = f"{folder_path}/{aip_package_name}"
+        package_id = package_id_for(hoso)
         
         logger.info(f"Bat dau xay dung package: {package_id}")
         logger.info(f"  - Duong dan ho so: {folder_path}")  
@@ -227,29 +604,45 @@ class PackageBuilder:
         summary.total_hoso = 1
         
         try:
+            if self.cleanup_folders and self.config.stream_zip:
+                # Folder se bi xoa ngay sau khi nen -> ghi thang vao ZIP/tar, khong tao thu muc
+                zip_path, manifest, success_files, error_files = self.build_package_streamed(
+                    hoso, pdf_root, output_dir, package_id)
+                summary.total_files = success_files + error_files
+                summary.total_size_mb = manifest.total_size / (1024 * 1024)
+                summary.manifest = manifest
+                summary.successful_builds = 1
+                summary.failed_builds = 0
+                summary.build_time_seconds = (datetime.now() - start_time).total_seconds()
+                logger.info(f"Xay dung thanh cong package {package_id} trong {summary.build_time_seconds:.2f}s")
+                logger.info(f"Package size: {summary.total_size_mb:.2f} MB")
+                logger.info(f"{self.container_format.upper()} file: {zip_path.name}")
+                return summary
+            
             # 1. Tao cau truc thu muc
             dirs = self.create_package_structure(output_dir, package_id)
+            sink = DirectorySink(dirs['root'])
             
             # 2. Sao chep file PDF
-            success_files, error_files = self.copy_pdf_files(hoso, pdf_root, dirs['rep1_data'])
+            success_files, error_files = self.copy_pdf_files(hoso, pdf_root, dirs['rep1_data'], sink.manifest)
             summary.total_files = success_files + error_files
             
             if success_files == 0:
                 raise Exception(f"Khong sao chep duoc file nao cho ho so {hoso.arc_file_code}")
             
             # 3. Sao chep schema files (Enhanced design)
-            self.copy_schema_files(dirs['schemas'])
+            self.copy_schema_files(sink)
             
             # 4. Sinh metadata XML
-            self.generate_metadata_files(hoso, package_id, dirs)
+            self.generate_metadata_files(hoso, package_id, sink)
             
-            # 5. Tinh toan kich thuoc
-            package_size = self._calculate_package_size(dirs['root'])
-            summary.total_size_mb = package_size / (1024 * 1024)  # Convert to MB
+            # 5. Kich thuoc lay tu manifest (ghi nhan luc ghi, khong duyet lai thu muc)
+            summary.total_size_mb = sink.manifest.total_size / (1024 * 1024)  # Convert to MB
+            summary.manifest = sink.manifest
             
-            # 6. Tao file ZIP - Ten file ZIP theo ten goi AIP (OBJID)
+            # 6. Tao file ZIP (hoac tar/tar.zst) - Ten file theo ten goi AIP (OBJID)
             # Vi du: Chi cuc.../hopso01/hoso01/urn_uuid_xxx.zip
-            zip_path = self.create_zip_package(dirs['root'])
+            zip_path = self.create_package_archive(dirs['root'], sink.manifest)
             
             # 7. Xoa folder AIP neu co tuy chon cleanup
             if self.cleanup_folders:
@@ -268,7 +661,7 @@ class PackageBuilder:
             
             logger.info(f"Xay dung thanh cong package {package_id} trong {summary.build_time_seconds:.2f}s")
             logger.info(f"Package size: {summary.total_size_mb:.2f} MB")
-            logger.info(f"ZIP file: {zip_path.name}")
+            logger.info(f"{self.container_format.upper()} file: {zip_path.name}")
             
             return summary
             
@@ -283,6 +676,179 @@ class PackageBuilder:
             logger.error(f"Loi xay dung package {package_id}: {e}")
             return summary
     
+    def build_package_streamed(self, hoso: HoSo, pdf_root: Path, output_dir: Path,
+                               package_id: str) -> Tuple[Path, PackageManifest, int, int]:
+        """
+        Xay dung goi AIP ghi thang vao file dong goi (khong tao thu muc trung gian)
+        
+        PDF duoc doc 1 lan: vua tinh checksum vua ghi vao ZIP/tar. Schema va metadata
+        duoc ghi vao cung file; noi dung giong goi tao tu thu muc.
+        
+        Returns:
+            Tuple[Path, PackageManifest, int, int]: (duong dan file dong goi, manifest, so file thanh cong, so file loi)
+        """
+        package_dir = output_dir / package_id
+        zip_path = container_path(package_dir, self.container_format)
+        logger.info(f"Tao file {self.container_format} (stream, khong tao folder): {zip_path}")
+        
+        if self.container_format == CONTAINER_ZIP:
+            sink = ZipStreamSink(zip_path, package_dir.name, policy=self.compression_policy)
+        else:
+            sink = TarStreamSink(zip_path, package_dir.name, self.container_format,
+                                 zstd_level=self.config.zstd_level, zstd_threads=self.config.zstd_threads)
+        # Member payload da ghi trong goi nay: sha256 -> ZipInfo/TarInfo
+        written: Dict[str, Any] = {}
+        try:
+            success_files, error_files = self.stream_pdf_files(hoso, pdf_root, sink, written)
+            if success_files == 0:
+                raise Exception(f"Khong sao chep duoc file nao cho ho so {hoso.arc_file_code}")
+            
+            self.copy_schema_files(sink)
+            self.generate_metadata_files(hoso, package_id, sink)
+            sink.close()
+        except Exception:
+            sink.abort()
+            raise
+        
+        # ZIP da dong hoan chinh -> cac goi sau co the dung lai member
+        if self.content_index and isinstance(sink, ZipStreamSink):
+            for sha256, zinfo in written.items():
+                self.content_index.add_zip_member(sha256, zip_path, zinfo)
+        
+        zip_size_mb = zip_path.stat().st_size / (1024 * 1024)
+        logger.info(f"Tao thanh cong file {self.container_format}: {zip_path.name} ({zip_size_mb:.2f} MB)")
+        return zip_path, sink.manifest, success_files, error_files
+    
+    def stream_pdf_files(self, hoso: HoSo, pdf_root: Path, sink: Union[ZipStreamSink, TarStreamSink],
+                         written: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        Ghi cac file PDF thang vao ZIP/tar (representations/rep1/data)
+        
+        Returns:
+            Tuple[int, int]: (so_file_thanh_cong, so_file_loi)
+        """
+        logger.info(f"Ghi file PDF vao ZIP cho ho so: {hoso.arc_file_code}")
+        if self.payload_mode != PAYLOAD_MODE_COPY:
+            logger.debug(f"Ghi thang vao ZIP: bo qua payload mode {self.payload_mode}")
+        
+        success_count = 0
+        error_count = 0
+        
+        for tailieu in hoso.tai_lieu:
+            if not tailieu.duongDanFile:
+                logger.warning(f"Tai lieu khong co duongDanFile: {tailieu.trich_yeu}")
+                error_count += 1
+                continue
+            
+            source_path = pdf_root / tailieu.duongDanFile.lstrip('\\/')
+            try:
+                if not source_path.exists():
+                    logger.error(f"File khong ton tai: {source_path}")
+                    error_count += 1
+                    continue
+                
+                # Ten da co trong ZIP -> them suffix (khong ghi de duoc member ZIP)
+                rel = f"{REP1_DATA_REL}/{source_path.name}"
+                counter = 1
+                while sink.exists(rel):
+                    rel = f"{REP1_DATA_REL}/{source_path.stem}_{counter:03d}{source_path.suffix}"
+                    counter += 1
+                
+                self._stream_payload(tailieu, source_path, sink, rel, written)
+                
+                success_count += 1
+                logger.debug(f"Ghi vao ZIP thanh cong: {source_path} -> {rel}")
+                
+            except ChecksumMismatchError as e:
+                logger.error(f"Loi checksum file {source_path}: {e}")
+                error_count += 1
+                continue
+                
+            except (OSError, zipfile.BadZipFile) as e:
+                logger.error(f"Loi ghi file {source_path} vao ZIP: {e}")
+                raise
+        
+        logger.info(f"Ghi PDF vao ZIP xong: {success_count} thanh cong, {error_count} loi")
+        return success_count, error_count
+    
+    def _stream_payload(self, tailieu: TaiLieu, source_path: Path, sink: Union[ZipStreamSink, TarStreamSink],
+                        rel: str, written: Dict[str, Any]) -> None:
+        """
+        Ghi 1 file PDF vao ZIP/tar va cap nhat size/checksum/so trang vao tailieu
+        
+        Cache hit: dung lai member da nen (cung ZIP hoac goi truoc) neu co, neu khong thi nen.
+        Cache miss: nen va tinh checksum trong cung 1 lan doc nguon. Rieng tar (khong bo
+        duoc member da ghi) co checksum ky vong thi kiem tra truoc khi ghi.
+        """
+        stream_method = f"{sink.container.split('.')[0]}_stream"
+        expected_sha256 = self._expected_sha256(tailieu)
+        level = ProbeLevel.HASH
+        if self.probe_level == ProbeLevel.TEXT or (self.probe_level >= ProbeLevel.STRUCTURE and not tailieu.so_trang):
+            level = self.probe_level
+        
+        cached = None
+        if self.probe_cache:
+            cached = self.probe_cache.get(source_path, level, required_digests=self.extra_fixity)
+        if cached:
+            if expected_sha256 and normalize_checksum(expected_sha256) != cached['sha256']:
+                raise ChecksumMismatchError(source_path, normalize_checksum(expected_sha256), cached['sha256'])
+            
+            size, sha256, pages = cached['size'], cached['sha256'], cached['pages']
+            digests = {a: cached['digests'][a] for a in ['SHA-256', *self.extra_fixity]}
+            if (self.content_index and isinstance(sink, ZipStreamSink)
+                    and self._write_reused_member(sink.zipf, sink.zip_path, sha256, sink.arcname(rel), written)):
+                method = 'zip_reuse'
+            else:
+                with open(source_path, 'rb') as src, sink.open_member(rel, source_path) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                method = stream_method
+            sink.record_member(rel, source_path, sha256)
+        else:
+            if expected_sha256 and not sink.can_discard:
+                with open(source_path, 'rb') as src:
+                    _, digests = stream_copy_and_hash(src, None)
+                if normalize_checksum(expected_sha256) != digests['SHA-256']:
+                    raise ChecksumMismatchError(source_path, normalize_checksum(expected_sha256), digests['SHA-256'])
+            with open(source_path, 'rb') as src, sink.open_member(rel, source_path) as dst:
+                size, digests = stream_copy_and_hash(src, dst, algorithms=['SHA-256', *self.extra_fixity])
+            sha256 = digests['SHA-256']
+            if expected_sha256 and normalize_checksum(expected_sha256) != sha256:
+                sink.discard_last()
+                raise ChecksumMismatchError(source_path, normalize_checksum(expected_sha256), sha256)
+            sink.record_member(rel, source_path, sha256)
+            method = stream_method
+            
+            # Khong co file dich -> doc cau truc tu file nguon (chi khi can so trang/text)
+            pages = None
+            file_info = None
+            if level >= ProbeLevel.STRUCTURE:
+                file_info = self.pdf_probe.probe_structure(source_path, with_text=level >= ProbeLevel.TEXT)
+                pages = file_info.pages
+            
+            if self.probe_cache:
+                if file_info is not None and not file_info.error:
+                    self.probe_cache.put(
+                        source_path, sha256, level, pages=pages,
+                        is_encrypted=file_info.is_encrypted, has_text=file_info.has_text,
+                        pdf_version=file_info.pdf_version, digests=digests
+                    )
+                else:
+                    self.probe_cache.put(source_path, sha256, ProbeLevel.HASH, digests=digests)
+        
+        written.setdefault(sha256, sink.member(rel))
+        self.copy_methods[method] += 1
+        logger.debug(f"Payload {rel}: {method}")
+        
+        # Khong co file trong output -> file_path tro toi file nguon
+        tailieu.file_path = source_path
+        tailieu.filename = Path(rel).name
+        tailieu.file_size = size
+        tailieu.checksum = sha256
+        tailieu.checksums = digests
+        
+        if pages and not tailieu.so_trang:
+            tailieu.so_trang = pages
+    
     def build_single_package_dict(self, hoso: HoSo, output_dir: Path, pdf_root: Path) -> Dict[str, Any]:
         """
         Xay dung 1 package va tra ve dict format cho batch processing
@@ -291,16 +857,7 @@ class PackageBuilder:
             summary = self.build_single_package(hoso, pdf_root, output_dir)
             
             # Su dung logic giong nhu build_single_package de tao package_id  
-            if hasattr(hoso, 'original_folder_path') and hoso.original_folder_path:
-                folder_path = str(hoso.original_folder_path).replace('\\', '/').replace(':', '_')
-                folder_path = folder_path.lstrip('/')
-            else:
-                folder_path = hoso.arc_file_code
-            
-            # Ten goi AIP lay tu OBJID
-            aip_package_name = hoso.objid.replace(':', '_')
-            package_id = f"{folder_path}/{aip_package_name}"
-            
+            package_id = package_id_for(hoso)
             package_path = output_dir / package_id
             
             return {
@@ -311,6 +868,7 @@ class PackageBuilder:
                 'size_mb': summary.total_size_mb,
                 'build_time': summary.build_time_seconds,
                 'files_processed': summary.total_files,
+                'manifest': summary.manifest,
                 'error': summary.errors[0] if summary.errors else None
             }
             
@@ -323,6 +881,7 @@ class PackageBuilder:
                 'size_mb': 0.0,
                 'build_time': 0.0,
                 'files_processed': 0,
+                'manifest': None,
                 'error': str(e)
             }
     
@@ -339,6 +898,14 @@ class PackageBuilder:
         total_summary = BuildSummary()
         total_summary.total_hoso = len(hoso_list)
         
+        # Moc thong ke cache truoc khi build (cache co the dung chung nhieu lan goi)
+        cache_hits_start = self.probe_cache.hits if self.probe_cache else 0
+        cache_misses_start = self.probe_cache.misses if self.probe_cache else 0
+        hash_start = hash_stats.snapshot()
+        dedup_start = self.content_index.get_stats() if self.content_index else None
+        copy_methods_start = Counter(self.copy_methods)
+        compression_start = self.compression_policy.stats.snapshot()
+        
         for i, hoso in enumerate(hoso_list, 1):
             logger.info(f"Xay dung package {i}/{len(hoso_list)}: {hoso.arc_file_code}")
             
@@ -360,66 +927,157 @@ class PackageBuilder:
         end_time = datetime.now()
         total_summary.build_time_seconds = (end_time - start_time).total_seconds()
         
+        if self.probe_cache:
+            total_summary.probe_cache_hits = self.probe_cache.hits - cache_hits_start
+            total_summary.probe_cache_misses = self.probe_cache.misses - cache_misses_start
+            logger.info(f"Probe cache: {total_summary.probe_cache_hits} hit, {total_summary.probe_cache_misses} miss")
+        
+        hash_end = hash_stats.snapshot()
+        hashed_bytes = hash_end['bytes'] - hash_start['bytes']
+        hash_seconds = hash_end['seconds'] - hash_start['seconds']
+        total_summary.hashed_mb = hashed_bytes / (1024 * 1024)
+        if hash_seconds > 0:
+            total_summary.hash_mb_per_second = total_summary.hashed_mb / hash_seconds
+        logger.info(f"Hash: {total_summary.hashed_mb:.2f} MB, {total_summary.hash_mb_per_second:.1f} MB/s")
+        
+        total_summary.copy_methods = dict(self.copy_methods - copy_methods_start)
+        logger.info(f"Phuong thuc sao chep: {total_summary.copy_methods}")
+        
+        compression = summarize_compression(self.compression_policy.stats.snapshot(), compression_start)
+        total_summary.compression = compression['types']
+        total_summary.compression_seconds_saved = compression['seconds_saved']
+        logger.info(f"Nen ZIP: {total_summary.compression}, tiet kiem ~{total_summary.compression_seconds_saved:.2f}s")
+        
+        total_summary.template_timings = self.xml_generator.stats()
+        
+        if self.content_index:
+            dedup_end = self.content_index.get_stats()
+            total_summary.dedup_files = dedup_end['duplicates'] - dedup_start['duplicates']
+            total_summary.dedup_saved_mb = (dedup_end['bytes_saved'] - dedup_start['bytes_saved']) / (1024 * 1024)
+            total_summary.zip_members_reused = dedup_end['zip_members_reused'] - dedup_start['zip_members_reused']
+            logger.info(f"Dedup: {total_summary.dedup_files} file trung, tiet kiem {total_summary.dedup_saved_mb:.2f} MB, "
+                        f"{total_summary.zip_members_reused} member ZIP dung lai")
+        
         logger.info(f"Hoan tat xay dung: {total_summary.successful_builds}/{total_summary.total_hoso} thanh cong")
         logger.info(f"Tong thoi gian: {total_summary.build_time_seconds:.2f}s")
         logger.info(f"Tong kich thuoc: {total_summary.total_size_mb:.2f} MB")
         
         return total_summary
     
-    def _calculate_package_size(self, package_dir: Path) -> int:
-        """Tinh tong kich thuoc package (bytes)"""
-        total_size = 0
-        
-        try:
-            for file_path in package_dir.rglob('*'):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-        except Exception as e:
-            logger.warning(f"Loi tinh kich thuoc package: {e}")
-        
-        return total_size
-
-    def copy_schema_files(self, schemas_dir: Path):
+    def copy_schema_files(self, sink: PackageSink):
         """
-        Sao chep cac file XSD schema vao thu muc schemas/
+        Dat cac file XSD schema vao thu muc schemas/
         Theo thiet ke moi, can cac schema: METS, EAD, PREMIS
+        
+        Schema da nap san trong bo nho (SchemaAssets, 1 lan moi process): thu muc
+        nhan hardlink toi ban da ghi truoc do (hoac ghi tu bo nho), ZIP/tar ghi thang.
         """
         logger.info("Sao chep cac file schema XSD")
         
-        # Duong dan den thu muc schemas trong project
-        project_schemas = Path(__file__).parent / 'schemas'
-
         try:
-            # Copy tất cả các file .xsd trong thư mục schemas
-            for source_path in project_schemas.glob('*.xsd'):
-                dest_path = schemas_dir / source_path.name
-                shutil.copy(source_path, dest_path)
-                logger.info(f"Da copy schema: {source_path.name}")
+            for name in self.schema_assets.names():
+                rel = f"{SCHEMAS_REL}/{name}"
+                schema = self.schema_assets.get(name)
+                if isinstance(sink, DirectorySink):
+                    target = sink.path(rel)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    self.schema_assets.place(name, target)
+                    sink.manifest.add(rel, schema.size, schema.sha256)
+                else:
+                    sink.write_bytes(rel, schema.data, schema.sha256)
+                logger.info(f"Da copy schema: {name}")
         except Exception as e:
             logger.error(f"Loi sao chep schema files: {e}")
             raise
 
-    def create_zip_package(self, package_dir: Path) -> Path:
+    def create_package_archive(self, package_dir: Path, manifest: Optional[PackageManifest] = None) -> Path:
+        """
+        Dong goi thu muc AIP theo Config.container_format (zip, tar, tar.zst)
+        
+        Returns:
+            Path cua file da tao (ten theo ten goi AIP, duoi theo dinh dang)
+        """
+        if self.container_format == CONTAINER_ZIP:
+            return self.create_zip_package(package_dir, manifest)
+        return self.create_tar_package(package_dir, manifest)
+    
+    def _package_files(self, package_dir: Path, manifest: Optional[PackageManifest]) -> List[Path]:
+        """File cua goi theo thu tu co dinh: tu manifest, khong co thi duyet thu muc"""
+        if manifest is not None:
+            return [package_dir / rel for rel in manifest.paths()]
+        return sorted(p for p in package_dir.rglob('*') if p.is_file())
+    
+    def create_tar_package(self, package_dir: Path, manifest: Optional[PackageManifest] = None) -> Path:
+        """
+        Tao file tar/tar.zst cho AIP package (ghi stream, khong tao ban sao tam)
+        
+        Args:
+            package_dir: Duong dan thu muc package
+            manifest: Danh sach file da ghi (None = duyet thu muc)
+            
+        Returns:
+            Path cua file da tao
+        """
+        tar_path = container_path(package_dir, self.container_format)
+        logger.info(f"Tao file {self.container_format}: {tar_path}")
+        try:
+            write_tar_package(package_dir, tar_path, self.container_format,
+                              zstd_level=self.config.zstd_level, zstd_threads=self.config.zstd_threads,
+                              files=self._package_files(package_dir, manifest))
+        except Exception as e:
+            logger.error(f"Loi tao file {self.container_format}: {e}")
+            raise
+        tar_size_mb = tar_path.stat().st_size / (1024 * 1024)
+        logger.info(f"Tao thanh cong file {self.container_format}: {tar_path.name} ({tar_size_mb:.2f} MB)")
+        return tar_path
+    
+    def create_zip_package(self, package_dir: Path, manifest: Optional[PackageManifest] = None) -> Path:
         """
         Tao file ZIP cho AIP package
         
         Args:
             package_dir: Duong dan thu muc package
+            manifest: Danh sach file da ghi (None = duyet thu muc)
             
         Returns:
             Path cua file ZIP da tao
         """
-        zip_path = package_dir.parent / (package_dir.name + '.zip')
+        zip_path = container_path(package_dir, CONTAINER_ZIP)
         logger.info(f"Tao file ZIP: {zip_path}")
+        # Member payload da ghi trong ZIP nay: sha256 -> ZipInfo
+        written: Dict[str, zipfile.ZipInfo] = {}
+        # Noi dung da dua vao hang doi ghi cua ZIP nay (ban sau dung lai member cua ban dau)
+        queued = set()
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
-                # Duyet tat ca file trong package directory
-                for file_path in package_dir.rglob('*'):
-                    if file_path.is_file():
-                        # Tinh duong dan tuong doi so voi package directory
-                        # Giu ten folder package trong ZIP
-                        arcname = Path(package_dir.name) / file_path.relative_to(package_dir)
-                        zipf.write(file_path, arcname)
+            # Tat ca file trong package, thu tu co dinh
+            files = self._package_files(package_dir, manifest)
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf, \
+                    ParallelZipWriter(zipf, self.compression_policy, self.zip_workers) as writer:
+                for file_path in files:
+                    # Tinh duong dan tuong doi so voi package directory
+                    # Giu ten folder package trong ZIP
+                    arcname = str(Path(package_dir.name) / file_path.relative_to(package_dir))
+                    sha256 = self.content_index.digest_for(file_path) if self.content_index else None
+                    if not sha256:
+                        writer.add_file(file_path, arcname)
+                        continue
+                    
+                    def register(zinfo: zipfile.ZipInfo, sha256: str = sha256) -> None:
+                        written.setdefault(sha256, zinfo)
+                    
+                    if sha256 in queued or self.content_index.zip_member(sha256):
+                        # Dung lai bytes da nen khi toi luot ghi (ban dau tien da nam trong ZIP)
+                        def reuse(file_path: Path = file_path, arcname: str = arcname, sha256: str = sha256):
+                            if self._write_reused_member(zipf, zip_path, sha256, arcname, written):
+                                return None
+                            return writer.write_file(file_path, arcname)
+                        writer.add_call(reuse, register)
+                    else:
+                        queued.add(sha256)
+                        writer.add_file(file_path, arcname, register)
+            # ZIP da dong hoan chinh -> cac goi sau co the dung lai member
+            for sha256, zinfo in written.items():
+                self.content_index.add_zip_member(sha256, zip_path, zinfo)
             # Tinh kich thuoc file ZIP
             zip_size_mb = zip_path.stat().st_size / (1024 * 1024)
             logger.info(f"Tao thanh cong file ZIP: {zip_path.name} ({zip_size_mb:.2f} MB)")
@@ -431,80 +1089,31 @@ class PackageBuilder:
                 zip_path.unlink()
             raise
     
-    def _update_placeholders_in_mets(self, mets_path: Path, package_dir: Path):
-        """Update placeholders in METS files with actual file info"""
-        import re
+    def _write_reused_member(self, zipf: zipfile.ZipFile, zip_path: Path, sha256: str,
+                             arcname: str, written: Dict[str, zipfile.ZipInfo]) -> bool:
+        """
+        Ghi payload trung noi dung vao ZIP bang bytes da nen cua lan xuat hien dau tien
+        
+        Returns:
+            True neu da ghi, False neu chua co member de dung lai (can nen binh thuong)
+        """
+        if not RAW_WRITE_SUPPORTED:
+            return False
+        if sha256 in written:
+            # Trung trong cung ZIP: doc lai tu chinh file dang ghi
+            zipf.fp.flush()
+            source_zip, source_info = zip_path, written[sha256]
+        else:
+            member = self.content_index.zip_member(sha256)
+            if member is None:
+                return False
+            source_zip, source_info = member
         
         try:
-            mets_content = mets_path.read_text(encoding='utf-8')
-            
-            # Update PREMIS file info in main METS
-            premis_file = package_dir / "metadata" / "preservation" / "PREMIS.xml" 
-            if premis_file.exists():
-                premis_size = premis_file.stat().st_size
-                premis_checksum = self._calculate_checksum(premis_file)
-                
-                mets_content = mets_content.replace('PLACEHOLDER_PREMIS_SIZE', str(premis_size))
-                mets_content = mets_content.replace('PLACEHOLDER_PREMIS_CHECKSUM', premis_checksum)
-            
-            # Update PREMIS_rep1 file info in rep1 METS
-            premis_rep1_file = package_dir / "representations" / "rep1" / "metadata" / "preservation" / "PREMIS_rep1.xml"
-            if premis_rep1_file.exists():
-                rep1_size = premis_rep1_file.stat().st_size
-                rep1_checksum = self._calculate_checksum(premis_rep1_file)
-                
-                mets_content = mets_content.replace('PLACEHOLDER_PREMIS_REP_SIZE', str(rep1_size))
-                mets_content = mets_content.replace('PLACEHOLDER_PREMIS_REP_CHECKSUM', rep1_checksum)
-            
-            # Update EAD_doc file info 
-            ead_descriptive_dir = package_dir / "representations" / "rep1" / "metadata" / "descriptive"
-            if ead_descriptive_dir.exists():
-                for ead_file in ead_descriptive_dir.glob("EAD_doc_*.xml"):
-                    file_id = ead_file.stem.replace("EAD_doc_", "")
-                    ead_size = ead_file.stat().st_size
-                    ead_checksum = self._calculate_checksum(ead_file)
-                    
-                    mets_content = mets_content.replace(f'PLACEHOLDER_EAD_DOC_{file_id}_SIZE', str(ead_size))
-                    mets_content = mets_content.replace(f'PLACEHOLDER_EAD_DOC_{file_id}_CHECKSUM', ead_checksum)
-            
-            # Update Representation file info in main METS
-            representation_file = package_dir / "representations" / "rep1" / "METS.xml"
-            if representation_file.exists():
-                rep_size = representation_file.stat().st_size
-                rep_checksum = self._calculate_checksum(representation_file)
-
-                mets_content = mets_content.replace('PLACEHOLDER_REP_CHECKSUM', rep_checksum)
-            
-            # Update PREMIS schema checksum in main METS
-            premis_schema_file = package_dir / "schemas" / "premis.xsd"
-            if premis_schema_file.exists():
-                premis_schema_checksum = self._calculate_checksum(premis_schema_file)
-                mets_content = mets_content.replace('PLACEHOLDER_SCHEMA_PREMIS_CHECKSUM', premis_schema_checksum)
-            
-            # Update METS schema checksum in main METS
-            mets_schema_file = package_dir / "schemas" / "mets.xsd"
-            if mets_schema_file.exists():
-                mets_schema_checksum = self._calculate_checksum(mets_schema_file)
-                mets_content = mets_content.replace('PLACEHOLDER_SCHEMA_METS_CHECKSUM', mets_schema_checksum)
-
-            # Update EAD schema checksum in main METS
-            ead_schema_file = package_dir / "schemas" / "ead.xsd"
-            if ead_schema_file.exists():
-                ead_schema_checksum = self._calculate_checksum(ead_schema_file)
-                mets_content = mets_content.replace('PLACEHOLDER_SCHEMA_EAD_CHECKSUM', ead_schema_checksum)
-            
-            mets_path.write_text(mets_content, encoding='utf-8')
-            logger.debug(f"Updated placeholders in {mets_path}")
-            
-        except Exception as e:
-            logger.warning(f"Error updating placeholders in {mets_path}: {e}")
-    
-    def _calculate_checksum(self, file_path: Path) -> str:
-        """Calculate SHA-256 checksum for a file"""
-        import hashlib
-        try:
-            with open(file_path, 'rb') as f:
-                return hashlib.sha256(f.read()).hexdigest()
-        except Exception as e:
-            logger.warning(f"Could not calculate checksum for {file_path}: {e}")
-            return "0" * 64
+            copy_raw_member(zipf, source_zip, source_info, str(arcname))
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.debug(f"Khong dung lai duoc member ZIP {source_info.filename} tu {source_zip}: {e}")
+            return False
+        
+        self.content_index.record_zip_reuse(source_info.compress_size)
+        return True
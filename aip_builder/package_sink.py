@@ -0,0 +1,293 @@
+"""
+Package Sink - Noi ghi cac file cua 1 goi AIP
+
+Chuc nang chinh:
+- DirectorySink: ghi ra cay thu muc AIP (nhu truoc day), ZIP duoc tao sau
+- ZipStreamSink: ghi thang vao file ZIP, khong tao thu muc trung gian
+  (dung khi --cleanup: folder se bi xoa ngay sau khi nen)
+- TarStreamSink: tuong tu cho tar/tar.zst
+- Duong dan trong goi luon la duong dan tuong doi dang posix (vd: 'metadata/preservation/PREMIS.xml')
+- Metadata XML da hoan chinh trong bo nho truoc khi ghi: moi file ghi dung 1 lan
+- write_stream: ghi XML render dang stream tung block, hash trong luc ghi
+  (bo nho khong tang theo so tai lieu cua ho so)
+- DirectorySink ghi file song song duoc (write_file + record theo thu tu), ZIP/tar ghi tuan tu
+- Moi sink ghi nhan file da ghi vao PackageManifest (kich thuoc, SHA-256, vai tro)
+"""
+
+import hashlib
+import logging
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from .containers import CONTAINER_TAR, CONTAINER_ZIP, DEFAULT_ZSTD_LEVEL, TAR_SPOOL_MAX_MEMORY, TarStreamWriter
+from .manifest import PackageManifest
+from .utils.zip_compression import CompressionPolicy
+from .utils.zip_compat import RAW_WRITE_SUPPORTED, set_compress_level
+from .utils.zip_writer import discard_member
+
+logger = logging.getLogger(__name__)
+
+
+class DirectorySink:
+    """Ghi file cua goi AIP ra thu muc (moi file ghi duoc ghi nhan vao manifest)"""
+
+    # write_file goi song song duoc tu nhieu thread (moi thread 1 file rieng);
+    # ghi nhan manifest (record) van tren 1 thread, theo thu tu
+    concurrent_writes = True
+
+    def __init__(self, root: Union[str, Path], manifest: Optional[PackageManifest] = None):
+        self.root = Path(root)
+        self.manifest = manifest if manifest is not None else PackageManifest()
+
+    def path(self, rel: str) -> Path:
+        return self.root / rel
+
+    def write_bytes(self, rel: str, data: bytes, checksum: Optional[str] = None) -> None:
+        """Ghi file tu bo nho (checksum = SHA-256 da tinh san, None thi tinh tu data)"""
+        self.write_file(rel, data)
+        self.record(rel, len(data), checksum or hashlib.sha256(data).hexdigest())
+
+    def write_file(self, rel: str, data: bytes) -> None:
+        """Chi ghi noi dung file, chua ghi nhan vao manifest (xem record)"""
+        path = self.path(rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def record(self, rel: str, size: int, checksum: str) -> None:
+        """Ghi nhan file da ghi bang write_file vao manifest"""
+        self.manifest.add(rel, size, checksum)
+
+    def write_stream(self, rel: str, blocks: Iterable[bytes]) -> Tuple[int, str]:
+        """Ghi file tung block (render stream), tra ve (kich thuoc, SHA-256) tinh trong luc ghi"""
+        path = self.path(rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'wb') as f:
+            for block in blocks:
+                f.write(block)
+                digest.update(block)
+                size += len(block)
+        checksum = digest.hexdigest()
+        self.manifest.add(rel, size, checksum)
+        return size, checksum
+
+    def exists(self, rel: str) -> bool:
+        return rel in self.manifest
+
+
+class _ArchiveStreamSink:
+    """
+    Phan chung cua sink ghi thang vao file dong goi (ZIP/tar)
+
+    Moi file ghi ngay khi them, dung 1 lan (metadata da hoan chinh truoc khi ghi).
+    Noi dung da ghi khong giu lai: chi ghi nhan member va manifest.
+    """
+
+    container = ""
+    # Bo duoc member vua ghi khong (checksum sai sau khi ghi)
+    can_discard = False
+    # 1 file dong goi: chi ghi tuan tu tren 1 thread
+    concurrent_writes = False
+
+    def __init__(self, archive_path: Union[str, Path], arc_root: str,
+                 manifest: Optional[PackageManifest] = None):
+        self.archive_path = Path(archive_path)
+        self.arc_root = arc_root
+        self.manifest = manifest if manifest is not None else PackageManifest()
+        self._members: Dict[str, object] = {}
+
+    @property
+    def total_size(self) -> int:
+        """Tong kich thuoc chua nen cua cac file trong goi"""
+        return self.manifest.total_size
+
+    def arcname(self, rel: str) -> str:
+        return f"{self.arc_root}/{rel}"
+
+    def exists(self, rel: str) -> bool:
+        return rel in self.manifest
+
+    def member(self, rel: str):
+        """ZipInfo/TarInfo cua file da ghi vao goi (payload/schema)"""
+        return self._members.get(rel)
+
+    def _record(self, rel: str, info, size: int, source: Union[str, Path, bytes],
+                checksum: Optional[str] = None):
+        self._members[rel] = info
+        if isinstance(source, bytes) and not checksum:
+            checksum = hashlib.sha256(source).hexdigest()
+        self.manifest.add(rel, size, checksum)
+        return info
+
+
+class ZipStreamSink(_ArchiveStreamSink):
+    """
+    Ghi file cua goi AIP thang vao ZIP
+
+    Moi file duoc nen ngay khi them.
+    Cach nen tung member theo CompressionPolicy (PDF -> STORED, XML -> DEFLATE/LZMA).
+    """
+
+    container = CONTAINER_ZIP
+    # Bo member can ghi raw (zip_compat); khong ho tro thi kiem tra checksum truoc khi ghi nhu tar
+    can_discard = RAW_WRITE_SUPPORTED
+
+    def __init__(self, zip_path: Union[str, Path], arc_root: str,
+                 policy: Optional[CompressionPolicy] = None, manifest: Optional[PackageManifest] = None):
+        super().__init__(zip_path, arc_root, manifest)
+        self.zip_path = self.archive_path
+        self.policy = policy or CompressionPolicy()
+        self.zip_path.parent.mkdir(parents=True, exist_ok=True)
+        self.zipf = zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6)
+        self._open_entry = None  # (EntryCompression, thoi diem bat dau) cua member dang ghi stream
+
+    def add_file(self, rel: str, source: Union[str, Path]) -> zipfile.ZipInfo:
+        zinfo = self.policy.write(self.zipf, source, self.arcname(rel))
+        return self._record(rel, zinfo, zinfo.file_size, source)
+
+    def write_bytes(self, rel: str, data: bytes, checksum: Optional[str] = None) -> zipfile.ZipInfo:
+        """Ghi member tu bo nho (checksum = SHA-256 da tinh san, None thi tinh tu data)"""
+        zinfo = self.policy.writestr(self.zipf, self.arcname(rel), data)
+        return self._record(rel, zinfo, len(data), data, checksum)
+
+    def write_stream(self, rel: str, blocks: Iterable[bytes]) -> Tuple[int, str]:
+        """
+        Ghi member tung block (render stream), tra ve (kich thuoc, SHA-256) tinh trong luc ghi
+
+        Noi dung khong giu lai trong bo nho.
+        """
+        entry = self.policy.choose(rel)
+        zinfo = zipfile.ZipInfo(self.arcname(rel), date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = entry.compress_type
+        set_compress_level(zinfo, entry.compresslevel)
+        zinfo.external_attr = 0o600 << 16  # Nhu ZipFile.writestr
+        digest = hashlib.sha256()
+        start = time.perf_counter()
+        with self.zipf.open(zinfo, 'w') as dst:
+            for block in blocks:
+                dst.write(block)
+                digest.update(block)
+        self.policy.stats.record(rel, entry.method, zinfo.file_size, zinfo.compress_size,
+                                 time.perf_counter() - start)
+        checksum = digest.hexdigest()
+        self._members[rel] = zinfo
+        self.manifest.add(rel, zinfo.file_size, checksum)
+        return zinfo.file_size, checksum
+
+    def open_member(self, rel: str, source: Union[str, Path]):
+        """Mo member moi de ghi stream, thuoc tinh (mtime, quyen) lay tu file nguon"""
+        entry = self.policy.choose_for_file(source, rel)
+        zinfo = zipfile.ZipInfo.from_file(source, self.arcname(rel))
+        zinfo.compress_type = entry.compress_type
+        set_compress_level(zinfo, entry.compresslevel)
+        self._open_entry = (entry, time.perf_counter())
+        return self.zipf.open(zinfo, 'w')
+
+    def record_member(self, rel: str, source: Union[str, Path],
+                      checksum: Optional[str] = None) -> zipfile.ZipInfo:
+        """Ghi nhan member vua ghi xong (open_member hoac copy_raw_member)"""
+        zinfo = self.zipf.filelist[-1]
+        if self._open_entry is not None:
+            entry, start = self._open_entry
+            self._open_entry = None
+            self.policy.stats.record(rel, entry.method, zinfo.file_size, zinfo.compress_size,
+                                     time.perf_counter() - start)
+        return self._record(rel, zinfo, zinfo.file_size, source, checksum)
+
+    def discard_last(self) -> None:
+        """Bo member vua ghi (vd: checksum khong khop)"""
+        self._open_entry = None
+        zinfo = self.zipf.filelist[-1]
+        discard_member(self.zipf, zinfo)
+
+    def close(self) -> None:
+        """Dong ZIP (ghi central directory)"""
+        self.zipf.close()
+        logger.debug(f"Da dong ZIP stream: {self.zip_path}")
+
+    def abort(self) -> None:
+        """Dong va xoa ZIP chua hoan chinh"""
+        try:
+            self.zipf.close()
+        except Exception as e:
+            logger.debug(f"Loi dong ZIP {self.zip_path}: {e}")
+        if self.zip_path.exists():
+            self.zip_path.unlink()
+
+
+class TarStreamSink(_ArchiveStreamSink):
+    """
+    Ghi file cua goi AIP thang vao tar/tar.zst
+
+    Payload doc stream tu nguon vao archive (header tar can kich thuoc truoc nen
+    lay tu file nguon). Khong the bo member da ghi trong stream: can kiem tra checksum
+    truoc khi ghi (can_discard = False).
+    """
+
+    def __init__(self, archive_path: Union[str, Path], arc_root: str, container: str = CONTAINER_TAR,
+                 zstd_level: int = DEFAULT_ZSTD_LEVEL, zstd_threads: int = 0,
+                 manifest: Optional[PackageManifest] = None):
+        super().__init__(archive_path, arc_root, manifest)
+        self.container = container
+        self.writer = TarStreamWriter(self.archive_path, container, zstd_level, zstd_threads)
+        self._open_info = None  # TarInfo cua member dang ghi stream
+
+    def add_file(self, rel: str, source: Union[str, Path]) -> tarfile.TarInfo:
+        tarinfo = self.writer.add_file(source, self.arcname(rel))
+        return self._record(rel, tarinfo, tarinfo.size, source)
+
+    def write_bytes(self, rel: str, data: bytes, checksum: Optional[str] = None) -> tarfile.TarInfo:
+        """Ghi member tu bo nho (checksum = SHA-256 da tinh san, None thi tinh tu data)"""
+        tarinfo = self.writer.add_bytes(self.arcname(rel), data)
+        return self._record(rel, tarinfo, len(data), data, checksum)
+
+    def write_stream(self, rel: str, blocks: Iterable[bytes]) -> Tuple[int, str]:
+        """
+        Ghi member tung block (render stream), tra ve (kich thuoc, SHA-256) tinh trong luc ghi
+
+        Header tar can kich thuoc truoc: cac block duoc dem qua file tam
+        (trong bo nho toi TAR_SPOOL_MAX_MEMORY) roi chep vao archive.
+        """
+        digest = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=TAR_SPOOL_MAX_MEMORY) as spool:
+            for block in blocks:
+                spool.write(block)
+                digest.update(block)
+            size = spool.tell()
+            spool.seek(0)
+            tarinfo = self.writer.add_fileobj(self.arcname(rel), spool, size)
+        checksum = digest.hexdigest()
+        self._members[rel] = tarinfo
+        self.manifest.add(rel, size, checksum)
+        return size, checksum
+
+    def open_member(self, rel: str, source: Union[str, Path]):
+        """Mo member moi de ghi stream, du lieu phai dung kich thuoc file nguon"""
+        member = self.writer.open_member(source, self.arcname(rel))
+        self._open_info = member.tarinfo
+        return member
+
+    def record_member(self, rel: str, source: Union[str, Path],
+                      checksum: Optional[str] = None) -> tarfile.TarInfo:
+        """Ghi nhan member vua ghi xong (open_member)"""
+        tarinfo, self._open_info = self._open_info, None
+        return self._record(rel, tarinfo, tarinfo.size, source, checksum)
+
+    def discard_last(self) -> None:
+        """Member da ghi vao stream tar khong bo duoc -> goi khong hop le"""
+        name = self._open_info.name if self._open_info is not None else '?'
+        raise OSError(f"Khong the bo member da ghi trong {self.container}: {name}")
+
+    def close(self) -> None:
+        """Ghi block ket thuc tar va dong archive"""
+        self.writer.close()
+        logger.debug(f"Da dong {self.container} stream: {self.archive_path}")
+
+    def abort(self) -> None:
+        """Dong va xoa archive chua hoan chinh"""
+        self.writer.abort()
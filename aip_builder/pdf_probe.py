@@ -3,18 +3,22 @@ PDF Probe - Module quet va trich thong tin tu file PDF
 
 Chuc nang chinh:
 - Tinh toan SHA-256, size, mtime cho tung PDF
-- Doc so trang su dung PyPDF2
+- Muc do quet (ProbeLevel): stat / hash / structure / text - chi lam phan can thiet
+- Quet song song: hash tren thread pool, parse cau truc tren process pool
+- Doc so trang tu trailer/xref (pdf_trailer), fallback PyPDF2 khi can
 - Ho tro duong dan dai Windows voi \\?\
 - Extract metadata co ban tu PDF
 """
 
-import hashlib
+import concurrent.futures
 import os
+import time
 from pathlib import Path, PurePath
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Iterator, Optional, List, Tuple, TYPE_CHECKING
 import logging
 from dataclasses import dataclass
+from enum import IntEnum
 
 try:
     from PyPDF2 import PdfReader
@@ -25,9 +29,42 @@ except ImportError:
         PdfReader = None
         logging.warning("PyPDF2 khong duoc cai dat. Khong the doc so trang PDF")
 
+from .pdf_trailer import read_trailer_info, PDFTrailerError
+from .utils.hashing import hash_file
+from .utils.name_index import FilenameIndex
+
+if TYPE_CHECKING:
+    from .probe_cache import ProbeCache
+
+# Backend doc cau truc PDF
+PROBE_BACKEND_TRAILER = "trailer"  # Doc header/trailer/xref + /Count, fallback PyPDF2
+PROBE_BACKEND_PYPDF2 = "pypdf2"  # Luon dung PyPDF2
+
 logger = logging.getLogger(__name__)
 
 
+class ProbeLevel(IntEnum):
+    """Muc do quet PDF, moi muc bao gom cac muc thap hon"""
+    STAT = 0  # Ton tai, size, mtime (chi os.stat)
+    HASH = 1  # + SHA-256 (doc toan bo file)
+    STRUCTURE = 2  # + so trang, ma hoa, producer (trailer/PyPDF2)
+    TEXT = 3  # + has_text (trich text trang dau bang PyPDF2)
+    
+    @classmethod
+    def parse(cls, value: "str | int | ProbeLevel") -> "ProbeLevel":
+        """Chuyen ten ('stat', 'hash', ...) hoac so thanh ProbeLevel"""
+        if isinstance(value, str):
+            try:
+                return cls[value.strip().upper()]
+            except KeyError:
+                raise ValueError(f"Probe level khong hop le: {value}")
+        return cls(value)
+
+
+# Ten cac muc cho CLI (click.Choice)
+PROBE_LEVEL_NAMES = [level.name.lower() for level in ProbeLevel]
+
+
 @dataclass
 class PDFInfo:
     """Thong tin ve file PDF"""
@@ -46,42 +83,85 @@ class PDFInfo:
 class PDFProbe:
     """Class quet thong tin file PDF"""
     
-    def __init__(self, use_long_path_prefix: bool = True):
+    def __init__(self, use_long_path_prefix: bool = True, cache: Optional['ProbeCache'] = None,
+                 backend: Optional[str] = None):
         self.use_long_path_prefix = use_long_path_prefix
         self.max_path_length = 240
+        self.cache = cache  # ProbeCache (tuy chon) de bo qua quet lai file khong doi
+        if backend is None:
+            from .config import get_config
+            backend = get_config().pdf_probe_backend
+        self.backend = backend.lower()
+        if self.backend not in (PROBE_BACKEND_TRAILER, PROBE_BACKEND_PYPDF2):
+            raise ValueError(f"PDF probe backend khong hop le: {backend}")
         
-    def probe_file(self, file_path: str | Path) -> PDFInfo:
+    def probe_file(self, file_path: str | Path, level: ProbeLevel = ProbeLevel.STRUCTURE) -> PDFInfo:
         """
-        Quet thong tin chi tiet tu mot file PDF
+        Quet thong tin tu mot file PDF den muc do yeu cau
         
         Args:
             file_path: Duong dan den file PDF
+            level: Muc do quet; cac truong cua muc cao hon de gia tri mac dinh
             
         Returns:
             PDFInfo chua thong tin file
         """
         file_path = Path(file_path)
+        level = ProbeLevel.parse(level)
+        
+        pdf_info, actual_path, done = self._probe_until_hash(file_path, level)
+        if done:
+            return pdf_info
         
+        try:
+            # Doc thong tin cau truc PDF (va text neu can)
+            self._extract_pdf_metadata(actual_path, pdf_info, with_text=level >= ProbeLevel.TEXT)
+            
+            if self.cache is not None:
+                self.cache.put_info(pdf_info, level=level)
+            
+            return pdf_info
+            
+        except Exception as e:
+            logger.error(f"Loi khi quet file {file_path}: {e}")
+            return self._error_info(file_path, str(e))
+    
+    def _probe_until_hash(self, file_path: Path, level: ProbeLevel) -> Tuple[PDFInfo, Optional[Path], bool]:
+        """
+        Thuc hien phan quet den muc HASH (stat, tra cache, tinh SHA-256)
+        
+        Returns:
+            Tuple (PDFInfo, duong dan thuc te, da_xong). da_xong = False nghia la
+            con phai doc cau truc PDF (level >= STRUCTURE va cache miss)
+        """
         # Su dung long path prefix neu can thiet (Windows)
         actual_path = self._get_actual_path(file_path)
         
         try:
             # Kiem tra file co ton tai khong
             if not actual_path.exists():
-                return PDFInfo(
-                    filepath=file_path,
-                    filename=file_path.name,
-                    size=0,
-                    mtime=datetime.now(),
-                    sha256="",
-                    error=f"File khong ton tai: {file_path}"
-                )
+                return self._error_info(file_path, f"File khong ton tai: {file_path}"), None, True
             
             # Thong tin co ban tu OS
             stat_info = actual_path.stat()
             size = stat_info.st_size
             mtime = datetime.fromtimestamp(stat_info.st_mtime)
             
+            if level == ProbeLevel.STAT:
+                return PDFInfo(
+                    filepath=file_path,
+                    filename=file_path.name,
+                    size=size,
+                    mtime=mtime,
+                    sha256=""
+                ), actual_path, True
+            
+            # Tra cuu cache truoc khi tinh lai
+            if self.cache is not None:
+                cached_info = self.cache.get_info(file_path, min_level=level, stat_result=stat_info)
+                if cached_info is not None:
+                    return cached_info, actual_path, True
+            
             # Tinh SHA-256
             sha256 = self._calculate_sha256(actual_path)
             
@@ -94,17 +174,62 @@ class PDFProbe:
                 sha256=sha256
             )
             
-            # Doc thong tin PDF neu PyPDF2 co san
-            if PdfReader:
-                self._extract_pdf_metadata(actual_path, pdf_info)
-            else:
-                logger.warning("PyPDF2 khong co san, bo qua thong tin PDF")
-                pdf_info.error = "PyPDF2 not available"
+            if level >= ProbeLevel.STRUCTURE:
+                return pdf_info, actual_path, False
             
-            return pdf_info
+            if self.cache is not None:
+                self.cache.put_info(pdf_info, level=level)
+            
+            return pdf_info, actual_path, True
             
         except Exception as e:
             logger.error(f"Loi khi quet file {file_path}: {e}")
+            return self._error_info(file_path, str(e)), None, True
+    
+    @staticmethod
+    def _error_info(file_path: Path, error: str) -> PDFInfo:
+        """PDFInfo cho file khong quet duoc"""
+        return PDFInfo(
+            filepath=file_path,
+            filename=file_path.name,
+            size=0,
+            mtime=datetime.now(),
+            sha256="",
+            error=error
+        )
+    
+    def probe_structure(self, file_path: str | Path, with_text: bool = False) -> PDFInfo:
+        """
+        Chi doc cau truc PDF (so trang, ma hoa, text) - khong tinh SHA-256
+
+        Dung khi checksum da duoc tinh o buoc khac (vd: luc sao chep file)
+
+        Args:
+            file_path: Duong dan den file PDF
+            with_text: Trich them text trang dau de xac dinh has_text
+
+        Returns:
+            PDFInfo voi sha256 rong
+        """
+        file_path = Path(file_path)
+        actual_path = self._get_actual_path(file_path)
+
+        try:
+            stat_info = actual_path.stat()
+            pdf_info = PDFInfo(
+                filepath=file_path,
+                filename=file_path.name,
+                size=stat_info.st_size,
+                mtime=datetime.fromtimestamp(stat_info.st_mtime),
+                sha256=""
+            )
+
+            self._extract_pdf_metadata(actual_path, pdf_info, with_text=with_text)
+
+            return pdf_info
+
+        except Exception as e:
+            logger.error(f"Loi khi doc cau truc file {file_path}: {e}")
             return PDFInfo(
                 filepath=file_path,
                 filename=file_path.name,
@@ -113,7 +238,7 @@ class PDFProbe:
                 sha256="",
                 error=str(e)
             )
-    
+
     def _get_actual_path(self, file_path: Path) -> Path:
         """Lay duong dan thuc te, su dung long path prefix neu can"""
         if (self.use_long_path_prefix and 
@@ -131,21 +256,34 @@ class PDFProbe:
     
     def _calculate_sha256(self, file_path: Path) -> str:
         """Tinh SHA-256 checksum cua file"""
-        hash_sha256 = hashlib.sha256()
-        
         try:
-            with open(file_path, 'rb') as f:
-                # Doc file theo chunk de tiet kiem bo nho
-                for chunk in iter(lambda: f.read(8192), b""):
-                    hash_sha256.update(chunk)
-            
-            return hash_sha256.hexdigest()
-            
+            return hash_file(file_path)
         except Exception as e:
             logger.error(f"Loi khi tinh SHA-256 cho {file_path}: {e}")
             return ""
     
-    def _extract_pdf_metadata(self, file_path: Path, pdf_info: PDFInfo) -> None:
+    def _extract_pdf_metadata(self, file_path: Path, pdf_info: PDFInfo, with_text: bool = False) -> None:
+        """Trich xuat metadata tu PDF theo backend da chon"""
+        # has_text can trich text -> chi PyPDF2 lam duoc
+        if self.backend == PROBE_BACKEND_TRAILER and not with_text:
+            try:
+                trailer_info = read_trailer_info(file_path)
+                pdf_info.pages = trailer_info.pages
+                pdf_info.is_encrypted = trailer_info.is_encrypted
+                if trailer_info.producer:
+                    pdf_info.pdf_version = trailer_info.producer
+                return
+            except (PDFTrailerError, OSError) as e:
+                logger.debug(f"Trailer backend khong doc duoc {file_path}, fallback PyPDF2: {e}")
+        
+        if not PdfReader:
+            logger.warning("PyPDF2 khong co san, bo qua thong tin PDF")
+            pdf_info.error = "PyPDF2 not available"
+            return
+        
+        self._extract_pdf_metadata_pypdf2(file_path, pdf_info, with_text)
+    
+    def _extract_pdf_metadata_pypdf2(self, file_path: Path, pdf_info: PDFInfo, with_text: bool = False) -> None:
         """Trich xuat metadata tu PDF su dung PyPDF2"""
         try:
             with open(file_path, 'rb') as f:
@@ -163,7 +301,7 @@ class PDFProbe:
                 
                 # Kiem tra co text khong (doc trang dau tien)
                 try:
-                    if pdf_info.pages and pdf_info.pages > 0:
+                    if with_text and pdf_info.pages and pdf_info.pages > 0:
                         page = reader.pages[0]
                         text = page.extract_text()
                         pdf_info.has_text = bool(text and text.strip())
@@ -174,13 +312,17 @@ class PDFProbe:
             logger.warning(f"Loi khi doc PDF metadata tu {file_path}: {e}")
             pdf_info.error = f"PDF read error: {e}"
     
-    def probe_directory(self, directory: str | Path, pattern: str = "*.pdf") -> List[PDFInfo]:
+    def probe_directory(self, directory: str | Path, pattern: str = "*.pdf",
+                        level: ProbeLevel = ProbeLevel.STRUCTURE,
+                        parallel: bool = False) -> List[PDFInfo]:
         """
         Quet tat ca file PDF trong thu muc
         
         Args:
             directory: Thu muc can quet
             pattern: Pattern file (mac dinh *.pdf)
+            level: Muc do quet cho tung file
+            parallel: Quet song song (ket qua theo thu tu hoan thanh)
             
         Returns:
             List PDFInfo cua tat ca file
@@ -191,71 +333,271 @@ class PDFProbe:
             logger.error(f"Thu muc khong ton tai: {directory}")
             return []
         
+        if parallel:
+            return list(self.iter_probe_directory(directory, pattern, level))
+        
         # Tim tat ca file PDF (bao gom trong sub-directory)
         pdf_files = list(directory.rglob(pattern))
         logger.info(f"Tim thay {len(pdf_files)} file PDF trong {directory}")
         
         results = []
         for pdf_file in pdf_files:
-            pdf_info = self.probe_file(pdf_file)
+            pdf_info = self.probe_file(pdf_file, level)
             results.append(pdf_info)
         
         return results
     
-    def probe_file_list(self, file_paths: List[str | Path]) -> List[PDFInfo]:
+    def probe_file_list(self, file_paths: List[str | Path],
+                        level: ProbeLevel = ProbeLevel.STRUCTURE) -> List[PDFInfo]:
         """
         Quet danh sach file PDF
         
         Args:
             file_paths: Danh sach duong dan file
+            level: Muc do quet cho tung file
             
         Returns:
             List PDFInfo tuong ung
         """
         results = []
         for file_path in file_paths:
-            pdf_info = self.probe_file(file_path)
+            pdf_info = self.probe_file(file_path, level)
             results.append(pdf_info)
         
         return results
+    
+    def iter_probe_directory(self, directory: str | Path, pattern: str = "*.pdf",
+                             level: ProbeLevel = ProbeLevel.STRUCTURE,
+                             **kwargs) -> Iterator[PDFInfo]:
+        """
+        Quet song song tat ca file PDF trong thu muc, tra ve ngay khi tung file xong
+        
+        Danh sach file duoc duyet dan (khong tao list truoc), phu hop thu muc rat lon.
+        Tham so con lai giong iter_probe_files.
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            logger.error(f"Thu muc khong ton tai: {directory}")
+            return iter(())
+        return self.iter_probe_files(directory.rglob(pattern), level, **kwargs)
+    
+    def iter_probe_files(self, file_paths: Iterable[str | Path],
+                         level: ProbeLevel = ProbeLevel.STRUCTURE,
+                         hash_workers: Optional[int] = None,
+                         parse_workers: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Iterator[PDFInfo]:
+        """
+        Quet song song danh sach file PDF, yield PDFInfo theo thu tu hoan thanh
+        
+        - stat/tra cache/SHA-256 chay tren thread pool (I/O va hashlib nha GIL)
+        - Doc cau truc PDF (trailer/PyPDF2, giu GIL) chay tren process pool
+        
+        Args:
+            file_paths: Danh sach (hoac iterator) duong dan file
+            level: Muc do quet cho tung file
+            hash_workers: So thread hash (mac dinh: Config.probe_hash_workers)
+            parse_workers: So process parse (mac dinh: Config.probe_parse_workers,
+                0 = so CPU; 1 = parse ngay trong thread hash, khong tao process)
+            timeout: Thoi gian toi da cho moi file/giai doan (giay), 0 = khong gioi han
+                (mac dinh: Config.probe_file_timeout). File qua han duoc tra ve voi error
+            
+        Yields:
+            PDFInfo cua tung file
+        """
+        from .config import get_config
+        config = get_config()
+        
+        level = ProbeLevel.parse(level)
+        hash_workers = hash_workers or config.probe_hash_workers
+        if parse_workers is None:
+            parse_workers = config.probe_parse_workers
+        parse_workers = parse_workers or os.cpu_count() or 1
+        if timeout is None:
+            timeout = config.probe_file_timeout
+        with_text = level >= ProbeLevel.TEXT
+        use_processes = level >= ProbeLevel.STRUCTURE and parse_workers > 1
+        
+        paths = iter(file_paths)
+        exhausted = False
+        # future -> (giai doan, PDFInfo hoac duong dan, han chot)
+        pending: Dict[concurrent.futures.Future, Tuple[str, Any, Optional[float]]] = {}
+        hash_in_flight = 0
+        parse_in_flight = 0
+        
+        thread_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=hash_workers, thread_name_prefix="pdf-probe"
+        )
+        process_pool = (
+            concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers)
+            if use_processes else None
+        )
+        
+        def deadline() -> Optional[float]:
+            return time.monotonic() + timeout if timeout else None
+        
+        try:
+            while True:
+                # Nap them viec cho thread pool (gioi han so viec dang cho de tiet kiem bo nho
+                # va khong lam day hang doi process pool)
+                while (not exhausted and hash_in_flight < hash_workers
+                       and parse_in_flight < parse_workers * 2):
+                    try:
+                        file_path = Path(next(paths))
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if use_processes:
+                        future = thread_pool.submit(self._probe_until_hash, file_path, level)
+                    else:
+                        future = thread_pool.submit(self.probe_file, file_path, level)
+                    pending[future] = ('hash', file_path, deadline())
+                    hash_in_flight += 1
+                
+                if not pending:
+                    break
+                
+                deadlines = [d for _, _, d in pending.values() if d is not None]
+                wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=wait_timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                
+                for future in done:
+                    stage, item, _ = pending.pop(future)
+                    
+                    if stage == 'hash':
+                        hash_in_flight -= 1
+                        result = future.result()
+                        if not use_processes:
+                            yield result
+                            continue
+                        
+                        pdf_info, actual_path, finished = result
+                        if finished:
+                            yield pdf_info
+                            continue
+                        
+                        try:
+                            parse_future = process_pool.submit(
+                                _extract_structure_worker, str(actual_path), self.backend, with_text
+                            )
+                        except Exception as e:
+                            # Process pool hong (vd: worker bi kill) -> parse ngay tai cho
+                            logger.warning(f"Khong gui duoc viec sang process pool, parse tai cho: {e}")
+                            self._extract_pdf_metadata(actual_path, pdf_info, with_text)
+                            self._store_structure(pdf_info, level)
+                            yield pdf_info
+                            continue
+                        pending[parse_future] = ('parse', pdf_info, deadline())
+                        parse_in_flight += 1
+                    
+                    else:
+                        parse_in_flight -= 1
+                        pdf_info = item
+                        try:
+                            fields = future.result()
+                        except Exception as e:
+                            logger.warning(f"Loi parse PDF {pdf_info.filepath} trong process pool: {e}")
+                            fields = {'error': f"PDF read error: {e}"}
+                        for key, value in fields.items():
+                            setattr(pdf_info, key, value)
+                        self._store_structure(pdf_info, level)
+                        yield pdf_info
+                
+                # Cac file qua han: tra ve loi, bo qua ket qua (viec dang chay khong the huy)
+                now = time.monotonic()
+                for future, (stage, item, limit) in list(pending.items()):
+                    if limit is None or limit > now or future.done():
+                        continue
+                    pending.pop(future)
+                    future.cancel()
+                    if stage == 'hash':
+                        hash_in_flight -= 1
+                        pdf_info = self._error_info(item, f"Timeout sau {timeout}s")
+                    else:
+                        parse_in_flight -= 1
+                        pdf_info = item
+                        pdf_info.error = f"Timeout parse PDF sau {timeout}s"
+                    logger.warning(f"Quet PDF qua han: {pdf_info.filepath}")
+                    yield pdf_info
+        
+        finally:
+            thread_pool.shutdown(wait=False, cancel_futures=True)
+            if process_pool is not None:
+                process_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _store_structure(self, pdf_info: PDFInfo, level: ProbeLevel) -> None:
+        """Luu ket qua quet cau truc vao cache (neu co)"""
+        if self.cache is not None:
+            self.cache.put_info(pdf_info, level=level)
 
 
-def probe_pdf(file_path: str | Path) -> PDFInfo:
+def _extract_structure_worker(actual_path: str, backend: str, with_text: bool) -> Dict[str, Any]:
+    """
+    Ham chay trong process pool: doc cau truc 1 file PDF
+    
+    Dat o cap module de pickle duoc; tra ve dict cac truong cau truc cua PDFInfo
+    """
+    file_path = Path(actual_path)
+    pdf_info = PDFInfo(filepath=file_path, filename=file_path.name, size=0,
+                       mtime=datetime.now(), sha256="")
+    PDFProbe(backend=backend)._extract_pdf_metadata(file_path, pdf_info, with_text)
+    return {
+        'pages': pdf_info.pages,
+        'pdf_version': pdf_info.pdf_version,
+        'is_encrypted': pdf_info.is_encrypted,
+        'has_text': pdf_info.has_text,
+        'error': pdf_info.error,
+    }
+
+
+def probe_pdf(file_path: str | Path, level: ProbeLevel = ProbeLevel.STRUCTURE) -> PDFInfo:
     """
     Ham tien ich quet 1 file PDF
     
     Args:
         file_path: Duong dan file PDF
+        level: Muc do quet
         
     Returns:
         PDFInfo chua thong tin file
     """
     probe = PDFProbe()
-    return probe.probe_file(file_path)
+    return probe.probe_file(file_path, level)
 
 
-def probe_pdf_directory(directory: str | Path, pattern: str = "*.pdf") -> List[PDFInfo]:
+def probe_pdf_directory(directory: str | Path, pattern: str = "*.pdf",
+                        level: ProbeLevel = ProbeLevel.STRUCTURE,
+                        parallel: bool = False) -> List[PDFInfo]:
     """
     Ham tien ich quet tat ca PDF trong thu muc
     
     Args:
         directory: Thu muc can quet
         pattern: Pattern file
+        level: Muc do quet
+        parallel: Quet song song (thread hash + process parse)
         
     Returns:
         List PDFInfo
     """
     probe = PDFProbe()
-    return probe.probe_directory(directory, pattern)
+    return probe.probe_directory(directory, pattern, level, parallel)
 
 
-def update_tailieu_with_pdf_info(tailieu_list: List, pdf_root: str | Path) -> List:
+def update_tailieu_with_pdf_info(tailieu_list: List, pdf_root: str | Path,
+                                 name_index: Optional[FilenameIndex] = None) -> List:
     """
     Cap nhat thong tin PDF vao danh sach TaiLieu model
     
+    Khi duong dan trong Excel khong ton tai, file duoc tim qua chi muc ten
+    chuan hoa (dung 1 lan cho ca danh sach, khong rglob cho tung tai lieu).
+    Ten khop nhieu file khong duoc tu chon ma bao cao trong log.
+    
     Args:
         tailieu_list: List TaiLieu model
         pdf_root: Thu muc goc chua PDF
+        name_index: Chi muc ten file da dung san (None = tu dung khi can)
         
     Returns:
         List TaiLieu da cap nhat
@@ -264,17 +606,20 @@ def update_tailieu_with_pdf_info(tailieu_list: List, pdf_root: str | Path) -> Li
     probe = PDFProbe()
     
     updated_list = []
+    not_found = 0
     for tailieu in tailieu_list:
         # Tim file PDF tuong ung
-        pdf_path = pdf_root / tailieu.duong_dan_file.replace('\\', '/')
+        rel_path = (tailieu.duong_dan_file or tailieu.duongDanFile or '').replace('\\', '/').lstrip('/')
+        pdf_path = pdf_root / rel_path if rel_path else None
         
-        if not pdf_path.exists():
-            # Thu tim theo filename
-            pdf_files = list(pdf_root.rglob(tailieu.filename))
-            if pdf_files:
-                pdf_path = pdf_files[0]
-            else:
-                logger.warning(f"Khong tim thay file PDF: {tailieu.filename}")
+        if pdf_path is None or not pdf_path.is_file():
+            # Tim qua chi muc ten chuan hoa (NFC/NFD, hoa/thuong, dau tieng Viet)
+            if name_index is None:
+                name_index = FilenameIndex(pdf_root)
+            pdf_path = name_index.find(rel_path or None, tailieu.filename)
+            if pdf_path is None:
+                logger.warning(f"Khong tim thay file PDF: {rel_path or tailieu.filename}")
+                not_found += 1
                 updated_list.append(tailieu)
                 continue
         
@@ -282,16 +627,20 @@ def update_tailieu_with_pdf_info(tailieu_list: List, pdf_root: str | Path) -> Li
         pdf_info = probe.probe_file(pdf_path)
         
         # Cap nhat vao TaiLieu model
-        tailieu.size = pdf_info.size
-        tailieu.mtime = pdf_info.mtime
-        tailieu.sha256 = pdf_info.sha256
-        tailieu.pages = pdf_info.pages
-        
-        # Cap nhat rel_href dua tren duong dan thuc te
-        rel_path = pdf_path.relative_to(pdf_root)
-        tailieu.rel_href = f"representations/rep1/data/{rel_path.as_posix()}"
+        tailieu.file_path = pdf_path
+        tailieu.filename = pdf_path.name
+        tailieu.file_size = pdf_info.size
+        if pdf_info.sha256:
+            tailieu.checksum = pdf_info.sha256
+        if pdf_info.pages and not tailieu.so_trang:
+            tailieu.so_trang = pdf_info.pages
         
         updated_list.append(tailieu)
     
-    logger.info(f"Cap nhat thong tin PDF cho {len(updated_list)} tai lieu")
+    if name_index is not None:
+        ambiguous = name_index.ambiguous()
+        if ambiguous:
+            logger.warning(f"Co {len(ambiguous)} ten file trung trong {pdf_root}")
+    
+    logger.info(f"Cap nhat thong tin PDF cho {len(updated_list) - not_found}/{len(updated_list)} tai lieu")
     return updated_list
@@ -0,0 +1,269 @@
+"""
+PDF Scan - Kiem tra nhanh suc khoe file PDF truoc khi dong goi
+
+Chuc nang chinh:
+- Chi doc header va phan cuoi file (seek + read co gioi han), khong parse toan bo PDF
+- Kiem tra: header %PDF-x.y, marker %%EOF, startxref/trailer, co ma hoa (/Encrypt)
+- Quet ca kho PDF song song (thread pool), ket qua theo thu tu hoan thanh;
+  file qua han (Config.probe_file_timeout) bao SCAN_ERROR thay vi cho mai
+- Xuat bao cao gon: CSV (moi file 1 dong) hoac JSON (tong hop + danh sach file loi)
+"""
+
+import concurrent.futures
+import csv
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .pdf_trailer import HEADER_READ_SIZE, TAIL_READ_SIZE, PDFTrailerError, PDFTrailerReader
+
+logger = logging.getLogger(__name__)
+
+# Trang thai file sau khi quet
+SCAN_OK = "ok"
+SCAN_WARNING = "warning"
+SCAN_ERROR = "error"
+
+# %%EOF phai nam trong 1024 bytes cuoi file (PDF 32000-1, Implementation note)
+EOF_SEARCH_SIZE = 1024
+
+_VERSION_RE = re.compile(rb'%PDF-(\d\.\d)')
+
+_CSV_FIELDS = ['path', 'status', 'size', 'version', 'has_eof', 'has_startxref',
+               'trailer_ok', 'is_encrypted', 'pages', 'issues']
+
+
+@dataclass
+class ScanResult:
+    """Ket qua quet 1 file PDF"""
+    path: Path
+    size: int = 0
+    version: Optional[str] = None
+    has_eof: bool = False
+    has_startxref: bool = False
+    trailer_ok: bool = False  # Doc duoc trailer/xref va /Root
+    is_encrypted: bool = False
+    pages: Optional[int] = None
+    issues: List[str] = field(default_factory=list)
+    status: str = SCAN_OK
+
+    def flag(self, status: str, issue: str) -> None:
+        self.issues.append(issue)
+        if status == SCAN_ERROR or self.status == SCAN_OK:
+            self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['path'] = str(self.path)
+        data['issues'] = '; '.join(self.issues)
+        return data
+
+
+def scan_pdf(file_path: str | Path) -> ScanResult:
+    """
+    Kiem tra suc khoe 1 file PDF bang cac lan doc co gioi han
+
+    Args:
+        file_path: Duong dan file PDF
+
+    Returns:
+        ScanResult (khong raise, moi loi duoc ghi vao issues/status)
+    """
+    result = ScanResult(path=Path(file_path))
+    try:
+        with open(file_path, 'rb') as f:
+            result.size = os.fstat(f.fileno()).st_size
+            if result.size == 0:
+                result.flag(SCAN_ERROR, "file rong")
+                return result
+
+            head = f.read(HEADER_READ_SIZE)
+            m = _VERSION_RE.search(head)
+            if not head.startswith(b'%PDF-') and m is None:
+                result.flag(SCAN_ERROR, "khong co header %PDF-")
+                return result
+            if m is not None:
+                result.version = m.group(1).decode('ascii')
+            if not head.startswith(b'%PDF-'):
+                result.flag(SCAN_WARNING, "header %PDF- khong o dau file")
+
+            tail_size = min(TAIL_READ_SIZE, result.size)
+            f.seek(result.size - tail_size)
+            tail = f.read(tail_size)
+            result.has_eof = b'%%EOF' in tail[-EOF_SEARCH_SIZE:]
+            result.has_startxref = b'startxref' in tail
+            if not result.has_eof:
+                result.flag(SCAN_ERROR, "khong co %%EOF (file co the bi cat)")
+            if not result.has_startxref:
+                result.flag(SCAN_ERROR, "khong co startxref")
+                return result
+
+            _scan_trailer(f, result)
+    except OSError as e:
+        result.flag(SCAN_ERROR, f"khong doc duoc file: {e}")
+
+    return result
+
+
+def _scan_trailer(f, result: ScanResult) -> None:
+    """Doc chuoi xref/trailer (co gioi han) de lay /Encrypt va so trang"""
+    reader = PDFTrailerReader(f)
+    try:
+        reader.load_xref_chain()
+    except (PDFTrailerError, ValueError, IndexError, TypeError, AttributeError) as e:
+        result.flag(SCAN_WARNING, f"trailer/xref khong doc duoc: {e}")
+        return
+
+    result.trailer_ok = True
+    result.is_encrypted = reader.trailer.get('Encrypt') is not None
+    if result.is_encrypted:
+        result.flag(SCAN_WARNING, "file ma hoa")
+
+    try:
+        catalog = reader.resolve(reader.trailer['Root'])
+        pages_root = reader.resolve(catalog['Pages'])
+        count = reader.resolve(pages_root.get('Count'))
+        if isinstance(count, int) and not isinstance(count, bool) and count >= 0:
+            result.pages = count
+    except (PDFTrailerError, ValueError, IndexError, TypeError, AttributeError, KeyError) as e:
+        logger.debug(f"Khong doc duoc page tree {result.path}: {e}")
+    if result.pages is None:
+        result.flag(SCAN_WARNING, "khong doc duoc so trang tu page tree")
+
+
+def iter_scan_files(paths: Iterable[str | Path], workers: Optional[int] = None,
+                    timeout: Optional[float] = None) -> Iterator[ScanResult]:
+    """
+    Quet nhieu file song song, tra ket qua theo thu tu hoan thanh
+
+    Args:
+        paths: Danh sach file PDF
+        workers: So thread (mac dinh Config.scan_workers)
+        timeout: Thoi gian toi da cho moi file (giay), 0 = khong gioi han
+            (mac dinh: Config.probe_file_timeout). File qua han duoc tra ve voi SCAN_ERROR
+    """
+    from .config import get_config
+    config = get_config()
+    if workers is None:
+        workers = config.scan_workers
+    workers = max(1, workers)
+    if timeout is None:
+        timeout = config.probe_file_timeout
+
+    paths = iter(paths)
+    exhausted = False
+    # future -> (duong dan, han chot)
+    pending: Dict[concurrent.futures.Future, Tuple[Path, Optional[float]]] = {}
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-scan")
+    try:
+        while True:
+            # Chi nap du viec cho cac thread (han chot tinh tu luc file bat dau duoc quet)
+            while not exhausted and len(pending) < workers:
+                try:
+                    path = Path(next(paths))
+                except StopIteration:
+                    exhausted = True
+                    break
+                limit = time.monotonic() + timeout if timeout else None
+                pending[executor.submit(scan_pdf, path)] = (path, limit)
+
+            if not pending:
+                break
+
+            deadlines = [d for _, d in pending.values() if d is not None]
+            wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = concurrent.futures.wait(
+                pending, timeout=wait_timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                pending.pop(future)
+                yield future.result()
+
+            # Cac file qua han: tra ve loi, bo qua ket qua (viec dang chay khong the huy)
+            now = time.monotonic()
+            for future, (path, limit) in list(pending.items()):
+                if limit is None or limit > now or future.done():
+                    continue
+                pending.pop(future)
+                future.cancel()
+                logger.warning(f"Scan PDF qua han: {path}")
+                result = ScanResult(path=path)
+                result.flag(SCAN_ERROR, f"timeout sau {timeout}s")
+                yield result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_directory(directory: str | Path, pattern: str = "*.pdf",
+                   workers: Optional[int] = None) -> List[ScanResult]:
+    """Quet tat ca file PDF trong thu muc (de quy), sap xep theo duong dan"""
+    results = list(iter_scan_files(Path(directory).rglob(pattern), workers))
+    results.sort(key=lambda r: str(r.path))
+    return results
+
+
+def summarize_scan(results: List[ScanResult]) -> Dict[str, Any]:
+    """Tong hop ket qua quet: so file theo trang thai, phien ban PDF, so file ma hoa"""
+    statuses = Counter(r.status for r in results)
+    return {
+        'total_files': len(results),
+        'total_size_mb': round(sum(r.size for r in results) / (1024 * 1024), 2),
+        'ok': statuses.get(SCAN_OK, 0),
+        'warning': statuses.get(SCAN_WARNING, 0),
+        'error': statuses.get(SCAN_ERROR, 0),
+        'encrypted': sum(1 for r in results if r.is_encrypted),
+        'versions': dict(sorted(Counter(r.version or 'unknown' for r in results).items())),
+    }
+
+
+def write_scan_report(results: List[ScanResult], report_path: str | Path,
+                      root: Optional[Path] = None) -> Path:
+    """
+    Ghi bao cao quet: .csv -> moi file 1 dong; con lai -> JSON (tong hop + file co van de)
+
+    Args:
+        results: Ket qua quet
+        report_path: File bao cao
+        root: Thu muc goc de ghi duong dan tuong doi
+    """
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def row(r: ScanResult) -> Dict[str, Any]:
+        data = r.to_dict()
+        if root is not None:
+            try:
+                data['path'] = r.path.relative_to(root).as_posix()
+            except ValueError:
+                pass
+        return data
+
+    if report_path.suffix.lower() == '.csv':
+        with open(report_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=_CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for r in results:
+                writer.writerow(row(r))
+    else:
+        report = {
+            'scanned_at': datetime.now().isoformat(timespec='seconds'),
+            'root': str(root) if root is not None else None,
+            'summary': summarize_scan(results),
+            'problems': [
+                {k: v for k, v in row(r).items() if k in ('path', 'status', 'version', 'size', 'issues')}
+                for r in results if r.status != SCAN_OK
+            ],
+        }
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Da ghi bao cao quet PDF: {report_path}")
+    return report_path
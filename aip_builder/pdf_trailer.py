@@ -0,0 +1,709 @@
+"""
+PDF Trailer - Doc nhanh cau truc PDF tu header, trailer va bang xref
+
+Chuc nang chinh:
+- Doc phien ban PDF tu header (%PDF-x.y)
+- Tim startxref o cuoi file, doc bang xref (co dien hoac xref stream) theo chuoi /Prev
+- Lay so trang tu /Count cua goc page tree (/Root -> /Pages), phat hien /Encrypt
+- Moi lan doc deu la seek + read co gioi han kich thuoc, khong parse toan bo file
+- Gap cau truc khong ho tro/hong -> raise PDFTrailerError de goi ham fallback (PyPDF2)
+"""
+
+import logging
+import re
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Gioi han kich thuoc moi lan doc (bytes)
+HEADER_READ_SIZE = 1024
+TAIL_READ_SIZE = 2048
+MAX_TAIL_READ_SIZE = 64 * 1024
+OBJECT_READ_SIZE = 4096
+MAX_OBJECT_READ_SIZE = 256 * 1024
+MAX_STREAM_SIZE = 16 * 1024 * 1024
+MAX_XREF_SECTIONS = 64
+MAX_RESOLVE_DEPTH = 8
+
+# Moi dong trong bang xref co dien dai dung 20 bytes (PDF 32000-1, 7.5.4)
+XREF_ENTRY_SIZE = 20
+
+_WHITESPACE = b'\x00\t\n\x0c\r '
+_DELIMITERS = b'()<>[]{}/%'
+_XREF_ENTRY_RE = re.compile(rb'^(\d{10}) (\d{5}) ([nf])')
+_VERSION_RE = re.compile(rb'%PDF-(\d\.\d)')
+
+
+class PDFTrailerError(Exception):
+    """Khong doc duoc cau truc PDF bang trailer/xref (can fallback)"""
+
+
+class _NeedMoreData(Exception):
+    """Buffer hien tai chua chua het doi tuong can parse"""
+
+
+class Ref(NamedTuple):
+    """Tham chieu gian tiep 'num gen R'"""
+    num: int
+    gen: int
+
+
+class Name(str):
+    """Ten PDF (/Name), luu khong co dau '/'"""
+
+
+@dataclass
+class TrailerInfo:
+    """Thong tin doc duoc tu trailer va page tree"""
+    version: Optional[str]
+    pages: int
+    is_encrypted: bool
+    producer: Optional[str] = None
+    xref_stream: bool = False
+
+
+class _Lexer:
+    """Tach token va parse doi tuong PDF tren 1 buffer bytes"""
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def _skip_whitespace(self) -> None:
+        data = self.data
+        while self.pos < len(data):
+            c = data[self.pos]
+            if c in _WHITESPACE:
+                self.pos += 1
+            elif c == 0x25:  # '%' - comment den het dong
+                while self.pos < len(data) and data[self.pos] not in b'\r\n':
+                    self.pos += 1
+            else:
+                return
+        raise _NeedMoreData()
+
+    def next_token(self) -> Any:
+        """Doc token tiep theo (so, ten, chuoi, dau ngoac, keyword)"""
+        self._skip_whitespace()
+        data = self.data
+        c = data[self.pos]
+
+        if c == 0x2F:  # '/'
+            start = self.pos + 1
+            end = start
+            while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+                end += 1
+            if end >= len(data):
+                raise _NeedMoreData()
+            self.pos = end
+            raw = data[start:end]
+            if b'#' in raw:
+                raw = re.sub(rb'#([0-9A-Fa-f]{2})', lambda m: bytes([int(m.group(1), 16)]), raw)
+            return Name(raw.decode('latin-1'))
+
+        if c == 0x3C:  # '<'
+            if self.pos + 1 >= len(data):
+                raise _NeedMoreData()
+            if data[self.pos + 1] == 0x3C:
+                self.pos += 2
+                return '<<'
+            end = data.find(b'>', self.pos)
+            if end < 0:
+                raise _NeedMoreData()
+            hex_digits = re.sub(rb'[^0-9A-Fa-f]', b'', data[self.pos + 1:end])
+            if len(hex_digits) % 2:
+                hex_digits += b'0'
+            self.pos = end + 1
+            return bytes.fromhex(hex_digits.decode('ascii'))
+
+        if c == 0x3E:  # '>'
+            if self.pos + 1 >= len(data):
+                raise _NeedMoreData()
+            if data[self.pos + 1] != 0x3E:
+                raise PDFTrailerError(f"Ky tu khong hop le tai vi tri {self.pos}")
+            self.pos += 2
+            return '>>'
+
+        if c in b'[]{}':
+            self.pos += 1
+            return chr(c)
+
+        if c == 0x28:  # '('
+            return self._literal_string()
+
+        start = self.pos
+        end = start
+        while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+            end += 1
+        if end >= len(data):
+            raise _NeedMoreData()
+        if end == start:
+            # Dau ngoac khong mong doi (vd: ')' le) - token rong se khong tien pos
+            raise PDFTrailerError(f"Ky tu khong hop le {chr(c)!r} tai vi tri {start}")
+        self.pos = end
+        token = data[start:end]
+        try:
+            return int(token)
+        except ValueError:
+            pass
+        try:
+            return float(token)
+        except ValueError:
+            return token.decode('latin-1')
+
+    def _literal_string(self) -> bytes:
+        """Doc chuoi (...) co xu ly ngoac long nhau va escape"""
+        data = self.data
+        pos = self.pos + 1
+        depth = 1
+        out = bytearray()
+        escapes = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b',
+                   ord('f'): b'\f', ord('('): b'(', ord(')'): b')', ord('\\'): b'\\'}
+        while pos < len(data):
+            c = data[pos]
+            if c == 0x5C:  # '\'
+                pos += 1
+                if pos >= len(data):
+                    break
+                e = data[pos]
+                if e in escapes:
+                    out += escapes[e]
+                    pos += 1
+                elif 0x30 <= e <= 0x37:
+                    octal = re.match(rb'[0-7]{1,3}', data[pos:pos + 3]).group(0)
+                    out.append(int(octal, 8) & 0xFF)
+                    pos += len(octal)
+                elif e in b'\r\n':
+                    pos += 2 if data[pos:pos + 2] == b'\r\n' else 1
+                else:
+                    out.append(e)
+                    pos += 1
+                continue
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    self.pos = pos + 1
+                    return bytes(out)
+            out.append(c)
+            pos += 1
+        raise _NeedMoreData()
+
+    def _check_progress(self, saved: int) -> None:
+        """Moi vong lap parse phai tien pos (du lieu hong khong duoc gay lap vo han)"""
+        if self.pos <= saved:
+            raise PDFTrailerError(f"Parse khong tien duoc tai vi tri {saved}")
+
+    def parse_object(self) -> Any:
+        """Parse 1 doi tuong PDF (dict, array, so, ten, chuoi, tham chieu)"""
+        token = self.next_token()
+
+        if token == '<<':
+            result: Dict[str, Any] = {}
+            while True:
+                saved = self.pos
+                key = self.next_token()
+                if key == '>>':
+                    return result
+                if not isinstance(key, Name):
+                    raise PDFTrailerError(f"Khoa dictionary khong hop le: {key!r}")
+                result[str(key)] = self.parse_object()
+                self._check_progress(saved)
+
+        if token == '[':
+            items: List[Any] = []
+            while True:
+                saved = self.pos
+                if self.next_token() == ']':
+                    return items
+                self.pos = saved
+                items.append(self.parse_object())
+                self._check_progress(saved)
+
+        if isinstance(token, int) and not isinstance(token, bool):
+            # Thu doc dang 'num gen R'
+            saved = self.pos
+            try:
+                gen = self.next_token()
+                if isinstance(gen, int):
+                    keyword = self.next_token()
+                    if keyword == 'R':
+                        return Ref(token, gen)
+            except _NeedMoreData:
+                # Het buffer: chi chac chan khi doc du 'num gen R'
+                self.pos = saved
+                raise
+            self.pos = saved
+            return token
+
+        if token == 'true':
+            return True
+        if token == 'false':
+            return False
+        if token == 'null':
+            return None
+        return token
+
+
+def _read_at(f: BinaryIO, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    return f.read(size)
+
+
+def _png_unpredict(data: bytes, columns: int, colors: int = 1, bpc: int = 8) -> bytes:
+    """Giai ma PNG predictor (Predictor >= 10) cho xref stream"""
+    bpp = max(1, colors * bpc // 8)
+    row_len = (columns * colors * bpc + 7) // 8
+    out = bytearray()
+    prev = bytearray(row_len)
+    stride = row_len + 1
+    if len(data) % stride:
+        raise PDFTrailerError("Du lieu PNG predictor khong chia het cho do dai dong")
+
+    for i in range(0, len(data), stride):
+        ftype = data[i]
+        row = bytearray(data[i + 1:i + stride])
+        if ftype == 1:  # Sub
+            for j in range(bpp, row_len):
+                row[j] = (row[j] + row[j - bpp]) & 0xFF
+        elif ftype == 2:  # Up
+            for j in range(row_len):
+                row[j] = (row[j] + prev[j]) & 0xFF
+        elif ftype == 3:  # Average
+            for j in range(row_len):
+                left = row[j - bpp] if j >= bpp else 0
+                row[j] = (row[j] + ((left + prev[j]) >> 1)) & 0xFF
+        elif ftype == 4:  # Paeth
+            for j in range(row_len):
+                a = row[j - bpp] if j >= bpp else 0
+                b = prev[j]
+                c = prev[j - bpp] if j >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                row[j] = (row[j] + pred) & 0xFF
+        elif ftype != 0:
+            raise PDFTrailerError(f"PNG filter khong ho tro: {ftype}")
+        out += row
+        prev = row
+
+    return bytes(out)
+
+
+def _decode_stream(stream_dict: Dict[str, Any], raw: bytes) -> bytes:
+    """Giai nen stream (chi ho tro FlateDecode + PNG predictor)"""
+    filters = stream_dict.get('Filter')
+    parms = stream_dict.get('DecodeParms')
+    if isinstance(filters, list):
+        if len(filters) > 1:
+            raise PDFTrailerError(f"Nhieu filter khong ho tro: {filters}")
+        filters = filters[0] if filters else None
+        if isinstance(parms, list):
+            parms = parms[0] if parms else None
+
+    if filters is None:
+        data = raw
+    elif filters == 'FlateDecode':
+        try:
+            # Gioi han kich thuoc sau giai nen (chong stream nen bat thuong)
+            inflater = zlib.decompressobj()
+            data = inflater.decompress(raw, MAX_STREAM_SIZE)
+        except zlib.error as e:
+            raise PDFTrailerError(f"Loi giai nen FlateDecode: {e}")
+        if inflater.unconsumed_tail:
+            raise PDFTrailerError(f"Stream giai nen vuot qua {MAX_STREAM_SIZE} bytes")
+    else:
+        raise PDFTrailerError(f"Filter khong ho tro: {filters}")
+
+    if isinstance(parms, dict):
+        predictor = parms.get('Predictor', 1)
+        if predictor >= 10:
+            data = _png_unpredict(data, parms.get('Columns', 1),
+                                  parms.get('Colors', 1), parms.get('BitsPerComponent', 8))
+        elif predictor != 1:
+            raise PDFTrailerError(f"Predictor khong ho tro: {predictor}")
+
+    return data
+
+
+class _XRefSection(ABC):
+    """1 section xref (co dien hoac stream) trong chuoi /Prev"""
+
+    @abstractmethod
+    def lookup(self, num: int) -> Optional[Tuple]:
+        """
+        Tra ve None neu section khong chua doi tuong, nguoc lai:
+        ('n', offset) | ('c', objstm_num, index) | ('f',)
+        """
+
+
+class _ClassicXRefSection(_XRefSection):
+    def __init__(self, f: BinaryIO, subsections: List[Tuple[int, int, int]]):
+        self.f = f
+        self.subsections = subsections  # (start, count, file_offset)
+
+    def lookup(self, num: int) -> Optional[Tuple]:
+        for start, count, entries_offset in self.subsections:
+            if start <= num < start + count:
+                entry = _read_at(self.f, entries_offset + (num - start) * XREF_ENTRY_SIZE, XREF_ENTRY_SIZE)
+                m = _XREF_ENTRY_RE.match(entry)
+                if not m:
+                    raise PDFTrailerError(f"Dong xref khong hop le cho doi tuong {num}")
+                if m.group(3) == b'f':
+                    return ('f',)
+                return ('n', int(m.group(1)))
+        return None
+
+
+class _StreamXRefSection(_XRefSection):
+    def __init__(self, data: bytes, widths: List[int], index: List[int]):
+        self.data = data
+        self.widths = widths
+        self.row_len = sum(widths)
+        self.index = index
+
+    def _field(self, row: int, field: int, default: int) -> int:
+        width = self.widths[field]
+        if width == 0:
+            return default
+        start = row * self.row_len + sum(self.widths[:field])
+        return int.from_bytes(self.data[start:start + width], 'big')
+
+    def lookup(self, num: int) -> Optional[Tuple]:
+        row_base = 0
+        for i in range(0, len(self.index) - 1, 2):
+            start, count = self.index[i], self.index[i + 1]
+            if start <= num < start + count:
+                row = row_base + num - start
+                if (row + 1) * self.row_len > len(self.data):
+                    raise PDFTrailerError(f"Xref stream thieu dong cho doi tuong {num}")
+                ftype = self._field(row, 0, 1)
+                if ftype == 1:
+                    return ('n', self._field(row, 1, 0))
+                if ftype == 2:
+                    return ('c', self._field(row, 1, 0), self._field(row, 2, 0))
+                return ('f',)
+            row_base += count
+        return None
+
+
+class PDFTrailerReader:
+    """Doc cau truc PDF toi thieu qua trailer/xref voi cac lan doc co gioi han"""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        f.seek(0, 2)
+        self.file_size = f.tell()
+        self.sections: List[_XRefSection] = []
+        self.trailer: Dict[str, Any] = {}
+        self.uses_xref_stream = False
+        self._objstm_cache: Dict[int, Tuple[bytes, Dict[int, int]]] = {}
+
+    # --- header / startxref ---
+
+    def read_version(self) -> Optional[str]:
+        head = _read_at(self.f, 0, HEADER_READ_SIZE)
+        m = _VERSION_RE.search(head)
+        if not m:
+            raise PDFTrailerError("Khong tim thay header %PDF-")
+        return m.group(1).decode('ascii')
+
+    def find_startxref(self) -> int:
+        size = TAIL_READ_SIZE
+        while True:
+            size = min(size, self.file_size)
+            tail = _read_at(self.f, self.file_size - size, size)
+            idx = tail.rfind(b'startxref')
+            if idx >= 0:
+                m = re.match(rb'startxref\s+(\d+)', tail[idx:])
+                if m:
+                    offset = int(m.group(1))
+                    if offset >= self.file_size:
+                        raise PDFTrailerError(f"startxref vuot qua kich thuoc file: {offset}")
+                    return offset
+            if size >= self.file_size or size >= MAX_TAIL_READ_SIZE:
+                raise PDFTrailerError("Khong tim thay startxref")
+            size *= 4
+
+    # --- xref ---
+
+    def load_xref_chain(self) -> None:
+        """Doc tat ca section xref theo chuoi /Prev (section moi nhat truoc)"""
+        offset: Optional[int] = self.find_startxref()
+        visited = set()
+
+        while offset is not None:
+            if offset in visited:
+                break
+            if len(visited) >= MAX_XREF_SECTIONS:
+                raise PDFTrailerError("Chuoi /Prev qua dai")
+            visited.add(offset)
+
+            head = _read_at(self.f, offset, 16)
+            if head.lstrip(_WHITESPACE).startswith(b'xref'):
+                trailer = self._read_classic_section(offset)
+                xref_stm = trailer.get('XRefStm')
+                if isinstance(xref_stm, int) and xref_stm not in visited:
+                    # File hybrid: xref stream bo sung ngay sau section co dien
+                    visited.add(xref_stm)
+                    self._read_stream_section(xref_stm)
+            else:
+                trailer = self._read_stream_section(offset)
+
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+
+            prev = trailer.get('Prev')
+            offset = prev if isinstance(prev, int) else None
+
+        if 'Root' not in self.trailer:
+            raise PDFTrailerError("Trailer khong co /Root")
+
+    def _read_classic_section(self, offset: int) -> Dict[str, Any]:
+        pos = offset
+        data = _read_at(self.f, pos, 256)
+        lexer = _Lexer(data)
+        try:
+            if lexer.next_token() != 'xref':
+                raise PDFTrailerError(f"Khong tim thay 'xref' tai {offset}")
+        except _NeedMoreData:
+            raise PDFTrailerError(f"Section xref bi cat tai {offset}")
+
+        subsections = []
+        while True:
+            pos += lexer.pos
+            data = _read_at(self.f, pos, 256)
+            lexer = _Lexer(data)
+            try:
+                token = lexer.next_token()
+                if token == 'trailer':
+                    break
+                count = lexer.next_token()
+            except _NeedMoreData:
+                raise PDFTrailerError(f"Section xref bi cat tai {pos}")
+            if not isinstance(token, int) or not isinstance(count, int) or count < 0:
+                raise PDFTrailerError(f"Dau subsection xref khong hop le tai {pos}")
+
+            # Bo qua khoang trang (EOL) truoc dong dau tien cua subsection
+            entries_offset = pos + lexer.pos
+            while entries_offset - pos < len(data) and data[entries_offset - pos] in _WHITESPACE:
+                entries_offset += 1
+            if count:
+                first = _read_at(self.f, entries_offset, XREF_ENTRY_SIZE)
+                if not _XREF_ENTRY_RE.match(first) or first[18:20].strip(_WHITESPACE):
+                    raise PDFTrailerError(f"Dong xref khong dung 20 bytes tai {entries_offset}")
+            subsections.append((token, count, entries_offset))
+
+            pos = entries_offset + count * XREF_ENTRY_SIZE
+            data = b''
+            lexer = _Lexer(data)
+
+        trailer = self._parse_at(pos + lexer.pos)
+        if not isinstance(trailer, dict):
+            raise PDFTrailerError(f"Trailer khong phai dictionary tai {pos}")
+
+        self.sections.append(_ClassicXRefSection(self.f, subsections))
+        return trailer
+
+    def _read_stream_section(self, offset: int) -> Dict[str, Any]:
+        stream_dict, raw = self._read_indirect_at(offset, want_stream=True)
+        if not isinstance(stream_dict, dict) or stream_dict.get('Type') != 'XRef':
+            raise PDFTrailerError(f"Khong phai xref stream tai {offset}")
+
+        data = _decode_stream(stream_dict, raw)
+        widths = stream_dict.get('W')
+        if not isinstance(widths, list) or len(widths) != 3 or not all(isinstance(w, int) for w in widths):
+            raise PDFTrailerError(f"/W khong hop le trong xref stream tai {offset}")
+        index = stream_dict.get('Index') or [0, stream_dict.get('Size', 0)]
+
+        self.sections.append(_StreamXRefSection(data, widths, index))
+        self.uses_xref_stream = True
+        return stream_dict
+
+    # --- doi tuong ---
+
+    def _parse_at(self, offset: int) -> Any:
+        """Parse 1 doi tuong truc tiep (khong co 'num gen obj') tai offset"""
+        size = OBJECT_READ_SIZE
+        while True:
+            data = _read_at(self.f, offset, size)
+            try:
+                return _Lexer(data).parse_object()
+            except _NeedMoreData:
+                if len(data) < size or size >= MAX_OBJECT_READ_SIZE:
+                    raise PDFTrailerError(f"Doi tuong bi cat tai {offset}")
+                size *= 4
+
+    def _read_indirect_at(self, offset: int, want_stream: bool = False,
+                          expected_num: Optional[int] = None) -> Tuple[Any, Optional[bytes]]:
+        """Doc doi tuong gian tiep 'num gen obj ... endobj' tai offset"""
+        size = OBJECT_READ_SIZE
+        while True:
+            data = _read_at(self.f, offset, size)
+            lexer = _Lexer(data)
+            try:
+                num, gen, keyword = lexer.next_token(), lexer.next_token(), lexer.next_token()
+                if not isinstance(num, int) or not isinstance(gen, int) or keyword != 'obj':
+                    raise PDFTrailerError(f"Khong tim thay 'obj' tai {offset}")
+                if expected_num is not None and num != expected_num:
+                    raise PDFTrailerError(f"Offset {offset} tro den doi tuong {num}, mong doi {expected_num}")
+                value = lexer.parse_object()
+                if not want_stream:
+                    return value, None
+                if lexer.next_token() != 'stream':
+                    raise PDFTrailerError(f"Doi tuong tai {offset} khong co stream")
+                break
+            except _NeedMoreData:
+                if len(data) < size or size >= MAX_OBJECT_READ_SIZE:
+                    raise PDFTrailerError(f"Doi tuong bi cat tai {offset}")
+                size *= 4
+
+        # Du lieu stream bat dau sau EOL ngay sau keyword 'stream'
+        stream_start = lexer.pos
+        if data[stream_start:stream_start + 2] == b'\r\n':
+            stream_start += 2
+        elif data[stream_start:stream_start + 1] in (b'\n', b'\r'):
+            stream_start += 1
+
+        length = value.get('Length') if isinstance(value, dict) else None
+        if isinstance(length, Ref):
+            length = self.resolve(length)
+        if not isinstance(length, int) or length < 0 or length > MAX_STREAM_SIZE:
+            raise PDFTrailerError(f"/Length khong hop le tai {offset}: {length!r}")
+
+        raw = _read_at(self.f, offset + stream_start, length)
+        if len(raw) != length:
+            raise PDFTrailerError(f"Stream bi cat tai {offset}")
+        return value, raw
+
+    def _lookup(self, num: int) -> Optional[Tuple]:
+        for section in self.sections:
+            entry = section.lookup(num)
+            if entry is not None:
+                return entry
+        return None
+
+    def _load_object_stream(self, stm_num: int) -> Tuple[bytes, Dict[int, int]]:
+        if stm_num in self._objstm_cache:
+            return self._objstm_cache[stm_num]
+
+        entry = self._lookup(stm_num)
+        if not entry or entry[0] != 'n':
+            raise PDFTrailerError(f"Khong tim thay object stream {stm_num}")
+        stream_dict, raw = self._read_indirect_at(entry[1], want_stream=True, expected_num=stm_num)
+        if not isinstance(stream_dict, dict) or stream_dict.get('Type') != 'ObjStm':
+            raise PDFTrailerError(f"Doi tuong {stm_num} khong phai ObjStm")
+
+        data = _decode_stream(stream_dict, raw)
+        first, n = stream_dict.get('First'), stream_dict.get('N')
+        if not isinstance(first, int) or not isinstance(n, int):
+            raise PDFTrailerError(f"ObjStm {stm_num} thieu /First hoac /N")
+
+        lexer = _Lexer(data[:first] + b' ')
+        offsets: Dict[int, int] = {}
+        try:
+            for _ in range(n):
+                obj_num, obj_off = lexer.next_token(), lexer.next_token()
+                offsets[obj_num] = first + obj_off
+        except _NeedMoreData:
+            raise PDFTrailerError(f"Header ObjStm {stm_num} bi cat")
+
+        self._objstm_cache[stm_num] = (data, offsets)
+        return data, offsets
+
+    def resolve(self, value: Any, depth: int = 0) -> Any:
+        """Giai tham chieu gian tiep thanh gia tri truc tiep"""
+        if not isinstance(value, Ref):
+            return value
+        if depth >= MAX_RESOLVE_DEPTH:
+            raise PDFTrailerError("Tham chieu long nhau qua sau")
+
+        entry = self._lookup(value.num)
+        if entry is None or entry[0] == 'f':
+            raise PDFTrailerError(f"Khong tim thay doi tuong {value.num}")
+
+        if entry[0] == 'n':
+            obj, _ = self._read_indirect_at(entry[1], expected_num=value.num)
+        else:
+            data, offsets = self._load_object_stream(entry[1])
+            if value.num not in offsets:
+                raise PDFTrailerError(f"Doi tuong {value.num} khong co trong ObjStm {entry[1]}")
+            try:
+                obj = _Lexer(data + b' ', offsets[value.num]).parse_object()
+            except _NeedMoreData:
+                raise PDFTrailerError(f"Doi tuong {value.num} bi cat trong ObjStm")
+
+        return self.resolve(obj, depth + 1)
+
+    # --- thong tin tong hop ---
+
+    def read_info(self) -> TrailerInfo:
+        version = self.read_version()
+        self.load_xref_chain()
+
+        is_encrypted = self.trailer.get('Encrypt') is not None
+
+        catalog = self.resolve(self.trailer['Root'])
+        if not isinstance(catalog, dict) or 'Pages' not in catalog:
+            raise PDFTrailerError("Catalog khong co /Pages")
+        pages_root = self.resolve(catalog['Pages'])
+        if not isinstance(pages_root, dict):
+            raise PDFTrailerError("/Pages khong phai dictionary")
+        count = self.resolve(pages_root.get('Count'))
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            raise PDFTrailerError(f"/Count khong hop le: {count!r}")
+
+        # Producer trong /Info (bo qua neu file ma hoa vi chuoi da bi ma hoa)
+        producer = None
+        if not is_encrypted and self.trailer.get('Info') is not None:
+            try:
+                info = self.resolve(self.trailer['Info'])
+                if isinstance(info, dict):
+                    producer = _decode_text(self.resolve(info.get('Producer')))
+            except PDFTrailerError as e:
+                logger.debug(f"Khong doc duoc /Info: {e}")
+
+        return TrailerInfo(
+            version=version,
+            pages=count,
+            is_encrypted=is_encrypted,
+            producer=producer,
+            xref_stream=self.uses_xref_stream
+        )
+
+
+def _decode_text(value: Any) -> Optional[str]:
+    """Giai ma chuoi van ban PDF (UTF-16BE co BOM hoac PDFDocEncoding ~ latin-1)"""
+    if not isinstance(value, bytes) or not value:
+        return None
+    if value.startswith(b'\xfe\xff'):
+        return value[2:].decode('utf-16-be', errors='replace')
+    if value.startswith(b'\xef\xbb\xbf'):
+        return value[3:].decode('utf-8', errors='replace')
+    return value.decode('latin-1')
+
+
+def read_trailer_info(file_path: str | Path) -> TrailerInfo:
+    """
+    Doc phien ban, so trang, trang thai ma hoa tu trailer/xref cua PDF
+
+    Args:
+        file_path: Duong dan file PDF
+
+    Returns:
+        TrailerInfo
+
+    Raises:
+        PDFTrailerError: Cau truc khong ho tro hoac file hong (nen fallback PyPDF2)
+        OSError: Khong mo duoc file
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            return PDFTrailerReader(f).read_info()
+        except (ValueError, IndexError, TypeError, AttributeError) as e:
+            raise PDFTrailerError(f"Loi parse cau truc PDF: {e}")
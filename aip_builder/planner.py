@@ -0,0 +1,388 @@
+"""
+Planner - Lap ke hoach build (dry-run) cho ca workbook, khong ghi gi ra dia
+
+Chuc nang chinh:
+- Dien PackagePlan: moi ho so -> thu muc goi, file dong goi (ZIP/tar), so file,
+  dung luong payload, uoc tinh dung luong metadata va file dong goi
+- Kiem ke PDF nguon: moi thu muc nguon chi quet 1 lan (os.scandir, song song),
+  khong stat tung duong dan -> lap ke hoach 100k ho so trong vai giay
+- Canh bao duong dan qua dai (gioi han 260 ky tu cua Windows)
+- Uoc tinh tong dung luong dia can (theo cleanup/payload mode/container)
+  va so voi dung luong trong cua o output
+- Xuat bao cao: CSV (moi ho so 1 dong) hoac JSON (tong hop + ho so co van de)
+"""
+
+import concurrent.futures
+import csv
+import json
+import logging
+import os
+import shutil
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import Config
+from .containers import CONTAINER_TAR_ZST, CONTAINER_ZIP, container_path
+from .models import HoSo, PackagePlan, PackagePlanItem
+from .package_builder import (
+    METS_REL, EAD_REL, PREMIS_REL, SCHEMAS_REL, REP1_METS_REL, REP1_DATA_REL,
+    REP1_DESCRIPTIVE_REL, PREMIS_REP1_REL, package_id_for,
+)
+from .schema_assets import get_schema_assets
+from .utils.file_copy import PAYLOAD_MODE_COPY, PAYLOAD_MODE_HARDLINK
+from .utils.pathlib_win import DEFAULT_PATH_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Uoc tinh kich thuoc XML metadata (do tren du lieu mau):
+# ~36 KiB co dinh (METS, PREMIS, EAD) + ~9 KiB moi tai lieu (EAD_doc, muc METS/PREMIS)
+METADATA_BASE_BYTES = 36 * 1024
+METADATA_PER_DOC_BYTES = 9 * 1024
+# Ty le nen XML (DEFLATE/zstd), PDF coi nhu khong nen duoc (tinh bang kich thuoc goc)
+XML_COMPRESS_RATIO = 0.2
+# ZIP: local header (30) + central directory (46) + data descriptor (16), chua tinh ten
+ZIP_ENTRY_OVERHEAD = 30 + 46 + 16
+ZIP_END_OVERHEAD = 22
+# tar: header 512 bytes moi member + 2 block ket thuc (PAX header khi ten dai/unicode)
+TAR_BLOCK = 512
+TAR_END_OVERHEAD = 2 * TAR_BLOCK
+
+_CSV_FIELDS = ['hoso_id', 'package_id', 'archive_path', 'file_count', 'payload_files', 'payload_bytes',
+               'metadata_bytes', 'estimated_archive_bytes', 'max_path_length', 'missing_files', 'long_paths']
+
+
+class DirectoryInventory:
+    """
+    Kiem ke file nguon: gom cac file can tim theo thu muc cha, quet moi thu muc
+    dung 1 lan (os.scandir) va chi stat file can dung
+    """
+
+    def __init__(self, workers: int = 8):
+        self.workers = max(1, workers)
+        self._sizes: Dict[str, Dict[str, int]] = {}
+        self.scanned_dirs = 0
+
+    def prefetch(self, files: Iterable[Tuple[str, str]]) -> None:
+        """Quet song song cac thu muc cua files ((thu muc, ten file))"""
+        wanted: Dict[str, Set[str]] = defaultdict(set)
+        for directory, name in files:
+            wanted[directory].add(name)
+        pending = {d: names for d, names in wanted.items() if d not in self._sizes}
+        if not pending:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for directory, sizes in zip(pending, executor.map(self._scan_dir, pending, pending.values())):
+                self._sizes[directory] = sizes
+        self.scanned_dirs += len(pending)
+
+    @staticmethod
+    def _scan_dir(directory: str, names: Set[str]) -> Dict[str, int]:
+        """Kich thuoc cac file can dung trong 1 thu muc (khong co/khong doc duoc -> rong)"""
+        sizes: Dict[str, int] = {}
+        # Windows khong phan biet hoa thuong: so khop them theo casefold
+        folded = {name.casefold(): name for name in names} if os.name == 'nt' else {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name if entry.name in names else folded.get(entry.name.casefold())
+                    if name is None:
+                        continue
+                    try:
+                        if entry.is_file():
+                            sizes[name] = entry.stat().st_size
+                    except OSError as e:
+                        logger.debug(f"Khong stat duoc {entry.path}: {e}")
+        except OSError as e:
+            logger.debug(f"Khong quet duoc thu muc {directory}: {e}")
+        return sizes
+
+    def size_of(self, directory: str, name: str) -> Optional[int]:
+        """Kich thuoc file (None neu khong ton tai); thu muc chua prefetch se duoc quet ngay"""
+        if directory not in self._sizes:
+            self._sizes[directory] = self._scan_dir(directory, {name})
+            self.scanned_dirs += 1
+        return self._sizes[directory].get(name)
+
+
+def _source_file(pdf_root: str, duong_dan: str) -> Tuple[str, str]:
+    """
+    (thu muc, ten file) nguon nhu PackageBuilder.copy_pdf_files (pdf_root / duongDanFile),
+    tinh bang chuoi - pathlib cham khi lap ke hoach hang trieu file
+    """
+    return os.path.split(os.path.join(pdf_root, duong_dan.lstrip('\\/')))
+
+
+def _nearest_existing(path: Path) -> Optional[Path]:
+    """Thu muc cha gan nhat dang ton tai (output chua duoc tao khi lap ke hoach)"""
+    for candidate in (path, *path.parents):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _schema_sizes() -> List[Tuple[str, int, int]]:
+    """(ten, kich thuoc, kich thuoc sau nen) cac schema dat vao moi goi"""
+    assets = get_schema_assets()
+    sizes = []
+    for name in assets.names():
+        asset = assets.get(name)
+        sizes.append((name, asset.size, len(zlib.compress(asset.data, 6))))
+    return sizes
+
+
+class BuildPlanner:
+    """
+    Lap ke hoach build cho danh sach ho so, khong ghi gi ra dia
+
+    Dung:
+        planner = BuildPlanner(config, cleanup_folders=False)
+        plan = planner.plan(hoso_list, pdf_root, output_dir)
+    """
+
+    def __init__(self, config: Optional[Config] = None, cleanup_folders: bool = False,
+                 path_limit: int = DEFAULT_PATH_LIMIT):
+        self.config = config or Config()
+        self.cleanup_folders = cleanup_folders
+        self.path_limit = path_limit
+        self.container = self.config.container_format
+        self.inventory = DirectoryInventory(self.config.scan_workers)
+        self._schemas = _schema_sizes()
+        self._schema_bytes = sum(size for _, size, _ in self._schemas)
+        self._schema_packed = sum(packed for _, _, packed in self._schemas)
+        # File co trong moi goi (khong phu thuoc so tai lieu)
+        self._fixed_rels = [METS_REL, REP1_METS_REL, EAD_REL, PREMIS_REL, PREMIS_REP1_REL]
+        self._fixed_rels += [f"{SCHEMAS_REL}/{name}" for name, _, _ in self._schemas]
+        # duongDanFile -> (thu muc, ten file) nguon
+        self._sources: Dict[str, Tuple[str, str]] = {}
+
+    def plan(self, hoso_list: List[HoSo], pdf_root: Path, output_dir: Path,
+             name: Optional[str] = None) -> PackagePlan:
+        """
+        Lap ke hoach cho ca danh sach ho so
+
+        Returns:
+            PackagePlan voi items (moi ho so 1 muc) va tong dung luong/dia trong
+        """
+        start = datetime.now()
+        pdf_root = Path(pdf_root)
+        output_dir = Path(output_dir).absolute()
+
+        root = str(pdf_root)
+        self._sources = {t.duongDanFile: _source_file(root, t.duongDanFile)
+                         for h in hoso_list for t in h.tai_lieu if t.duongDanFile}
+        self.inventory.prefetch(self._sources.values())
+
+        payload_mode = self._effective_payload_mode(pdf_root, output_dir)
+        items = [self.plan_package(hoso, pdf_root, output_dir) for hoso in hoso_list]
+        archive_bytes = sum(item.estimated_archive_bytes for item in items)
+
+        # Folder goi: metadata luon ghi that, payload chi ton dung luong khi sao chep
+        if payload_mode == PAYLOAD_MODE_COPY:
+            folder_bytes = [item.metadata_bytes + item.payload_bytes for item in items]
+        else:
+            folder_bytes = [item.metadata_bytes for item in items]
+        if not self.cleanup_folders:
+            disk_bytes = archive_bytes + sum(folder_bytes)
+        elif self.config.stream_zip:
+            # Cleanup + stream: ghi thang vao file dong goi, khong tao folder
+            disk_bytes = archive_bytes
+        else:
+            # Cleanup khong stream: can them cho 1 folder lon nhat truoc khi xoa
+            disk_bytes = archive_bytes + max(folder_bytes, default=0)
+
+        plan = PackagePlan(
+            name=name or output_dir.name,
+            hoso_list=hoso_list,
+            output_dir=output_dir,
+            items=items,
+            container=self.container,
+            cleanup_folders=self.cleanup_folders,
+            payload_mode=payload_mode,
+            path_limit=self.path_limit,
+            total_files=sum(item.file_count for item in items),
+            payload_bytes=sum(item.payload_bytes for item in items),
+            estimated_archive_bytes=archive_bytes,
+            estimated_disk_bytes=disk_bytes,
+        )
+
+        existing = _nearest_existing(output_dir)
+        if existing is not None:
+            try:
+                plan.free_disk_bytes = shutil.disk_usage(existing).free
+            except OSError as e:
+                logger.warning(f"Khong xac dinh duoc dung luong trong cua {existing}: {e}")
+
+        logger.info(f"Lap ke hoach {len(plan.items)} ho so ({self.inventory.scanned_dirs} thu muc nguon) "
+                    f"trong {(datetime.now() - start).total_seconds():.2f}s")
+        return plan
+
+    def _effective_payload_mode(self, pdf_root: Path, output_dir: Path) -> str:
+        """Nhu PackageBuilder: hardlink khac file system -> copy"""
+        payload_mode = self.config.payload_mode
+        if payload_mode != PAYLOAD_MODE_HARDLINK:
+            return payload_mode
+        existing = _nearest_existing(output_dir)
+        try:
+            if existing is None or pdf_root.stat().st_dev != existing.stat().st_dev:
+                return PAYLOAD_MODE_COPY
+        except OSError:
+            return PAYLOAD_MODE_COPY
+        return payload_mode
+
+    def plan_package(self, hoso: HoSo, pdf_root: Path, output_dir: Path) -> PackagePlanItem:
+        """Ke hoach cho 1 ho so (dung inventory da quet, khong truy cap dia)"""
+        package_id = package_id_for(hoso)
+        package_dir = output_dir / package_id
+        archive_path = container_path(package_dir, self.container)
+
+        # Payload: ten dich nhu copy_pdf_files (trung ten khac kich thuoc -> them _001)
+        payload: Dict[str, int] = {}
+        missing: List[str] = []
+        for tailieu in hoso.tai_lieu:
+            if not tailieu.duongDanFile:
+                missing.append(f"({tailieu.trich_yeu or 'khong co duongDanFile'})")
+                continue
+            source = self._sources.get(tailieu.duongDanFile)
+            if source is None:
+                source = self._sources[tailieu.duongDanFile] = _source_file(str(pdf_root), tailieu.duongDanFile)
+            size = self.inventory.size_of(*source)
+            if size is None:
+                missing.append(tailieu.duongDanFile)
+                continue
+            target = source[1]
+            if target in payload and payload[target] != size:
+                stem, dot, suffix = target.rpartition('.')
+                stem, suffix = (stem, dot + suffix) if dot else (target, '')
+                counter = 1
+                while target in payload:
+                    target = f"{stem}_{counter:03d}{suffix}"
+                    counter += 1
+            payload[target] = size
+
+        # Metadata: METS, rep1/METS, EAD, PREMIS, PREMIS_rep1, schema + EAD_doc moi tai lieu
+        rels = list(self._fixed_rels)
+        rels += [f"{REP1_DESCRIPTIVE_REL}/{t.ead_doc_filename}" for t in hoso.tai_lieu if t.ead_doc_filename]
+        rels += [f"{REP1_DATA_REL}/{name}" for name in payload]
+        xml_bytes = METADATA_BASE_BYTES + METADATA_PER_DOC_BYTES * len(hoso.tai_lieu)
+        payload_bytes = sum(payload.values())
+
+        # Duong dan dai nhat: file trong folder goi va file dong goi
+        package_str = str(package_dir)
+        archive_len = len(package_str) + len(self.container) + 1
+        base_len = len(package_str) + 1
+        rel_lengths = list(map(len, rels))
+        max_path_length = max(archive_len, base_len + max(rel_lengths))
+        long_paths = []
+        if max_path_length >= self.path_limit:
+            long_paths = [f"{package_dir.name}/{rel}" for rel in rels if base_len + len(rel) >= self.path_limit]
+            if archive_len >= self.path_limit:
+                long_paths.append(archive_path.name)
+
+        # Gia tri da dung kieu -> bo qua validation (100k+ muc)
+        return PackagePlanItem.model_construct(
+            hoso_id=hoso.arc_file_code,
+            package_id=package_id,
+            package_dir=package_dir,
+            archive_path=archive_path,
+            file_count=len(rels),
+            payload_files=len(payload),
+            missing_files=missing,
+            payload_bytes=payload_bytes,
+            metadata_bytes=xml_bytes + self._schema_bytes,
+            estimated_archive_bytes=self._estimate_archive(package_dir.name, rels, sum(rel_lengths),
+                                                           payload_bytes, xml_bytes),
+            max_path_length=max_path_length,
+            long_paths=long_paths,
+        )
+
+    def _estimate_archive(self, root: str, rels: List[str], rel_chars: int,
+                          payload_bytes: int, xml_bytes: int) -> int:
+        """
+        Uoc tinh kich thuoc file dong goi: PDF giu nguyen, XML nen theo ty le, schema nen that
+
+        Ten member tinh theo so ky tu (ten unicode trong ZIP dai hon vai bytes)
+        """
+        xml_packed = int(xml_bytes * XML_COMPRESS_RATIO)
+        if self.container == CONTAINER_ZIP:
+            names = len(rels) * (len(root) + 1) + rel_chars
+            overhead = len(rels) * ZIP_ENTRY_OVERHEAD + 2 * names
+            return payload_bytes + xml_packed + self._schema_packed + overhead + ZIP_END_OVERHEAD
+        # tar: moi member 1 header + dem toi block 512 (+ PAX header neu ten dai/unicode)
+        pax = root.isascii()
+        headers = sum(TAR_BLOCK * (3 if len(root) + len(rel) >= 100 or not (pax and rel.isascii()) else 1)
+                      for rel in rels)
+        padding = TAR_BLOCK // 2 * len(rels)
+        if self.container == CONTAINER_TAR_ZST:
+            return payload_bytes + xml_packed + self._schema_packed + (headers + padding) // 10
+        return payload_bytes + xml_bytes + self._schema_bytes + headers + padding + TAR_END_OVERHEAD
+
+
+def plan_build(hoso_list: List[HoSo], pdf_root: Path, output_dir: Path,
+               config: Optional[Config] = None, cleanup_folders: bool = False) -> PackagePlan:
+    """Lap ke hoach build (dry-run) cho danh sach ho so"""
+    return BuildPlanner(config, cleanup_folders=cleanup_folders).plan(hoso_list, pdf_root, output_dir)
+
+
+def summarize_plan(plan: PackagePlan) -> Dict[str, Any]:
+    """Tong hop ke hoach: so goi, so file, dung luong, dia trong, van de"""
+    mb = 1024 * 1024
+    return {
+        'total_hoso': len(plan.items),
+        'total_files': plan.total_files,
+        'payload_mb': round(plan.payload_bytes / mb, 2),
+        'estimated_archive_mb': round(plan.estimated_archive_bytes / mb, 2),
+        'estimated_disk_mb': round(plan.estimated_disk_bytes / mb, 2),
+        'free_disk_mb': round(plan.free_disk_bytes / mb, 2) if plan.free_disk_bytes is not None else None,
+        'fits_on_disk': plan.fits_on_disk,
+        'missing_files': plan.missing_count,
+        'path_overflows': plan.overflow_count,
+        'max_path_length': max((i.max_path_length for i in plan.items), default=0),
+        'path_limit': plan.path_limit,
+        'container': plan.container,
+        'cleanup_folders': plan.cleanup_folders,
+        'payload_mode': plan.payload_mode,
+    }
+
+
+def write_plan_report(plan: PackagePlan, report_path: str | Path) -> Path:
+    """
+    Ghi bao cao ke hoach: .csv -> moi ho so 1 dong; con lai -> JSON (tong hop + ho so co van de)
+
+    Args:
+        plan: Ke hoach da lap
+        report_path: File bao cao (nam ngoai thu muc output neu muon dry-run hoan toan)
+    """
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def row(item: PackagePlanItem) -> Dict[str, Any]:
+        data = item.model_dump(mode='json')
+        data['missing_files'] = '; '.join(item.missing_files)
+        data['long_paths'] = '; '.join(item.long_paths)
+        return data
+
+    if report_path.suffix.lower() == '.csv':
+        with open(report_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=_CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for item in plan.items:
+                writer.writerow(row(item))
+    else:
+        report = {
+            'planned_at': datetime.now().isoformat(timespec='seconds'),
+            'output_dir': str(plan.output_dir),
+            'summary': summarize_plan(plan),
+            'problems': [
+                item.model_dump(mode='json', include={'hoso_id', 'package_id', 'missing_files',
+                                                      'max_path_length', 'long_paths'})
+                for item in plan.items if item.missing_files or item.long_paths
+            ],
+        }
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Da ghi bao cao ke hoach: {report_path}")
+    return report_path
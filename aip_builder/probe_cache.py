@@ -0,0 +1,282 @@
+"""
+Probe Cache - Bo nho dem ket qua quet PDF tren dia (SQLite)
+
+Chuc nang chinh:
+- Luu ket qua PDFProbe (sha256, fixity bo sung, so trang, ma hoa, text, phien ban) giua cac lan chay
+- Khoa tra cuu theo dinh danh file: (path, size, mtime_ns, inode)
+- Tu dong vo hieu hoa khi file thay doi, gioi han so ban ghi voi LRU eviction
+- Dem so lan hit/miss de bao cao trong batch summary
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .pdf_probe import PDFInfo, ProbeLevel
+
+logger = logging.getLogger(__name__)
+
+# Ten file cache mac dinh, dat canh thu muc output
+DEFAULT_CACHE_FILENAME = ".aip_probe_cache.sqlite"
+
+# Tang khi thay doi y nghia/cau truc bang -> cache cu bi xoa khi mo
+_SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probe_cache (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    pages INTEGER,
+    is_encrypted INTEGER NOT NULL DEFAULT 0,
+    has_text INTEGER NOT NULL DEFAULT 0,
+    pdf_version TEXT,
+    digests TEXT,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_probe_cache_last_access ON probe_cache(last_access);
+"""
+
+
+class ProbeCache:
+    """Cache ket qua quet PDF, dung chung giua cac thread trong 1 process"""
+
+    def __init__(self, db_path: str | Path, max_entries: int = 1_000_000):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._puts_since_check = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS probe_cache")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+        logger.info(f"Su dung probe cache: {self.db_path}")
+
+    @classmethod
+    def for_output_dir(cls, output_dir: str | Path, max_entries: int = 1_000_000,
+                       filename: str = DEFAULT_CACHE_FILENAME) -> 'ProbeCache':
+        """
+        Tao cache canh thu muc output (o thu muc cha) de cac lan chay voi
+        output co timestamp khac nhau van dung chung 1 cache
+        """
+        output_dir = Path(output_dir).resolve()
+        return cls(output_dir.parent / filename, max_entries=max_entries)
+
+    @staticmethod
+    def _key_path(file_path: str | Path) -> str:
+        return str(Path(file_path).resolve())
+
+    def get(self, file_path: str | Path, min_level: ProbeLevel = ProbeLevel.HASH,
+            stat_result: Optional[os.stat_result] = None,
+            required_digests: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Tra cuu ket qua da luu cho file
+
+        Args:
+            file_path: Duong dan file
+            min_level: Muc do quet toi thieu ban ghi phai dat
+            stat_result: Ket qua os.stat da co (tranh stat lai)
+            required_digests: Cac fixity bo sung ban ghi phai co (vd: ['MD5'])
+
+        Returns:
+            Dict cac truong da luu, None neu khong co hoac da cu
+        """
+        key = self._key_path(file_path)
+        try:
+            st = stat_result or os.stat(file_path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, level, sha256, pages, is_encrypted, "
+                "has_text, pdf_version, digests FROM probe_cache WHERE path = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            size, mtime_ns, inode, level, sha256, pages, is_encrypted, has_text, pdf_version, digests = row
+            if (size, mtime_ns, inode) != (st.st_size, st.st_mtime_ns, st.st_ino):
+                # File da thay doi -> vo hieu hoa ban ghi cu
+                self._conn.execute("DELETE FROM probe_cache WHERE path = ?", (key,))
+                self.misses += 1
+                return None
+
+            digests = json.loads(digests) if digests else {}
+            digests['SHA-256'] = sha256
+            if level < min_level or any(a not in digests for a in required_digests):
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE probe_cache SET last_access = ? WHERE path = ?", (time.time(), key)
+            )
+            self.hits += 1
+
+        return {
+            'size': size,
+            'mtime': datetime.fromtimestamp(mtime_ns / 1e9),
+            'level': ProbeLevel(level),
+            'sha256': sha256,
+            'pages': pages,
+            'is_encrypted': bool(is_encrypted),
+            'has_text': bool(has_text),
+            'pdf_version': pdf_version,
+            'digests': digests,
+        }
+
+    def get_info(self, file_path: str | Path, min_level: ProbeLevel = ProbeLevel.STRUCTURE,
+                 stat_result: Optional[os.stat_result] = None) -> Optional[PDFInfo]:
+        """Tra cuu va tra ve PDFInfo (None neu miss)"""
+        cached = self.get(file_path, min_level, stat_result)
+        if cached is None:
+            return None
+        file_path = Path(file_path)
+        return PDFInfo(
+            filepath=file_path,
+            filename=file_path.name,
+            size=cached['size'],
+            mtime=cached['mtime'],
+            sha256=cached['sha256'],
+            pages=cached['pages'],
+            pdf_version=cached['pdf_version'],
+            is_encrypted=cached['is_encrypted'],
+            has_text=cached['has_text'],
+        )
+
+    def put(self, file_path: str | Path, sha256: str, level: ProbeLevel,
+            pages: Optional[int] = None,
+            is_encrypted: bool = False, has_text: bool = False,
+            pdf_version: Optional[str] = None,
+            stat_result: Optional[os.stat_result] = None,
+            digests: Optional[Dict[str, str]] = None) -> None:
+        """Luu ket qua quet cho file (ghi de ban ghi cu neu co)"""
+        if not sha256:
+            return
+
+        key = self._key_path(file_path)
+        try:
+            st = stat_result or os.stat(file_path)
+        except OSError as e:
+            logger.debug(f"Khong the stat {file_path} de luu cache: {e}")
+            return
+
+        with self._lock:
+            # Khong ha cap ban ghi da co thong tin day du hon
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, level, digests FROM probe_cache WHERE path = ?", (key,)
+            ).fetchone()
+            # SHA-256 da co cot rieng, chi luu cac fixity bo sung
+            extra = {a: d for a, d in (digests or {}).items() if a != 'SHA-256'}
+            if row and (row[0], row[1], row[2]) == (st.st_size, st.st_mtime_ns, st.st_ino):
+                if row[4]:
+                    extra = {**json.loads(row[4]), **extra}
+                if row[3] > level:
+                    self._conn.execute(
+                        "UPDATE probe_cache SET digests = ? WHERE path = ?",
+                        (json.dumps(extra) if extra else None, key)
+                    )
+                    return
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probe_cache (path, size, mtime_ns, inode, level, sha256, "
+                "pages, is_encrypted, has_text, pdf_version, digests, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, st.st_size, st.st_mtime_ns, st.st_ino, int(level), sha256, pages,
+                 int(is_encrypted), int(has_text), pdf_version,
+                 json.dumps(extra) if extra else None, time.time())
+            )
+
+            self._puts_since_check += 1
+            if self._puts_since_check >= 1000:
+                self._puts_since_check = 0
+                self._evict_locked()
+
+    def put_info(self, pdf_info: PDFInfo, level: ProbeLevel = ProbeLevel.STRUCTURE) -> None:
+        """Luu PDFInfo vao cache (bo qua neu quet bi loi hoac chua co hash)"""
+        if pdf_info.error or level < ProbeLevel.HASH:
+            return
+        self.put(
+            pdf_info.filepath, pdf_info.sha256, level,
+            pages=pdf_info.pages,
+            is_encrypted=pdf_info.is_encrypted,
+            has_text=pdf_info.has_text,
+            pdf_version=pdf_info.pdf_version,
+        )
+
+    def _evict_locked(self) -> None:
+        """Xoa cac ban ghi it dung nhat khi vuot gioi han (goi khi da giu lock)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM probe_cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        # Xoa bot xuong 90% gioi han de khong phai evict lien tuc
+        to_delete = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM probe_cache WHERE path IN "
+            "(SELECT path FROM probe_cache ORDER BY last_access ASC LIMIT ?)",
+            (to_delete,)
+        )
+        self.evictions += to_delete
+        logger.info(f"Probe cache: xoa {to_delete} ban ghi cu (LRU)")
+
+    def evict(self) -> None:
+        """Ap dung gioi han kich thuoc cache ngay lap tuc"""
+        with self._lock:
+            self._evict_locked()
+
+    def invalidate(self, file_path: str | Path) -> None:
+        """Xoa ban ghi cua 1 file"""
+        with self._lock:
+            self._conn.execute("DELETE FROM probe_cache WHERE path = ?", (self._key_path(file_path),))
+
+    def clear(self) -> None:
+        """Xoa toan bo cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM probe_cache")
+        logger.info(f"Da xoa toan bo probe cache: {self.db_path}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thong ke hit/miss cua cache"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM probe_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+        }
+
+    def close(self) -> None:
+        """Dong ket noi SQLite"""
+        with self._lock:
+            self._evict_locked()
+            self._conn.close()
@@ -0,0 +1,304 @@
+"""
+Render Context - Bien dich san gia tri template cho 1 ho so
+
+Chuc nang chinh:
+- Tinh 1 lan moi HoSo/TaiLieu moi gia tri ma cac template XML in ra: ma (thoi_han_bao_quan_code,
+  ngon_ngu_code, che_do_su_dung_code, ...), ngay (ngay_van_ban_formatted, ...), tieu de
+  (effective_title), UUID viet hoa, ten file, fixity
+- Ket qua la ban ghi phang, bat bien (dataclass frozen): chuoi da escape XML, da ap gia tri
+  mac dinh cua template -> template chi con in thuoc tinh, khong goi property/filter moi lan render
+- Gia tri in ra giong het template doc truc tiep model (ke ca None -> 'None' o cho cu da in vay)
+- Gia tri lay tu Config (agent, to chuc) gom vao AgentRecord, dung chung cho ca ho so
+
+Dung:
+    record = compile_hoso(hoso, config)
+    generator.generate_mets(record, package_id)  # generate_* nhan HoSo hoac HoSoRecord
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .config import Config
+from .models import HoSo, TaiLieu
+from .template_cache import basename, escape_xml, safe_filename
+
+# Fixity khi tai lieu chua co checksums: (thuat toan, digest) theo tung template PREMIS
+_PREMIS_MISSING_DIGEST = '[TO_BE_CALCULATED]'
+_PREMIS_REP_MISSING_DIGEST = '0' * 64
+
+Fixity = Tuple[Tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class AgentRecord:
+    """Gia tri agent/to chuc lay tu Config (METS metsHdr, PREMIS agent/fixity)"""
+    software_role: str
+    software_type: str
+    software_othertype: str
+    software_name: str
+    software_version: str
+    organization: str  # Ten to chuc (PREMIS_rep1 messageDigestOriginator, khong escape)
+    organization_xml: str  # Ten to chuc da escape (METS agent EDITOR)
+    organization_id: str  # safe_filename(ten to chuc) hoac 'UNKNOWN_ORG'
+    organization_label: str  # Ten to chuc hoac 'Unknown Organization'
+    organization_email: str  # '' neu khong co
+    agency_code: str
+    archivist_xml: str
+    archivist_code: str
+
+
+@dataclass(frozen=True)
+class TaiLieuRecord:
+    """Gia tri template cua 1 tai lieu (EAD_doc, rep1/METS, PREMIS, PREMIS_rep1)"""
+    ead_doc_filename: Optional[str]
+    # EAD_doc (simpledc_tailieu_template.xml)
+    doc_id: str
+    arc_doc_code: str
+    maintenance: str
+    type_name: str
+    code_number: str
+    code_notation: str
+    issued_date: str
+    organ_name: str  # Da escape, '' neu khong co (cung la <creator> PREMIS)
+    subject: str  # Trich yeu da escape, '' neu khong co (cung la <documentTitle> PREMIS)
+    language: str
+    number_of_page: str
+    infor_sign: str
+    keyword: str
+    mode: str
+    confidence_level: str
+    autograph: str
+    format: str
+    process: str
+    risk_recovery: str
+    risk_recovery_status: str
+    description: str
+    # rep1/METS.xml (UUID viet hoa; kich thuoc/checksum/ten file in nhu str())
+    dmd_uuid: str
+    dmd_ref_uuid: str
+    file_uuid: str
+    metalink_uuid: str
+    kich_thuoc_file: str
+    checksum: str
+    filename: str
+    # PREMIS.xml / PREMIS_rep1.xml
+    file_id: str
+    title: str  # effective_title da escape
+    data_name: str  # Ten file trong rep1/data: filename hoac basename(duongDanFile)
+    has_source: bool  # Co duongDanFile (PREMIS chi mo ta file co duong dan)
+    source_name: str  # basename(duongDanFile)
+    original_name: str  # basename(duongDanFile) da escape
+    page_count: str  # so_trang, '' neu khong co
+    file_size: str  # '' neu khong co
+    physical_condition: str  # tinh_trang_vat_ly da escape
+    premis_fixity: Fixity
+    rep_fixity: Fixity
+
+
+@dataclass(frozen=True)
+class HoSoRecord:
+    """Gia tri template cua 1 ho so (METS, rep1/METS, EAD, PREMIS) + ban ghi cac tai lieu"""
+    id: str
+    objid: str
+    arc_file_code: str  # Da escape
+    title: str  # effective_title da escape
+    # EAD.xml (simpledc_hoso_template.xml)
+    maintenance: str
+    mode: str
+    language: str
+    start_date: str
+    end_date: str
+    keyword: str
+    total_doc: str
+    number_of_paper: str
+    number_of_page: str
+    format: str
+    infor_sign: str
+    confidence_level: str
+    paper_file_code: str
+    risk_recovery: str
+    risk_recovery_status: str
+    description: str
+    # PREMIS.xml
+    annotation: str  # chu_giai da escape
+    fonds: str  # phong hoac muc_luc da escape
+    doc_count: int
+    # UUID viet hoa: METS goc (main_*) va rep1/METS.xml
+    main_dmd_uuid: str
+    main_dmd_ref_uuid: str
+    main_amd_uuid: str
+    main_digiprov_uuid: str
+    main_premis_ref_uuid: str
+    main_filesec_uuid: str
+    main_repr_group_uuid: str
+    main_repr_file_uuid: str
+    main_schemas_group_uuid: str
+    main_mets_xsd_uuid: str
+    main_ead_xsd_uuid: str
+    main_premis_xsd_uuid: str
+    main_structmap_uuid: str
+    main_div_uuid: str
+    main_metadata_div_uuid: str
+    main_schemas_div_uuid: str
+    main_repr_div_uuid: str
+    rep_uuid: str
+    dmd_uuid: str
+    dmd_ref_uuid: str
+    amd_uuid: str
+    digiprov_uuid: str
+    premis_ref_uuid: str
+    filesec_uuid: str
+    filegroup_uuid: str
+    structmap_uuid: str
+    metadata_div_uuid: str
+    data_div_uuid: str
+    metalink_div_uuid: str
+    agent: AgentRecord
+    tai_lieu: Tuple[TaiLieuRecord, ...]
+
+
+def compile_agent(config: Config) -> AgentRecord:
+    """Gia tri agent/to chuc tu Config"""
+    organization = config.organization_name
+    return AgentRecord(
+        software_role=str(config.software_agent_role),
+        software_type=str(config.software_agent_type),
+        software_othertype=str(config.software_agent_othertype),
+        software_name=str(config.software_agent_name),
+        software_version=str(config.software_agent_version),
+        organization=str(organization),
+        organization_xml=escape_xml(organization),
+        organization_id=safe_filename(organization) if organization else 'UNKNOWN_ORG',
+        organization_label=str(organization or 'Unknown Organization'),
+        organization_email=str(config.organization_email) if config.organization_email else '',
+        agency_code=str(config.agency_code),
+        archivist_xml=escape_xml(config.archivist_name),
+        archivist_code=str(config.archivist_code),
+    )
+
+
+def _fixity(tai_lieu: TaiLieu, missing: str) -> Fixity:
+    """Cac cap (thuat toan, digest) cua tai lieu; chua co checksums -> SHA-256 voi checksum/missing"""
+    if tai_lieu.checksums:
+        return tuple((str(algorithm), str(digest)) for algorithm, digest in tai_lieu.checksums.items())
+    return (('SHA-256', str(tai_lieu.checksum or missing)),)
+
+
+def compile_tai_lieu(tai_lieu: TaiLieu, parent_maintenance: Optional[str] = None) -> TaiLieuRecord:
+    """
+    Gia tri template cua 1 tai lieu
+
+    Args:
+        parent_maintenance: Ma thoi han bao quan cua ho so chua tai lieu (uu tien hon cua tai lieu)
+    """
+    risk_recovery = tai_lieu.che_do_du_phong
+    source_name = basename(tai_lieu.duongDanFile)
+    return TaiLieuRecord(
+        ead_doc_filename=tai_lieu.ead_doc_filename,
+        doc_id=escape_xml(tai_lieu.file_id),
+        arc_doc_code=escape_xml(tai_lieu.arc_doc_code),
+        maintenance=str(parent_maintenance or tai_lieu.thoi_han_bao_quan_code or '01'),
+        type_name=str(tai_lieu.loai_tai_lieu_code or '32'),
+        code_number=escape_xml(tai_lieu.so_van_ban),
+        code_notation=escape_xml(tai_lieu.ky_hieu_van_ban),
+        issued_date=str(tai_lieu.ngay_van_ban_formatted),
+        organ_name=escape_xml(tai_lieu.co_quan_ban_hanh),
+        subject=escape_xml(tai_lieu.trich_yeu),
+        language=str(tai_lieu.ngon_ngu_code or '01'),
+        number_of_page=str(tai_lieu.so_trang_tai_lieu or tai_lieu.so_trang or 0),
+        infor_sign=escape_xml(tai_lieu.ky_hieu_thong_tin),
+        keyword=escape_xml(tai_lieu.tu_khoa),
+        mode=str(tai_lieu.che_do_su_dung_code or '02'),
+        confidence_level=str(tai_lieu.muc_do_tin_cay_code or '02'),
+        autograph=escape_xml(tai_lieu.but_tich),
+        format=str(tai_lieu.tinh_trang_vat_ly_code or '02'),
+        process=str(tai_lieu.quy_trinh_xu_ly_code or '0'),
+        risk_recovery=str(risk_recovery or '0'),
+        risk_recovery_status=str(tai_lieu.tinh_trang_du_phong or '02') if risk_recovery == '1' else '',
+        description=escape_xml(tai_lieu.ghi_chu_tai_lieu or tai_lieu.ghi_chu),
+        dmd_uuid=tai_lieu.dmd_uuid.upper(),
+        dmd_ref_uuid=tai_lieu.dmd_ref_uuid.upper(),
+        file_uuid=tai_lieu.file_uuid.upper(),
+        metalink_uuid=tai_lieu.metalink_uuid.upper(),
+        kich_thuoc_file=str(tai_lieu.kich_thuoc_file),
+        checksum=str(tai_lieu.checksum),
+        filename=str(tai_lieu.filename),
+        file_id=str(tai_lieu.file_id),
+        title=escape_xml(tai_lieu.effective_title),
+        data_name=str(tai_lieu.filename or source_name),
+        has_source=bool(tai_lieu.duongDanFile),
+        source_name=source_name,
+        original_name=escape_xml(source_name),
+        page_count=str(tai_lieu.so_trang) if tai_lieu.so_trang else '',
+        file_size=str(tai_lieu.file_size) if tai_lieu.file_size else '',
+        physical_condition=escape_xml(tai_lieu.tinh_trang_vat_ly),
+        premis_fixity=_fixity(tai_lieu, _PREMIS_MISSING_DIGEST),
+        rep_fixity=_fixity(tai_lieu, _PREMIS_REP_MISSING_DIGEST),
+    )
+
+
+def compile_hoso(hoso: HoSo, config: Config) -> HoSoRecord:
+    """
+    Gia tri template cua ho so va tat ca tai lieu (goi sau khi da co checksum/kich thuoc payload)
+
+    Returns:
+        HoSoRecord bat bien, dung chung cho moi template cua goi
+    """
+    maintenance = hoso.thoi_han_bao_quan_code
+    risk_recovery = hoso.che_do_du_phong
+    return HoSoRecord(
+        id=str(hoso.id),
+        objid=str(hoso.objid),
+        arc_file_code=escape_xml(hoso.arc_file_code),
+        title=escape_xml(hoso.effective_title),
+        maintenance=str(maintenance or '01'),
+        mode=str(hoso.che_do_su_dung_code or '02'),
+        language=str(hoso.ngon_ngu_code or '01'),
+        start_date=str(hoso.start_date_formatted),
+        end_date=str(hoso.end_date_formatted),
+        keyword=escape_xml(hoso.tu_khoa),
+        total_doc=str(hoso.tong_so_van_ban or len(hoso.tai_lieu) if hoso.tai_lieu else 0),
+        number_of_paper=str(hoso.so_luong_to or 0),
+        number_of_page=str(hoso.effective_total_pages or 0),
+        format=str(hoso.tinh_trang_vat_ly_code or '02'),
+        infor_sign=escape_xml(hoso.ky_hieu_thong_tin),
+        confidence_level=str(hoso.muc_do_tin_cay_code or '02'),
+        paper_file_code=escape_xml(hoso.effective_paper_file_code),
+        risk_recovery=str(risk_recovery or '0'),
+        risk_recovery_status=str(hoso.tinh_trang_du_phong or '02') if risk_recovery == '1' else '',
+        description=escape_xml(hoso.ghi_chu),
+        annotation=escape_xml(hoso.chu_giai),
+        fonds=escape_xml(hoso.phong if hoso.phong else hoso.muc_luc),
+        doc_count=len(hoso.tai_lieu),
+        main_dmd_uuid=hoso.main_dmd_uuid.upper(),
+        main_dmd_ref_uuid=hoso.main_dmd_ref_uuid.upper(),
+        main_amd_uuid=hoso.main_amd_uuid.upper(),
+        main_digiprov_uuid=hoso.main_digiprov_uuid.upper(),
+        main_premis_ref_uuid=hoso.main_premis_ref_uuid.upper(),
+        main_filesec_uuid=hoso.main_filesec_uuid.upper(),
+        main_repr_group_uuid=hoso.main_repr_group_uuid.upper(),
+        main_repr_file_uuid=hoso.main_repr_file_uuid.upper(),
+        main_schemas_group_uuid=hoso.main_schemas_group_uuid.upper(),
+        main_mets_xsd_uuid=hoso.main_mets_xsd_uuid.upper(),
+        main_ead_xsd_uuid=hoso.main_ead_xsd_uuid.upper(),
+        main_premis_xsd_uuid=hoso.main_premis_xsd_uuid.upper(),
+        main_structmap_uuid=hoso.main_structmap_uuid.upper(),
+        main_div_uuid=hoso.main_div_uuid.upper(),
+        main_metadata_div_uuid=hoso.main_metadata_div_uuid.upper(),
+        main_schemas_div_uuid=hoso.main_schemas_div_uuid.upper(),
+        main_repr_div_uuid=hoso.main_repr_div_uuid.upper(),
+        rep_uuid=hoso.rep_uuid.upper(),
+        dmd_uuid=hoso.dmd_uuid.upper(),
+        dmd_ref_uuid=hoso.dmd_ref_uuid.upper(),
+        amd_uuid=hoso.amd_uuid.upper(),
+        digiprov_uuid=hoso.digiprov_uuid.upper(),
+        premis_ref_uuid=hoso.premis_ref_uuid.upper(),
+        filesec_uuid=hoso.filesec_uuid.upper(),
+        filegroup_uuid=hoso.filegroup_uuid.upper(),
+        structmap_uuid=hoso.structmap_uuid.upper(),
+        metadata_div_uuid=hoso.metadata_div_uuid.upper(),
+        data_div_uuid=hoso.data_div_uuid.upper(),
+        metalink_div_uuid=hoso.metalink_div_uuid.upper(),
+        agent=compile_agent(config),
+        tai_lieu=tuple(compile_tai_lieu(tai_lieu, maintenance) for tai_lieu in hoso.tai_lieu),
+    )
@@ -0,0 +1,130 @@
+"""
+Schema Assets - Cache cac file XSD schema dung chung cho ca lan chay
+
+Chuc nang chinh:
+- Doc cac file schemas/*.xsd 1 lan moi process: noi dung, kich thuoc, SHA-256
+- Dat schema vao tung goi khong can doc lai file nguon:
+  thu muc -> hardlink toi ban da ghi dau tien (khac o dia/loi thi ghi tu bo nho),
+  ZIP/tar stream -> ghi thang tu bo nho
+- Cung cap checksum cho placeholder PLACEHOLDER_SCHEMA_*_CHECKSUM trong METS
+  (khong phai hash lai file da sao chep)
+- Bien dich XSD 1 lan (lazy) de kiem tra cay XML trong bo nho (engine lxml)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Thu muc schema di kem package
+SCHEMA_DIR = Path(__file__).parent / 'schemas'
+
+
+@dataclass(frozen=True)
+class SchemaAsset:
+    """1 file schema da nap vao bo nho"""
+    name: str
+    data: bytes
+    size: int
+    sha256: str
+
+
+class SchemaAssets:
+    """Cac file XSD da nap san, thread-safe, dung chung giua cac goi/thread"""
+
+    def __init__(self, schema_dir: Union[str, Path] = SCHEMA_DIR, pattern: str = '*.xsd'):
+        self.schema_dir = Path(schema_dir)
+        self._assets: Dict[str, SchemaAsset] = {}
+        for path in sorted(self.schema_dir.glob(pattern)):
+            data = path.read_bytes()
+            self._assets[path.name] = SchemaAsset(path.name, data, len(data), hashlib.sha256(data).hexdigest())
+        # Ban da ghi ra thu muc dau tien cua moi schema (nguon hardlink cho cac goi sau)
+        self._placed: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self.linked = 0
+        self.written = 0
+        # XSD da bien dich (None: khong bien dich duoc) + lock rieng moi schema (error_log dung chung)
+        self._compiled: Dict[str, Optional[etree.XMLSchema]] = {}
+        self._validate_locks: Dict[str, threading.Lock] = {}
+        logger.debug(f"Da nap {len(self._assets)} schema tu {self.schema_dir}")
+
+    def names(self) -> List[str]:
+        return list(self._assets)
+
+    def get(self, name: str) -> Optional[SchemaAsset]:
+        return self._assets.get(name)
+
+    def xml_schema(self, name: str) -> Optional[etree.XMLSchema]:
+        """XSD da bien dich (lan dau goi), None neu khong co hoac khong bien dich duoc"""
+        with self._lock:
+            if name in self._compiled:
+                return self._compiled[name]
+        schema = None
+        if name in self._assets:
+            try:
+                schema = etree.XMLSchema(etree.parse(str(self.schema_dir / name)))
+            except (etree.XMLSchemaParseError, etree.XMLSyntaxError) as e:
+                logger.warning(f"Khong bien dich duoc schema {name}, bo qua kiem tra XSD: {e}")
+        with self._lock:
+            self._compiled.setdefault(name, schema)
+            self._validate_locks.setdefault(name, threading.Lock())
+            return self._compiled[name]
+
+    def validate(self, name: str, root: etree._Element) -> List[str]:
+        """
+        Kiem tra cay XML voi XSD name (khong parse lai)
+
+        Returns:
+            Danh sach loi (rong neu hop le hoac XSD khong dung duoc)
+        """
+        schema = self.xml_schema(name)
+        if schema is None:
+            return []
+        with self._validate_locks[name]:
+            if schema.validate(root):
+                return []
+            return [f"{error.path}: {error.message}" for error in schema.error_log]
+
+    def place(self, name: str, target: Path) -> None:
+        """
+        Dat schema vao target (thu muc goi): hardlink toi ban da ghi truoc do neu duoc,
+        neu khong thi ghi tu bo nho
+        """
+        asset = self._assets[name]
+        with self._lock:
+            first = self._placed.get(name)
+        if first is not None:
+            try:
+                if first.stat().st_size == asset.size:
+                    os.link(first, target)
+                    with self._lock:
+                        self.linked += 1
+                    return
+            except OSError as e:
+                logger.debug(f"Khong hardlink duoc schema {target} -> {first}: {e}")
+        target.write_bytes(asset.data)
+        with self._lock:
+            self.written += 1
+            # Ban dau da bi xoa (vd: --cleanup) hoac khac o dia -> ban moi lam nguon
+            if first is None or not first.exists() or first.stat().st_dev != target.stat().st_dev:
+                self._placed[name] = target
+
+
+_schema_assets: Optional[SchemaAssets] = None
+_schema_assets_lock = threading.Lock()
+
+
+def get_schema_assets() -> SchemaAssets:
+    """SchemaAssets dung chung cho process (nap lan dau goi)"""
+    global _schema_assets
+    with _schema_assets_lock:
+        if _schema_assets is None:
+            _schema_assets = SchemaAssets()
+        return _schema_assets
@@ -0,0 +1,252 @@
+"""
+Template Cache - Jinja2 environment dung chung cho ca process
+
+Chuc nang chinh:
+- 1 Environment (loader, filter) cho moi process, dung chung giua cac
+  XMLTemplateGenerator/PackageBuilder/chunk/thread - khong tao lai moi chunk
+- Bien dich san cac template XML luc khoi dong, khong kiem tra lai file template
+  moi lan render (auto_reload tat)
+- Tuy chon bytecode cache tren dia (Config.template_cache_dir): process worker va
+  lan chay CLI ngan nap bytecode thay vi bien dich lai
+- Thong ke thoi gian bien dich va render theo tung template
+- Render dang stream (generate): tra ve tung doan chuoi, khong dung ca file trong bo nho
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+from uuid import uuid4 as _uuid4
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+logger = logging.getLogger(__name__)
+
+# Thu muc template di kem package
+TEMPLATE_DIR = Path(__file__).parent / 'templates'
+
+# Template dung khi sinh goi AIP (bien dich san luc khoi dong)
+XML_TEMPLATES = (
+    'mets_template.xml',
+    'rep_mets.xml',
+    'simpledc_hoso_template.xml',
+    'simpledc_tailieu_template.xml',
+    'premis_template.xml',
+    'premis_rep_template.xml',
+)
+
+# Render stream: gom cac doan nho cua Jinja thanh block (so ky tu) truoc khi tra ve
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def format_date(value, format='%Y-%m-%dT%H:%M:%S'):
+    """Format datetime object"""
+    if isinstance(value, datetime):
+        return value.strftime(format)
+    return str(value)
+
+
+def escape_xml(value):
+    """Escape XML characters"""
+    if not value:
+        return ''
+    return str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&apos;')
+
+
+def safe_filename(value):
+    """Tao filename an toan"""
+    if not value:
+        return 'unknown'
+    # Loại bỏ dấu tiếng Việt
+    value = unicodedata.normalize('NFD', str(value))
+    value = value.encode('ascii', 'ignore').decode('utf-8')
+    # Chuyển về chữ thường
+    value = value.lower()
+    # Thay khoảng trắng bằng _
+    value = re.sub(r'\s+', '_', value)
+    # Chỉ giữ ký tự a-z, 0-9, _, -
+    value = re.sub(r'[^a-z0-9_-]', '', value)
+    return value
+
+
+def basename(value):
+    """Lay ten file tu duong dan"""
+    if not value:
+        return 'unknown.pdf'
+    return Path(str(value)).name
+
+
+def random_uuid():
+    """Tao UUID ngau nhien"""
+    return str(_uuid4()).replace('-', '')
+
+
+def uuid4(value=None):
+    """Tao UUID4"""
+    return str(_uuid4())
+
+
+FILTERS = {
+    'format_date': format_date,
+    'escape_xml': escape_xml,
+    'safe_filename': safe_filename,
+    'basename': basename,
+    'random_uuid': random_uuid,
+    'uuid4': uuid4,
+}
+
+
+class _CountingBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache tren dia, dem so template nap duoc tu cache"""
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def load_bytecode(self, bucket) -> None:
+        super().load_bytecode(bucket)
+        if bucket.code is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+class TemplateCache:
+    """
+    Environment + template da bien dich, thread-safe, dung chung cho process
+
+    Dung:
+        templates = get_template_cache()
+        xml = templates.render('mets_template.xml', context)
+    """
+
+    def __init__(self, template_dir: Union[str, Path] = TEMPLATE_DIR,
+                 bytecode_dir: Optional[Union[str, Path]] = None,
+                 precompile: Iterable[str] = XML_TEMPLATES):
+        self.template_dir = Path(template_dir)
+        self.bytecode_cache: Optional[_CountingBytecodeCache] = None
+        if bytecode_dir:
+            Path(bytecode_dir).mkdir(parents=True, exist_ok=True)
+            self.bytecode_cache = _CountingBytecodeCache(str(bytecode_dir))
+        self.env = Environment(
+            loader=FileSystemLoader(str(self.template_dir)),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            autoescape=False,
+            auto_reload=False,
+            bytecode_cache=self.bytecode_cache,
+        )
+        self.env.filters.update(FILTERS)
+
+        self._templates: Dict[str, Template] = {}
+        self._compile_seconds: Dict[str, float] = {}
+        self._renders: Dict[str, int] = {}
+        self._render_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        for name in precompile:
+            self.get(name)
+        if self.bytecode_cache:
+            logger.debug(f"Template bytecode cache {bytecode_dir}: {self.bytecode_cache.hits} hit, "
+                         f"{self.bytecode_cache.misses} miss")
+
+    def get(self, name: str) -> Template:
+        """Template da bien dich (bien dich lan dau neu chua co)"""
+        template = self._templates.get(name)
+        if template is not None:
+            return template
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                start = time.perf_counter()
+                template = self.env.get_template(name)
+                self._compile_seconds[name] = time.perf_counter() - start
+                self._renders.setdefault(name, 0)
+                self._render_seconds.setdefault(name, 0.0)
+                self._templates[name] = template
+        return template
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        """Render template, ghi nhan thoi gian render"""
+        template = self.get(name)
+        start = time.perf_counter()
+        content = template.render(context)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._renders[name] += 1
+            self._render_seconds[name] += elapsed
+        return content
+
+    def generate(self, name: str, context: Dict[str, Any],
+                 block_size: int = STREAM_BLOCK_SIZE) -> Iterator[str]:
+        """
+        Render template dang stream (Template.generate), ghi nhan thoi gian render
+
+        Cac doan nho cua Jinja duoc gom thanh block >= block_size ky tu (tru block cuoi).
+        Chi tinh thoi gian sinh block, khong tinh thoi gian nguoi goi ghi/hash.
+        """
+        chunks = self.get(name).generate(context)
+        buffer = []
+        buffered = 0
+        elapsed = 0.0
+        start = time.perf_counter()
+        try:
+            for chunk in chunks:
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= block_size:
+                    block = ''.join(buffer)
+                    buffer.clear()
+                    buffered = 0
+                    elapsed += time.perf_counter() - start
+                    yield block
+                    start = time.perf_counter()
+            block = ''.join(buffer)
+            elapsed += time.perf_counter() - start
+            start = None
+            if block:
+                yield block
+        finally:
+            if start is not None:
+                elapsed += time.perf_counter() - start
+            with self._lock:
+                self._renders[name] += 1
+                self._render_seconds[name] += elapsed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Thoi gian bien dich/render theo template (tinh tu khi khoi tao)"""
+        with self._lock:
+            return {
+                name: {
+                    'compile_ms': round(self._compile_seconds[name] * 1000, 2),
+                    'renders': self._renders[name],
+                    'render_ms': round(self._render_seconds[name] * 1000, 2),
+                    'avg_render_ms': round(self._render_seconds[name] * 1000 / self._renders[name], 3)
+                                     if self._renders[name] else 0.0,
+                }
+                for name in self._templates
+            }
+
+
+_template_cache: Optional[TemplateCache] = None
+_template_cache_lock = threading.Lock()
+
+
+def get_template_cache(bytecode_dir: Optional[Union[str, Path]] = None) -> TemplateCache:
+    """
+    TemplateCache dung chung cho process (khoi tao va bien dich lan dau goi)
+
+    Args:
+        bytecode_dir: Thu muc bytecode cache, chi co tac dung o lan goi dau tien
+    """
+    global _template_cache
+    with _template_cache_lock:
+        if _template_cache is None:
+            _template_cache = TemplateCache(bytecode_dir=bytecode_dir)
+        elif bytecode_dir and _template_cache.bytecode_cache is None:
+            logger.debug(f"Template da bien dich, bo qua bytecode cache {bytecode_dir}")
+        return _template_cache
@@ -0,0 +1,163 @@
+"""
+Fast Copy - Sao chep file bang co che cua kernel, khong dua du lieu qua userspace
+
+Chuc nang:
+- Thu lan luot: reflink (FICLONE - btrfs/XFS), copy_file_range, sendfile,
+  cuoi cung la sao chep thuong qua buffer (giong shutil.copy2)
+- Tra ve ten phuong thuc da dung de ghi vao thong ke build
+- Giu mtime/permission nhu shutil.copy2
+"""
+
+import errno
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Phuong thuc sao chep (theo thu tu uu tien)
+COPY_REFLINK = "reflink"
+COPY_FILE_RANGE = "copy_file_range"
+COPY_SENDFILE = "sendfile"
+COPY_USERSPACE = "userspace"
+COPY_METHODS = (COPY_REFLINK, COPY_FILE_RANGE, COPY_SENDFILE, COPY_USERSPACE)
+
+# Config.copy_backend: "auto" = thu tat ca theo thu tu tren
+COPY_BACKEND_AUTO = "auto"
+
+# ioctl FICLONE (Linux)
+_FICLONE = 0x40049409
+
+# Loi cho biet phuong thuc khong ho tro tren file system/ket hop file nay -> thu phuong thuc ke tiep
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY,
+    errno.EBADF, errno.EPERM, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+}
+
+# Kich thuoc moi lan goi copy_file_range/sendfile
+_CHUNK_SIZE = 1024 * 1024 * 1024
+
+
+def _reflink_fd(src_fd: int, dst_fd: int, size: int) -> None:
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "Reflink khong ho tro tren he dieu hanh nay")
+    fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+
+
+def _copy_file_range_fd(src_fd: int, dst_fd: int, size: int) -> None:
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, "copy_file_range khong ho tro")
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(src_fd, dst_fd, min(_CHUNK_SIZE, size - copied))
+        if n == 0:
+            break
+        copied += n
+    if copied != size:
+        raise OSError(errno.EIO, f"copy_file_range chi sao chep {copied}/{size} bytes")
+
+
+def _sendfile_fd(src_fd: int, dst_fd: int, size: int) -> None:
+    if not hasattr(os, 'sendfile'):
+        raise OSError(errno.ENOSYS, "sendfile khong ho tro")
+    copied = 0
+    while copied < size:
+        n = os.sendfile(dst_fd, src_fd, copied, min(_CHUNK_SIZE, size - copied))
+        if n == 0:
+            break
+        copied += n
+    if copied != size:
+        raise OSError(errno.EIO, f"sendfile chi sao chep {copied}/{size} bytes")
+
+
+_KERNEL_COPIERS = (
+    (COPY_REFLINK, _reflink_fd),
+    (COPY_FILE_RANGE, _copy_file_range_fd),
+    (COPY_SENDFILE, _sendfile_fd),
+)
+
+
+def _methods_for(backend: str) -> Tuple[str, ...]:
+    """Cac phuong thuc se thu cho backend (luon ket thuc bang userspace)"""
+    if backend == COPY_BACKEND_AUTO:
+        return COPY_METHODS
+    if backend not in COPY_METHODS:
+        raise ValueError(f"Copy backend khong hop le: {backend} (chon: auto, {', '.join(COPY_METHODS)})")
+    start = COPY_METHODS.index(backend)
+    return COPY_METHODS[start:]
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Lay backend: tham so truyen vao, hoac Config.copy_backend"""
+    if backend:
+        return backend
+    from ..config import get_config
+    return get_config().copy_backend or COPY_BACKEND_AUTO
+
+
+def fast_copy(source: Union[str, Path], target: Union[str, Path],
+              backend: Optional[str] = None, only: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    Sao chep file, uu tien co che kernel (thay the shutil.copy2)
+
+    Args:
+        source: File nguon
+        target: File dich (bi ghi de neu da ton tai)
+        backend: "auto" hoac phuong thuc bat dau thu (mac dinh Config.copy_backend)
+        only: Chi thu cac phuong thuc nay (vd: (COPY_REFLINK,)); None = tat ca
+
+    Returns:
+        Ten phuong thuc da dung (COPY_REFLINK, COPY_FILE_RANGE, COPY_SENDFILE, COPY_USERSPACE)
+
+    Raises:
+        OSError: Khong sao chep duoc bang phuong thuc nao
+    """
+    methods = [m for m in _methods_for(resolve_backend(backend)) if only is None or m in only]
+    if not methods:
+        raise OSError(errno.EOPNOTSUPP, f"Khong co phuong thuc sao chep phu hop cho {source}")
+
+    method = None
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        size = os.fstat(src.fileno()).st_size
+        for name, copier in _KERNEL_COPIERS:
+            if name not in methods:
+                continue
+            try:
+                copier(src.fileno(), dst.fileno(), size)
+                method = name
+                break
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS and name != COPY_REFLINK:
+                    raise
+                logger.debug(f"{name} khong dung duoc cho {source}: {e}")
+                # Xoa du lieu ghi do dang truoc khi thu phuong thuc ke tiep
+                dst.seek(0)
+                dst.truncate()
+                src.seek(0)
+
+        if method is None and COPY_USERSPACE in methods:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+            method = COPY_USERSPACE
+
+    if method is None:
+        os.unlink(target)
+        raise OSError(errno.EOPNOTSUPP, f"Khong sao chep duoc {source} bang {', '.join(methods)}")
+
+    # Giu mtime/permission giong shutil.copy2
+    shutil.copystat(source, target)
+    logger.debug(f"Sao chep ({method}): {source} -> {target}")
+    return method
+
+
+def reflink_file(source: Union[str, Path], target: Union[str, Path]) -> None:
+    """
+    Tao ban sao copy-on-write (reflink) cua source tai target
+
+    Raises:
+        OSError: He dieu hanh/file system khong ho tro reflink
+    """
+    fast_copy(source, target, only=(COPY_REFLINK,))
@@ -0,0 +1,205 @@
+"""
+File Copy - Sao chep file dong thoi tinh checksum trong mot lan doc
+
+Chuc nang:
+- Sao chep file nguon -> dich theo stream, tinh SHA-256 (va cac fixity bo sung)
+  va kich thuoc ngay trong luc ghi (moi byte nguon chi doc 1 lan)
+- Kiem tra checksum ky vong (vd: cot AN trong Excel) khi sao chep xong
+- Neu file system ho tro reflink: clone file (khong ghi du lieu) roi chi doc nguon de hash
+- Che do payload khong sao chep: hardlink / symlink / reflink toi file nguon
+"""
+
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple, Union
+
+from .fast_copy import COPY_REFLINK, COPY_USERSPACE, fast_copy
+from .hashing import MultiHasher, hash_stats, iter_blocks, normalize_algorithms
+
+logger = logging.getLogger(__name__)
+
+# Che do dat payload vao representations/rep1/data
+PAYLOAD_MODE_COPY = "copy"
+PAYLOAD_MODE_HARDLINK = "hardlink"
+PAYLOAD_MODE_SYMLINK = "symlink"
+PAYLOAD_MODE_REFLINK = "reflink"
+PAYLOAD_MODES = (PAYLOAD_MODE_COPY, PAYLOAD_MODE_HARDLINK, PAYLOAD_MODE_SYMLINK, PAYLOAD_MODE_REFLINK)
+
+
+class ChecksumMismatchError(Exception):
+    """Checksum thuc te cua file khong khop voi checksum ky vong"""
+
+    def __init__(self, path: Union[str, Path], expected: str, actual: str):
+        self.path = Path(path)
+        self.expected = expected
+        self.actual = actual
+        super().__init__(
+            f"Checksum khong khop cho {self.path.name}: expected {expected}, got {actual}"
+        )
+
+
+@dataclass
+class CopyResult:
+    """Ket qua sao chep 1 file"""
+    source: Path
+    target: Optional[Path]
+    size: int
+    sha256: str
+    digests: Dict[str, str] = field(default_factory=dict)  # {thuat toan: digest}, gom ca SHA-256
+    method: str = COPY_USERSPACE  # Phuong thuc sao chep (xem utils.fast_copy)
+
+
+def stream_copy_and_hash(src: BinaryIO, dst: Optional[BinaryIO],
+                         buffer_size: Optional[int] = None,
+                         algorithms: Iterable[str] = ('SHA-256',)) -> Tuple[int, Dict[str, str]]:
+    """
+    Doc src theo block, ghi sang dst (neu co) va tinh checksum tren cung buffer
+
+    Args:
+        src: File object nguon (mo che do 'rb')
+        dst: File object dich (mo che do 'wb'), None neu chi can tinh checksum
+        buffer_size: Kich thuoc block doc (mac dinh Config.hash_block_size)
+        algorithms: Cac thuat toan digest can tinh
+
+    Returns:
+        Tuple[int, Dict[str, str]]: (size, {thuat toan: digest})
+    """
+    hasher = MultiHasher(algorithms)
+    size = 0
+    start = time.perf_counter()
+
+    for chunk in iter_blocks(src, buffer_size):
+        hasher.update(chunk)
+        if dst is not None:
+            dst.write(chunk)
+        size += len(chunk)
+
+    hash_stats.record(size, time.perf_counter() - start)
+    return size, hasher.hexdigests()
+
+
+def normalize_checksum(value: Optional[str]) -> str:
+    """Chuan hoa checksum de so sanh (bo khoang trang, chu thuong)"""
+    if not value:
+        return ""
+    return str(value).strip().lower()
+
+
+def copy_and_hash(source: Union[str, Path], target: Union[str, Path],
+                  expected_sha256: Optional[str] = None,
+                  buffer_size: Optional[int] = None,
+                  extra_algorithms: Iterable[str] = (),
+                  try_reflink: bool = False) -> CopyResult:
+    """
+    Sao chep file va tinh SHA-256 (va fixity bo sung) trong 1 lan doc nguon
+
+    Args:
+        source: File nguon
+        target: File dich (bi ghi de neu da ton tai)
+        expected_sha256: Checksum ky vong, neu co se duoc kiem tra sau khi sao chep
+        buffer_size: Kich thuoc buffer doc/ghi
+        extra_algorithms: Thuat toan digest tinh them (vd: MD5, SHA-512)
+        try_reflink: Thu reflink truoc; thanh cong thi chi doc nguon de hash.
+            copy_file_range/sendfile khong dung o day vi van phai doc du lieu de hash
+
+    Returns:
+        CopyResult voi size, sha256, digests
+
+    Raises:
+        ChecksumMismatchError: Neu checksum thuc te khac checksum ky vong
+            (file dich da sao chep se bi xoa)
+    """
+    source = Path(source)
+    target = Path(target)
+
+    algorithms = normalize_algorithms(extra_algorithms)
+    method = COPY_USERSPACE
+    if try_reflink:
+        try:
+            method = fast_copy(source, target, only=(COPY_REFLINK,))
+        except OSError as e:
+            logger.debug(f"Reflink khong dung duoc cho {source}: {e}")
+
+    if method == COPY_REFLINK:
+        # Dich da la ban clone, chi can doc nguon de tinh checksum
+        with open(source, 'rb', buffering=0) as src:
+            size, digests = stream_copy_and_hash(src, None, buffer_size, algorithms)
+    else:
+        with open(source, 'rb', buffering=0) as src, open(target, 'wb') as dst:
+            size, digests = stream_copy_and_hash(src, dst, buffer_size, algorithms)
+        # Giu mtime/permission giong shutil.copy2
+        shutil.copystat(source, target)
+    sha256 = digests['SHA-256']
+
+    expected = normalize_checksum(expected_sha256)
+    if expected and expected != sha256:
+        try:
+            target.unlink()
+        except OSError as e:
+            logger.warning(f"Khong the xoa file loi checksum {target}: {e}")
+        raise ChecksumMismatchError(source, expected, sha256)
+
+    return CopyResult(source=source, target=target, size=size, sha256=sha256,
+                      digests=digests, method=method)
+
+
+def link_payload(source: Union[str, Path], target: Union[str, Path], mode: str) -> str:
+    """
+    Dat payload vao target bang lien ket toi source thay vi sao chep
+
+    Args:
+        source: File nguon
+        target: Vi tri payload (khong duoc ton tai)
+        mode: PAYLOAD_MODE_HARDLINK, PAYLOAD_MODE_SYMLINK hoac PAYLOAD_MODE_REFLINK
+
+    Returns:
+        Ten phuong thuc da dung (= mode)
+
+    Raises:
+        OSError: Khong tao duoc lien ket (vd: khac file system, khong ho tro reflink)
+    """
+    if mode == PAYLOAD_MODE_HARDLINK:
+        os.link(source, target)
+    elif mode == PAYLOAD_MODE_SYMLINK:
+        # Duong dan tuyet doi: ZIP/validator doc noi dung qua link tu bat ky thu muc nao
+        os.symlink(os.path.abspath(source), target)
+    elif mode == PAYLOAD_MODE_REFLINK:
+        fast_copy(source, target, only=(COPY_REFLINK,))
+    else:
+        raise ValueError(f"Che do payload khong phai lien ket: {mode}")
+    return mode
+
+
+def link_and_hash(source: Union[str, Path], target: Union[str, Path], mode: str,
+                  expected_sha256: Optional[str] = None,
+                  buffer_size: Optional[int] = None,
+                  extra_algorithms: Iterable[str] = ()) -> CopyResult:
+    """
+    Lien ket payload (hardlink/symlink/reflink) va tinh checksum tu file nguon
+
+    Raises:
+        OSError: Khong tao duoc lien ket
+        ChecksumMismatchError: Checksum khac checksum ky vong (lien ket da tao bi xoa)
+    """
+    source = Path(source)
+    target = Path(target)
+
+    method = link_payload(source, target, mode)
+    with open(source, 'rb', buffering=0) as src:
+        size, digests = stream_copy_and_hash(src, None, buffer_size, normalize_algorithms(extra_algorithms))
+    sha256 = digests['SHA-256']
+
+    expected = normalize_checksum(expected_sha256)
+    if expected and expected != sha256:
+        try:
+            target.unlink()
+        except OSError as e:
+            logger.warning(f"Khong the xoa lien ket loi checksum {target}: {e}")
+        raise ChecksumMismatchError(source, expected, sha256)
+
+    return CopyResult(source=source, target=target, size=size, sha256=sha256,
+                      digests=digests, method=method)
@@ -0,0 +1,196 @@
+"""
+Hashing - Dich vu tinh checksum dung chung cho toan bo pipeline
+
+Chuc nang:
+- Doc file theo block lon bang readinto() vao buffer dung lai (moi thread 1 buffer),
+  khong bao gio doc ca file vao bo nho
+- Kich thuoc block cau hinh qua Config.hash_block_size
+- Tinh nhieu thuat toan (SHA-256, MD5, SHA-512, BLAKE2b...) tren cung buffer, 1 lan doc
+- Thong ke so bytes da hash va toc do (MB/s) de bao cao trong build summary
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Kich thuoc block mac dinh (1 MiB)
+DEFAULT_HASH_BLOCK_SIZE = 1024 * 1024
+
+# Ten thuat toan theo PREMIS/METS -> ten hashlib
+HASH_ALGORITHMS = {
+    'MD5': 'md5',
+    'SHA-1': 'sha1',
+    'SHA-256': 'sha256',
+    'SHA-384': 'sha384',
+    'SHA-512': 'sha512',
+    'BLAKE2b-512': 'blake2b',
+    'BLAKE2s-256': 'blake2s',
+}
+
+# Ten viet tat/bien the -> ten chuan
+_ALGORITHM_ALIASES = {
+    key.replace('-', '').upper(): key for key in HASH_ALGORITHMS
+}
+_ALGORITHM_ALIASES.update({name.upper(): key for key, name in HASH_ALGORITHMS.items()})
+_ALGORITHM_ALIASES['BLAKE2'] = 'BLAKE2b-512'
+
+_local = threading.local()
+
+
+class HashStats:
+    """Thong ke hash (thread-safe): so file, so bytes, thoi gian"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def record(self, nbytes: int, seconds: float) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += nbytes
+            self.seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            files, nbytes, seconds = self.files, self.bytes, self.seconds
+        mb = nbytes / (1024 * 1024)
+        return {
+            'files': files,
+            'bytes': nbytes,
+            'seconds': seconds,
+            'mb_per_second': (mb / seconds) if seconds > 0 else 0.0,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.files = 0
+            self.bytes = 0
+            self.seconds = 0.0
+
+
+# Thong ke chung cua process
+hash_stats = HashStats()
+
+
+def normalize_algorithm(name: str) -> str:
+    """
+    Chuan hoa ten thuat toan ve dang PREMIS ('sha512', 'SHA512' -> 'SHA-512')
+
+    Raises:
+        ValueError: Thuat toan khong ho tro
+    """
+    key = str(name).strip().replace('_', '-')
+    if key in HASH_ALGORITHMS:
+        return key
+    canonical = _ALGORITHM_ALIASES.get(key.replace('-', '').upper())
+    if canonical is None:
+        raise ValueError(f"Thuat toan checksum khong ho tro: {name}")
+    return canonical
+
+
+def normalize_algorithms(names: Iterable[str], primary: str = 'SHA-256') -> List[str]:
+    """Danh sach thuat toan chuan hoa, bo trung lap, thuat toan chinh dung dau"""
+    result = [normalize_algorithm(primary)]
+    for name in names:
+        canonical = normalize_algorithm(name)
+        if canonical not in result:
+            result.append(canonical)
+    return result
+
+
+class MultiHasher:
+    """Cap nhat nhieu digest tu cung 1 buffer"""
+
+    def __init__(self, algorithms: Iterable[str]):
+        self._hashers = {
+            algorithm: hashlib.new(HASH_ALGORITHMS[algorithm])
+            for algorithm in (normalize_algorithm(a) for a in algorithms)
+        }
+
+    def update(self, chunk) -> None:
+        for hasher in self._hashers.values():
+            hasher.update(chunk)
+
+    def hexdigests(self) -> Dict[str, str]:
+        """Dict {ten thuat toan: hex digest} theo thu tu khai bao"""
+        return {algorithm: hasher.hexdigest() for algorithm, hasher in self._hashers.items()}
+
+
+def resolve_block_size(block_size: Optional[int] = None) -> int:
+    """Lay kich thuoc block: tham so truyen vao, hoac Config.hash_block_size"""
+    if block_size:
+        return block_size
+    from ..config import get_config
+    return get_config().hash_block_size or DEFAULT_HASH_BLOCK_SIZE
+
+
+def _get_buffer(block_size: int) -> bytearray:
+    """Buffer dung lai cho thread hien tai (cap phat lai khi doi kich thuoc)"""
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None or len(buffer) != block_size:
+        buffer = bytearray(block_size)
+        _local.buffer = buffer
+    return buffer
+
+
+def iter_blocks(src: BinaryIO, block_size: Optional[int] = None) -> Iterator[memoryview]:
+    """
+    Doc src theo block vao buffer dung lai cua thread
+
+    Moi memoryview chi hop le den lan lap tiep theo (buffer bi ghi de).
+    """
+    buffer = _get_buffer(resolve_block_size(block_size))
+    view = memoryview(buffer)
+    while True:
+        n = src.readinto(buffer)
+        if not n:
+            break
+        yield view[:n]
+
+
+def hash_file(file_path: Union[str, Path], algorithm: str = "sha256",
+              block_size: Optional[int] = None) -> str:
+    """
+    Tinh checksum cua file
+
+    Args:
+        file_path: Duong dan file
+        algorithm: Ten thuat toan (vd: 'SHA-256', 'sha256', 'MD5')
+        block_size: Kich thuoc block doc (mac dinh Config.hash_block_size)
+
+    Returns:
+        Hex digest
+
+    Raises:
+        OSError: Khong doc duoc file
+    """
+    algorithm = normalize_algorithm(algorithm)
+    return hash_file_multi(file_path, [algorithm], block_size)[algorithm]
+
+
+def hash_file_multi(file_path: Union[str, Path], algorithms: Iterable[str],
+                    block_size: Optional[int] = None) -> Dict[str, str]:
+    """
+    Tinh nhieu checksum cua file trong 1 lan doc
+
+    Returns:
+        Dict {ten thuat toan chuan: hex digest}
+    """
+    hasher = MultiHasher(algorithms)
+    size = 0
+    start = time.perf_counter()
+
+    with open(file_path, 'rb', buffering=0) as f:
+        for chunk in iter_blocks(f, block_size):
+            hasher.update(chunk)
+            size += len(chunk)
+
+    hash_stats.record(size, time.perf_counter() - start)
+    return hasher.hexdigests()
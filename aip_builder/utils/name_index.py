@@ -0,0 +1,122 @@
+"""
+Name Index - Chi muc ten file chuan hoa cho cay thu muc PDF
+
+Chuc nang:
+- Duyet cay thu muc 1 lan (os.scandir), khong rglob lai cho tung tai lieu
+- Chuan hoa ten: khong phan biet NFC/NFD, hoa/thuong, dau tieng Viet (d/đ)
+- Tra cuu theo duong dan tuong doi chuan hoa hoac chi theo ten file
+- Bao cao ten trung (nhieu file khop cung 1 ten) thay vi chon bua 1 file
+"""
+
+import fnmatch
+import logging
+import os
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Chu khong tach duoc bang NFD
+_EXTRA_FOLDS = str.maketrans({'đ': 'd', 'Đ': 'd', 'ð': 'd', 'Ð': 'd'})
+
+
+def normalize_name(name: str) -> str:
+    """
+    Chuan hoa ten file/duong dan de so sanh
+
+    'Bìa Hồ Sơ.PDF' (NFC hay NFD) -> 'bia ho so.pdf'; dau '\\' -> '/'
+    """
+    decomposed = unicodedata.normalize('NFD', str(name).translate(_EXTRA_FOLDS))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.casefold().replace('\\', '/').strip().strip('/')
+
+
+class FilenameIndex:
+    """Chi muc ten file chuan hoa -> cac duong dan trong cay thu muc"""
+
+    def __init__(self, root: Union[str, Path], pattern: str = "*.pdf"):
+        self.root = Path(root)
+        self.pattern = pattern
+        self._by_name: Dict[str, List[Path]] = {}
+        self._by_relpath: Dict[str, List[Path]] = {}
+        self.file_count = 0
+        self._build()
+
+    def _build(self) -> None:
+        pattern = normalize_name(self.pattern)
+        stack = [(self.root, '')]
+        while stack:
+            directory, rel_dir = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                logger.warning(f"Khong the doc thu muc {directory}: {e}")
+                continue
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((Path(entry.path), rel))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                name = normalize_name(entry.name)
+                if not fnmatch.fnmatchcase(name, pattern):
+                    continue
+                path = Path(entry.path)
+                self._by_name.setdefault(name, []).append(path)
+                self._by_relpath.setdefault(normalize_name(rel), []).append(path)
+                self.file_count += 1
+
+        logger.info(f"Chi muc ten file: {self.file_count} file trong {self.root}")
+
+    def lookup(self, name: str) -> List[Path]:
+        """Tat ca file co ten (chuan hoa) trung voi name"""
+        return list(self._by_name.get(normalize_name(Path(str(name).replace('\\', '/')).name), []))
+
+    def lookup_relpath(self, rel_path: str) -> List[Path]:
+        """Cac file co duong dan tuong doi (chuan hoa) trung voi rel_path"""
+        return list(self._by_relpath.get(normalize_name(rel_path), []))
+
+    def find(self, rel_path: Optional[str] = None, filename: Optional[str] = None) -> Optional[Path]:
+        """
+        Tim 1 file theo duong dan tuong doi, sau do theo ten file
+
+        Neu nhieu file cung ten: uu tien file nam trong thu muc cua rel_path,
+        con lai van trung thi ghi canh bao va tra ve None
+
+        Returns:
+            Path neu tim duoc dung 1 file, nguoc lai None
+        """
+        if rel_path:
+            matches = self.lookup_relpath(rel_path)
+            if len(matches) == 1:
+                return matches[0]
+            if len(matches) > 1:
+                logger.warning(f"Duong dan trung ({len(matches)} file): {rel_path}")
+                return None
+
+        name = filename or (Path(rel_path.replace('\\', '/')).name if rel_path else None)
+        if not name:
+            return None
+        matches = self.lookup(name)
+        if len(matches) == 1:
+            return matches[0]
+        expected_parent = normalize_name(Path(rel_path.replace('\\', '/')).parent.as_posix()) if rel_path else ''
+        if len(matches) > 1 and expected_parent not in ('', '.'):
+            # Thu thu hep theo thu muc cha mong doi
+            narrowed = [p for p in matches
+                        if ('/' + normalize_name(p.parent.relative_to(self.root).as_posix())).endswith('/' + expected_parent)]
+            if len(narrowed) == 1:
+                return narrowed[0]
+        if len(matches) > 1:
+            logger.warning(f"Ten file trung ({len(matches)} file), khong tu chon: {name} -> "
+                           f"{', '.join(str(p.relative_to(self.root)) for p in matches)}")
+        return None
+
+    def ambiguous(self) -> Dict[str, List[Path]]:
+        """Cac ten chuan hoa co nhieu hon 1 file"""
+        return {name: list(paths) for name, paths in self._by_name.items() if len(paths) > 1}
@@ -0,0 +1,182 @@
+"""
+Parallel Zip - Nen cac member ZIP song song, ghi theo thu tu co dinh
+
+Chuc nang:
+- Member can nen (DEFLATE/LZMA) duoc nen o thread pool (zlib/lzma nha GIL)
+  vao file tam, kem CRC va kich thuoc
+- Ghi local header + du lieu vao ZIP dung thu tu them vao; central directory
+  vi the cung theo thu tu do (ket qua khong phu thuoc thread nao xong truoc)
+- Member STORED, member nho va thao tac tuy y (vd: dung lai member da nen) chay
+  tren thread ghi, dung luot cua no trong hang doi
+- Gioi han so member dang cho de khong giu qua nhieu file tam
+- Ban Python chua kiem tra ghi raw member (zip_compat.RAW_WRITE_SUPPORTED tat):
+  ghi tuan tu bang zipfile.write tren thread ghi
+"""
+
+import collections
+import concurrent.futures
+import os
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Callable, Deque, Optional, Tuple, Union
+
+from .zip_compat import RAW_WRITE_SUPPORTED, get_compressor
+from .zip_compression import CompressionPolicy, EntryCompression, METHOD_STORE
+from .zip_writer import write_raw_member
+
+# Member nho hon nguong nay nen ngay tren thread ghi (khong dang chuyen sang thread khac)
+PARALLEL_MIN_SIZE = 256 * 1024
+
+# Du lieu nen giu trong bo nho toi da bao nhieu truoc khi ghi ra file tam
+_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+_READ_SIZE = 1024 * 1024
+
+
+def resolve_zip_workers(workers: Optional[int]) -> int:
+    """So thread nen: 0/None = so CPU"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _compress_member(path: Path, arcname: str, entry: EntryCompression) -> Tuple[zipfile.ZipInfo, object, float]:
+    """Nen 1 file vao file tam (chay o thread pool). Tra ve (ZipInfo da du CRC/kich thuoc, file tam, giay)"""
+    start = time.perf_counter()
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = entry.compress_type
+    compressor = get_compressor(entry.compress_type, entry.compresslevel)
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    crc = 0
+    size = 0
+    try:
+        with open(path, 'rb') as src:
+            while True:
+                chunk = src.read(_READ_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+                spool.write(compressor.compress(chunk))
+        spool.write(compressor.flush())
+    except BaseException:
+        spool.close()
+        raise
+    zinfo.CRC = crc
+    zinfo.file_size = size
+    zinfo.compress_size = spool.tell()
+    spool.seek(0)
+    return zinfo, spool, time.perf_counter() - start
+
+
+class ParallelZipWriter:
+    """
+    Them member vao ZipFile, nen song song nhung ghi theo thu tu them vao
+
+    Dung:
+        with ParallelZipWriter(zipf, policy, workers=4) as writer:
+            writer.add_file(path, arcname, on_written=...)
+            writer.add_call(lambda: ..., on_written=...)
+    """
+
+    def __init__(self, zipf: zipfile.ZipFile, policy: CompressionPolicy,
+                 workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.zipf = zipf
+        self.policy = policy
+        self.workers = resolve_zip_workers(workers)
+        self.max_pending = max_pending or self.workers * 2
+        self._executor = None
+        if self.workers > 1 and RAW_WRITE_SUPPORTED:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                                   thread_name_prefix='zip')
+        # Hang doi theo thu tu: (future hoac callable, arcname, entry, on_written)
+        self._queue: Deque[tuple] = collections.deque()
+        self._in_flight = 0
+
+    def add_file(self, path: Union[str, Path], arcname: str,
+                 on_written: Optional[Callable[[zipfile.ZipInfo], None]] = None) -> None:
+        """Them file; nen song song neu can nen va du lon"""
+        path = Path(path)
+        entry = self.policy.choose_for_file(path, arcname)
+        if (self._executor is None or entry.method == METHOD_STORE
+                or path.stat().st_size < PARALLEL_MIN_SIZE):
+            self.add_call(lambda: self.write_file(path, arcname, entry), on_written)
+            return
+        future = self._executor.submit(_compress_member, path, arcname, entry)
+        self._queue.append((future, arcname, entry, on_written))
+        self._in_flight += 1
+        while self._in_flight > self.max_pending:
+            self._drain_one()
+
+    def add_call(self, fn: Callable[[], Optional[zipfile.ZipInfo]],
+                 on_written: Optional[Callable[[zipfile.ZipInfo], None]] = None) -> None:
+        """Them thao tac ghi chay tren thread ghi, dung thu tu (fn tra ve ZipInfo da ghi)"""
+        self._queue.append((fn, None, None, on_written))
+        if self._in_flight == 0:
+            self._drain_ready()
+
+    def write_file(self, path: Union[str, Path], arcname: str,
+                   entry: Optional[EntryCompression] = None) -> zipfile.ZipInfo:
+        """Ghi file ngay tren thread hien tai (chi goi tu thao tac add_call hoac khi hang doi rong)"""
+        if entry is None:
+            entry = self.policy.choose_for_file(path, arcname)
+        start = time.perf_counter()
+        self.zipf.write(path, arcname, compress_type=entry.compress_type, compresslevel=entry.compresslevel)
+        zinfo = self.zipf.filelist[-1]
+        self.policy.stats.record(arcname, entry.method, zinfo.file_size, zinfo.compress_size,
+                                 time.perf_counter() - start)
+        return zinfo
+
+    def _drain_ready(self) -> None:
+        """Ghi cac muc dau hang doi khong phai cho thread nen"""
+        while self._queue and not isinstance(self._queue[0][0], concurrent.futures.Future):
+            self._drain_one()
+
+    def _drain_one(self) -> None:
+        """Ghi muc dau hang doi (cho thread nen neu can)"""
+        job, arcname, entry, on_written = self._queue.popleft()
+        if isinstance(job, concurrent.futures.Future):
+            self._in_flight -= 1
+            zinfo, spool, seconds = job.result()
+            try:
+                write_raw_member(self.zipf, zinfo, spool)
+            finally:
+                spool.close()
+            self.policy.stats.record(arcname, entry.method, zinfo.file_size, zinfo.compress_size, seconds)
+        else:
+            zinfo = job()
+        if on_written is not None and zinfo is not None:
+            on_written(zinfo)
+
+    def close(self) -> None:
+        """Ghi tat ca muc con lai theo thu tu va dung thread pool"""
+        try:
+            while self._queue:
+                self._drain_one()
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        """Huy cac muc chua ghi (khi loi)"""
+        futures = [job for job, *_ in self._queue if isinstance(job, concurrent.futures.Future)]
+        self._queue.clear()
+        self._in_flight = 0
+        for future in futures:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                future.result()[1].close()
+
+    def __enter__(self) -> 'ParallelZipWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
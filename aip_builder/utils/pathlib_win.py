@@ -217,11 +217,11 @@ def safe_copy_file(src: Union[str, Path], dst: Union[str, Path]) -> bool:
         # Dam bao thu muc dich ton tai
         ensure_directory(dst_path.actual_path.parent)
         
-        # Copy file
-        import shutil
-        shutil.copy2(src_path.actual_path, dst_path.actual_path)
+        # Copy file (reflink/copy_file_range/sendfile neu duoc, giong shutil.copy2)
+        from .fast_copy import fast_copy
+        method = fast_copy(src_path.actual_path, dst_path.actual_path)
         
-        logger.debug(f"Copy thanh cong: {src} -> {dst}")
+        logger.debug(f"Copy thanh cong ({method}): {src} -> {dst}")
         return True
         
     except Exception as e:
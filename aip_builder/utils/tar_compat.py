@@ -0,0 +1,72 @@
+"""
+Tar Compat - Mot cho duy nhat dung thuoc tinh noi bo cua tarfile
+
+Chuc nang:
+- Ghi member tar dang push (ghi header, day du lieu tung block, dem block cuoi) can
+  TarFile._check/offset/members/fileobj: cac ten nay khong thuoc API cong khai, co the
+  doi giua cac ban CPython
+- STREAM_MEMBER_SUPPORTED chi bat tren ban CPython da kiem tra (TESTED_VERSIONS) va khi
+  cac thuoc tinh con ton tai; tat thi noi goi quay ve TarFile.addfile (API cong khai)
+
+Da kiem tra voi CPython 3.11, 3.12, 3.13.
+"""
+
+import io
+import logging
+import sys
+import tarfile
+
+logger = logging.getLogger(__name__)
+
+# Cac ban CPython da kiem tra ghi member dang push (ban khac -> TarFile.addfile)
+TESTED_VERSIONS = ((3, 11), (3, 12), (3, 13))
+
+_TARFILE_INTERNALS = ('_check', 'offset', 'members', 'fileobj')
+
+
+def _internals_available() -> bool:
+    """Ban tarfile hien tai con cac thuoc tinh noi bo can dung khong"""
+    with tarfile.open(fileobj=io.BytesIO(), mode='w|') as probe:
+        return all(hasattr(probe, name) for name in _TARFILE_INTERNALS)
+
+
+STREAM_MEMBER_SUPPORTED = sys.version_info[:2] in TESTED_VERSIONS and _internals_available()
+if not STREAM_MEMBER_SUPPORTED:
+    logger.debug(f"Python {sys.version_info[0]}.{sys.version_info[1]}: tat ghi member tar dang push, "
+                 f"dung TarFile.addfile")
+
+
+def _require_stream_member() -> None:
+    if not STREAM_MEMBER_SUPPORTED:
+        raise RuntimeError("Ghi member tar dang push khong ho tro tren ban Python nay")
+
+
+def begin_member(tar: tarfile.TarFile, tarinfo: tarfile.TarInfo) -> None:
+    """
+    Ghi header member vao tar dang mo ghi (du lieu ghi tiep qua write_member_data)
+
+    Raises:
+        RuntimeError: Ban Python khong ho tro (xem STREAM_MEMBER_SUPPORTED)
+        OSError: TarFile khong mo o che do ghi/da dong
+    """
+    _require_stream_member()
+    tar._check('awx')
+    buf = tarinfo.tobuf(tar.format, tar.encoding, tar.errors)
+    tar.fileobj.write(buf)
+    tar.offset += len(buf)
+
+
+def write_member_data(tar: tarfile.TarFile, data: bytes) -> None:
+    """Ghi 1 block du lieu cua member dang mo (sau begin_member)"""
+    tar.fileobj.write(data)
+
+
+def end_member(tar: tarfile.TarFile, tarinfo: tarfile.TarInfo) -> None:
+    """Dem cho du block va ghi nhan member nhu TarFile.addfile (du lieu da dung tarinfo.size)"""
+    _require_stream_member()
+    blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+    if remainder > 0:
+        tar.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+        blocks += 1
+    tar.offset += blocks * tarfile.BLOCKSIZE
+    tar.members.append(tarinfo)
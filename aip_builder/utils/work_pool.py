@@ -0,0 +1,161 @@
+"""
+Work Pool - Pool thread gioi han dung chung cho ca lan chay
+
+Chuc nang:
+- So luot (slot) co dinh cho ca process: worker batch giu 1 luot khi build 1 goi,
+  viec con trong goi (render/hash/ghi EAD_doc) chi chay o thread pool khi con luot trong
+- Het luot thi thread goi tu chay viec (khong cho, khong tao them thread):
+  song song long nhau (batch -> goi -> tai lieu) khong vuot qua so luot, khong deadlock
+- Ket qua tra ve dung thu tu dau vao (ket qua khong phu thuoc thread nao xong truoc)
+- Gom nhieu viec nho thanh 1 lo moi lan chuyen sang thread (giam chi phi dieu phoi)
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import logging
+import os
+import threading
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# So viec toi thieu de chia sang thread khac (it hon thi chay tuan tu tren thread goi)
+PARALLEL_MIN_ITEMS = 8
+
+
+def resolve_pool_workers(workers: Optional[int]) -> int:
+    """So luot cua pool: 0/None = so CPU"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+class WorkPool:
+    """
+    Pool thread voi so luot gioi han, dung chung giua cac worker va viec long nhau
+
+    Dung:
+        pool = get_work_pool()
+        with pool.slot():                      # worker ngoai (vd: 1 goi trong batch)
+            for result in pool.map(fn, items): # viec con, dung thu tu
+                ...
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = resolve_pool_workers(workers)
+        self._slots = threading.Semaphore(self.workers)
+        self._local = threading.local()  # Thread hien tai dang giu luot chua
+        self._executor = None
+        if self.workers > 1:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                                   thread_name_prefix='work')
+        self._lock = threading.Lock()
+        self.offloaded = 0  # So lo da chay o thread pool
+        self.inline = 0  # So lo chay tren thread goi (het luot hoac qua it viec)
+
+    def _holding(self) -> bool:
+        return getattr(self._local, 'held', False)
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        """Giu 1 luot trong khi chay (cho neu het luot); thread da giu luot thi khong lay them"""
+        if self._holding():
+            yield
+            return
+        self._slots.acquire()
+        self._local.held = True
+        try:
+            yield
+        finally:
+            self._local.held = False
+            self._slots.release()
+
+    def _run_batch(self, fn: Callable[[T], R], batch: Sequence[T]) -> List[R]:
+        """Chay 1 lo tren thread pool (luot da lay khi submit, tra lai khi xong)"""
+        self._local.held = True
+        try:
+            return [fn(item) for item in batch]
+        finally:
+            self._local.held = False
+            self._slots.release()
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T], batch_size: int = 1,
+            max_pending: Optional[int] = None) -> Iterator[R]:
+        """
+        Chay fn tren tung item, tra ket qua dung thu tu items
+
+        Thread goi giu 1 luot trong suot qua trinh (lay neu chua co). Moi lo batch_size item
+        chi chuyen sang thread pool khi lay duoc them luot ngay (khong cho), neu khong thi
+        thread goi tu chay lo do. Toi da max_pending lo dang cho ghi ket qua
+        (mac dinh 2 x so luot) de khong giu qua nhieu ket qua trong bo nho.
+        """
+        items = items if isinstance(items, Sequence) else list(items)
+        if self._executor is None or len(items) < PARALLEL_MIN_ITEMS:
+            with self._lock:
+                self.inline += 1
+            with self.slot():
+                for item in items:
+                    yield fn(item)
+            return
+
+        batch_size = max(1, batch_size)
+        max_pending = max_pending or self.workers * 2
+        # Hang doi theo thu tu: Future (lo o thread pool) hoac list ket qua (lo chay tai cho)
+        queue: Deque = collections.deque()
+        offloaded = inline = 0
+        with self.slot():
+            try:
+                for start in range(0, len(items), batch_size):
+                    batch = items[start:start + batch_size]
+                    if self._slots.acquire(blocking=False):
+                        queue.append(self._executor.submit(self._run_batch, fn, batch))
+                        offloaded += 1
+                    else:
+                        queue.append([fn(item) for item in batch])
+                        inline += 1
+                    # Tra cac lo dau hang da xong; hang day thi cho lo dau
+                    while queue and (len(queue) > max_pending or not isinstance(queue[0], concurrent.futures.Future)
+                                     or queue[0].done()):
+                        yield from _batch_result(queue.popleft())
+                while queue:
+                    yield from _batch_result(queue.popleft())
+            finally:
+                # Loi/nguoi goi dung giua chung: huy lo chua chay (lo da chay tu tra luot)
+                for job in queue:
+                    if isinstance(job, concurrent.futures.Future) and job.cancel():
+                        self._slots.release()
+                with self._lock:
+                    self.offloaded += offloaded
+                    self.inline += inline
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'workers': self.workers, 'offloaded': self.offloaded, 'inline': self.inline}
+
+
+def _batch_result(job) -> list:
+    return job.result() if isinstance(job, concurrent.futures.Future) else job
+
+
+_work_pool: Optional[WorkPool] = None
+_work_pool_lock = threading.Lock()
+
+
+def get_work_pool(workers: Optional[int] = None) -> WorkPool:
+    """
+    WorkPool dung chung cho process (tao lan dau goi)
+
+    So luot lay tu lan goi dau tien (0/None = so CPU); lan goi sau voi so khac chi ghi log.
+    """
+    global _work_pool
+    with _work_pool_lock:
+        if _work_pool is None:
+            _work_pool = WorkPool(workers)
+            logger.debug(f"Tao work pool dung chung {_work_pool.workers} luot")
+        elif workers and resolve_pool_workers(workers) != _work_pool.workers:
+            logger.debug(f"Work pool da tao voi {_work_pool.workers} luot, bo qua {workers}")
+        return _work_pool
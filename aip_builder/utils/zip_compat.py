@@ -0,0 +1,108 @@
+"""
+Zip Compat - Mot cho duy nhat dung thuoc tinh noi bo cua zipfile
+
+Chuc nang:
+- Ghi member da nen san (nen song song, dung lai member ZIP khac) va bo member vua ghi
+  can ZipFile._lock/_writing/_seekable/_writecheck/_didModify va zipfile._get_compressor:
+  cac ten nay khong thuoc API cong khai, co the doi giua cac ban CPython
+- RAW_WRITE_SUPPORTED chi bat tren ban CPython da kiem tra (TESTED_VERSIONS) va khi
+  cac thuoc tinh con ton tai; tat thi noi goi quay ve zipfile.write/writestr tuan tu
+  (khong nen song song, khong dung lai member, kiem tra checksum truoc khi ghi)
+- Muc nen cua ZipInfo: compress_level (cong khai tu 3.13) hoac _compresslevel
+
+Da kiem tra voi CPython 3.11, 3.12, 3.13.
+"""
+
+import io
+import logging
+import sys
+import zipfile
+from typing import BinaryIO, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cac ban CPython da kiem tra ghi raw member (ban khac -> ghi tuan tu qua zipfile)
+TESTED_VERSIONS = ((3, 11), (3, 12), (3, 13))
+
+_ZIPFILE_INTERNALS = ('_lock', '_writing', '_seekable', '_writecheck', '_didModify')
+
+
+def _internals_available() -> bool:
+    """Ban zipfile hien tai con cac thuoc tinh noi bo can dung khong"""
+    if not hasattr(zipfile, '_get_compressor'):
+        return False
+    with zipfile.ZipFile(io.BytesIO(), 'w') as probe:
+        return all(hasattr(probe, name) for name in _ZIPFILE_INTERNALS)
+
+
+RAW_WRITE_SUPPORTED = sys.version_info[:2] in TESTED_VERSIONS and _internals_available()
+if not RAW_WRITE_SUPPORTED:
+    logger.debug(f"Python {sys.version_info[0]}.{sys.version_info[1]}: tat ghi raw member ZIP, "
+                 f"dung zipfile.write tuan tu")
+
+
+def _require_raw_write() -> None:
+    if not RAW_WRITE_SUPPORTED:
+        raise RuntimeError("Ghi raw member ZIP khong ho tro tren ban Python nay")
+
+
+def set_compress_level(zinfo: zipfile.ZipInfo, level: Optional[int]) -> None:
+    """Dat muc nen cho member ghi qua ZipFile.open(zinfo, 'w')"""
+    if hasattr(zinfo, 'compress_level'):  # Cong khai tu 3.13
+        zinfo.compress_level = level
+    else:
+        zinfo._compresslevel = level
+
+
+def get_compressor(compress_type: int, level: Optional[int]):
+    """Compressor cua zipfile cho phuong thuc nen (chi khi RAW_WRITE_SUPPORTED)"""
+    _require_raw_write()
+    return zipfile._get_compressor(compress_type, level)
+
+
+def append_member(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, write: Callable[[BinaryIO], None]) -> None:
+    """
+    Them member vao cuoi ZIP dang ghi: write(fp) ghi local header + du lieu tai vi tri member
+
+    Giu lock va kiem tra nhu ZipFile.writestr; zinfo.header_offset duoc dien truoc khi goi write.
+
+    Raises:
+        RuntimeError: Ban Python khong ho tro (xem RAW_WRITE_SUPPORTED)
+        ValueError: ZIP dang co write handle khac
+    """
+    _require_raw_write()
+    with zipf._lock:
+        if zipf._writing:
+            raise ValueError("ZIP dang co write handle khac")
+        if zipf._seekable:
+            zipf.fp.seek(zipf.start_dir)
+        zinfo.header_offset = zipf.fp.tell()
+        zipf._writecheck(zinfo)
+        zipf._didModify = True
+
+        write(zipf.fp)
+
+        zipf.start_dir = zipf.fp.tell()
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[zinfo.filename] = zinfo
+
+
+def truncate_last_member(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> None:
+    """
+    Bo member cuoi cung cua ZIP dang ghi (cat du lieu tu header cua no)
+
+    Raises:
+        RuntimeError: Ban Python khong ho tro (xem RAW_WRITE_SUPPORTED)
+        ValueError: zinfo khong phai member cuoi hoac ZIP khong seek duoc
+    """
+    _require_raw_write()
+    with zipf._lock:
+        if zipf._writing or not zipf.filelist or zipf.filelist[-1] is not zinfo:
+            raise ValueError(f"Chi bo duoc member cuoi cung cua ZIP: {zinfo.filename}")
+        if not zipf._seekable:
+            raise ValueError("ZIP khong seek duoc, khong the bo member")
+        zipf.filelist.pop()
+        zipf.NameToInfo.pop(zinfo.filename, None)
+        zipf.start_dir = zinfo.header_offset
+        zipf.fp.seek(zipf.start_dir)
+        zipf.fp.truncate()
@@ -0,0 +1,243 @@
+"""
+Zip Compression - Chinh sach nen cho tung member cua ZIP goi AIP
+
+Chuc nang:
+- PDF va cac dinh dang da nen san (anh, ZIP, Office...) -> STORED, khong ton CPU nen lai
+- XML/XSD va file van ban -> DEFLATE hoac LZMA voi muc nen cau hinh duoc
+- Che do adaptive: chi ap dung cho file khong thuoc 2 nhom tren - nen thu block dau
+  cua file, ty le kem thi STORED (PDF/anh... van luon STORED, XML/XSD van luon nen)
+- Thong ke theo loai file: so file, dung luong truoc/sau nen, thoi gian ghi,
+  uoc tinh thoi gian tiet kiem nho STORED
+"""
+
+import logging
+import threading
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Phuong thuc nen
+METHOD_STORE = "store"
+METHOD_DEFLATE = "deflate"
+METHOD_LZMA = "lzma"
+COMPRESS_TYPES = {
+    METHOD_STORE: zipfile.ZIP_STORED,
+    METHOD_DEFLATE: zipfile.ZIP_DEFLATED,
+    METHOD_LZMA: zipfile.ZIP_LZMA,
+}
+
+# Dinh dang da nen san: nen lai gan nhu khong giam dung luong
+DEFAULT_STORE_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.tif', '.tiff', '.jp2', '.webp',
+    '.zip', '.gz', '.bz2', '.xz', '.zst', '.7z', '.rar',
+    '.mp3', '.mp4', '.m4a', '.avi', '.mkv', '.mov',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods',
+)
+
+# Dinh dang van ban: luon nen (ke ca che do adaptive)
+TEXT_EXTENSIONS = ('.xml', '.xsd', '.txt', '.csv', '.json', '.html', '.htm')
+
+# Che do adaptive: kich thuoc mau va muc tiet kiem toi thieu de nen
+ADAPTIVE_SAMPLE_SIZE = 256 * 1024
+ADAPTIVE_MIN_SAVING = 0.05
+
+
+@dataclass
+class EntryCompression:
+    """Cach nen 1 member ZIP"""
+    method: str
+    compress_type: int
+    compresslevel: Optional[int] = None
+
+
+def _extension(name: Union[str, Path]) -> str:
+    return Path(str(name)).suffix.lower() or '(none)'
+
+
+class CompressionStats:
+    """Thong ke nen theo loai file (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._types: Dict[str, Dict[str, Any]] = {}
+        # Toc do nen do duoc (bytes, giay) - dung de uoc tinh thoi gian tiet kiem
+        self._compress_bytes = 0
+        self._compress_seconds = 0.0
+        self._stored_bytes = 0
+
+    def record(self, name: Union[str, Path], method: str, file_size: int,
+               compress_size: int, seconds: float) -> None:
+        ext = _extension(name)
+        with self._lock:
+            entry = self._types.setdefault(ext, {'files': 0, 'bytes': 0, 'compressed': 0,
+                                                 'seconds': 0.0, 'methods': {}})
+            entry['files'] += 1
+            entry['bytes'] += file_size
+            entry['compressed'] += compress_size
+            entry['seconds'] += seconds
+            entry['methods'][method] = entry['methods'].get(method, 0) + 1
+            if method == METHOD_STORE:
+                self._stored_bytes += file_size
+            else:
+                self._compress_bytes += file_size
+                self._compress_seconds += seconds
+
+    def record_sample(self, nbytes: int, seconds: float) -> None:
+        """Ghi nhan lan nen thu (adaptive) de uoc tinh toc do nen"""
+        with self._lock:
+            self._compress_bytes += nbytes
+            self._compress_seconds += seconds
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Cong don snapshot cua CompressionStats khac (vd: tung chunk trong batch)"""
+        with self._lock:
+            for ext, v in snapshot['types'].items():
+                entry = self._types.setdefault(ext, {'files': 0, 'bytes': 0, 'compressed': 0,
+                                                     'seconds': 0.0, 'methods': {}})
+                for key in ('files', 'bytes', 'compressed', 'seconds'):
+                    entry[key] += v[key]
+                for method, count in v['methods'].items():
+                    entry['methods'][method] = entry['methods'].get(method, 0) + count
+            self._compress_bytes += snapshot['compress_bytes']
+            self._compress_seconds += snapshot['compress_seconds']
+            self._stored_bytes += snapshot['stored_bytes']
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Trang thai hien tai (dung de tinh chenh lech giua 2 thoi diem)"""
+        with self._lock:
+            return {
+                'types': {ext: dict(v, methods=dict(v['methods'])) for ext, v in self._types.items()},
+                'compress_bytes': self._compress_bytes,
+                'compress_seconds': self._compress_seconds,
+                'stored_bytes': self._stored_bytes,
+            }
+
+
+def summarize_compression(end: Dict[str, Any], start: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Bao cao nen giua 2 snapshot: ty le theo loai file va thoi gian tiet kiem uoc tinh
+
+    Returns:
+        {'types': {ext: {files, size_mb, compressed_mb, ratio, seconds, methods}}, 'seconds_saved': float}
+    """
+    start = start or {'types': {}, 'compress_bytes': 0, 'compress_seconds': 0.0, 'stored_bytes': 0}
+    types = {}
+    for ext, v in sorted(end['types'].items()):
+        s = start['types'].get(ext, {'files': 0, 'bytes': 0, 'compressed': 0, 'seconds': 0.0, 'methods': {}})
+        files = v['files'] - s['files']
+        if files <= 0:
+            continue
+        nbytes = v['bytes'] - s['bytes']
+        compressed = v['compressed'] - s['compressed']
+        methods = {m: n - s['methods'].get(m, 0) for m, n in v['methods'].items() if n - s['methods'].get(m, 0) > 0}
+        types[ext] = {
+            'files': files,
+            'size_mb': round(nbytes / (1024 * 1024), 2),
+            'compressed_mb': round(compressed / (1024 * 1024), 2),
+            'ratio': round(compressed / nbytes, 3) if nbytes else 1.0,
+            'seconds': round(v['seconds'] - s['seconds'], 3),
+            'methods': methods,
+        }
+
+    compress_bytes = end['compress_bytes'] - start['compress_bytes']
+    compress_seconds = end['compress_seconds'] - start['compress_seconds']
+    stored_bytes = end['stored_bytes'] - start['stored_bytes']
+    seconds_saved = 0.0
+    if compress_bytes > 0 and compress_seconds > 0:
+        seconds_saved = stored_bytes / (compress_bytes / compress_seconds)
+    return {'types': types, 'seconds_saved': round(seconds_saved, 2)}
+
+
+class CompressionPolicy:
+    """Chon phuong thuc nen cho tung member ZIP theo loai file (va mau du lieu neu adaptive)"""
+
+    def __init__(self, method: str = METHOD_DEFLATE, level: Optional[int] = 6,
+                 store_extensions: Iterable[str] = DEFAULT_STORE_EXTENSIONS,
+                 adaptive: bool = False, min_saving: float = ADAPTIVE_MIN_SAVING,
+                 sample_size: int = ADAPTIVE_SAMPLE_SIZE):
+        if method not in (METHOD_DEFLATE, METHOD_LZMA):
+            raise ValueError(f"Phuong thuc nen khong hop le: {method} (chon: {METHOD_DEFLATE}, {METHOD_LZMA})")
+        self.method = method
+        self.level = level
+        self.store_extensions = {e.lower() if e.startswith('.') else f".{e.lower()}" for e in store_extensions}
+        self.adaptive = adaptive
+        self.min_saving = min_saving
+        self.sample_size = sample_size
+        self.stats = CompressionStats()
+
+    @classmethod
+    def from_config(cls, config) -> 'CompressionPolicy':
+        return cls(
+            method=config.zip_compression,
+            level=config.zip_compression_level,
+            store_extensions=config.zip_store_extensions,
+            adaptive=config.zip_adaptive,
+            min_saving=config.zip_adaptive_min_saving,
+        )
+
+    def _compressed(self) -> EntryCompression:
+        # zipfile bo qua compresslevel voi LZMA (dung preset mac dinh)
+        return EntryCompression(self.method, COMPRESS_TYPES[self.method], self.level)
+
+    def _stored(self) -> EntryCompression:
+        return EntryCompression(METHOD_STORE, zipfile.ZIP_STORED)
+
+    def needs_sample(self, name: Union[str, Path]) -> bool:
+        """Co can doc mau dau file de quyet dinh khong (chi file chua biet loai)"""
+        ext = _extension(name)
+        return self.adaptive and ext not in TEXT_EXTENSIONS and ext not in self.store_extensions
+
+    def choose(self, name: Union[str, Path], sample: Optional[bytes] = None) -> EntryCompression:
+        """
+        Chon cach nen cho member
+
+        Args:
+            name: Ten file/member (de lay phan mo rong)
+            sample: Block dau cua file (chi dung khi adaptive, voi file chua biet loai)
+        """
+        ext = _extension(name)
+        if ext in TEXT_EXTENSIONS:
+            return self._compressed()
+        if ext in self.store_extensions:
+            return self._stored()
+        if self.adaptive and sample:
+            start = time.perf_counter()
+            compressed = zlib.compress(sample, self.level if self.level is not None else -1)
+            self.stats.record_sample(len(sample), time.perf_counter() - start)
+            saving = 1 - len(compressed) / len(sample)
+            return self._compressed() if saving >= self.min_saving else self._stored()
+        return self._compressed()
+
+    def choose_for_file(self, path: Union[str, Path], name: Optional[str] = None) -> EntryCompression:
+        """Chon cach nen cho file tren dia (doc mau dau file neu adaptive)"""
+        sample = None
+        if self.needs_sample(name or path):
+            try:
+                with open(path, 'rb') as f:
+                    sample = f.read(self.sample_size)
+            except OSError as e:
+                logger.debug(f"Khong doc duoc mau {path}: {e}")
+        return self.choose(name or path, sample)
+
+    def write(self, zipf: zipfile.ZipFile, path: Union[str, Path], arcname: str) -> zipfile.ZipInfo:
+        """Ghi file vao ZIP theo chinh sach va ghi thong ke"""
+        entry = self.choose_for_file(path, arcname)
+        start = time.perf_counter()
+        zipf.write(path, arcname, compress_type=entry.compress_type, compresslevel=entry.compresslevel)
+        zinfo = zipf.filelist[-1]
+        self.stats.record(arcname, entry.method, zinfo.file_size, zinfo.compress_size, time.perf_counter() - start)
+        return zinfo
+
+    def writestr(self, zipf: zipfile.ZipFile, arcname: str, data: bytes) -> zipfile.ZipInfo:
+        """Ghi du lieu trong bo nho vao ZIP theo chinh sach va ghi thong ke"""
+        entry = self.choose(arcname, data[:self.sample_size] if self.needs_sample(arcname) else None)
+        start = time.perf_counter()
+        zipf.writestr(arcname, data, compress_type=entry.compress_type, compresslevel=entry.compresslevel)
+        zinfo = zipf.filelist[-1]
+        self.stats.record(arcname, entry.method, zinfo.file_size, zinfo.compress_size, time.perf_counter() - start)
+        return zinfo
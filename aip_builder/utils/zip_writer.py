@@ -0,0 +1,111 @@
+"""
+Zip Writer - Ghi member ZIP tu bytes da nen san
+
+Chuc nang:
+- Doc du lieu da nen (raw) cua 1 member trong file ZIP co san
+- Ghi member do vao ZIP dang tao ma khong giai nen/nen lai
+  (CRC, kich thuoc, phuong thuc nen giu nguyen)
+- Ghi member da nen san (vd: nen song song o thread khac) vao ZIP theo thu tu
+- Bo member vua ghi cuoi cung (vd: payload sai checksum khi ghi stream)
+- Can thuoc tinh noi bo cua zipfile (qua utils.zip_compat): chi goi khi
+  zip_compat.RAW_WRITE_SUPPORTED, neu khong raise RuntimeError
+"""
+
+import logging
+import os
+import struct
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Union
+
+from .zip_compat import append_member, truncate_last_member
+
+logger = logging.getLogger(__name__)
+
+# Local file header: signature + 26 bytes, ten file va extra nam sau
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+def _seek_member_data(src: BinaryIO, zinfo: zipfile.ZipInfo) -> None:
+    """Dua con tro file toi vi tri bat dau du lieu da nen cua member"""
+    src.seek(zinfo.header_offset)
+    header = src.read(_LOCAL_HEADER_SIZE)
+    if len(header) != _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Local header khong hop le cho member {zinfo.filename}")
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    data_offset = src.seek(name_len + extra_len, 1)
+    if os.fstat(src.fileno()).st_size < data_offset + zinfo.compress_size:
+        raise zipfile.BadZipFile(f"Du lieu member {zinfo.filename} bi cat ngan")
+
+
+def copy_raw_member(zipf: zipfile.ZipFile, source_zip: Union[str, Path],
+                    source_info: zipfile.ZipInfo, arcname: str) -> zipfile.ZipInfo:
+    """
+    Ghi member source_info cua source_zip vao zipf voi ten arcname, dung lai bytes da nen
+
+    Args:
+        zipf: ZipFile dang mo che do 'w' (file co the seek)
+        source_zip: File ZIP chua member goc (da ghi xong)
+        source_info: ZipInfo cua member goc
+        arcname: Ten member trong ZIP moi
+
+    Returns:
+        ZipInfo cua member moi
+
+    Raises:
+        OSError, zipfile.BadZipFile: Khong doc duoc member goc
+            (zipf khong bi thay doi neu loi xay ra truoc khi ghi)
+    """
+    zinfo = zipfile.ZipInfo(str(arcname).replace('\\', '/'), date_time=source_info.date_time)
+    zinfo.compress_type = source_info.compress_type
+    zinfo.external_attr = source_info.external_attr
+    zinfo.create_system = source_info.create_system
+    zinfo.CRC = source_info.CRC
+    zinfo.compress_size = source_info.compress_size
+    zinfo.file_size = source_info.file_size
+
+    with open(source_zip, 'rb') as src:
+        _seek_member_data(src, source_info)
+        write_raw_member(zipf, zinfo, src)
+
+    return zinfo
+
+
+def write_raw_member(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, src: BinaryIO) -> zipfile.ZipInfo:
+    """
+    Ghi member da nen san: local header tu zinfo (CRC, kich thuoc, phuong thuc nen
+    da dien day du) roi dung zinfo.compress_size bytes doc tu src
+
+    Returns:
+        zinfo (da co header_offset)
+    """
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+
+    def write(fp: BinaryIO) -> None:
+        fp.write(zinfo.FileHeader(zip64))
+        _copy_exact(src, fp, zinfo.compress_size)
+
+    append_member(zipf, zinfo, write)
+    return zinfo
+
+
+def discard_member(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> None:
+    """
+    Xoa member vua ghi xong khoi ZIP dang tao (cat bo du lieu cua no)
+
+    Raises:
+        ValueError: zinfo khong phai member cuoi cung
+    """
+    truncate_last_member(zipf, zinfo)
+
+
+def _copy_exact(src: BinaryIO, dst: BinaryIO, length: int) -> None:
+    """Sao chep dung length bytes tu src sang dst"""
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise zipfile.BadZipFile("Du lieu member ZIP bi cat ngan")
+        dst.write(chunk)
+        remaining -= len(chunk)
@@ -7,14 +7,19 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 from lxml import etree
-import hashlib
 import json
 
 from .models import HoSo, TaiLieu, BuildSummary
 from .config import Config
+from .utils.hashing import hash_file, hash_file_multi, normalize_algorithm
+from .pdf_scan import scan_pdf, SCAN_ERROR, SCAN_WARNING
+from .manifest import PackageManifest
 
 logger = logging.getLogger(__name__)
 
+# Thu muc payload trong goi (duong dan trong manifest)
+_REP1_DATA_REL = 'representations/rep1/data'
+
 
 class ValidationResult:
     """Ket qua validation"""
@@ -64,12 +69,13 @@ class CSIPValidator:
         self.config = config
         self.schema_cache: Dict[str, etree.XMLSchema] = {}
     
-    def validate_package(self, package_dir: Path) -> ValidationResult:
+    def validate_package(self, package_dir: Path, manifest: Optional[PackageManifest] = None) -> ValidationResult:
         """
         Validation tong the cho 1 AIP package
         
         Args:
             package_dir: Thu muc chua AIP package
+            manifest: Danh sach file builder da ghi (neu co thi khong duyet lai thu muc)
             
         Returns:
             ValidationResult: Ket qua validation
@@ -94,14 +100,18 @@ class CSIPValidator:
             self._validate_metadata_files(package_dir, result)
             
             # 4. Kiem tra representation files
-            self._validate_representation_files(package_dir, result)
+            self._validate_representation_files(package_dir, result, manifest)
             
             # 5. Kiem tra tinh nhat quan
-            self._validate_consistency(package_dir, result)
+            self._validate_consistency(package_dir, result, manifest)
             
             # 6. Tinh toan thong ke
-            result.total_size = self._calculate_total_size(package_dir)
-            result.checked_files = self._count_files(package_dir)
+            if manifest is not None:
+                result.total_size = manifest.total_size
+                result.checked_files = manifest.file_count
+            else:
+                result.total_size = self._calculate_total_size(package_dir)
+                result.checked_files = self._count_files(package_dir)
             
         except Exception as e:
             result.add_error(f"Loi validation: {e}")
@@ -243,7 +253,8 @@ class CSIPValidator:
         except Exception as e:
             result.add_error(f"Loi kiem tra PREMIS: {e}")
     
-    def _validate_representation_files(self, package_dir: Path, result: ValidationResult):
+    def _validate_representation_files(self, package_dir: Path, result: ValidationResult,
+                                       manifest: Optional[PackageManifest] = None):
         """Kiem tra cac file trong representation"""
         logger.debug("Kiem tra representation files...")
         
@@ -252,8 +263,19 @@ class CSIPValidator:
             result.add_error("Thu muc data khong ton tai")
             return
         
-        # Dem file
-        pdf_files = list(data_dir.glob("*.pdf"))
+        # Dem file (payload co the la symlink/hardlink toi PDF nguon - payload mode)
+        if manifest is not None:
+            pdf_files = [data_dir / name for name in manifest.names_in(_REP1_DATA_REL)
+                         if name.lower().endswith('.pdf')]
+        else:
+            pdf_files = list(data_dir.glob("*.pdf"))
+        broken_links = [p for p in pdf_files if p.is_symlink() and not p.exists()]
+        for link in broken_links:
+            result.add_error(f"Symlink payload tro toi file khong ton tai: {link.name} -> {link.readlink()}")
+        pdf_files = [p for p in pdf_files if p not in broken_links]
+        linked = sum(1 for p in pdf_files if p.is_symlink())
+        if linked:
+            result.add_info(f"{linked} file PDF la symlink toi file nguon")
         if len(pdf_files) == 0:
             result.add_warning("Khong co file PDF nao trong data")
         else:
@@ -269,27 +291,17 @@ class CSIPValidator:
             result.add_warning(f"{corrupted_count} file PDF co van de")
     
     def _validate_pdf_file(self, pdf_path: Path, result: ValidationResult) -> bool:
-        """Kiem tra 1 file PDF"""
-        try:
-            # Kiem tra kich thuoc
-            if pdf_path.stat().st_size == 0:
-                result.add_error(f"File PDF rong: {pdf_path.name}")
-                return False
-            
-            # Kiem tra header PDF
-            with open(pdf_path, 'rb') as f:
-                header = f.read(8)
-                if not header.startswith(b'%PDF-'):
-                    result.add_error(f"File khong phai PDF: {pdf_path.name}")
-                    return False
-            
-            return True
-            
-        except Exception as e:
-            result.add_error(f"Loi kiem tra file {pdf_path.name}: {e}")
+        """Kiem tra 1 file PDF (header, %%EOF, startxref/trailer, ma hoa)"""
+        scan = scan_pdf(pdf_path)
+        if scan.status == SCAN_ERROR:
+            result.add_error(f"File PDF loi {pdf_path.name}: {'; '.join(scan.issues)}")
             return False
+        if scan.status == SCAN_WARNING:
+            result.add_warning(f"File PDF {pdf_path.name}: {'; '.join(scan.issues)}")
+        return True
     
-    def _validate_consistency(self, package_dir: Path, result: ValidationResult):
+    def _validate_consistency(self, package_dir: Path, result: ValidationResult,
+                              manifest: Optional[PackageManifest] = None):
         """Kiem tra tinh nhat quan giua cac file"""
         logger.debug("Kiem tra tinh nhat quan...")
         
@@ -317,10 +329,12 @@ class CSIPValidator:
                         filename = href.split('/')[-1]
                         mets_files.add(filename)
             
-            # Lay danh sach file thuc te
+            # Lay danh sach file thuc te (tu manifest neu co)
             data_dir = package_dir / "representations" / "rep1" / "data"
             actual_files = set()
-            if data_dir.exists():
+            if manifest is not None:
+                actual_files.update(manifest.names_in(_REP1_DATA_REL))
+            elif data_dir.exists():
                 for file_path in data_dir.iterdir():
                     if file_path.is_file():
                         actual_files.add(file_path.name)
@@ -386,6 +400,9 @@ class IntegrityChecker:
         """
         Kiem tra checksum cac file trong package
         
+        Moi thuat toan fixity co trong PREMIS (SHA-256, MD5, SHA-512...) deu duoc
+        kiem tra, tat ca tinh trong 1 lan doc file
+        
         Returns:
             Tuple[bool, List[str]]: (is_valid, errors)
         """
@@ -393,7 +410,10 @@ class IntegrityChecker:
         
         try:
             # Doc PREMIS de lay checksum
-            premis_path = package_dir / "metadata" / "preservation" / "premis.xml"
+            preservation_dir = package_dir / "metadata" / "preservation"
+            premis_path = preservation_dir / "PREMIS.xml"
+            if not premis_path.exists():
+                premis_path = preservation_dir / "premis.xml"
             if not premis_path.exists():
                 errors.append("Khong tim thay PREMIS.xml de kiem tra checksum")
                 return False, errors
@@ -428,22 +448,33 @@ class IntegrityChecker:
                     errors.append(f"File khong ton tai: {filename}")
                     continue
                 
-                # Lay checksum tu PREMIS
-                checksum_elem = file_obj.find('.//premis:messageDigest', namespaces=ns)
-                if checksum_elem is None:
+                # Lay tat ca fixity tu PREMIS
+                fixity_elems = file_obj.findall('.//premis:fixity', namespaces=ns)
+                if not fixity_elems:
                     errors.append(f"Khong co checksum trong PREMIS cho file: {filename}")
                     continue
                 
-                expected_checksum = checksum_elem.text
-                if expected_checksum == '[TO_BE_CALCULATED]':
-                    continue  # Skip files chua tinh checksum
+                expected: Dict[str, str] = {}
+                for fixity in fixity_elems:
+                    algorithm = fixity.findtext('premis:messageDigestAlgorithm', default='SHA-256', namespaces=ns)
+                    digest = fixity.findtext('premis:messageDigest', default='', namespaces=ns).strip()
+                    if not digest or digest == '[TO_BE_CALCULATED]':
+                        continue  # Skip checksum chua tinh
+                    try:
+                        expected[normalize_algorithm(algorithm)] = digest
+                    except ValueError:
+                        logger.warning(f"Bo qua thuat toan checksum khong ho tro ({algorithm}) cho file {filename}")
                 
-                # Tinh checksum thuc te
-                actual_checksum = IntegrityChecker.calculate_sha256(actual_file)
+                if not expected:
+                    continue
+                
+                # Tinh checksum thuc te (moi thuat toan, 1 lan doc)
+                actual = hash_file_multi(actual_file, expected.keys())
                 
-                if actual_checksum.upper() != expected_checksum.upper():
-                    errors.append(f"Checksum khong khop cho file {filename}: "
-                                f"expected {expected_checksum}, got {actual_checksum}")
+                for algorithm, expected_checksum in expected.items():
+                    if actual[algorithm].upper() != expected_checksum.upper():
+                        errors.append(f"Checksum {algorithm} khong khop cho file {filename}: "
+                                    f"expected {expected_checksum}, got {actual[algorithm]}")
             
         except Exception as e:
             errors.append(f"Loi kiem tra checksum: {e}")
@@ -453,13 +484,8 @@ class IntegrityChecker:
     @staticmethod
     def calculate_sha256(file_path: Path) -> str:
         """Tinh SHA-256 checksum"""
-        sha256_hash = hashlib.sha256()
-        
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(chunk)
-            return sha256_hash.hexdigest()
+            return hash_file(file_path)
         except Exception as e:
             logger.error(f"Loi tinh checksum cho {file_path}: {e}")
             return ""
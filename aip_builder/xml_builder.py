@@ -0,0 +1,1002 @@
+"""
+XML Tree Builder - Engine sinh XML bang lxml (thay cho template Jinja2)
+
+Chuc nang chinh:
+- Dung cay METS, rep1/METS, EAD (SimpleDC ho so/tai lieu), PREMIS, PREMIS_rep1 truc tiep
+  bang etree.SubElement: khong qua filter escape_xml, khong trim whitespace template
+- Noi dung tuong duong ngu nghia voi template Jinja2 (cung element, thuoc tinh, gia tri;
+  khac khoang trang/comment), lxml tu escape gia tri
+- Placeholder METS (PLACEHOLDER_*) la gia tri thuoc tinh, duoc gan lai tren cay
+  (fill_placeholders) thay vi thay chuoi
+- Cay da dung kiem tra XSD truc tiep (validate_tree), khong parse lai
+- Thong ke thoi gian dung cay + serialize theo loai XML (cung dang TemplateCache.stats)
+- So sanh 2 engine: thoi gian sinh XML moi ho so/tai lieu + kiem tra tuong duong (benchmark_engines)
+
+Chon engine: Config.xml_engine = "lxml" (mac dinh "jinja")
+"""
+
+import copy
+import logging
+import re
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from lxml import etree
+
+from .config import Config
+from .models import HoSo, TaiLieu
+from .render_context import compile_hoso
+from .schema_assets import get_schema_assets
+from .template_cache import basename, format_date, safe_filename
+from .utils.work_pool import get_work_pool
+from .xml_generator import EAD_DOC_BATCH_SIZE, resolve_placeholders
+
+logger = logging.getLogger(__name__)
+
+METS_NS = 'http://www.loc.gov/METS/'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+XSI_NS = 'http://www.w3.org/2001/XMLSchema-instance'
+CSIP_NS = 'https://DILCIS.eu/XML/METS/CSIPExtensionMETS'
+PREMIS_NS = 'http://www.loc.gov/premis/v3'
+
+METS_NSMAP = {'mets': METS_NS, 'xlink': XLINK_NS, 'xsi': XSI_NS, 'csip': CSIP_NS}
+PREMIS_NSMAP = {'premis': PREMIS_NS, 'xsi': XSI_NS}
+
+_M = f'{{{METS_NS}}}'
+_P = f'{{{PREMIS_NS}}}'
+_XLINK_HREF = f'{{{XLINK_NS}}}href'
+_XLINK_TYPE = f'{{{XLINK_NS}}}type'
+_XLINK_TITLE = f'{{{XLINK_NS}}}title'
+_XSI_TYPE = f'{{{XSI_NS}}}type'
+_XSI_SCHEMA_LOCATION = f'{{{XSI_NS}}}schemaLocation'
+_CSIP_NOTETYPE = f'{{{CSIP_NS}}}NOTETYPE'
+
+# XSD kiem tra cay theo loai XML (schema khong bien dich duoc thi bo qua)
+XSD_FOR_KIND = {
+    'mets': 'mets.xsd',
+    'rep_mets': 'mets.xsd',
+    'ead': 'ead.xsd',
+    'ead_doc': 'EAD_doc.xsd',
+    'premis': 'premis.xsd',
+    'premis_rep': 'premis.xsd',
+}
+
+# Moc thoi gian trong XML (khac nhau giua 2 lan sinh) - bo qua khi so sanh engine
+_TIMESTAMP_PATTERN = re.compile(rb'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(\.\d+)?(\+07:00)?|\d{8}_\d{6}|\d{4}-\d\d-\d\d')
+
+# Ky tu dieu khien khong hop le trong XML 1.0 (lxml tu choi)
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+METS_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S+07:00'
+
+
+def _str(value: Any) -> str:
+    """Gia tri in ra nhu {{ value }} cua Jinja2 (None -> 'None')"""
+    return _INVALID_XML_CHARS.sub('', str(value))
+
+
+def _esc(value: Any) -> str:
+    """Gia tri in ra nhu {{ value | escape_xml }} (rong neu falsy, lxml tu escape)"""
+    return _INVALID_XML_CHARS.sub('', str(value)) if value else ''
+
+
+def _el(parent: etree._Element, tag: str, text: Optional[str] = None,
+        attrib: Optional[Dict[str, str]] = None) -> etree._Element:
+    element = etree.SubElement(parent, tag, attrib) if attrib else etree.SubElement(parent, tag)
+    if text is not None:
+        element.text = text
+    return element
+
+
+def serialize(root: etree._Element) -> bytes:
+    """Cay XML -> bytes UTF-8 (khai bao XML, thut le)"""
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', pretty_print=True)
+
+
+def fill_placeholders(root: etree._Element, values: Dict[str, str]) -> None:
+    """Gan gia tri cho cac thuoc tinh PLACEHOLDER_* tren cay (placeholder khong co trong values giu nguyen)"""
+    for element in root.iter(etree.Element):
+        for name, value in element.attrib.items():
+            if 'PLACEHOLDER_' in value:
+                element.set(name, resolve_placeholders(value, values))
+
+
+class _Prototype:
+    """
+    Khuon subtree lap lai moi tai lieu: deepcopy (trong C) roi gan gia tri vao cac o '{ten}'
+    (text hoac thuoc tinh) - nhanh hon dung tung element bang SubElement
+
+    Gia tri None cho o text -> bo element do (element tuy chon trong template).
+    """
+
+    def __init__(self, root: etree._Element):
+        self.root = root
+        self.slots = []  # (vi tri trong root.iter(), ten thuoc tinh | None = text, ten o)
+        for index, element in enumerate(root.iter()):
+            for name, value in element.attrib.items():
+                if value.startswith('{'):
+                    self.slots.append((index, name, value[1:-1]))
+            if element.text and element.text.startswith('{'):
+                self.slots.append((index, None, element.text[1:-1]))
+                element.text = None
+
+    def fill(self, values: Dict[str, Optional[str]]) -> etree._Element:
+        clone = self.root.__copy__()  # lxml: copy ca subtree, khong qua memo cua copy.deepcopy
+        elements = list(clone.iter())
+        removed = []
+        for index, attribute, slot in self.slots:
+            value = values[slot]
+            if attribute is not None:
+                elements[index].set(attribute, value)
+            elif value is None:
+                removed.append(elements[index])
+            else:
+                elements[index].text = value
+        for element in removed:
+            element.getparent().remove(element)
+        return clone
+
+
+def _ead_doc_prototype() -> _Prototype:
+    root = etree.Element('simpledc')
+    for tag in ('docId', 'arcDocCode', 'maintenance', 'typeName', 'codeNumber', 'codeNotation', 'issuedDate',
+                'organName', 'subject', 'language', 'numberOfPage', 'inforSign', 'keyword', 'mode',
+                'confidenceLevel', 'autograph', 'format', 'process', 'riskRecovery', 'riskRecoveryStatus',
+                'description'):
+        _el(root, tag, f"{{{tag}}}")
+    return _Prototype(root)
+
+
+def _premis_identifier(parent: etree._Element, tag: str, id_type: str, value: str) -> None:
+    identifier = _el(parent, _P + tag)
+    _el(identifier, _P + f'{tag}Type', id_type)
+    _el(identifier, _P + f'{tag}Value', value)
+
+
+def _premis_relationship(parent: etree._Element, sub_type: str, id_type: str, value: str) -> None:
+    relationship = _el(parent, _P + 'relationship')
+    _el(relationship, _P + 'relationshipType', 'structural')
+    _el(relationship, _P + 'relationshipSubType', sub_type)
+    related = _el(relationship, _P + 'relatedObjectIdentification')
+    _el(related, _P + 'relatedObjectIdentifierType', id_type)
+    _el(related, _P + 'relatedObjectIdentifierValue', value)
+
+
+def _premis_fixity(parent: etree._Element) -> None:
+    fixity = _el(parent, _P + 'fixity')
+    _el(fixity, _P + 'messageDigestAlgorithm', '{algorithm}')
+    _el(fixity, _P + 'messageDigest', '{digest}')
+    _el(fixity, _P + 'messageDigestOriginator', '{originator}')
+
+
+def _premis_pdf_format(parent: etree._Element) -> None:
+    fmt = _el(parent, _P + 'format')
+    designation = _el(fmt, _P + 'formatDesignation')
+    _el(designation, _P + 'formatName', 'PDF')
+    _el(designation, _P + 'formatVersion', '1.4 or later')
+    _el(fmt, _P + 'formatNote', 'Portable Document Format')
+
+
+def _premis_event_outcome(parent: etree._Element, note: str) -> None:
+    outcome = _el(parent, _P + 'eventOutcomeInformation')
+    _el(outcome, _P + 'eventOutcome', 'success')
+    detail = _el(outcome, _P + 'eventOutcomeDetail')
+    _el(detail, _P + 'eventOutcomeDetailNote', note)
+
+
+def _premis_file_prototype() -> _Prototype:
+    """premis:object file cua PREMIS.xml (significantProperties luon la con cuoi)"""
+    root = etree.Element(_P + 'object', {_XSI_TYPE: 'premis:file'}, nsmap=PREMIS_NSMAP)
+    _premis_identifier(root, 'objectIdentifier', 'LOCAL', '{object_id}')
+    _el(root, _P + 'objectCategory', 'file')
+    level = _el(root, _P + 'preservationLevel')
+    _el(level, _P + 'preservationLevelType', 'bit preservation')
+    _el(level, _P + 'preservationLevelValue', 'Full')
+    _el(level, _P + 'preservationLevelRole', 'requirement')
+    _el(level, _P + 'preservationLevelRationale', 'legal mandate')
+    _el(level, _P + 'preservationLevelDateAssigned', '{assigned}')
+    characteristics = _el(root, _P + 'objectCharacteristics')
+    _el(characteristics, _P + 'compositionLevel', '0')
+    _premis_fixity(characteristics)
+    _el(characteristics, _P + 'size', '{size}')
+    _premis_pdf_format(characteristics)
+    extension = _el(characteristics, _P + 'objectCharacteristicsExtension')
+    _el(extension, 'originalFileName', '{original_name}')
+    _el(extension, 'documentTitle', '{title}')
+    _el(extension, 'pageCount', '{pages}')
+    _el(extension, 'creator', '{creator}')
+    _el(root, _P + 'originalName', '{original_name}')
+    _premis_identifier(root, 'linkingEventIdentifier', 'UUID', '{event_id}')
+    storage = _el(root, _P + 'storage')
+    location = _el(storage, _P + 'contentLocation')
+    _el(location, _P + 'contentLocationType', 'URI')
+    _el(location, _P + 'contentLocationValue', '{location}')
+    _premis_relationship(root, 'is part of', 'LOCAL', '{rep_id}')
+    significant = _el(root, _P + 'significantProperties')
+    _el(significant, _P + 'significantPropertiesType', 'Physical Condition')
+    _el(significant, _P + 'significantPropertiesValue', '{condition}')
+    return _Prototype(root)
+
+
+def _premis_digitization_prototype() -> _Prototype:
+    """premis:event so hoa 1 file cua PREMIS.xml"""
+    root = etree.Element(_P + 'event', nsmap=PREMIS_NSMAP)
+    _premis_identifier(root, 'eventIdentifier', 'UUID', '{event_id}')
+    _el(root, _P + 'eventType', 'digitization')
+    _el(root, _P + 'eventDateTime', '{event_time}')
+    detail = _el(root, _P + 'eventDetailInformation')
+    _el(detail, _P + 'eventDetail', '{detail}')
+    _premis_event_outcome(root, 'Document successfully digitized to PDF format')
+    linking = _el(root, _P + 'linkingAgentIdentifier')
+    _el(linking, _P + 'linkingAgentIdentifierType', 'LOCAL')
+    _el(linking, _P + 'linkingAgentIdentifierValue', '{agent_id}')
+    _el(linking, _P + 'linkingAgentRole', 'implementer')
+    linking = _el(root, _P + 'linkingObjectIdentifier')
+    _el(linking, _P + 'linkingObjectIdentifierType', 'LOCAL')
+    _el(linking, _P + 'linkingObjectIdentifierValue', '{object_id}')
+    _el(linking, _P + 'linkingObjectRole', 'outcome')
+    return _Prototype(root)
+
+
+def _premis_rep_file_prototype() -> _Prototype:
+    """premis:object file cua PREMIS_rep1.xml"""
+    root = etree.Element(_P + 'object', {_XSI_TYPE: 'premis:file'}, nsmap=PREMIS_NSMAP)
+    _premis_identifier(root, 'objectIdentifier', 'LOCAL', '{object_id}')
+    characteristics = _el(root, _P + 'objectCharacteristics')
+    _el(characteristics, _P + 'compositionLevel', '0')
+    _premis_fixity(characteristics)
+    _el(characteristics, _P + 'size', '{size}')
+    _premis_pdf_format(characteristics)
+    extension = _el(characteristics, _P + 'objectCharacteristicsExtension')
+    _el(extension, 'originalFileName', '{filename}')
+    _el(extension, 'documentTitle', '{title}')
+    _el(extension, 'pageCount', '{pages}')
+    _el(extension, 'creator', '{creator}')
+    storage = _el(root, _P + 'storage')
+    location = _el(storage, _P + 'contentLocation')
+    _el(location, _P + 'contentLocationType', 'URI')
+    _el(location, _P + 'contentLocationValue', '{location}')
+    _premis_relationship(root, 'is part of', 'LOCAL', '{rep_id}')
+    return _Prototype(root)
+
+
+def _rep_mets_prototypes() -> Dict[str, _Prototype]:
+    """dmdSec, file (fileGrp Data) va div MetadataLink cua moi tai lieu trong rep1/METS.xml"""
+    dmd = etree.Element(_M + 'dmdSec', {'ID': '{dmd_id}', 'CREATED': '{created}', 'STATUS': 'CURRENT'},
+                        nsmap=METS_NSMAP)
+    _el(dmd, _M + 'mdRef', attrib={
+        'ID': '{dmd_ref_id}',
+        'LOCTYPE': 'URL', 'MDTYPE': 'OTHER', 'OTHERMDTYPE': 'EAD', 'MDTYPEVERSION': '1.0',
+        'MIMETYPE': 'text/xml', 'SIZE': '{size}', 'CHECKSUM': '{checksum}',
+        'CHECKSUMTYPE': 'SHA-256', 'CREATED': '{created}',
+        _XLINK_TYPE: 'simple', _XLINK_HREF: '{href}',
+    })
+    data_file = etree.Element(_M + 'file', {
+        'ID': '{file_id}', 'MIMETYPE': 'application/pdf', 'SIZE': '{size}', 'CHECKSUM': '{checksum}',
+        'CHECKSUMTYPE': 'SHA-256', 'CREATED': '{created}',
+    }, nsmap=METS_NSMAP)
+    _el(data_file, _M + 'FLocat', attrib={'LOCTYPE': 'URL', _XLINK_HREF: '{href}', _XLINK_TYPE: 'simple'})
+    link = etree.Element(_M + 'div', {'ID': '{link_id}', 'DMDID': '{dmd_id}', 'ADMID': '{digiprov_id}',
+                                      'LABEL': 'MetadataLink/File'}, nsmap=METS_NSMAP)
+    _el(link, _M + 'fptr', attrib={'FILEID': '{file_id}'})
+    return {'dmd': _Prototype(dmd), 'file': _Prototype(data_file), 'link': _Prototype(link)}
+
+
+_EAD_DOC = _ead_doc_prototype()
+_PREMIS_FILE = _premis_file_prototype()
+_PREMIS_DIGITIZATION = _premis_digitization_prototype()
+_PREMIS_REP_FILE = _premis_rep_file_prototype()
+_REP_METS = _rep_mets_prototypes()
+
+
+def canonical_xml(content: Union[str, bytes]) -> bytes:
+    """
+    Dang chuan (C14N) de so sanh noi dung 2 engine: bo comment, khoang trang giua element
+    va moc thoi gian
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    root = etree.fromstring(data, etree.XMLParser(remove_comments=True))
+    for element in root.iter():
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        if element.tail is not None and not element.tail.strip():
+            element.tail = None
+    return _TIMESTAMP_PATTERN.sub(b'T', etree.tostring(root, method='c14n'))
+
+
+class BuildTimings:
+    """Thoi gian dung cay + serialize theo loai XML, dung chung cho process (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._seconds: Dict[str, float] = {}
+
+    def record(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self._counts[kind] = self._counts.get(kind, 0) + 1
+            self._seconds[kind] = self._seconds.get(kind, 0.0) + seconds
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Cung dang TemplateCache.stats() (compile_ms = 0: khong co buoc bien dich)"""
+        with self._lock:
+            return {
+                f"lxml:{kind}": {
+                    'compile_ms': 0.0,
+                    'renders': self._counts[kind],
+                    'render_ms': round(self._seconds[kind] * 1000, 2),
+                    'avg_render_ms': round(self._seconds[kind] * 1000 / self._counts[kind], 3),
+                }
+                for kind in self._counts
+            }
+
+
+_timings = BuildTimings()
+
+
+def get_build_timings() -> BuildTimings:
+    """Thong ke thoi gian engine lxml dung chung cho process"""
+    return _timings
+
+
+class XMLTreeBuilder:
+    """
+    Sinh XML cho AIP package bang lxml - cung giao dien voi XMLTemplateGenerator
+
+    build_*: tra ve cay (etree._Element); generate_*: tra ve chuoi XML nhu engine Jinja2.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.schema_assets = get_schema_assets()
+        self.work_pool = get_work_pool(config.pool_workers)  # Dung cay EAD_doc song song
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Thoi gian dung cay + serialize theo loai XML (tinh tu khi khoi dong process)"""
+        return _timings.stats()
+
+    def _timed(self, kind: str, start: float) -> None:
+        _timings.record(kind, time.perf_counter() - start)
+
+    # ------------------------------------------------------------------ METS
+
+    def _mets_header(self, parent: etree._Element, created: str, rep: bool) -> None:
+        config = self.config
+        attrib = {'CREATEDATE': created, 'LASTMODDATE': created}
+        if rep:
+            attrib['RECORDSTATUS'] = 'NEW'
+            attrib[f'{{{CSIP_NS}}}OAISPACKAGETYPE'] = 'AIP'
+        header = _el(parent, _M + 'metsHdr', attrib=attrib)
+        if not rep:
+            _el(header, f'{{{CSIP_NS}}}OAISPACKAGETYPE', 'AIP')
+
+        agent = _el(header, _M + 'agent', attrib={
+            'ROLE': _str(config.software_agent_role),
+            'TYPE': _str(config.software_agent_type),
+            'OTHERTYPE': _str(config.software_agent_othertype),
+        })
+        _el(agent, _M + 'name', _str(config.software_agent_name))
+        _el(agent, _M + 'note', _str(config.software_agent_version), {_CSIP_NOTETYPE: 'SOFTWARE VERSION'})
+
+        agent = _el(header, _M + 'agent', attrib={'ROLE': 'EDITOR', 'TYPE': 'ORGANIZATION'})
+        _el(agent, _M + 'name', _esc(config.organization_name))
+        _el(agent, _M + 'note', _str(config.agency_code), {_CSIP_NOTETYPE: 'IDENTIFICATIONCODE'})
+        if not rep and config.organization_email:
+            _el(agent, _M + 'note', f"Contact: {_str(config.organization_email)}")
+
+        agent = _el(header, _M + 'agent', attrib={'ROLE': 'ARCHIVIST', 'TYPE': 'ORGANIZATION'})
+        _el(agent, _M + 'name', _esc(config.archivist_name))
+        _el(agent, _M + 'note', _str(config.archivist_code), {_CSIP_NOTETYPE: 'IDENTIFICATIONCODE'})
+
+    def build_mets(self, hoso: HoSo, package_id: str) -> etree._Element:
+        """Cay METS goc (mets_template.xml)"""
+        start = time.perf_counter()
+        created = datetime.now().strftime(METS_TIME_FORMAT)
+        root = etree.Element(_M + 'mets', {
+            _XSI_SCHEMA_LOCATION: 'http://www.loc.gov/METS/ http://www.loc.gov/standards/mets/mets.xsd',
+            'OBJID': _str(hoso.objid),
+            'LABEL': _esc(hoso.effective_title),
+            'TYPE': 'Mixed',
+            'PROFILE': 'https://eark-project.com/E-ARK-CSIP-1.2',
+        }, nsmap=METS_NSMAP)
+        self._mets_header(root, created, rep=False)
+
+        dmd_id = f"uuid-{hoso.main_dmd_uuid.upper()}"
+        dmd = _el(root, _M + 'dmdSec', attrib={'ID': dmd_id, 'CREATED': created})
+        _el(dmd, _M + 'mdRef', attrib={
+            'ID': f"uuid-{hoso.main_dmd_ref_uuid.upper()}",
+            'LOCTYPE': 'URL', 'MDTYPE': 'OTHER', 'OTHERMDTYPE': 'EAD', 'MDTYPEVERSION': '1.0',
+            'MIMETYPE': 'text/xml', 'SIZE': 'PLACEHOLDER_EAD_SIZE', 'CHECKSUMTYPE': 'SHA-256',
+            'CHECKSUM': 'PLACEHOLDER_EAD_CHECKSUM', 'CREATED': created,
+            _XLINK_TYPE: 'simple', _XLINK_HREF: 'metadata/descriptive/EAD.xml',
+        })
+
+        amd_id = f"uuid-{hoso.main_amd_uuid.upper()}"
+        amd = _el(root, _M + 'amdSec', attrib={'ID': amd_id})
+        digiprov = _el(amd, _M + 'digiprovMD', attrib={'ID': f"uuid-{hoso.main_digiprov_uuid.upper()}",
+                                                       'STATUS': 'CURRENT'})
+        _el(digiprov, _M + 'mdRef', attrib={
+            'ID': f"uuid-{hoso.main_premis_ref_uuid.upper()}",
+            'LOCTYPE': 'URL', 'MDTYPE': 'PREMIS', 'MIMETYPE': 'text/xml',
+            'SIZE': 'PLACEHOLDER_PREMIS_SIZE', 'CHECKSUMTYPE': 'SHA-256',
+            'CHECKSUM': 'PLACEHOLDER_PREMIS_CHECKSUM', 'CREATED': created,
+            _XLINK_TYPE: 'simple', _XLINK_HREF: 'metadata/preservation/PREMIS.xml',
+        })
+
+        file_sec = _el(root, _M + 'fileSec', attrib={'ID': f"uuid-{hoso.main_filesec_uuid.upper()}"})
+        group = _el(file_sec, _M + 'fileGrp', attrib={'ID': f"uuid-{hoso.main_repr_group_uuid.upper()}",
+                                                      'USE': 'Representations/rep1'})
+        repr_file_id = hoso.main_repr_file_uuid.upper()
+        mets_file = _el(group, _M + 'file', attrib={
+            'ID': f"ID-{repr_file_id}", 'MIMETYPE': 'application/xml', 'CREATED': created,
+            'CHECKSUMTYPE': 'SHA-256', 'CHECKSUM': 'PLACEHOLDER_REP_CHECKSUM',
+        })
+        _el(mets_file, _M + 'FLocat', attrib={'LOCTYPE': 'URL', _XLINK_HREF: 'representations/rep1/METS.xml',
+                                              _XLINK_TYPE: 'simple'})
+
+        schemas_group_id = f"uuid-{hoso.main_schemas_group_uuid.upper()}"
+        group = _el(file_sec, _M + 'fileGrp', attrib={'ID': schemas_group_id, 'USE': 'Schemas'})
+        for uuid, placeholder, href in ((hoso.main_mets_xsd_uuid, 'PLACEHOLDER_SCHEMA_METS_CHECKSUM', 'schemas/mets.xsd'),
+                                        (hoso.main_ead_xsd_uuid, 'PLACEHOLDER_SCHEMA_EAD_CHECKSUM', 'schemas/ead.xsd'),
+                                        (hoso.main_premis_xsd_uuid, 'PLACEHOLDER_SCHEMA_PREMIS_CHECKSUM', 'schemas/premis.xsd')):
+            schema_file = _el(group, _M + 'file', attrib={
+                'ID': f"ID-{uuid.upper()}", 'MIMETYPE': 'application/octet-stream', 'CREATED': created,
+                'CHECKSUMTYPE': 'SHA-256', 'CHECKSUM': placeholder,
+            })
+            _el(schema_file, _M + 'FLocat', attrib={'LOCTYPE': 'URL', _XLINK_HREF: href, _XLINK_TYPE: 'simple'})
+
+        struct_map = _el(root, _M + 'structMap', attrib={'ID': f"uuid-{hoso.main_structmap_uuid.upper()}",
+                                                         'LABEL': 'CSIP', 'TYPE': 'PHYSICAL'})
+        main_div = _el(struct_map, _M + 'div', attrib={'ID': f"uuid-{hoso.main_div_uuid.upper()}", 'LABEL': dmd_id})
+        _el(main_div, _M + 'div', attrib={'ID': f"uuid-{hoso.main_metadata_div_uuid.upper()}", 'LABEL': 'Metadata',
+                                          'DMDID': dmd_id, 'ADMID': amd_id})
+        div = _el(main_div, _M + 'div', attrib={'ID': f"uuid-{hoso.main_schemas_div_uuid.upper()}", 'LABEL': 'Schemas'})
+        _el(div, _M + 'fptr', attrib={'FILEID': schemas_group_id})
+        div = _el(main_div, _M + 'div', attrib={'ID': f"uuid-{hoso.main_repr_div_uuid.upper()}",
+                                                'LABEL': 'Representations/rep1'})
+        _el(div, _M + 'mptr', attrib={'LOCTYPE': 'URL', _XLINK_HREF: 'representations/rep1/METS.xml',
+                                      _XLINK_TYPE: 'simple', _XLINK_TITLE: f"uuid-{repr_file_id}"})
+        self._timed('mets', start)
+        return root
+
+    def build_rep_mets(self, hoso: HoSo, package_id: str) -> etree._Element:
+        """Cay METS cap representation (rep_mets.xml)"""
+        start = time.perf_counter()
+        created = datetime.now().strftime(METS_TIME_FORMAT)
+        root = etree.Element(_M + 'mets', {
+            _XSI_SCHEMA_LOCATION: 'http://www.loc.gov/METS/ http://www.loc.gov/standards/mets/mets.xsd',
+            'OBJID': f"uuid-{hoso.rep_uuid.upper()}",
+            'LABEL': _esc(hoso.effective_title),
+            'TYPE': 'Mixed',
+            f'{{{CSIP_NS}}}CONTENTINFORMATIONTYPE': 'MIXED',
+            'PROFILE': 'https://earkcsip.dilcis.eu/profile/E-ARK-CSIP.xml',
+        }, nsmap=METS_NSMAP)
+        self._mets_header(root, created, rep=True)
+
+        dmd = _el(root, _M + 'dmdSec', attrib={'ID': f"uuid-{hoso.dmd_uuid.upper()}", 'CREATED': created,
+                                               'STATUS': 'CURRENT'})
+        _el(dmd, _M + 'mdRef', attrib={
+            'ID': f"uuid-{hoso.dmd_ref_uuid.upper()}",
+            'LOCTYPE': 'URL', 'MDTYPE': 'OTHER', 'OTHERMDTYPE': 'EAD', 'MDTYPEVERSION': '1.0',
+            'MIMETYPE': 'text/xml', 'SIZE': 'PLACEHOLDER_EAD_SIZE', 'CHECKSUM': 'PLACEHOLDER_EAD_CHECKSUM',
+            'CHECKSUMTYPE': 'SHA-256', 'CREATED': created,
+            _XLINK_TYPE: 'simple', _XLINK_HREF: '../metadata/descriptive/ead.xml',
+        })
+        for index, tai_lieu in enumerate(hoso.tai_lieu, 1):
+            root.append(_REP_METS['dmd'].fill({
+                'dmd_id': f"uuid-{tai_lieu.dmd_uuid.upper()}",
+                'dmd_ref_id': f"uuid-{tai_lieu.dmd_ref_uuid.upper()}",
+                'created': created,
+                'size': f"PLACEHOLDER_EAD_DOC_File{index}_SIZE",
+                'checksum': f"PLACEHOLDER_EAD_DOC_File{index}_CHECKSUM",
+                'href': f"metadata/descriptive/EAD_doc_File{index}.xml",
+            }))
+
+        digiprov_id = f"uuid-{hoso.digiprov_uuid.upper()}"
+        premis_ref_id = f"uuid-{hoso.premis_ref_uuid.upper()}"
+        amd = _el(root, _M + 'amdSec', attrib={'ID': f"uuid-{hoso.amd_uuid.upper()}"})
+        digiprov = _el(amd, _M + 'digiprovMD', attrib={'ID': digiprov_id, 'STATUS': 'CURRENT'})
+        _el(digiprov, _M + 'mdRef', attrib={
+            'ID': premis_ref_id,
+            'LOCTYPE': 'URL', 'MDTYPE': 'PREMIS', 'MIMETYPE': 'text/xml',
+            'SIZE': 'PLACEHOLDER_PREMIS_REP_SIZE', 'CHECKSUM': 'PLACEHOLDER_PREMIS_REP_CHECKSUM',
+            'CHECKSUMTYPE': 'SHA-256', 'CREATED': created,
+            _XLINK_TYPE: 'simple', _XLINK_HREF: 'metadata/preservation/PREMIS_rep1.xml',
+        })
+
+        filegroup_id = f"uuid-{hoso.filegroup_uuid.upper()}"
+        file_sec = _el(root, _M + 'fileSec', attrib={'ID': f"uuid-{hoso.filesec_uuid.upper()}"})
+        group = _el(file_sec, _M + 'fileGrp', attrib={'ID': filegroup_id, 'USE': 'Data'})
+        for tai_lieu in hoso.tai_lieu:
+            group.append(_REP_METS['file'].fill({
+                'file_id': f"ID-{tai_lieu.file_uuid.upper()}",
+                'size': _str(tai_lieu.kich_thuoc_file),
+                'checksum': _str(tai_lieu.checksum),
+                'created': created,
+                'href': f"data/{_str(tai_lieu.filename)}",
+            }))
+
+        struct_map = _el(root, _M + 'structMap', attrib={'ID': f"uuid-{hoso.structmap_uuid.upper()}",
+                                                         'TYPE': 'PHYSICAL', 'LABEL': 'CSIP'})
+        main_div = _el(struct_map, _M + 'div', attrib={'ID': f"uuid-{hoso.main_div_uuid.upper()}",
+                                                       'LABEL': hoso.rep_uuid.upper()})
+        div = _el(main_div, _M + 'div', attrib={'ID': f"uuid-{hoso.metadata_div_uuid.upper()}", 'LABEL': 'Metadata'})
+        _el(div, _M + 'fptr', attrib={'FILEID': premis_ref_id})
+        div = _el(main_div, _M + 'div', attrib={'ID': f"uuid-{hoso.data_div_uuid.upper()}", 'LABEL': 'Data'})
+        _el(div, _M + 'fptr', attrib={'FILEID': filegroup_id})
+        link_div = _el(main_div, _M + 'div', attrib={'ID': f"uuid-{hoso.metalink_div_uuid.upper()}",
+                                                     'LABEL': 'MetadataLink'})
+        for tai_lieu in hoso.tai_lieu:
+            link_div.append(_REP_METS['link'].fill({
+                'link_id': f"uuid-{tai_lieu.metalink_uuid.upper()}",
+                'dmd_id': f"uuid-{tai_lieu.dmd_uuid.upper()}",
+                'digiprov_id': digiprov_id,
+                'file_id': f"ID-{tai_lieu.file_uuid.upper()}",
+            }))
+        self._timed('rep_mets', start)
+        return root
+
+    # -------------------------------------------------------------- SimpleDC
+
+    def build_ead(self, hoso: HoSo, package_id: str) -> etree._Element:
+        """Cay SimpleDC cap ho so (simpledc_hoso_template.xml)"""
+        start = time.perf_counter()
+        root = etree.Element('simpledc')
+        _el(root, 'arcFileCode', _esc(hoso.arc_file_code))
+        _el(root, 'title', _esc(hoso.effective_title))
+        _el(root, 'maintenance', _str(hoso.thoi_han_bao_quan_code or '01'))
+        _el(root, 'mode', _str(hoso.che_do_su_dung_code or '02'))
+        _el(root, 'language', _str(hoso.ngon_ngu_code or '01'))
+        _el(root, 'startDate', _str(hoso.start_date_formatted))
+        _el(root, 'endDate', _str(hoso.end_date_formatted))
+        _el(root, 'keyword', _esc(hoso.tu_khoa))
+        _el(root, 'totalDoc', _str((hoso.tong_so_van_ban or len(hoso.tai_lieu)) if hoso.tai_lieu else 0))
+        _el(root, 'numberOfPaper', _str(hoso.so_luong_to or 0))
+        _el(root, 'numberOfPage', _str(hoso.effective_total_pages or 0))
+        _el(root, 'format', _str(hoso.tinh_trang_vat_ly_code or '02'))
+        _el(root, 'inforSign', _esc(hoso.ky_hieu_thong_tin))
+        _el(root, 'confidenceLevel', _str(hoso.muc_do_tin_cay_code or '02'))
+        _el(root, 'paperFileCode', _esc(hoso.effective_paper_file_code))
+        _el(root, 'riskRecovery', _str(hoso.che_do_du_phong or '0'))
+        _el(root, 'riskRecoveryStatus',
+            _str(hoso.tinh_trang_du_phong or '02') if hoso.che_do_du_phong == '1' else '')
+        _el(root, 'description', _esc(hoso.ghi_chu))
+        self._timed('ead', start)
+        return root
+
+    def build_ead_document(self, tai_lieu: TaiLieu, hoso: HoSo, package_id: str) -> etree._Element:
+        """Cay SimpleDC cho 1 tai lieu (simpledc_tailieu_template.xml)"""
+        start = time.perf_counter()
+        root = _EAD_DOC.fill({
+            'docId': _esc(tai_lieu.file_id),
+            'arcDocCode': _esc(tai_lieu.arc_doc_code),
+            'maintenance': _str(hoso.thoi_han_bao_quan_code or tai_lieu.thoi_han_bao_quan_code or '01'),
+            'typeName': _str(tai_lieu.loai_tai_lieu_code or '32'),
+            'codeNumber': _esc(tai_lieu.so_van_ban),
+            'codeNotation': _esc(tai_lieu.ky_hieu_van_ban),
+            'issuedDate': _str(tai_lieu.ngay_van_ban_formatted),
+            'organName': _esc(tai_lieu.co_quan_ban_hanh),
+            'subject': _esc(tai_lieu.trich_yeu),
+            'language': _str(tai_lieu.ngon_ngu_code or '01'),
+            'numberOfPage': _str(tai_lieu.so_trang_tai_lieu or tai_lieu.so_trang or 0),
+            'inforSign': _esc(tai_lieu.ky_hieu_thong_tin),
+            'keyword': _esc(tai_lieu.tu_khoa),
+            'mode': _str(tai_lieu.che_do_su_dung_code or '02'),
+            'confidenceLevel': _str(tai_lieu.muc_do_tin_cay_code or '02'),
+            'autograph': _esc(tai_lieu.but_tich),
+            'format': _str(tai_lieu.tinh_trang_vat_ly_code or '02'),
+            'process': _str(tai_lieu.quy_trinh_xu_ly_code or '0'),
+            'riskRecovery': _str(tai_lieu.che_do_du_phong or '0'),
+            'riskRecoveryStatus': (_str(tai_lieu.tinh_trang_du_phong or '02')
+                                   if tai_lieu.che_do_du_phong == '1' else ''),
+            'description': _esc(tai_lieu.ghi_chu_tai_lieu or tai_lieu.ghi_chu),
+        })
+        self._timed('ead_doc', start)
+        return root
+
+    # ---------------------------------------------------------------- PREMIS
+
+    @staticmethod
+    def _premis_root() -> etree._Element:
+        return etree.Element(_P + 'premis', {
+            _XSI_SCHEMA_LOCATION: 'http://www.loc.gov/premis/v3 http://www.loc.gov/standards/premis/premis.xsd',
+            'version': '3.0',
+        }, nsmap=PREMIS_NSMAP)
+
+    @staticmethod
+    def _preservation_level(parent: etree._Element, level_type: str, assigned: str) -> None:
+        level = _el(parent, _P + 'preservationLevel')
+        _el(level, _P + 'preservationLevelType', level_type)
+        _el(level, _P + 'preservationLevelValue', 'High')
+        _el(level, _P + 'preservationLevelRole', 'intention')
+        _el(level, _P + 'preservationLevelRationale', 'institutional policy')
+        _el(level, _P + 'preservationLevelDateAssigned', assigned)
+
+    @staticmethod
+    def _fixities(tai_lieu: TaiLieu, missing: str) -> List[tuple]:
+        """(thuat toan, digest) cho cac premis:fixity cua 1 file"""
+        if tai_lieu.checksums:
+            return [(_str(algorithm), _str(digest)) for algorithm, digest in tai_lieu.checksums.items()]
+        return [('SHA-256', _str(tai_lieu.checksum or missing))]
+
+    @staticmethod
+    def _extra_fixities(characteristics: etree._Element, fixities: List[tuple]) -> None:
+        """Them premis:fixity thu 2 tro di (khuon chi co 1, ngay sau compositionLevel)"""
+        fixity = characteristics[1]
+        for position, (algorithm, digest) in enumerate(fixities[1:], 2):
+            extra = copy.deepcopy(fixity)
+            extra[0].text = algorithm
+            extra[1].text = digest
+            characteristics.insert(position, extra)
+
+    def build_premis(self, hoso: HoSo, package_id: str) -> etree._Element:
+        """Cay PREMIS cap goi (premis_template.xml)"""
+        start = time.perf_counter()
+        config = self.config
+        created_time = datetime.now()
+        assigned = format_date(created_time, '%Y-%m-%d')
+        event_time = format_date(created_time, '%Y-%m-%dT%H:%M:%S')
+        package_id = _str(package_id)
+        rep_id = f"{package_id}_rep1"
+        # Context premis cua engine Jinja2 khong co agent_name/agent_version (template in rong,
+        # safe_filename -> 'unknown'); giu nguyen de 2 engine cho noi dung tuong duong
+        agent_name = ''
+        agent_version = ''
+        software_agent_id = f"{safe_filename(agent_name)}_{agent_version}"
+        org_agent_id = safe_filename(config.organization_name) if config.organization_name else 'UNKNOWN_ORG'
+        creation_event_id = f"event-creation-{_str(hoso.id)}"
+        title = _esc(hoso.effective_title)
+
+        root = self._premis_root()
+
+        # Intellectual Entity Object
+        entity = _el(root, _P + 'object', attrib={_XSI_TYPE: 'premis:intellectualEntity'})
+        _premis_identifier(entity, 'objectIdentifier', 'LOCAL', package_id)
+        _el(entity, _P + 'objectCategory', 'intellectual entity')
+        self._preservation_level(entity, 'full preservation', assigned)
+        characteristics = _el(entity, _P + 'objectCharacteristics')
+        extension = _el(characteristics, _P + 'objectCharacteristicsExtension')
+        _el(extension, 'title', title)
+        _el(extension, 'type', 'AIP - Archival Information Package')
+        if hoso.arc_file_code:
+            _el(extension, 'identifier', _esc(hoso.arc_file_code))
+        significant = _el(entity, _P + 'significantProperties')
+        _el(significant, _P + 'significantPropertiesType', 'Archival Record')
+        _el(significant, _P + 'significantPropertiesValue', title)
+        if hoso.chu_giai:
+            significant_ext = _el(significant, _P + 'significantPropertiesExtension')
+            _el(significant_ext, 'description', _esc(hoso.chu_giai))
+        if hoso.phong or hoso.muc_luc:
+            _premis_relationship(entity, 'is part of', 'FONDS', _esc(hoso.phong if hoso.phong else hoso.muc_luc))
+        _premis_identifier(entity, 'linkingEventIdentifier', 'UUID', creation_event_id)
+
+        # Representation Object
+        representation = _el(root, _P + 'object', attrib={_XSI_TYPE: 'premis:representation'})
+        _premis_identifier(representation, 'objectIdentifier', 'LOCAL', rep_id)
+        _el(representation, _P + 'objectCategory', 'representation')
+        self._preservation_level(representation, 'logical preservation', assigned)
+        characteristics = _el(representation, _P + 'objectCharacteristics')
+        extension = _el(characteristics, _P + 'objectCharacteristicsExtension')
+        _el(extension, 'representationType', 'Original')
+        _el(extension, 'digitalFormatName', 'PDF')
+        _premis_identifier(representation, 'linkingEventIdentifier', 'UUID', creation_event_id)
+        _premis_relationship(representation, 'represents', 'LOCAL', package_id)
+
+        # File Objects (loop.index cua template dem ca tai lieu khong co duongDanFile)
+        files = [(f"{package_id}_file_{index}", tailieu)
+                 for index, tailieu in enumerate(hoso.tai_lieu, 1) if tailieu.duongDanFile]
+        for file_object_id, tailieu in files:
+            original_name = _esc(basename(tailieu.duongDanFile))
+            fixities = self._fixities(tailieu, '[TO_BE_CALCULATED]')
+            file_object = _PREMIS_FILE.fill({
+                'object_id': file_object_id,
+                'assigned': assigned,
+                'algorithm': fixities[0][0],
+                'digest': fixities[0][1],
+                'originator': agent_name,
+                'size': _str(tailieu.file_size) if tailieu.file_size else None,
+                'original_name': original_name,
+                'title': _esc(tailieu.trich_yeu) if tailieu.trich_yeu else None,
+                'pages': _str(tailieu.so_trang) if tailieu.so_trang else None,
+                'creator': _esc(tailieu.co_quan_ban_hanh) if tailieu.co_quan_ban_hanh else None,
+                'event_id': f"event-digitization-{file_object_id}",
+                'location': f"representations/rep1/data/{_str(tailieu.filename or basename(tailieu.duongDanFile))}",
+                'rep_id': rep_id,
+                'condition': _esc(tailieu.tinh_trang_vat_ly),
+            })
+            if len(fixities) > 1:
+                self._extra_fixities(file_object[3], fixities)
+            if not tailieu.tinh_trang_vat_ly:
+                file_object.remove(file_object[-1])
+            root.append(file_object)
+
+        # Event: AIP Creation
+        event = _el(root, _P + 'event')
+        _premis_identifier(event, 'eventIdentifier', 'UUID', creation_event_id)
+        _el(event, _P + 'eventType', 'creation')
+        _el(event, _P + 'eventDateTime', event_time)
+        detail = _el(event, _P + 'eventDetailInformation')
+        # ma_muc_luc khong co trong HoSo -> template in rong
+        _el(detail, _P + 'eventDetail',
+            f"AIP package creation for archival record {_str(getattr(hoso, 'ma_muc_luc', None) or '')}")
+        _premis_event_outcome(event, f"AIP successfully created with {len(hoso.tai_lieu)} files")
+        linking = _el(event, _P + 'linkingAgentIdentifier')
+        _el(linking, _P + 'linkingAgentIdentifierType', 'LOCAL')
+        _el(linking, _P + 'linkingAgentIdentifierValue', software_agent_id)
+        _el(linking, _P + 'linkingAgentRole', 'executor')
+        linking = _el(event, _P + 'linkingObjectIdentifier')
+        _el(linking, _P + 'linkingObjectIdentifierType', 'LOCAL')
+        _el(linking, _P + 'linkingObjectIdentifierValue', package_id)
+        _el(linking, _P + 'linkingObjectRole', 'outcome')
+
+        # Event: File Digitization
+        for file_object_id, tailieu in files:
+            root.append(_PREMIS_DIGITIZATION.fill({
+                'event_id': f"event-digitization-{file_object_id}",
+                'event_time': event_time,
+                'detail': f"Digital conversion of physical document {_str(basename(tailieu.duongDanFile))}",
+                'agent_id': org_agent_id,
+                'object_id': file_object_id,
+            }))
+
+        # Agent - AIP Builder Software
+        agent = _el(root, _P + 'agent')
+        _premis_identifier(agent, 'agentIdentifier', 'LOCAL', software_agent_id)
+        _el(agent, _P + 'agentName', f"{agent_name} {agent_version}")
+        _el(agent, _P + 'agentType', 'software')
+        _el(agent, _P + 'agentNote', 'Automated AIP creation and PREMIS metadata generation tool')
+        extension = _el(agent, _P + 'agentExtension')
+        _el(extension, 'softwareVersion', agent_version)
+        _el(extension, 'operatingSystem', 'Windows/Linux/macOS')
+        _el(extension, 'functionType', 'preservation packaging')
+
+        # Agent - Repository Organization
+        agent = _el(root, _P + 'agent')
+        _premis_identifier(agent, 'agentIdentifier', 'LOCAL', org_agent_id)
+        _el(agent, _P + 'agentName', _str(config.organization_name or 'Unknown Organization'))
+        _el(agent, _P + 'agentType', 'organization')
+        _el(agent, _P + 'agentNote',
+            'Digital preservation repository responsible for long-term access and preservation')
+        extension = _el(agent, _P + 'agentExtension')
+        if config.organization_email:
+            _el(extension, 'contactEmail', _str(config.organization_email))
+        _el(extension, 'preservationRole', 'repository')
+        self._timed('premis', start)
+        return root
+
+    def build_premis_rep(self, hoso: HoSo, package_id: str) -> etree._Element:
+        """Cay PREMIS cap representation (premis_rep_template.xml)"""
+        start = time.perf_counter()
+        config = self.config
+        created_time = datetime.now()
+        package_id = _str(package_id)
+        rep_id = f"{package_id}_rep1"
+        originator = _str(config.organization_name)
+
+        root = self._premis_root()
+        representation = _el(root, _P + 'object', attrib={_XSI_TYPE: 'premis:representation'})
+        _premis_identifier(representation, 'objectIdentifier', 'LOCAL', rep_id)
+        characteristics = _el(representation, _P + 'objectCharacteristics')
+        extension = _el(characteristics, _P + 'objectCharacteristicsExtension')
+        _el(extension, 'representationType', 'Original')
+        _el(extension, 'digitalFormatName', 'PDF')
+        _el(extension, 'purpose', 'Original digital representation of archival records')
+        _premis_relationship(representation, 'represents', 'LOCAL', package_id)
+
+        for tai_lieu in hoso.tai_lieu:
+            filename = _str(tai_lieu.filename or basename(tai_lieu.duongDanFile))
+            fixities = self._fixities(tai_lieu, '0' * 64)
+            file_object = _PREMIS_REP_FILE.fill({
+                'object_id': f"{package_id}_{_str(tai_lieu.file_id)}",
+                'algorithm': fixities[0][0],
+                'digest': fixities[0][1],
+                'originator': originator,
+                'size': _str(tai_lieu.file_size or 0),
+                'filename': filename,
+                'title': _esc(tai_lieu.effective_title),
+                'pages': _str(tai_lieu.so_trang) if tai_lieu.so_trang else None,
+                'creator': _esc(tai_lieu.co_quan_ban_hanh) if tai_lieu.co_quan_ban_hanh else None,
+                'location': f"data/{filename}",
+                'rep_id': rep_id,
+            })
+            if len(fixities) > 1:
+                self._extra_fixities(file_object[1], fixities)
+            root.append(file_object)
+
+        agent = _el(root, _P + 'agent')
+        _premis_identifier(agent, 'agentIdentifier', 'LOCAL', 'aip_builder_system_rep')
+        _el(agent, _P + 'agentName', 'AIP Builder System - Representation Processor')
+        _el(agent, _P + 'agentType', 'software')
+        extension = _el(agent, _P + 'agentExtension')
+        _el(extension, 'softwareVersion', '2.0')
+        _el(extension, 'operatingSystem', 'Windows/Linux/macOS')
+        _el(extension, 'function', 'Representation-level metadata processing')
+
+        event = _el(root, _P + 'event')
+        _premis_identifier(event, 'eventIdentifier', 'LOCAL',
+                           f"{rep_id}_validation_{created_time.strftime('%Y%m%d_%H%M%S')}")
+        _el(event, _P + 'eventType', 'validation')
+        _el(event, _P + 'eventDateTime', f"{created_time.isoformat()}+07:00")
+        detail = _el(event, _P + 'eventDetailInformation')
+        _el(detail, _P + 'eventDetail', 'Representation-level validation of PDF files and metadata')
+        _premis_event_outcome(event, f"{len(hoso.tai_lieu)} files in representation validated successfully")
+        linking = _el(event, _P + 'linkingAgentIdentifier')
+        _el(linking, _P + 'linkingAgentIdentifierType', 'LOCAL')
+        _el(linking, _P + 'linkingAgentIdentifierValue', 'aip_builder_system_rep')
+        _el(linking, _P + 'linkingAgentRole', 'validator')
+        linking = _el(event, _P + 'linkingObjectIdentifier')
+        _el(linking, _P + 'linkingObjectIdentifierType', 'LOCAL')
+        _el(linking, _P + 'linkingObjectIdentifierValue', rep_id)
+        _el(linking, _P + 'linkingObjectRole', 'outcome')
+        self._timed('premis_rep', start)
+        return root
+
+    # ------------------------------------------------------------ Tien ich
+
+    def serialize(self, kind: str, root: etree._Element) -> bytes:
+        """Serialize cay (thoi gian tinh vao thong ke cua kind)"""
+        start = time.perf_counter()
+        data = serialize(root)
+        self._timed(kind, start)
+        return data
+
+    def validate_tree(self, kind: str, root: etree._Element) -> List[str]:
+        """
+        Kiem tra cay voi XSD cua loai XML, khong parse lai
+
+        Returns:
+            Danh sach loi (rong neu hop le hoac XSD khong bien dich duoc)
+        """
+        return self.schema_assets.validate(XSD_FOR_KIND[kind], root)
+
+    def build_all_trees(self, hoso: HoSo, package_id: str) -> Dict[str, Any]:
+        """
+        Dung tat ca cay XML cho 1 ho so (cung key voi XMLTemplateGenerator.generate_all_xml)
+
+        'ead_docs' la dict {ten file: cay}.
+        """
+        trees = {
+            'mets': self.build_mets(hoso, package_id),
+            'rep_mets': self.build_rep_mets(hoso, package_id),
+            'ead': self.build_ead(hoso, package_id),
+            'premis': self.build_premis(hoso, package_id),
+            'premis_rep': self.build_premis_rep(hoso, package_id),
+            'ead_docs': self.build_ead_documents(hoso, package_id),
+        }
+        return trees
+
+    def build_ead_documents(self, hoso: HoSo, package_id: str) -> Dict[str, etree._Element]:
+        """Cay EAD_doc {ten file: cay} cua cac tai lieu co ead_doc_filename, dung song song o work pool"""
+        tai_lieus = [t for t in hoso.tai_lieu if getattr(t, 'ead_doc_filename', None)]
+        built = self.work_pool.map(lambda t: self.build_ead_document(t, hoso, package_id),
+                                   tai_lieus, batch_size=EAD_DOC_BATCH_SIZE)
+        return {t.ead_doc_filename: root for t, root in zip(tai_lieus, built)}
+
+    # Giao dien chuoi nhu XMLTemplateGenerator (test_xml, so sanh engine)
+
+    def generate_mets(self, hoso: HoSo, package_id: str) -> str:
+        return serialize(self.build_mets(hoso, package_id)).decode('utf-8')
+
+    def generate_rep_mets(self, hoso: HoSo, package_id: str) -> str:
+        return serialize(self.build_rep_mets(hoso, package_id)).decode('utf-8')
+
+    def generate_ead(self, hoso: HoSo, package_id: str) -> str:
+        return serialize(self.build_ead(hoso, package_id)).decode('utf-8')
+
+    def generate_ead_document(self, tai_lieu: TaiLieu, hoso: HoSo, package_id: str) -> str:
+        return serialize(self.build_ead_document(tai_lieu, hoso, package_id)).decode('utf-8')
+
+    def generate_premis(self, hoso: HoSo, package_id: str) -> str:
+        return serialize(self.build_premis(hoso, package_id)).decode('utf-8')
+
+    def generate_premis_rep(self, hoso: HoSo, package_id: str) -> str:
+        return serialize(self.build_premis_rep(hoso, package_id)).decode('utf-8')
+
+    def generate_all_xml(self, hoso: HoSo, package_id: str) -> Dict[str, Any]:
+        """Tat ca XML dang chuoi (cung key voi XMLTemplateGenerator.generate_all_xml)"""
+        logger.info(f"Sinh tat ca XML (lxml) cho ho so: {hoso.arc_file_code}")
+        results = {kind: serialize(getattr(self, f'build_{kind}')(hoso, package_id)).decode('utf-8')
+                   for kind in ('mets', 'rep_mets', 'ead', 'premis', 'premis_rep')}
+        results['ead_docs'] = self.generate_ead_documents(hoso, package_id)
+        return results
+
+    def generate_ead_documents(self, hoso: HoSo, package_id: str) -> Dict[str, str]:
+        """EAD_doc dang chuoi {ten file: XML}, dung + serialize song song (nhu XMLTemplateGenerator)"""
+        tai_lieus = [t for t in hoso.tai_lieu if getattr(t, 'ead_doc_filename', None)]
+        rendered = self.work_pool.map(lambda t: self.generate_ead_document(t, hoso, package_id),
+                                      tai_lieus, batch_size=EAD_DOC_BATCH_SIZE)
+        return {t.ead_doc_filename: xml for t, xml in zip(tai_lieus, rendered)}
+
+
+def benchmark_engines(hoso_list: Sequence[HoSo], config: Config, rounds: int = 3) -> Dict[str, Any]:
+    """
+    So sanh engine jinja va lxml: sinh tat ca XML (generate_all_xml) cho hoso_list
+
+    Moi engine chay rounds lan, lay lan nhanh nhat. Noi dung 2 engine duoc so sanh
+    theo canonical_xml (lan chay cuoi). Thoi gian theo template (stats() cua engine) la
+    trung binh 1 lan chay; context_ms_per_document la thoi gian bien dich ban ghi
+    render context (compile_hoso, da gom trong thoi gian engine jinja).
+
+    Returns:
+        {'documents', 'context_ms_per_document',
+         'engines': {engine: {seconds, ms_per_hoso, ms_per_document, mb, templates: {ten: ms/tai lieu}}},
+         'speedup', 'mismatches': [ten file khac nhau]}
+    """
+    from .xml_generator import XML_ENGINE_JINJA, XML_ENGINE_LXML, create_xml_generator
+
+    documents = sum(len(hoso.tai_lieu) for hoso in hoso_list)
+    rounds = max(1, rounds)
+    context_best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for hoso in hoso_list:
+            compile_hoso(hoso, config)
+        elapsed = time.perf_counter() - start
+        context_best = elapsed if context_best is None else min(context_best, elapsed)
+
+    engines: Dict[str, Dict[str, Any]] = {}
+    outputs: Dict[str, List[Dict[str, Any]]] = {}
+    for engine in (XML_ENGINE_JINJA, XML_ENGINE_LXML):
+        generator = create_xml_generator(replace(config, xml_engine=engine))
+        before = generator.stats()
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            results = [generator.generate_all_xml(hoso, f"AIP_{hoso.arc_file_code}") for hoso in hoso_list]
+            size = sum(len(xml.encode('utf-8')) for result in results for xml in _iter_xml(result))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        outputs[engine] = results
+        engines[engine] = {
+            'seconds': round(best, 4),
+            'ms_per_hoso': round(best * 1000 / max(1, len(hoso_list)), 3),
+            'ms_per_document': round(best * 1000 / max(1, documents), 3),
+            'mb': round(size / (1024 * 1024), 3),
+            'templates': {
+                name: round((stats['render_ms'] - before.get(name, {}).get('render_ms', 0.0))
+                            / rounds / max(1, documents), 4)
+                for name, stats in generator.stats().items() if stats['renders']
+            },
+        }
+
+    mismatches = []
+    for jinja_result, lxml_result in zip(outputs[XML_ENGINE_JINJA], outputs[XML_ENGINE_LXML]):
+        for name, (jinja_xml, lxml_xml) in _pair_xml(jinja_result, lxml_result):
+            try:
+                if canonical_xml(jinja_xml) == canonical_xml(lxml_xml):
+                    continue
+            except etree.XMLSyntaxError:
+                pass
+            mismatches.append(name)
+
+    lxml_seconds = engines[XML_ENGINE_LXML]['seconds']
+    return {
+        'hoso': len(hoso_list),
+        'documents': documents,
+        'context_ms_per_document': round(context_best * 1000 / max(1, documents), 4),
+        'engines': engines,
+        'speedup': round(engines[XML_ENGINE_JINJA]['seconds'] / lxml_seconds, 2) if lxml_seconds else None,
+        'mismatches': mismatches,
+    }
+
+
+def _iter_xml(result: Dict[str, Any]):
+    """Cac chuoi XML trong ket qua generate_all_xml"""
+    for kind, content in result.items():
+        if kind == 'ead_docs':
+            yield from content.values()
+        else:
+            yield content
+
+
+def _pair_xml(first: Dict[str, Any], second: Dict[str, Any]):
+    """Ghep cap XML cung ten trong 2 ket qua generate_all_xml: (ten, (xml 1, xml 2))"""
+    for kind, content in first.items():
+        if kind == 'ead_docs':
+            for filename, xml in content.items():
+                yield filename, (xml, second['ead_docs'].get(filename, ''))
+        else:
+            yield kind, (content, second.get(kind, ''))
@@ -3,216 +3,190 @@ XML Template Generator cho AIP Builder
 Sinh ra cac XML template theo chuan CSIP
 """
 import logging
-import hashlib
-import os
-from pathlib import Path
-from typing import Dict, List, Any, Optional
+import re
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Union
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, Template
 
 from .models import HoSo, TaiLieu
 from .config import Config
+from .render_context import HoSoRecord, TaiLieuRecord, compile_hoso, compile_tai_lieu
+from .template_cache import get_template_cache
+from .utils.work_pool import get_work_pool
 
 logger = logging.getLogger(__name__)
 
+# Placeholder trong template METS (kich thuoc/checksum chi biet sau khi sinh cac file khac)
+PLACEHOLDER_PATTERN = re.compile(r'PLACEHOLDER_[A-Za-z0-9_]+')
+
+# Template cua tung loai XML trong goi
+XML_TEMPLATE_NAMES = {
+    'mets': 'mets_template.xml',
+    'rep_mets': 'rep_mets.xml',
+    'ead': 'simpledc_hoso_template.xml',
+    'premis': 'premis_template.xml',
+    'premis_rep': 'premis_rep_template.xml',
+    'ead_doc': 'simpledc_tailieu_template.xml',
+}
+
+# Engine sinh metadata XML (Config.xml_engine)
+XML_ENGINE_JINJA = "jinja"
+XML_ENGINE_LXML = "lxml"
+XML_ENGINES = (XML_ENGINE_JINJA, XML_ENGINE_LXML)
+
+# So EAD_doc moi lan chuyen sang work pool (render song song trong 1 ho so)
+EAD_DOC_BATCH_SIZE = 16
+
+
+def resolve_placeholders(content: str, values: Dict[str, str]) -> str:
+    """
+    Thay tat ca placeholder trong 1 lan duyet chuoi
+    
+    Placeholder khong co trong values duoc giu nguyen.
+    """
+    return PLACEHOLDER_PATTERN.sub(lambda m: values.get(m.group(0), m.group(0)), content)
+
+
+def iter_resolved_placeholders(chunks: Iterable[str], values: Dict[str, str]) -> Iterator[str]:
+    """
+    Thay placeholder tren luong chuoi (render stream)
+    
+    Placeholder co the bi cat giua 2 block (vd: PLACEHOLDER_EAD_DOC_File{{ loop.index }}_SIZE):
+    phan cuoi moi doan con la ky tu cua tu duoc giu lai, ghep voi doan sau.
+    """
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        cut = len(pending)
+        while cut and (pending[cut - 1].isalnum() or pending[cut - 1] == '_'):
+            cut -= 1
+        if cut:
+            yield resolve_placeholders(pending[:cut], values)
+            pending = pending[cut:]
+    if pending:
+        yield resolve_placeholders(pending, values)
+
 
 class XMLTemplateGenerator:
     """Sinh cac XML template cho AIP package"""
     
     def __init__(self, config: Config):
         self.config = config
-        self.template_dir = Path(__file__).parent / 'templates'
-        
-        # Khoi tao Jinja2 environment
-        self.env = Environment(
-            loader=FileSystemLoader(str(self.template_dir)),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            autoescape=False
-        )
         
-        # Dang ky cac filter
-        self._register_filters()
+        # Jinja2 environment va template da bien dich dung chung cho ca process
+        self.templates = get_template_cache(config.template_cache_dir)
+        self.template_dir = self.templates.template_dir
+        self.env = self.templates.env
+        # Pool thread dung chung ca lan chay: EAD_doc cua 1 ho so render song song
+        self.work_pool = get_work_pool(config.pool_workers)
     
-    def _calculate_sha256(self, file_path: str) -> str:
-        """Tinh SHA-256 checksum cho file"""
-        try:
-            with open(file_path, 'rb') as f:
-                return hashlib.sha256(f.read()).hexdigest()
-        except Exception as e:
-            logger.warning(f"Khong the tinh SHA-256 cho {file_path}: {e}")
-            return ""
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Thoi gian bien dich/render theo template (dung chung cho process)"""
+        return self.templates.stats()
     
-    def _get_file_size(self, file_path: str) -> int:
-        """Lay kich thuoc file"""
-        try:
-            return os.path.getsize(file_path)
-        except Exception as e:
-            logger.warning(f"Khong the lay kich thuoc file {file_path}: {e}")
-            return 0
+    def compile(self, hoso: Union[HoSo, HoSoRecord]) -> HoSoRecord:
+        """Ban ghi gia tri template cua ho so (HoSoRecord giu nguyen, HoSo bien dich 1 lan)"""
+        if isinstance(hoso, HoSoRecord):
+            return hoso
+        return compile_hoso(hoso, self.config)
     
-    def _register_filters(self):
-        """Dang ky cac custom filter cho Jinja2"""
-        
-        def format_date(value, format='%Y-%m-%dT%H:%M:%S'):
-            """Format datetime object"""
-            if isinstance(value, datetime):
-                return value.strftime(format)
-            return str(value)
-        
-        def escape_xml(value):
-            """Escape XML characters"""
-            if not value:
-                return ''
-            return str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&apos;')
-        
-        def safe_filename(value):
-            """Tao filename an toan"""
-            import re
-            import unicodedata
-            if not value:
-                return 'unknown'
-            # Loại bỏ dấu tiếng Việt
-            value = unicodedata.normalize('NFD', str(value))
-            value = value.encode('ascii', 'ignore').decode('utf-8')
-            # Chuyển về chữ thường
-            value = value.lower()
-            # Thay khoảng trắng bằng _
-            value = re.sub(r'\s+', '_', value)
-            # Chỉ giữ ký tự a-z, 0-9, _, -
-            value = re.sub(r'[^a-z0-9_-]', '', value)
-            return value
-        
-        def basename(value):
-            """Lay ten file tu duong dan"""
-            from pathlib import Path
-            if not value:
-                return 'unknown.pdf'
-            return Path(str(value)).name
-        
-        def random_uuid():
-            """Tao UUID ngau nhien"""
-            from uuid import uuid4
-            return str(uuid4()).replace('-', '')
+    def _context(self, kind: str, hoso: Union[HoSo, HoSoRecord], package_id: str,
+                 tai_lieu: Optional[TaiLieuRecord] = None) -> Dict[str, Any]:
+        """Context render cho 1 loai XML (kind: key cua XML_TEMPLATE_NAMES)"""
+        if kind == 'ead_doc':
+            # EAD_doc chi doc ban ghi tai lieu (khong bien dich lai ca ho so)
+            return {
+                'package_id': package_id,
+                'hoso': hoso,
+                'tai_lieu': tai_lieu,
+                'created_time': datetime.now()
+            }
         
-        def uuid4(value=None):
-            """Tao UUID4"""
-            from uuid import uuid4 as _uuid4
-            return str(_uuid4())
+        record = self.compile(hoso)
+        if kind == 'mets':
+            return {
+                'package_id': package_id,
+                'hoso': record,
+                'agent': record.agent,
+                'created_time': datetime.now().strftime('%Y-%m-%dT%H:%M:%S+07:00'),
+                'agent_name': self.config.agent_name,
+                'agent_version': self.config.agent_version
+            }
         
-        # Dang ky filter
-        self.env.filters['format_date'] = format_date
-        self.env.filters['escape_xml'] = escape_xml
-        self.env.filters['safe_filename'] = safe_filename
-        self.env.filters['basename'] = basename
-        self.env.filters['random_uuid'] = random_uuid
-        self.env.filters['uuid4'] = uuid4
+        return {
+            'package_id': package_id,
+            'hoso': record,
+            'agent': record.agent,
+            'created_time': datetime.now()
+        }
     
-    def generate_mets(self, hoso: HoSo, package_id: str) -> str:
+    def generate_mets(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> str:
         """
         Sinh METS XML cho ho so
         """
         logger.info(f"Sinh METS cho ho so: {hoso.arc_file_code}")
-        
-        template = self.env.get_template('mets_template.xml')
-        
-        # Chuan bi du lieu
-        context = {
-            'package_id': package_id,
-            'hoso': hoso,
-            'config': self.config,
-            'created_time': datetime.now().strftime('%Y-%m-%dT%H:%M:%S+07:00'),
-            'agent_name': self.config.agent_name,
-            'agent_version': self.config.agent_version
-        }
-        
-        return template.render(context)
+        return self.templates.render(XML_TEMPLATE_NAMES['mets'], self._context('mets', hoso, package_id))
     
-    def generate_ead(self, hoso: HoSo, package_id: str) -> str:
+    def generate_ead(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> str:
         """
         Sinh SimpleeDC XML cho ho so - mo ta archive theo cau truc moi
         """
         logger.info(f"Sinh SimpleeDC cho ho so: {hoso.arc_file_code}")
-        
-        template = self.env.get_template('simpledc_hoso_template.xml')
-        
-        context = {
-            'package_id': package_id,
-            'hoso': hoso,
-            'config': self.config,
-            'created_time': datetime.now()
-        }
-        
-        return template.render(context)
+        return self.templates.render(XML_TEMPLATE_NAMES['ead'], self._context('ead', hoso, package_id))
     
-    def generate_premis(self, hoso: HoSo, package_id: str) -> str:
+    def generate_premis(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> str:
         """
         Sinh PREMIS XML cho ho so - thong tin bao quan
         """
         logger.info(f"Sinh PREMIS cho ho so: {hoso.arc_file_code}")
-        
-        template = self.env.get_template('premis_template.xml')
-        
-        context = {
-            'package_id': package_id,
-            'hoso': hoso,
-            'config': self.config,
-            'created_time': datetime.now()
-        }
-        
-        return template.render(context)
+        return self.templates.render(XML_TEMPLATE_NAMES['premis'], self._context('premis', hoso, package_id))
     
-    def generate_premis_rep(self, hoso: HoSo, package_id: str) -> str:
+    def generate_premis_rep(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> str:
         """
         Sinh PREMIS_rep1.xml cho representation level - thong tin bao quan cap dai dien
         """
         logger.info(f"Sinh PREMIS_rep1 cho ho so: {hoso.arc_file_code}")
-        
-        template = self.env.get_template('premis_rep_template.xml')
-        
-        context = {
-            'package_id': package_id,
-            'hoso': hoso,
-            'config': self.config,
-            'created_time': datetime.now()
-        }
-        
-        return template.render(context)
+        return self.templates.render(XML_TEMPLATE_NAMES['premis_rep'],
+                                     self._context('premis_rep', hoso, package_id))
     
-    def generate_ead_document(self, tai_lieu: TaiLieu, hoso: HoSo, package_id: str) -> str:
+    def generate_ead_document(self, tai_lieu: Union[TaiLieu, TaiLieuRecord], hoso: Union[HoSo, HoSoRecord],
+                              package_id: str) -> str:
         """
         Sinh file EAD SimpleeDC cho 1 tai lieu cu the theo thiet ke moi
         
         Args:
-            tai_lieu: Doi tuong TaiLieu can sinh EAD
+            tai_lieu: TaiLieuRecord (tu HoSoRecord.tai_lieu) hoac TaiLieu (khi hoso la HoSo)
             hoso: Ho so chua tai lieu
             package_id: ID cua package
             
         Returns:
             Noi dung XML SimpleeDC cho tai lieu
         """
-        logger.debug(f"Sinh SimpleeDC EAD cho tai lieu: {tai_lieu.effective_title}")
+        if not isinstance(tai_lieu, TaiLieuRecord):
+            tai_lieu = compile_tai_lieu(tai_lieu, hoso.thoi_han_bao_quan_code)
+        logger.debug(f"Sinh SimpleeDC EAD cho tai lieu: {tai_lieu.title}")
         
         try:
-            template = self.env.get_template('simpledc_tailieu_template.xml')
-            
-            context = {
-                'tai_lieu': tai_lieu,
-                'hoso': hoso, 
-                'package_id': package_id,
-                'created_time': datetime.now(),
-                'config': self.config,
-                # Pass parent HoSo's properties for TaiLieu to use
-                'parent_thoi_han_bao_quan_code': hoso.thoi_han_bao_quan_code
-            }
-            
-            return template.render(context)
+            return self.templates.render(XML_TEMPLATE_NAMES['ead_doc'],
+                                         self._context('ead_doc', hoso, package_id, tai_lieu))
             
         except Exception as e:
-            logger.error(f"Loi sinh SimpleeDC EAD cho tai lieu {tai_lieu.effective_title}: {e}")
+            logger.error(f"Loi sinh SimpleeDC EAD cho tai lieu {tai_lieu.title}: {e}")
             raise
 
-    def generate_rep_mets(self, hoso: HoSo, package_id: str) -> str:
+    def generate_ead_documents(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> Dict[str, str]:
+        """
+        Sinh EAD_doc cho cac tai lieu co ead_doc_filename, render song song o work pool
+        
+        Returns:
+            Dict {ten file: XML} theo thu tu tai lieu
+        """
+        hoso = self.compile(hoso)
+        tai_lieus = [t for t in hoso.tai_lieu if getattr(t, 'ead_doc_filename', None)]
+        rendered = self.work_pool.map(lambda t: self.generate_ead_document(t, hoso, package_id),
+                                      tai_lieus, batch_size=EAD_DOC_BATCH_SIZE)
+        return {t.ead_doc_filename: xml for t, xml in zip(tai_lieus, rendered)}
+
+    def generate_rep_mets(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> str:
         """
         Sinh file METS cho representation level (rep1/METS.xml)
         
@@ -226,22 +200,37 @@ class XMLTemplateGenerator:
         logger.debug(f"Sinh rep1/METS.xml cho ho so: {hoso.arc_file_code}")
         
         try:
-            template = self.env.get_template('rep_mets.xml')
-            
-            context = {
-                'hoso': hoso,
-                'package_id': package_id,
-                'created_time': datetime.now(),
-                'config': self.config
-            }
-            
-            return template.render(context)
+            return self.templates.render(XML_TEMPLATE_NAMES['rep_mets'],
+                                         self._context('rep_mets', hoso, package_id))
             
         except Exception as e:
             logger.error(f"Loi sinh rep METS cho {hoso.arc_file_code}: {e}")
             raise
 
-    def generate_all_xml(self, hoso: HoSo, package_id: str) -> Dict[str, Any]:
+    def stream_xml(self, kind: str, hoso: Union[HoSo, HoSoRecord], package_id: str,
+                   tai_lieu: Optional[Union[TaiLieu, TaiLieuRecord]] = None,
+                   placeholders: Optional[Dict[str, str]] = None) -> Iterator[bytes]:
+        """
+        Render 1 XML dang stream: tung block bytes, khong dung ca file trong bo nho
+        
+        Args:
+            kind: Loai XML (key cua XML_TEMPLATE_NAMES: mets, rep_mets, ead, premis, premis_rep, ead_doc)
+            tai_lieu: Tai lieu (chi voi kind='ead_doc'; TaiLieu khi hoso la HoSo)
+            placeholders: Gia tri thay cho PLACEHOLDER_* (METS/rep METS), None = giu nguyen
+            
+        Returns:
+            Iterator cac block bytes UTF-8
+        """
+        logger.debug(f"Render stream {kind} cho ho so: {hoso.arc_file_code}")
+        if tai_lieu is not None and not isinstance(tai_lieu, TaiLieuRecord):
+            tai_lieu = compile_tai_lieu(tai_lieu, hoso.thoi_han_bao_quan_code)
+        chunks = self.templates.generate(XML_TEMPLATE_NAMES[kind],
+                                         self._context(kind, hoso, package_id, tai_lieu))
+        if placeholders is not None:
+            chunks = iter_resolved_placeholders(chunks, placeholders)
+        return (block.encode('utf-8') for block in chunks)
+
+    def generate_all_xml(self, hoso: Union[HoSo, HoSoRecord], package_id: str) -> Dict[str, Any]:
         """
         Sinh tat ca cac XML can thiet cho 1 ho so theo thiet ke moi
         
@@ -256,22 +245,18 @@ class XMLTemplateGenerator:
         logger.info(f"Sinh tat ca XML cho ho so: {hoso.arc_file_code}")
         
         try:
+            # Gia tri template tinh 1 lan cho ca ho so, dung chung cho moi XML
+            hoso = self.compile(hoso)
             results = {
                 'mets': self.generate_mets(hoso, package_id),
                 'rep_mets': self.generate_rep_mets(hoso, package_id),
                 'ead': self.generate_ead(hoso, package_id), 
                 'premis': self.generate_premis(hoso, package_id),
                 'premis_rep': self.generate_premis_rep(hoso, package_id),  # New: PREMIS for representation level
-                'ead_docs': {}
+                # Sinh EAD rieng cho tung tai lieu (song song)
+                'ead_docs': self.generate_ead_documents(hoso, package_id)
             }
             
-            # Sinh EAD rieng cho tung tai lieu
-            for tai_lieu in hoso.tai_lieu:
-                if hasattr(tai_lieu, 'ead_doc_filename') and tai_lieu.ead_doc_filename:
-                    filename = tai_lieu.ead_doc_filename
-                    results['ead_docs'][filename] = self.generate_ead_document(tai_lieu, hoso, package_id)
-                    logger.debug(f"Sinh {filename} cho tai lieu: {tai_lieu.effective_title}")
-            
             logger.info(f"Sinh thanh cong {len(results)} XML types cho {hoso.arc_file_code}")
             logger.info(f"Sinh {len(results['ead_docs'])} EAD documents rieng")
             return results
@@ -279,46 +264,21 @@ class XMLTemplateGenerator:
         except Exception as e:
             logger.error(f"Loi khi sinh XML cho {hoso.arc_file_code}: {e}")
             raise
-    
-    def update_mets_with_metadata_files(self, mets_content: str, ead_file_path: str, premis_file_path: str) -> str:
-        """
-        Cap nhat METS voi thong tin thuc te cua cac file metadata
-        
-        Args:
-            mets_content: Noi dung METS hien tai
-            ead_file_path: Duong dan toi file EAD.xml
-            premis_file_path: Duong dan toi file PREMIS.xml
-            
-        Returns:
-            Noi dung METS da cap nhat
-        """
-        logger.debug("Cap nhat METS voi thong tin metadata files")
-        
-        try:
-            # Tinh toan thong tin thuc te cho EAD
-            ead_size = self._get_file_size(ead_file_path) if os.path.exists(ead_file_path) else 0
-            ead_checksum = self._calculate_sha256(ead_file_path) if os.path.exists(ead_file_path) else ""
-            
-            # Tinh toan thong tin thuc te cho PREMIS  
-            premis_size = self._get_file_size(premis_file_path) if os.path.exists(premis_file_path) else 0
-            premis_checksum = self._calculate_sha256(premis_file_path) if os.path.exists(premis_file_path) else ""
-            
-            # Cap nhat noi dung METS bang cach thay the placeholders
-            updated_content = mets_content
-            
-            # Thay the placeholders EAD
-            updated_content = updated_content.replace("PLACEHOLDER_EAD_SIZE", str(ead_size))
-            updated_content = updated_content.replace("PLACEHOLDER_EAD_CHECKSUM", ead_checksum)
-            
-            # Thay the placeholders PREMIS
-            updated_content = updated_content.replace("PLACEHOLDER_PREMIS_SIZE", str(premis_size))
-            updated_content = updated_content.replace("PLACEHOLDER_PREMIS_CHECKSUM", premis_checksum)
-            
-            logger.debug(f"Cap nhat METS: EAD size={ead_size}, checksum={ead_checksum[:8] if ead_checksum else 'empty'}...")
-            logger.debug(f"Cap nhat METS: PREMIS size={premis_size}, checksum={premis_checksum[:8] if premis_checksum else 'empty'}...")
-            
-            return updated_content
-            
-        except Exception as e:
-            logger.error(f"Loi cap nhat METS voi metadata files: {e}")
-            return mets_content  # Tra ve noi dung goc neu co loi
+
+
+def create_xml_generator(config: Config):
+    """
+    Tao bo sinh metadata XML theo Config.xml_engine
+
+    Returns:
+        XMLTemplateGenerator (jinja) hoac XMLTreeBuilder (lxml), cung giao dien generate_*
+
+    Raises:
+        ValueError: Engine khong hop le
+    """
+    if config.xml_engine == XML_ENGINE_JINJA:
+        return XMLTemplateGenerator(config)
+    if config.xml_engine == XML_ENGINE_LXML:
+        from .xml_builder import XMLTreeBuilder
+        return XMLTreeBuilder(config)
+    raise ValueError(f"Engine XML khong hop le: {config.xml_engine} (chon: {', '.join(XML_ENGINES)})")
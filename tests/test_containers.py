@@ -0,0 +1,65 @@
+"""
+Kiem tra TarStreamWriter.open_member: qua tar_compat (ghi stream) va fallback TarFile.addfile
+"""
+
+import io
+import tarfile
+
+import pytest
+
+from aip_builder import containers
+from aip_builder.containers import CONTAINER_TAR, TarStreamWriter
+from aip_builder.utils import tar_compat
+
+MODES = [
+    pytest.param(True, id='stream', marks=pytest.mark.skipif(
+        not tar_compat.STREAM_MEMBER_SUPPORTED, reason='Ban Python chua kiem tra tar_compat')),
+    pytest.param(False, id='addfile'),
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF-1.4\n' + bytes(range(256)) * 41)  # Khong chia het BLOCKSIZE
+    return path
+
+
+@pytest.mark.parametrize('supported', MODES)
+def test_open_member_roundtrip(tmp_path, source, monkeypatch, supported):
+    monkeypatch.setattr(containers, 'STREAM_MEMBER_SUPPORTED', supported)
+    archive = tmp_path / 'goi.tar'
+    writer = TarStreamWriter(archive, CONTAINER_TAR)
+    data = source.read_bytes()
+    with writer.open_member(source, 'goi/data/a.pdf') as dst:
+        for i in range(0, len(data), 1000):
+            dst.write(data[i:i + 1000])
+    writer.add_bytes('goi/METS.xml', b'<mets/>')
+    writer.close()
+
+    with tarfile.open(archive) as tar:
+        assert tar.getnames() == ['goi/data/a.pdf', 'goi/METS.xml']
+        assert tar.extractfile('goi/data/a.pdf').read() == data
+        assert tar.extractfile('goi/METS.xml').read() == b'<mets/>'
+
+
+@pytest.mark.parametrize('supported', MODES)
+def test_open_member_size_mismatch(tmp_path, source, monkeypatch, supported):
+    monkeypatch.setattr(containers, 'STREAM_MEMBER_SUPPORTED', supported)
+    writer = TarStreamWriter(tmp_path / 'goi.tar', CONTAINER_TAR)
+    try:
+        with pytest.raises(OSError):
+            with writer.open_member(source, 'goi/data/a.pdf') as dst:
+                dst.write(source.read_bytes()[:-1])
+        with pytest.raises(OSError):
+            with writer.open_member(source, 'goi/data/a.pdf') as dst:
+                dst.write(source.read_bytes() + b'x')
+    finally:
+        writer.close()
+
+
+def test_tar_compat_requires_support(monkeypatch):
+    monkeypatch.setattr(tar_compat, 'STREAM_MEMBER_SUPPORTED', False)
+    with tarfile.open(fileobj=io.BytesIO(), mode='w|') as tar:
+        with pytest.raises(RuntimeError):
+            tar_compat.begin_member(tar, tarfile.TarInfo('x'))
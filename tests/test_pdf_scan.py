@@ -0,0 +1,39 @@
+"""
+Kiem tra iter_scan_files: file qua han bao SCAN_ERROR, khong cho mai
+"""
+
+import threading
+import time
+
+from aip_builder import pdf_scan
+from aip_builder.pdf_scan import SCAN_ERROR, SCAN_OK, ScanResult, iter_scan_files
+
+
+def test_slow_file_reported_as_timeout(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def fake_scan(path):
+        if path.name == 'slow.pdf':
+            release.wait(30)  # Gia lap file treo (vd: o mang khong tra loi)
+        return ScanResult(path=path)
+
+    monkeypatch.setattr(pdf_scan, 'scan_pdf', fake_scan)
+    paths = [tmp_path / name for name in ('a.pdf', 'slow.pdf', 'b.pdf', 'c.pdf')]
+    start = time.monotonic()
+    try:
+        results = {r.path.name: r for r in iter_scan_files(paths, workers=2, timeout=0.3)}
+    finally:
+        release.set()
+
+    assert time.monotonic() - start < 5
+    assert set(results) == {'a.pdf', 'slow.pdf', 'b.pdf', 'c.pdf'}
+    assert results['slow.pdf'].status == SCAN_ERROR
+    assert 'timeout' in results['slow.pdf'].issues[0]
+    assert all(results[name].status == SCAN_OK for name in ('a.pdf', 'b.pdf', 'c.pdf'))
+
+
+def test_no_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_scan, 'scan_pdf', lambda path: ScanResult(path=path))
+    paths = [tmp_path / f'{i}.pdf' for i in range(20)]
+    results = list(iter_scan_files(paths, workers=3, timeout=0))
+    assert sorted(r.path for r in results) == sorted(paths)
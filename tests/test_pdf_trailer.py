@@ -0,0 +1,120 @@
+"""
+Kiem tra pdf_trailer voi PDF hong: moi truong hop phai raise PDFTrailerError
+(de goi ham fallback) va ket thuc trong thoi gian gioi han, khong lap vo han
+"""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from aip_builder.pdf_trailer import PDFTrailerError, read_trailer_info
+
+# Thoi gian toi da cho 1 lan doc (giay); PDF nho chi mat vai ms
+READ_TIMEOUT = 5.0
+
+
+def build_pdf(trailer_extra: bytes = b'', page_count: int = 2) -> bytes:
+    """PDF toi thieu voi bang xref co dien (offset tinh chinh xac)"""
+    kids = b' '.join(b'%d 0 R' % (3 + i) for i in range(page_count))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % page_count,
+    ]
+    objects += [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>'] * page_count
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % num + body + b'\nendobj\n'
+    xref_offset = len(out)
+    out += b'xref\n0 %d\n' % (len(objects) + 1)
+    out += b'0000000000 65535 f \n'
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R' % (len(objects) + 1) + trailer_extra + b' >>\n'
+    out += b'startxref\n%d\n%%%%EOF\n' % xref_offset
+    return bytes(out)
+
+
+def read_bounded(path: Path):
+    """read_trailer_info trong thread rieng; qua READ_TIMEOUT thi fail (thay vi treo ca test)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = read_trailer_info(path)
+        except BaseException as e:  # Tra ve cho thread test kiem tra
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(READ_TIMEOUT)
+    assert not thread.is_alive(), f"read_trailer_info khong ket thuc sau {READ_TIMEOUT}s"
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def write(tmp_path: Path, data: bytes) -> Path:
+    path = tmp_path / 'test.pdf'
+    path.write_bytes(data)
+    return path
+
+
+def test_valid_pdf(tmp_path):
+    info = read_bounded(write(tmp_path, build_pdf(page_count=3)))
+    assert info.pages == 3
+    assert info.version == '1.4'
+    assert not info.is_encrypted
+
+
+def test_stray_paren_in_array(tmp_path):
+    path = write(tmp_path, build_pdf(trailer_extra=b' /ID [<ab12> ) <cd34>]'))
+    with pytest.raises(PDFTrailerError):
+        read_bounded(path)
+
+
+def test_stray_paren_as_dict_value(tmp_path):
+    path = write(tmp_path, build_pdf(trailer_extra=b' /Info )'))
+    with pytest.raises(PDFTrailerError):
+        read_bounded(path)
+
+
+@pytest.mark.parametrize('keep', [0.1, 0.5, 0.9, 0.97])
+def test_truncated(tmp_path, keep):
+    data = build_pdf()
+    path = write(tmp_path, data[:int(len(data) * keep)])
+    with pytest.raises(PDFTrailerError):
+        read_bounded(path)
+
+
+@pytest.mark.parametrize('marker, replacement', [
+    (b'xref\n0 ', b'xrex\n0 '),  # Tu khoa xref hong
+    (b'0000000000 65535 f', b'00000000)0 65535 f'),  # Dong xref hong
+    (b'/Root 1 0 R', b'/Root 1 0 )'),  # Tham chieu /Root hong
+    (b'/Root 1 0 R', b'/Root 9 0 R'),  # /Root tro toi doi tuong khong co
+    (b'startxref\n', b'startxref\n9'),  # Offset xref sai
+    (b'trailer\n<<', b'trailer\n[)'),  # Trailer khong phai dictionary
+])
+def test_flipped_xref_trailer_bytes(tmp_path, marker, replacement):
+    data = build_pdf()
+    assert marker in data
+    path = write(tmp_path, data.replace(marker, replacement, 1))
+    with pytest.raises(PDFTrailerError):
+        read_bounded(path)
+
+
+def test_flipped_bytes_in_tail_terminate(tmp_path):
+    """Thay tung byte vung xref/trailer bang dau ngoac: doc duoc hoac PDFTrailerError, khong treo"""
+    data = build_pdf()
+    tail_start = data.index(b'xref\n')
+    for pos in range(tail_start, len(data)):
+        for value in b')]}>':
+            mutated = bytearray(data)
+            mutated[pos] = value
+            try:
+                read_bounded(write(tmp_path, bytes(mutated)))
+            except PDFTrailerError:
+                pass
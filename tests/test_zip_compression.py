@@ -0,0 +1,39 @@
+"""
+Kiem tra CompressionPolicy: store_extensions luon STORED, ke ca khi bat adaptive
+"""
+
+import os
+
+import pytest
+
+from aip_builder.utils.zip_compression import METHOD_LZMA, METHOD_STORE, CompressionPolicy
+
+# Du lieu nen rat tot: neu adaptive duoc ap dung thi se chon nen
+COMPRESSIBLE = b'%PDF-1.4\n' + b'0' * 64 * 1024
+
+
+@pytest.mark.parametrize('method', ['deflate', METHOD_LZMA])
+def test_store_extensions_win_over_adaptive(method):
+    policy = CompressionPolicy(method=method, adaptive=True)
+    assert not policy.needs_sample('rep1/data/doc.pdf')
+    assert policy.choose('rep1/data/doc.pdf', COMPRESSIBLE).method == METHOD_STORE
+    assert policy.choose('rep1/data/scan.JPG', COMPRESSIBLE).method == METHOD_STORE
+
+
+def test_text_always_compressed():
+    policy = CompressionPolicy(adaptive=True)
+    assert not policy.needs_sample('metadata/METS.xml')
+    assert policy.choose('metadata/METS.xml', os.urandom(4096)).method == 'deflate'
+
+
+def test_adaptive_samples_undecided_types():
+    policy = CompressionPolicy(adaptive=True)
+    assert policy.needs_sample('rep1/data/file.bin')
+    assert policy.choose('rep1/data/file.bin', os.urandom(64 * 1024)).method == METHOD_STORE
+    assert policy.choose('rep1/data/file.bin', COMPRESSIBLE).method == 'deflate'
+
+
+def test_no_adaptive_compresses_undecided_types():
+    policy = CompressionPolicy(adaptive=False)
+    assert not policy.needs_sample('rep1/data/file.bin')
+    assert policy.choose('rep1/data/file.bin').method == 'deflate'